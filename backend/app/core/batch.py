@@ -0,0 +1,313 @@
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from urllib.parse import urlparse
+
+from app.core.crawler import canonical_doc_url, IK_BASE
+from app.core.catalogue import get_case_catalogue
+from app.core.ledger import get_ingestion_ledger, KIND_URL
+
+logger = logging.getLogger(__name__)
+
+# ─── Bulk URL ingestion ──────────────────────────────────────────────────────
+#
+# /api/learn/batch takes a whole reading list (URLs or bare IndianKanoon
+# docids), deduplicates it against the ingestion ledger and the case
+# catalogue in one pass, queues the rest on the shared ingestion workers and
+# tracks everything as one job whose per-item results can be streamed.
+
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "5000"))
+# Finished jobs kept for status polling / late stream readers
+MAX_FINISHED_JOBS = 50
+# Batch URLs handed to the shared ingestion pool at once, across all jobs:
+# one per ingestion worker, so a 5000-item job never floods the pool's queue
+# ahead of single /api/learn requests.
+MAX_BATCH_INFLIGHT = int(os.getenv("INGEST_WORKERS", "2"))
+# URLs per submission; each group shares one batched metadata extraction
+# (see ingest.ingest_cases_from_urls)
+BATCH_GROUP_SIZE = int(os.getenv("URL_EXTRACTION_BATCH", "8"))
+
+_DOCID_RE = re.compile(r"^\d+$")
+
+
+def normalize_batch_item(item: str) -> str | None:
+    """A bare docid or any IndianKanoon doc link → canonical doc URL; other http(s) URLs as-is; else None."""
+    item = (item or "").strip()
+    if _DOCID_RE.match(item):
+        return f"{IK_BASE}/doc/{item}/"
+    if urlparse(item).scheme not in ("http", "https") or not urlparse(item).netloc:
+        return None
+    return canonical_doc_url(item) or item
+
+
+class BatchJob:
+    """
+    Progress of one bulk ingestion: per-item status, counts, throughput and
+    an append-only event log that stream readers follow.
+
+    Item statuses: "queued", then "done" or "failed"; items rejected before
+    scheduling are "duplicate" or "invalid".
+    """
+
+    def __init__(self, items: list[str]):
+        self.job_id = str(uuid.uuid4())
+        self.created_at = time.time()
+        self.finished_at = None
+        self.items: dict[str, str] = {}
+        self.events: list[dict] = []
+        self._pending = 0
+        self._sealed = False  # set once every item has been scheduled
+        self._lock = threading.Lock()
+        self._listeners = []  # wake-up callbacks of stream readers
+        self._requested = len(items)
+
+    def _notify(self):
+        """Caller holds the lock."""
+        for listener in self._listeners:
+            listener()
+
+    def _emit(self, item: str, status: str, **extra):
+        """Caller holds the lock."""
+        self.items[item] = status
+        self.events.append({"item": item, "status": status, **extra})
+        self._notify()
+
+    def reject(self, item: str, status: str):
+        with self._lock:
+            self._emit(item, status)
+
+    def queue(self, item: str):
+        with self._lock:
+            self.items[item] = "queued"
+            self._pending += 1
+
+    def settle(self, item: str, ok: bool, error: str = None):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0 and self._sealed:
+                self.finished_at = time.time()
+            self._emit(item, "done" if ok else "failed", **({"error": error} if error else {}))
+
+    def seal(self):
+        """No more items will be queued; the job finishes when the queued ones settle."""
+        with self._lock:
+            self._sealed = True
+            if self._pending == 0:
+                self.finished_at = time.time()
+                self._notify()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def summary(self, include_items: bool = False) -> dict:
+        with self._lock:
+            counts = {"queued": 0, "done": 0, "failed": 0, "duplicate": 0, "invalid": 0}
+            for status in self.items.values():
+                counts[status] += 1
+            completed = counts["done"] + counts["failed"]
+            elapsed = (self.finished_at or time.time()) - self.created_at
+            rate = completed / elapsed if elapsed > 0 else 0.0
+            result = {
+                "job_id": self.job_id,
+                "status": "done" if self.finished else "running",
+                "requested": self._requested,
+                "total": len(self.items),
+                **counts,
+                "elapsed_s": round(elapsed, 1),
+                "throughput_per_min": round(rate * 60, 2),
+                "eta_s": round(counts["queued"] / rate, 1) if rate and counts["queued"] else None,
+            }
+            if include_items:
+                result["items"] = dict(self.items)
+        return result
+
+    async def follow(self, heartbeat_s: float = 15.0):
+        """
+        Yield events as items settle, then a final {"summary": ...} event.
+        Yields None on a quiet heartbeat interval (for keep-alives).
+
+        Runs on the event loop: ingestion threads wake it through an
+        asyncio.Queue fed with loop.call_soon_threadsafe, so a slow job ties
+        up no threadpool thread per open stream.
+        """
+        loop = asyncio.get_running_loop()
+        wakeups: asyncio.Queue = asyncio.Queue()
+
+        def _wake():
+            try:
+                loop.call_soon_threadsafe(wakeups.put_nowait, None)
+            except RuntimeError:  # loop already closed; the reader is gone
+                pass
+
+        with self._lock:
+            self._listeners.append(_wake)
+        try:
+            sent = 0
+            while True:
+                with self._lock:
+                    new, finished = self.events[sent:], self.finished
+                sent += len(new)
+                for event in new:
+                    yield event
+                if finished:
+                    break
+                if not new:
+                    try:
+                        await asyncio.wait_for(wakeups.get(), timeout=heartbeat_s)
+                    except asyncio.TimeoutError:
+                        yield None
+            yield {"summary": self.summary()}
+        finally:
+            with self._lock:
+                self._listeners.remove(_wake)
+
+
+def format_event(event: dict | None, fmt: str) -> str:
+    """One stream frame: a JSON line (NDJSON) or an SSE message; None → keep-alive."""
+    if event is None:
+        return "\n" if fmt == "ndjson" else ": keep-alive\n\n"
+    data = json.dumps(event)
+    return f"{data}\n" if fmt == "ndjson" else f"data: {data}\n\n"
+
+
+# ── Job registry ──
+
+_jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def get_batch_job(job_id: str) -> BatchJob | None:
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def _register(job: BatchJob):
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+        finished = [jid for jid, j in _jobs.items() if j.finished]
+        for jid in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[jid]
+
+
+# ── Throttled submission ──
+#
+# Queued batch URLs wait here and are handed to the ingestion pool in groups
+# of up to BATCH_GROUP_SIZE (one job's URLs per group), at most
+# MAX_BATCH_INFLIGHT groups at a time; each completion submits the next. URLs
+# waiting or ingesting are "in flight": a second batch naming them while they
+# are rejects them as duplicates instead of ingesting them twice.
+
+_waiting: "deque[tuple[BatchJob, str, object]]" = deque()
+_inflight: set[str] = set()
+_running = 0
+_draining = False  # one thread at a time moves _waiting into the pool
+_dispatch_lock = threading.Lock()
+
+
+def _claim_urls(urls: list[str]) -> set[str]:
+    """Mark ``urls`` in flight; returns those already in flight (not claimed)."""
+    with _dispatch_lock:
+        busy = {url for url in urls if url in _inflight}
+        _inflight.update(url for url in urls if url not in busy)
+    return busy
+
+
+def _dispatch():
+    """Submit waiting URLs while there is a free slot."""
+    global _running, _draining
+    with _dispatch_lock:
+        if _draining:
+            return  # the draining thread will see the freed slot
+        _draining = True
+    while True:
+        with _dispatch_lock:
+            if not _waiting or _running >= MAX_BATCH_INFLIGHT:
+                _draining = False
+                return
+            job, url, submit = _waiting.popleft()
+            group = [url]
+            while _waiting and len(group) < BATCH_GROUP_SIZE and _waiting[0][0] is job:
+                group.append(_waiting.popleft()[1])
+            _running += 1
+
+        def _done(future, job=job, group=group):
+            global _running
+            try:
+                results, error = future.result(), None
+            except Exception as e:
+                results, error = {}, str(e)
+            with _dispatch_lock:
+                _running -= 1
+                _inflight.difference_update(group)
+            for url in group:
+                job.settle(url, bool(results.get(url)), error=error)
+            _dispatch()
+
+        try:
+            # force=True: dedup already done in start_batch, in one pass
+            future = submit(group, True)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        # A future that is already done runs _done right here; its _dispatch()
+        # returns at once because this thread holds _draining.
+        future.add_done_callback(_done)
+
+
+def start_batch(items: list[str], force: bool = False, submit=None) -> BatchJob:
+    """
+    Normalise, deduplicate and queue ``items``; returns the job immediately.
+
+    Dedup is one pass over the ledger and the case catalogue (both local
+    SQLite) plus the URLs other batches still have in flight, so the per-URL
+    Pinecone lookup in ingest_case_from_url is skipped for everything that
+    gets queued. Queued URLs are submitted in groups of BATCH_GROUP_SIZE,
+    MAX_BATCH_INFLIGHT groups at a time. ``submit(urls, force)`` must return
+    a Future resolving to ingest_cases_from_urls()'s {url: bool} (defaults to
+    the shared ingestion workers).
+    """
+    if submit is None:
+        from app.ingest import submit_url_group_ingestion
+        submit = lambda urls, force: submit_url_group_ingestion(urls, force=force)  # noqa: E731
+
+    job = BatchJob(items)
+    urls = list(dict.fromkeys(filter(None, map(normalize_batch_item, items))))
+    for raw in items:
+        if normalize_batch_item(raw) is None:
+            job.reject(raw, "invalid")
+
+    known = set()
+    if not force:
+        ledger = get_ingestion_ledger()
+        catalogue = get_case_catalogue()
+        if ledger is not None:
+            # Same liveness rule as the single-URL path: stale entries are not duplicates
+            from app.ingest import live_ledger_keys
+            known |= live_ledger_keys(ledger, KIND_URL, urls, catalogue)
+        if catalogue is not None:
+            known |= catalogue.known_urls(urls)
+    known |= _claim_urls([url for url in urls if url not in known])
+
+    _register(job)
+    queued = []
+    for url in urls:
+        if url in known:
+            job.reject(url, "duplicate")
+            continue
+        job.queue(url)
+        queued.append(url)
+    job.seal()
+    with _dispatch_lock:
+        _waiting.extend((job, url, submit) for url in queued)
+    _dispatch()
+    logger.info(f"Batch {job.job_id}: {len(items)} items, {len(queued)} queued, "
+                f"{len(urls) - len(queued)} already ingested or in flight")
+    return job
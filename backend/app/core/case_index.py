@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+CASE_INDEX_ENABLED = os.getenv("CASE_INDEX_ENABLED", "1") != "0"
+
+# Minimum similarity for a name to resolve to an indexed case. Conflict
+# resolution is destructive (it marks records overruled), so it uses the
+# strict default; display-only linking may pass a lower threshold.
+CASE_MATCH_THRESHOLD = float(os.getenv("CASE_MATCH_THRESHOLD", "0.8"))
+
+# ─── Name normalisation ──────────────────────────────────────────────────────
+
+# Legal stopwords excluded from name matching (appear in almost every case name)
+_LEGAL_STOPWORDS = {
+    "the", "and", "vs", "vs.", "v.", "v", "state", "union",
+    "india", "of", "in", "re", "ors", "anr", "another"
+}
+# Party-name noise: corporate suffixes, honorifics and "M/S." fragments
+_PARTY_NOISE = {
+    "ms", "m", "s", "ltd", "limited", "pvt", "private", "p", "co", "corp",
+    "company", "inc", "llp", "sri", "shri", "smt", "dr", "mr", "case", "others",
+}
+
+_TRAILING_DATE_RE = re.compile(r"\s+on\s+\d{1,2}\s+[A-Za-z]+,?\s+(\d{4})\s*$")
+_PAREN_YEAR_RE = re.compile(r"\(\s*((?:18|19|20)\d{2})\s*\)")
+_YEAR_RE = re.compile(r"\(?\b(?:18|19|20)\d{2}\b\)?")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def name_tokens(name: str) -> list[str]:
+    """Significant, order-preserving tokens of a case name."""
+    name = _TRAILING_DATE_RE.sub("", name.strip()).lower()
+    name = _YEAR_RE.sub(" ", name)
+    return [
+        t for t in _WORD_RE.findall(name)
+        if t not in _LEGAL_STOPWORDS and t not in _PARTY_NOISE
+    ]
+
+
+def name_year(name: str) -> str:
+    """Year written into a case name ("... on 13 August, 1997", "(1997)"), or ""."""
+    match = _TRAILING_DATE_RE.search(name or "") or _PAREN_YEAR_RE.search(name or "")
+    return match.group(1) if match else ""
+
+
+def _parse_date(value) -> date | None:
+    for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(str(value or "")[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _entry_key(name: str, record_ids, judgment_date: str, url: str) -> str:
+    """
+    Identity of one judgment: its URL, else its first record id, else name
+    and date. Never the name alone — normalised names collide across
+    judgments (same parties, different years).
+    """
+    if url:
+        return url
+    if record_ids:
+        return f"id:{record_ids[0]}"
+    return f"name:{' '.join(name_tokens(name))}|{judgment_date or 'UNKNOWN'}"
+
+
+def _trigrams(tokens: list[str]) -> set[str]:
+    text = f"  {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Similarity of two case names in [0, 1] (see CaseNameIndex.lookup)."""
+    ta, tb = name_tokens(a), name_tokens(b)
+    return _score(set(ta), _trigrams(ta), set(tb), _trigrams(tb))
+
+
+def _score(tokens_a: set, grams_a: set, tokens_b: set, grams_b: set) -> float:
+    if not tokens_a or not tokens_b:
+        return 0.0
+    # Token-set: mean of containment in both directions. A short citation
+    # ("Parle Products v. J.P. & Co.") still scores high against the full
+    # IndianKanoon title, but a name contained in a much longer, different
+    # one ("Vishaka v. Rajasthan Tourism Board") does not reach 0.8.
+    common = len(tokens_a & tokens_b)
+    token_set = (common / min(len(tokens_a), len(tokens_b)) + common / max(len(tokens_a), len(tokens_b))) / 2
+    # Trigram Dice coefficient catches spelling variants ("Vishakha"/"Vishaka")
+    dice = 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+    return max(token_set, dice)
+
+
+# "X v. Y", "X vs. Y", "X versus Y" spans in free text (e.g. an LLM answer)
+_CASE_MENTION_RE = re.compile(
+    r"((?:[A-Z][\w.&/'-]*,?\s+){0,6}?[A-Z][\w.&/'-]*\s+(?:v\.?|vs\.?|versus)\s+"
+    r"(?:[A-Z][\w.&/'-]*|of|the|and|&)(?:,?\s+(?:[A-Z][\w.&/'-]*|of|the|and|&|\(\d{4}\)))*)"
+)
+
+
+def find_case_mentions(text: str) -> list[str]:
+    """Case-name-like spans in ``text``, in order of appearance."""
+    return list(dict.fromkeys(m.strip(" ,") for m in _CASE_MENTION_RE.findall(text)))
+
+
+# ─── Index ───────────────────────────────────────────────────────────────────
+
+class CaseNameIndex:
+    """
+    Local case-name resolver: maps loosely written case names to ingested
+    cases (their Pinecone record ids, date, URL and status) without any
+    network call.
+
+    One entry per judgment, keyed by its URL (or record id), so judgments
+    whose names normalise alike keep their own record ids and dates. Names
+    and aliases (ai_case_name, clean title) are normalised to significant
+    tokens; an inverted trigram index yields candidates, which are ranked
+    by max(token-set overlap, trigram Dice). Entries are stored in SQLite
+    and loaded into memory on start.
+
+    Pass ``persist=False`` for an in-memory index.
+    """
+
+    def __init__(self, path=None, persist: bool = True):
+        self.entries: list[dict] = []
+        self._keys: dict[str, int] = {}
+        self._tokens: list[tuple[set, set]] = []   # per alias: (tokens, trigrams)
+        self._alias_owner: list[int] = []
+        self._postings: dict[str, set[int]] = defaultdict(set)
+        self._indexed: set[tuple[int, str]] = set()
+        self._lock = threading.Lock()
+        self._db = None
+        if persist:
+            self._db = connect_sqlite(path or get_data_dir() / "case_index.sqlite")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS cases (
+                    key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    aliases TEXT NOT NULL,
+                    record_ids TEXT NOT NULL,
+                    judgment_date TEXT,
+                    url TEXT,
+                    status TEXT NOT NULL
+                )"""
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT key, name, aliases, record_ids, judgment_date, url, status FROM cases"
+            ).fetchall()
+            for old_key, name, aliases, record_ids, judgment_date, url, status in rows:
+                entry = {
+                    "name": name, "aliases": json.loads(aliases), "record_ids": json.loads(record_ids),
+                    "judgment_date": judgment_date, "url": url, "status": status,
+                }
+                key = _entry_key(name, entry["record_ids"], judgment_date, url)
+                idx = self._insert(key, entry)
+                if key != old_key:
+                    # Rows written before entries were keyed by judgment identity
+                    self._db.execute("DELETE FROM cases WHERE key = ?", (old_key,))
+                    self._write(key, self.entries[idx])
+            self._db.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _insert(self, key: str, entry: dict) -> int:
+        """Add or replace an entry in memory and index its names. Caller holds the lock (or is __init__)."""
+        if key in self._keys:
+            idx = self._keys[key]
+            old = self.entries[idx]
+            entry["aliases"] = list(dict.fromkeys(old["aliases"] + entry["aliases"]))
+            entry["record_ids"] = list(dict.fromkeys(old["record_ids"] + entry["record_ids"]))
+            self.entries[idx] = entry
+        else:
+            idx = len(self.entries)
+            self._keys[key] = idx
+            self.entries.append(entry)
+        for alias in [entry["name"], *entry["aliases"]]:
+            tokens = name_tokens(alias)
+            if not tokens or (idx, " ".join(tokens)) in self._indexed:
+                continue
+            self._indexed.add((idx, " ".join(tokens)))
+            grams = _trigrams(tokens)
+            alias_id = len(self._tokens)
+            self._tokens.append((set(tokens), grams))
+            self._alias_owner.append(idx)
+            for gram in grams:
+                self._postings[gram].add(alias_id)
+        return idx
+
+    def add(self, name: str, aliases=(), record_ids=(), judgment_date: str = None,
+            url: str = None, status: str = "active") -> bool:
+        """
+        Index one judgment, merging with an existing entry for the same URL
+        (or record id). False if the name has no content.
+        """
+        if not name_tokens(name):
+            return False
+        record_ids = list(record_ids)
+        key = _entry_key(name, record_ids, judgment_date, url)
+        entry = {
+            "name": name.strip(), "aliases": [a.strip() for a in aliases if a and a.strip()],
+            "record_ids": record_ids, "judgment_date": judgment_date or "UNKNOWN",
+            "url": url or "", "status": status,
+        }
+        with self._lock:
+            idx = self._insert(key, entry)
+            self._write(key, self.entries[idx])
+        return True
+
+    def set_status(self, name: str, status: str, threshold: float = CASE_MATCH_THRESHOLD) -> bool:
+        """Set the status of the one judgment ``name`` resolves to. False if none or ambiguous."""
+        matches = self.candidates(name, threshold=threshold, include_overruled=True)
+        if len(matches) != 1:
+            return False
+        return self._set_entry_status(matches[0], status)
+
+    def set_status_for_records(self, record_ids, status: str) -> int:
+        """Set the status of every entry holding one of ``record_ids``. Returns the number changed."""
+        record_ids = set(record_ids)
+        changed = 0
+        for entry in list(self.entries):
+            if entry["status"] != status and record_ids.intersection(entry["record_ids"]):
+                changed += self._set_entry_status(entry, status)
+        return changed
+
+    def _set_entry_status(self, entry: dict, status: str) -> bool:
+        with self._lock:
+            entry["status"] = status
+            self._write(_entry_key(entry["name"], entry["record_ids"], entry["judgment_date"], entry["url"]), entry)
+        return True
+
+    def _write(self, key: str, entry: dict):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, entry["name"], json.dumps(entry["aliases"]), json.dumps(entry["record_ids"]),
+             entry["judgment_date"], entry["url"], entry["status"]),
+        )
+        self._db.commit()
+
+    def lookup_all(self, name: str, threshold: float = CASE_MATCH_THRESHOLD, limit: int = 5,
+                   include_overruled: bool = False) -> list[tuple[float, dict]]:
+        """Ranked (score, entry) pairs for ``name`` at or above ``threshold``."""
+        tokens = name_tokens(name)
+        if not tokens:
+            return []
+        q_tokens, q_grams = set(tokens), _trigrams(tokens)
+
+        candidates = set()
+        for gram in q_grams:
+            candidates |= self._postings.get(gram, set())
+
+        best: dict[int, float] = {}
+        for alias_id in candidates:
+            a_tokens, a_grams = self._tokens[alias_id]
+            score = _score(q_tokens, q_grams, a_tokens, a_grams)
+            owner = self._alias_owner[alias_id]
+            if score >= threshold and score > best.get(owner, 0):
+                best[owner] = score
+
+        ranked = sorted(
+            ((score, self.entries[idx]) for idx, score in best.items()
+             if include_overruled or self.entries[idx]["status"] == "active"),
+            key=lambda pair: pair[0], reverse=True,
+        )
+        return ranked[:limit]
+
+    def candidates(self, name: str, threshold: float = CASE_MATCH_THRESHOLD, include_overruled: bool = False,
+                   before=None) -> list[dict]:
+        """
+        Every judgment ``name`` may denote, best first. A year written in the
+        name ("(1997)") keeps only judgments of that year; ``before`` (a
+        date) drops judgments known to be dated on or after it — a judgment
+        cannot overrule a later one. More than one result means the name is
+        ambiguous.
+        """
+        entries = [entry for _, entry in self.lookup_all(name, threshold=threshold, limit=len(self.entries) or 1,
+                                                         include_overruled=include_overruled)]
+        year = name_year(name)
+        if year:
+            entries = [e for e in entries if _parse_date(e["judgment_date"]) is None
+                       or str(_parse_date(e["judgment_date"]).year) == year]
+        if before is not None:
+            entries = [e for e in entries if _parse_date(e["judgment_date"]) is None
+                       or _parse_date(e["judgment_date"]) < before]
+        return entries
+
+    def lookup(self, name: str, threshold: float = CASE_MATCH_THRESHOLD,
+               include_overruled: bool = False) -> dict | None:
+        """Best-matching entry for ``name``, or None."""
+        ranked = self.lookup_all(name, threshold=threshold, limit=1, include_overruled=include_overruled)
+        return ranked[0][1] if ranked else None
+
+
+# Global index instance
+_case_index = None
+_index_lock = threading.Lock()
+
+
+def get_case_index() -> CaseNameIndex | None:
+    """Get or load the shared case-name index. None when CASE_INDEX_ENABLED=0."""
+    global _case_index
+    if _case_index is None and CASE_INDEX_ENABLED:
+        with _index_lock:
+            if _case_index is None:
+                try:
+                    _case_index = CaseNameIndex()
+                except Exception as e:
+                    logger.warning(f"Case-name index unavailable ({e}). Continuing without it.")
+                    return None
+    return _case_index
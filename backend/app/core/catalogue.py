@@ -0,0 +1,289 @@
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+CASE_CATALOGUE_ENABLED = os.getenv("CASE_CATALOGUE_ENABLED", "1") != "0"
+
+# Keyset-pagination orderings: name → (column, direction)
+SORTS = {
+    "date_desc": ("judgment_date", "DESC"),
+    "date_asc": ("judgment_date", "ASC"),
+    "title": ("title", "ASC"),
+    "recent": ("ingested_at", "DESC"),
+}
+_FETCH_BATCH = 100  # ids per index.fetch() call during a rebuild
+
+
+def clean_title(raw_title: str) -> str:
+    """
+    Strip leading markdown heading markers and embedded newlines. Some titles
+    are stored with the raw first line of the markdown doc, e.g.
+    "Maneka Gandhi...\\n### Equivalent citations..." (the \\n may be a literal
+    two-char escape sequence OR a real newline).
+    """
+    return re.split(r'\\n|\n|###|##', (raw_title or "").lstrip('#').strip())[0].strip()[:120]
+
+
+class CaseCatalogue:
+    """
+    Local table of document-level records (one row per ingested judgment),
+    maintained on ingest and rebuildable from Pinecone's list/fetch APIs.
+
+    Serves /api/cases without any inference or vector query: filters and
+    orderings are plain indexed SQLite queries with keyset (cursor)
+    pagination, so deep pages cost the same as the first. A version counter
+    bumped on every write backs the endpoint's ETag.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_data_dir() / "catalogue.sqlite"
+        self._lock = threading.Lock()
+        self._db = connect_sqlite(self.path)
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS cases (
+                doc_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                url TEXT NOT NULL,
+                legal_domain TEXT NOT NULL,
+                judgment_date TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total_chunks INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cases_date ON cases(judgment_date, doc_id);
+            CREATE INDEX IF NOT EXISTS idx_cases_title ON cases(title, doc_id);
+            CREATE INDEX IF NOT EXISTS idx_cases_recent ON cases(ingested_at, doc_id);
+            CREATE INDEX IF NOT EXISTS idx_cases_domain ON cases(legal_domain);
+            CREATE INDEX IF NOT EXISTS idx_cases_url ON cases(url);
+            CREATE TABLE IF NOT EXISTS catalogue_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"""
+        )
+        self._db.commit()
+
+    # ── Writes ──
+
+    def _bump(self):
+        """Advance the version counter (ETag source). Caller holds the lock."""
+        self._db.execute(
+            "INSERT INTO catalogue_meta VALUES ('version', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def upsert(self, doc_id: str, metadata: dict, total_chunks: int = 1):
+        """Insert or refresh one document from its (chunk 0) Pinecone metadata."""
+        judgment_date = metadata.get("ai_validated_date") or ""
+        ingested_at = metadata.get("ingested_at")
+        try:
+            ingested_at = float(ingested_at)
+        except (TypeError, ValueError):
+            ingested_at = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, clean_title(metadata.get("title", "Unknown Case")), metadata.get("url", ""),
+                 metadata.get("ai_legal_domain", ""), judgment_date, metadata.get("status", "active"),
+                 int(metadata.get("total_chunks", total_chunks)), ingested_at),
+            )
+            self._bump()
+            self._db.commit()
+
+    def set_status_by_url(self, urls, status: str) -> int:
+        urls = [u for u in urls if u]
+        if not urls:
+            return 0
+        with self._lock:
+            changed = self._db.executemany(
+                "UPDATE cases SET status = ? WHERE url = ? AND status != ?",
+                [(status, url, status) for url in urls],
+            ).rowcount
+            if changed:
+                self._bump()
+            self._db.commit()
+        return changed
+
+    def remove(self, doc_ids) -> list[str]:
+        """Delete these documents; returns the doc_ids that were catalogued."""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        removed = []
+        with self._lock:
+            for doc_id in doc_ids:
+                if self._db.execute("DELETE FROM cases WHERE doc_id = ?", (doc_id,)).rowcount:
+                    removed.append(doc_id)
+            if removed:
+                self._bump()
+            self._db.commit()
+        return removed
+
+    def rebuild_from_pinecone(self, index, namespace: str = "", on_removed=None) -> int:
+        """
+        Re-populate the catalogue from Pinecone: page through every id with
+        index.list(), fetch metadata in batches and keep chunk_index == 0.
+        Documents no longer in the index (deleted or re-extracted under a new
+        id) are removed once the listing completes and passed to
+        ``on_removed(doc_ids)``. No embedding or query calls. Returns the
+        number of documents found.
+        """
+        found = 0
+        seen: set[str] = set()
+
+        def _fetch(ids: list[str]):
+            nonlocal found
+            fetched = index.fetch(ids=ids, namespace=namespace)
+            for vec_id, vector in (getattr(fetched, "vectors", None) or {}).items():
+                meta = dict(getattr(vector, "metadata", None) or {})
+                if int(meta.get("chunk_index", -1)) == 0:
+                    self.upsert(vec_id, meta)
+                    seen.add(vec_id)
+                    found += 1
+
+        pending: list[str] = []
+        for page in index.list(namespace=namespace):
+            pending.extend(page)
+            while len(pending) >= _FETCH_BATCH:
+                _fetch(pending[:_FETCH_BATCH])
+                del pending[:_FETCH_BATCH]
+        if pending:
+            _fetch(pending)
+        with self._lock:
+            stale = [r[0] for r in self._db.execute("SELECT doc_id FROM cases").fetchall() if r[0] not in seen]
+        removed = self.remove(stale)
+        if removed and on_removed is not None:
+            on_removed(removed)
+        logger.info(f"Case catalogue rebuilt from Pinecone: {found} documents, {len(removed)} removed.")
+        return found
+
+    # ── Reads ──
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM catalogue_meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def etag(self, **params) -> str:
+        """Weak ETag for a listing: catalogue version + the request parameters."""
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        return f'W/"{self.version}-{digest}"'
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+
+    def has_doc(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM cases WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def known_docs(self, doc_ids) -> set[str]:
+        """The subset of ``doc_ids`` that are catalogued."""
+        doc_ids = list(dict.fromkeys(d for d in doc_ids if d))
+        found = set()
+        with self._lock:
+            for start in range(0, len(doc_ids), 500):
+                batch = doc_ids[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT doc_id FROM cases WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(r[0] for r in rows)
+        return found
+
+    def known_urls(self, urls) -> set[str]:
+        """The subset of ``urls`` that belong to a catalogued document."""
+        urls = list(dict.fromkeys(u for u in urls if u))
+        found = set()
+        with self._lock:
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT DISTINCT url FROM cases WHERE url IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(r[0] for r in rows)
+        return found
+
+    @staticmethod
+    def _encode_cursor(sort_value, doc_id: str) -> str:
+        return base64.urlsafe_b64encode(json.dumps([sort_value, doc_id]).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            sort_value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return sort_value, doc_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def list(self, limit: int = 50, cursor: str = None, sort: str = "date_desc", domain: str = None,
+             date_from: str = None, date_to: str = None, status: str = None) -> dict:
+        """
+        One page of cases. ``cursor`` is the opaque ``next_cursor`` of the
+        previous page. Dates are ISO strings; documents with no parsed date
+        are excluded by date filters. Raises ValueError on a bad sort/cursor.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort '{sort}'. Use one of: {', '.join(SORTS)}")
+        column, direction = SORTS[sort]
+
+        where, args = [], []
+        if domain:
+            where.append("legal_domain = ? COLLATE NOCASE")
+            args.append(domain)
+        if status:
+            where.append("status = ?")
+            args.append(status)
+        if date_from:
+            where.append("judgment_date >= ?")
+            args.append(date_from)
+        if date_to:
+            where.append("judgment_date != '' AND judgment_date <= ?")
+            args.append(date_to)
+        filter_sql, filter_args = list(where), list(args)
+
+        if cursor:
+            sort_value, doc_id = self._decode_cursor(cursor)
+            op = "<" if direction == "DESC" else ">"
+            where.append(f"({column}, doc_id) {op} (?, ?)")
+            args.extend([sort_value, doc_id])
+
+        sql = "SELECT doc_id, title, url, legal_domain, judgment_date, status, total_chunks, ingested_at FROM cases"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {column} {direction}, doc_id {direction} LIMIT ?"
+
+        count_sql = "SELECT COUNT(*) FROM cases" + (" WHERE " + " AND ".join(filter_sql) if filter_sql else "")
+        with self._lock:
+            rows = self._db.execute(sql, (*args, limit + 1)).fetchall()
+            total = self._db.execute(count_sql, filter_args).fetchone()[0]
+
+        keys = ("id", "title", "url", "legal_domain", "judgment_date", "status", "total_chunks", "ingested_at")
+        cases = [dict(zip(keys, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = cases[-1]
+            next_cursor = self._encode_cursor(last[column], last["id"])
+        return {"cases": cases, "next_cursor": next_cursor, "total": total}
+
+
+# Global catalogue instance
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_case_catalogue() -> CaseCatalogue | None:
+    """Get or open the shared case catalogue. None when CASE_CATALOGUE_ENABLED=0."""
+    global _catalogue
+    if _catalogue is None and CASE_CATALOGUE_ENABLED:
+        with _catalogue_lock:
+            if _catalogue is None:
+                try:
+                    _catalogue = CaseCatalogue()
+                except Exception as e:
+                    logger.warning(f"Case catalogue unavailable ({e}). Continuing without it.")
+                    return None
+    return _catalogue
@@ -0,0 +1,34 @@
+# ─── Chunking ────────────────────────────────────────────────────────────────
+#
+# Shared by ingestion (chunk_text) and the query path (context packing undoes
+# the overlap), so neither has to import the other's module.
+
+CHUNK_SIZE = 1500      # characters per chunk
+CHUNK_OVERLAP = 200    # overlap between consecutive chunks
+MAX_CHUNKS = 20        # safety cap per document (20 × 1500 = 30 000 chars max)
+
+
+def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """
+    Splits text into overlapping chunks using a sliding window.
+    
+    Unlike the previous text[:9000] truncation which permanently discarded
+    80%+ of long judgments, this preserves the entire document across
+    multiple indexed chunks — each inheriting parent metadata.
+    """
+    if not text:
+        return []
+    
+    chunks = []
+    start = 0
+    while start < len(text) and len(chunks) < MAX_CHUNKS:
+        end = start + chunk_size
+        chunk = text[start:end]
+        
+        # Only add non-trivial chunks (skip trailing whitespace fragments)
+        if len(chunk.strip()) > 50:
+            chunks.append(chunk)
+        
+        start += chunk_size - overlap
+    
+    return chunks
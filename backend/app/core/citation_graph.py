@@ -0,0 +1,405 @@
+import os
+import re
+import csv
+import json
+import logging
+import sqlite3
+import threading
+from array import array
+from datetime import date
+from pathlib import Path
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+CITATION_GRAPH_ENABLED = os.getenv("CITATION_GRAPH_ENABLED", "1") != "0"
+
+# Seed data: the `cited_cases` column of the legacy bulk-ingestion CSV.
+LEGACY_CSV = Path(__file__).resolve().parents[3] / "legacy" / "cases.csv"
+
+RELATIONS = ("overrules", "upholds", "cites")
+
+# ─── Case-name keys ──────────────────────────────────────────────────────────
+
+_TRAILING_DATE_RE = re.compile(r"\s+on\s+\d{1,2}\s+[A-Za-z]+,?\s+(\d{4})\s*$")
+_PAREN_YEAR_RE = re.compile(r"\(\s*(\d{4})\s*\)")
+_VERSUS_RE = re.compile(r"\b(?:versus|v\.?|vs\.?)(?=\s)", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_CASE_RE = re.compile(r"\b(?:vs?\.?|versus)\s", re.IGNORECASE)
+
+
+def case_key(name: str) -> str:
+    """
+    Normalise a case name so the same judgment written different ways maps
+    to one key: "X vs Y on 26 July, 2018", "X v. Y (2018)" and "X Vs. Y ..."
+    all become "x vs y". The year is not part of the key — see case_year().
+    """
+    name = _TRAILING_DATE_RE.sub("", name.strip())
+    name = _PAREN_YEAR_RE.sub(" ", name).replace("...", " ")
+    name = _VERSUS_RE.sub(" vs ", name.lower())
+    return _NON_WORD_RE.sub(" ", name).strip()
+
+
+def case_year(name: str, judgment_date: str = None) -> str:
+    """Judgment year from an ISO ``judgment_date``, else from the name's date suffix or "(YYYY)"; "" if unknown."""
+    parsed = _parse_iso(str(judgment_date or "")[:10])
+    if parsed:
+        return str(parsed.year)
+    match = _TRAILING_DATE_RE.search(name or "") or _PAREN_YEAR_RE.search(name or "")
+    return match.group(1) if match else ""
+
+
+def _identity(key: str, year: str) -> str:
+    return f"{key}|{year}"
+
+
+def _parse_iso(value: str):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _split_cases(value) -> list[str]:
+    """Case names from a comma-separated metadata string or a list."""
+    if isinstance(value, str):
+        value = value.split(",")
+    return [v.strip() for v in (value or []) if v and v.strip()]
+
+
+# ─── Graph ───────────────────────────────────────────────────────────────────
+
+class CitationGraph:
+    """
+    In-process directed graph of judgments and their overrules / upholds /
+    cites relationships.
+
+    A node is one judgment: its normalised name plus its year, so
+    "State of Punjab vs X" of 1990 and of 2005 stay apart. A name seen
+    without a year (e.g. an overrules target the LLM named) gets an undated
+    node, which only stands for a dated judgment of the same name while that
+    name is unambiguous (see _resolve).
+
+    Nodes are dense integer ids; each relation keeps per-node out- and
+    in-adjacency as ``array('I')`` (4 bytes per edge end), so "what overruled
+    X" and "how often is Y upheld" are a dict lookup plus an index. Every new
+    node, alias and edge is written through to SQLite as it is added;
+    save() commits them.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else get_data_dir() / "citation_graph.sqlite"
+        self._lock = threading.RLock()
+        self._reset()
+        try:
+            self._open()
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"Citation graph at {self.path} is unreadable ({e}). Moving it aside and starting empty.")
+            self.path.replace(self.path.with_suffix(".corrupt"))
+            self._open()
+        self._load()
+        legacy_json = self.path.with_suffix(".json")
+        if not self.names and legacy_json != self.path and legacy_json.exists():
+            self._import_json(legacy_json)
+
+    def _open(self):
+        self._db = connect_sqlite(self.path)
+        self._db.executescript(
+            """CREATE TABLE IF NOT EXISTS nodes (
+                id INTEGER PRIMARY KEY,
+                identity TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                judgment_date TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS aliases (identity TEXT PRIMARY KEY, node INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS edges (
+                src INTEGER NOT NULL,
+                rel TEXT NOT NULL,
+                dst INTEGER NOT NULL,
+                PRIMARY KEY (src, rel, dst)
+            );"""
+        )
+        self._db.commit()
+
+    def _reset(self):
+        self.names: list[str] = []
+        self.dates: list[str] = []
+        self._years: list[str] = []
+        self._ids: dict[str, int] = {}             # identity (name key | year) → node
+        self._by_name: dict[str, list[int]] = {}   # name key → nodes, dated and undated
+        self._out = {rel: [] for rel in RELATIONS}
+        self._in = {rel: [] for rel in RELATIONS}
+
+    # ── Nodes ──
+
+    def _index_identity(self, identity: str, node: int):
+        self._ids.setdefault(identity, node)
+        nodes = self._by_name.setdefault(identity.rpartition("|")[0], [])
+        if node not in nodes:
+            nodes.append(node)
+
+    def _new_node(self, identity: str, name: str) -> int:
+        node = len(self.names)
+        self.names.append(name)
+        self.dates.append("UNKNOWN")
+        self._years.append(identity.rpartition("|")[2])
+        for rel in RELATIONS:
+            self._out[rel].append(array("I"))
+            self._in[rel].append(array("I"))
+        self._index_identity(identity, node)
+        return node
+
+    def _name_key(self, node: int) -> str:
+        return case_key(self.names[node])
+
+    def _resolve(self, name: str, judgment_date: str = None) -> int | None:
+        """
+        The node ``name`` denotes. With a year (from ``judgment_date`` or the
+        name) that is the dated node; without one, the only dated node of
+        that name, or its undated node. None when the name is ambiguous.
+        """
+        key = case_key(name or "")
+        if not key:
+            return None
+        year = case_year(name, judgment_date)
+        if year:
+            return self._ids.get(_identity(key, year))
+        dated = {n for n in self._by_name.get(key, ()) if self._years[n]}
+        if len(dated) == 1:
+            return dated.pop()
+        if dated:
+            return None
+        return self._ids.get(_identity(key, ""))
+
+    def node_id(self, name: str, judgment_date: str = None) -> int | None:
+        return self._resolve(name, judgment_date)
+
+    def add_case(self, name: str, judgment_date: str = None, aliases=()) -> int:
+        """
+        Return the node id for ``name`` (in ``judgment_date``'s year, ISO
+        YYYY-MM-DD), creating it if needed; aliases map to the same node.
+        """
+        key, year = case_key(name), case_year(name, judgment_date)
+        identity = _identity(key, year)
+        with self._lock:
+            node = self._ids.get(identity)
+            if node is None:
+                node = self._new_node(identity, name.strip())
+                self._db.execute("INSERT INTO nodes VALUES (?, ?, ?, ?)", (node, identity, name.strip(), "UNKNOWN"))
+            if judgment_date and judgment_date != "UNKNOWN" and self.dates[node] != judgment_date:
+                self.dates[node] = judgment_date
+                self._db.execute("UPDATE nodes SET judgment_date = ? WHERE id = ?", (judgment_date, node))
+            for alias in aliases:
+                alias_key = case_key(alias or "")
+                alias_identity = _identity(alias_key, year)
+                if alias_key and alias_identity not in self._ids:
+                    self._index_identity(alias_identity, node)
+                    self._db.execute("INSERT OR IGNORE INTO aliases VALUES (?, ?)", (alias_identity, node))
+            return node
+
+    # ── Edges ──
+
+    def _link(self, src: int, rel: str, dst: int) -> bool:
+        if src == dst or dst in self._out[rel][src]:
+            return False
+        self._out[rel][src].append(dst)
+        self._in[rel][dst].append(src)
+        self._db.execute("INSERT OR IGNORE INTO edges VALUES (?, ?, ?)", (src, rel, dst))
+        return True
+
+    def add_edges(self, source: str, rel: str, targets, judgment_date: str = None) -> int:
+        """
+        Add ``source -rel-> target`` for each target name. Returns the number
+        of new edges. An ``overrules`` edge is refused when the target is
+        known not to be older than the source — the temporal rule
+        resolve_legal_conflicts applies to records it finds.
+        """
+        with self._lock:
+            src = self.add_case(source, judgment_date)
+            src_date = _parse_iso(self.dates[src])
+            added = 0
+            for target in targets:
+                if not case_key(target):
+                    continue
+                dst = self.add_case(target)
+                if rel == "overrules" and src_date:
+                    known = self._resolve(target)
+                    dst_date = _parse_iso(self.dates[known if known is not None else dst])
+                    if dst_date and src_date <= dst_date:
+                        logger.warning(
+                            f"Citation graph: '{source}' ({src_date}) cannot overrule '{target}' ({dst_date}); "
+                            f"edge not recorded."
+                        )
+                        continue
+                added += self._link(src, rel, dst)
+            return added
+
+    def record_case(self, metadata: dict) -> int:
+        """
+        Incrementally add one ingested judgment and the cases it upholds (the
+        ai_* fields written by process_and_store_document), then persist.
+
+        Overrules edges are added by resolve_legal_conflicts only after
+        temporal verification.
+        """
+        name = metadata.get("ai_case_name") or metadata.get("title") or ""
+        if not case_key(name):
+            return 0
+        judgment_date = metadata.get("ai_validated_date")
+        with self._lock:
+            self.add_case(name, judgment_date, aliases=[metadata.get("title")])
+            added = self.add_edges(name, "upholds", _split_cases(metadata.get("ai_upholds_cases")),
+                                   judgment_date=judgment_date)
+            self.save()
+            return added
+
+    # ── Queries ──
+
+    def neighbours(self, name: str, rel: str, incoming: bool = False, judgment_date: str = None) -> list[str]:
+        node = self._resolve(name, judgment_date)
+        if node is None:
+            return []
+        adjacency = (self._in if incoming else self._out)[rel][node]
+        return [self.names[n] for n in adjacency]
+
+    def overruled_by(self, name: str, judgment_date: str = None) -> list[str]:
+        """Judgments recorded as overruling ``name``."""
+        return self.neighbours(name, "overrules", incoming=True, judgment_date=judgment_date)
+
+    def _candidates(self, name: str, judgment_date: str = None) -> tuple[int | None, list[int]]:
+        """
+        (node, nodes whose incoming edges apply to ``name``). Edges into the
+        undated node of the same name count only while at most one dated
+        judgment carries that name.
+        """
+        node = self._resolve(name, judgment_date)
+        nodes = [node] if node is not None else []
+        key = case_key(name or "")
+        undated = self._ids.get(_identity(key, "")) if key else None
+        if undated is not None and undated != node:
+            dated = {n for n in self._by_name.get(key, ()) if self._years[n]}
+            if dated <= {node}:
+                nodes.append(undated)
+        return node, nodes
+
+    def overruling_judgment(self, name: str, judgment_date: str = None) -> tuple[str, str] | None:
+        """
+        (name, date) of the judgment that overrules ``name``, or None. An
+        edge from a case that is not newer (both dates known) is ignored —
+        the same temporal rule resolve_legal_conflicts applies.
+        """
+        node, nodes = self._candidates(name, judgment_date)
+        own_date = _parse_iso(str(judgment_date or "")[:10]) or (_parse_iso(self.dates[node]) if node is not None else None)
+        for candidate in nodes:
+            for later in self._in["overrules"][candidate]:
+                later_date = _parse_iso(self.dates[later])
+                if own_date and later_date and later_date <= own_date:
+                    continue
+                return self.names[later], self.dates[later]
+        return None
+
+    def overruling_case(self, name: str, judgment_date: str = None) -> str | None:
+        """Name of the judgment that overrules ``name`` (see overruling_judgment), or None."""
+        later = self.overruling_judgment(name, judgment_date)
+        return later[0] if later else None
+
+    def is_overruled(self, name: str, judgment_date: str = None) -> bool:
+        return self.overruling_judgment(name, judgment_date) is not None
+
+    def authority(self, name: str, judgment_date: str = None) -> int:
+        """How many judgments uphold or cite ``name`` — a cheap precedent-strength signal."""
+        _, nodes = self._candidates(name, judgment_date)
+        return sum(len(self._in["upholds"][n]) + len(self._in["cites"][n]) for n in nodes)
+
+    def date_of(self, name: str, judgment_date: str = None) -> str:
+        node = self._resolve(name, judgment_date)
+        return self.dates[node] if node is not None else "UNKNOWN"
+
+    def stats(self) -> dict:
+        return {
+            "nodes": len(self.names),
+            "edges": {rel: sum(len(a) for a in self._out[rel]) for rel in RELATIONS},
+            "path": str(self.path),
+        }
+
+    # ── Persistence ──
+
+    def save(self):
+        """Commit the nodes, aliases and edges written since the last save."""
+        with self._lock:
+            self._db.commit()
+
+    def _load(self):
+        try:
+            for node, identity, name, judgment_date in self._db.execute(
+                "SELECT id, identity, name, judgment_date FROM nodes ORDER BY id"
+            ):
+                if node != len(self.names):
+                    raise ValueError(f"node ids are not dense at {node}")
+                self._new_node(identity, name)
+                self.dates[node] = judgment_date
+            for identity, node in self._db.execute("SELECT identity, node FROM aliases"):
+                self._index_identity(identity, node)
+            for src, rel, dst in self._db.execute("SELECT src, rel, dst FROM edges"):
+                if src != dst and dst not in self._out[rel][src]:
+                    self._out[rel][src].append(dst)
+                    self._in[rel][dst].append(src)
+        except Exception as e:
+            logger.warning(f"Could not load citation graph from {self.path} ({e}). Starting empty.")
+            self._reset()
+            self._db.executescript("DELETE FROM nodes; DELETE FROM aliases; DELETE FROM edges;")
+            self._db.commit()
+
+    def _import_json(self, path: Path):
+        """One-off migration from the earlier single-file JSON format."""
+        try:
+            data = json.loads(path.read_text())
+            with self._lock:
+                nodes = [self.add_case(name, d) for name, d in zip(data["names"], data["dates"])]
+                for alias, old in data.get("aliases", {}).items():
+                    self.add_case(data["names"][old], data["dates"][old], aliases=[alias])
+                for rel, flat in data["edges"].items():
+                    for i in range(0, len(flat), 2):
+                        self._link(nodes[flat[i]], rel, nodes[flat[i + 1]])
+                self.save()
+            logger.info(f"Imported {len(nodes)} citation graph nodes from {path}")
+        except Exception as e:
+            logger.warning(f"Could not import citation graph from {path} ({e}).")
+
+
+def seed_from_legacy_csv(graph: CitationGraph, csv_path: Path = LEGACY_CSV) -> int:
+    """Add `cites` edges from the legacy cases.csv (statute entries are skipped)."""
+    if not csv_path.exists():
+        return 0
+    added = 0
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            cited = [c for c in (row.get("cited_cases") or "").split(";") if _CASE_RE.search(c)]
+            added += graph.add_edges(row["case_title"], "cites", cited)
+    return added
+
+
+# Global graph instance
+_citation_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_citation_graph() -> CitationGraph | None:
+    """
+    Get or load the shared citation graph. A fresh graph is seeded from the
+    legacy CSV. None when CITATION_GRAPH_ENABLED=0.
+    """
+    global _citation_graph
+    if _citation_graph is None and CITATION_GRAPH_ENABLED:
+        with _graph_lock:
+            if _citation_graph is None:
+                try:
+                    graph = CitationGraph()
+                    if not graph.names and seed_from_legacy_csv(graph):
+                        graph.save()
+                    _citation_graph = graph
+                except Exception as e:
+                    logger.warning(f"Citation graph unavailable ({e}). Continuing without it.")
+                    return None
+    return _citation_graph
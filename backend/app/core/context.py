@@ -0,0 +1,109 @@
+import os
+import logging
+
+from app.core.chunking import CHUNK_OVERLAP
+from app.core.catalogue import clean_title
+from app.core.extraction import MODEL_CONTEXT_TOKENS, DEFAULT_CONTEXT_TOKENS, _CHARS_PER_TOKEN
+
+logger = logging.getLogger(__name__)
+
+# ─── Grounded-prompt context packing ────────────────────────────────────────
+#
+# Retrieved hits are chunks of a sliding window (chunking.chunk_text): chunk
+# i+1 repeats the last CHUNK_OVERLAP characters of chunk i. Adjacent chunks
+# of one case are merged back into a single passage with the overlap removed,
+# and whole cases are packed best-score-first until the token budget is spent.
+
+# Upper bound on context tokens per grounded prompt — a latency budget, not a
+# capacity one. It is further capped by the smallest context window in the
+# model cascade, since one prompt is sent to every fallback model.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+_CONTEXT_WINDOW_SHARE = 0.25
+_MIN_PARTIAL_CHARS = 400  # don't squeeze in a truncated case shorter than this
+_GAP_MARKER = "\n[...]\n"
+
+
+def context_budget_tokens(models: list[str]) -> int:
+    smallest = min((MODEL_CONTEXT_TOKENS.get(m, DEFAULT_CONTEXT_TOKENS) for m in models), default=DEFAULT_CONTEXT_TOKENS)
+    return min(CONTEXT_TOKEN_BUDGET, int(smallest * _CONTEXT_WINDOW_SHARE))
+
+
+def _overlap(left: str, right: str, max_overlap: int = CHUNK_OVERLAP) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right`` (≤ max_overlap)."""
+    for size in range(min(max_overlap, len(left), len(right)), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def merge_chunks(chunks: dict[int, str]) -> str:
+    """
+    Rebuild a passage from {chunk_index: text}: consecutive chunks are joined
+    with their shared overlap removed; gaps are marked with "[...]".
+    """
+    parts, previous_index, previous_text = [], None, ""
+    for chunk_index in sorted(chunks):
+        text = chunks[chunk_index]
+        if previous_index is not None and chunk_index == previous_index + 1:
+            text = text[_overlap(previous_text, text):]
+        elif previous_index is not None:
+            parts.append(_GAP_MARKER)
+        parts.append(text)
+        previous_index, previous_text = chunk_index, chunks[chunk_index]
+    return "".join(parts).strip()
+
+
+def _group_by_case(hits: list) -> list[dict]:
+    """Hits grouped per case (URL, else title), ordered by the best hit score."""
+    cases: dict[str, dict] = {}
+    for order, hit in enumerate(hits):
+        meta = hit.get("fields", {}) or hit.get("metadata", {})
+        key = meta.get("url") or meta.get("title", "Unknown Case")
+        case = cases.setdefault(key, {"meta": meta, "score": hit.get("_score", 0), "chunks": {}, "order": order})
+        case["score"] = max(case["score"], hit.get("_score", 0))
+        chunk_index = meta.get("chunk_index")
+        try:
+            chunk_index = int(chunk_index)
+        except (TypeError, ValueError):
+            chunk_index = -1 - order  # unknown position: never merged with a neighbour
+        case["chunks"].setdefault(chunk_index, meta.get("text", ""))
+    return sorted(cases.values(), key=lambda c: (-c["score"], c["order"]))
+
+
+def _case_header(meta: dict, score: float) -> str:
+    domain = meta.get("ai_legal_domain", "")
+    judgment_date = meta.get("ai_judgment_date", "")
+    date_info = f" (Decided: {judgment_date})" if judgment_date and judgment_date != "UNKNOWN" else ""
+    domain_info = f" [{domain}]" if domain and domain != "General" else ""
+    title = clean_title(meta.get("title", "Unknown Case")) or "Unknown Case"
+    return f"Case: {title}{date_info}{domain_info} [Relevance: {score:.2f}]\nContent: "
+
+
+def pack_context(hits: list, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> tuple[str, list[dict]]:
+    """
+    Build the grounded-prompt context from ranked hits.
+
+    Returns (context_text, packed) where ``packed`` lists the cases that made
+    it into the context, best first, as {"meta", "score", "text"} dicts.
+    """
+    budget = budget_tokens * _CHARS_PER_TOKEN
+    blocks, packed = [], []
+    for case in _group_by_case(hits):
+        text = merge_chunks(case["chunks"])
+        if not text:
+            continue
+        header = _case_header(case["meta"], case["score"])
+        room = budget - len(header) - 2
+        if room < min(len(text), _MIN_PARTIAL_CHARS):
+            break
+        if len(text) > room:
+            text = text[:room - 3] + "..."
+        blocks.append(header + text)
+        packed.append({"meta": case["meta"], "score": case["score"], "text": text})
+        budget -= len(header) + len(text) + 2
+
+    logger.info(
+        f"DEBUG: Packed {len(packed)} case(s) from {len(hits)} hit(s) into "
+        f"{sum(len(b) for b in blocks)} chars (budget {budget_tokens} tokens)."
+    )
+    return "\n\n".join(blocks), packed
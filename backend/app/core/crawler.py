@@ -1,59 +1,214 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import re
 import logging
-from app.core.scraper import fetch_case_text
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+from bs4 import BeautifulSoup
+
+from app.core.scraper import _HTML_PARSER, _select_judgment_node
+from app.utils.http import http_get
+from app.utils.http_cache import cached_fetch
+from app.utils.ratelimit import HostRateLimiter, get_host_limiter
+from app.core.ikapi import get_ik_client, search_query_from_url
 
 logger = logging.getLogger(__name__)
 
-def crawl_and_ingest(start_url: str, limit: int = 20):
+IK_BASE = "https://indiankanoon.org"
+
+# Search results link to /docfragment/<id>/?formInput=..., judgments cite
+# each other via /doc/<id>/. Both normalise to the canonical /doc/<id>/ URL.
+_DOC_LINK_RE = re.compile(r"/(?:doc|docfragment)/(\d+)/?")
+
+# Judgments also link the statutes and sections they apply ("Section 21 in
+# The Trade Marks Act, 1940", "Article 14 in Constitution of India"); those
+# /doc/ pages are bare acts, not cases.
+_STATUTE_TITLE_RE = re.compile(
+    r"^(?:section|sec\.|article|art\.|order|rule|regulation|schedule|clause)\s+\S+\s+(?:in|of)\s"
+    r"|^(?:the\s+)?code\s+of\s"
+    r"|\b(?:act|code|constitution of india|rules|regulations|ordinance)(?:,?\s*\d{4})?\s*$",
+    re.IGNORECASE,
+)
+# IndianKanoon search docsources that are legislation rather than courts
+_STATUTE_SOURCE_RE = re.compile(r"\b(?:act|acts|ordinance|rules|constitution)\b|^(?:central|state) government", re.IGNORECASE)
+
+MAX_SEARCH_PAGES = 5   # IndianKanoon search result pages to walk per seed
+CRAWL_WORKERS = 4      # concurrent fetches; the host limiter still caps the rate
+
+
+def canonical_doc_url(href: str) -> str | None:
+    """Map any IndianKanoon doc/docfragment link to https://indiankanoon.org/doc/<id>/."""
+    match = _DOC_LINK_RE.search(href)
+    if not match:
+        return None
+    if href.startswith("http") and "indiankanoon.org" not in urlparse(href).netloc:
+        return None
+    return f"{IK_BASE}/doc/{match.group(1)}/"
+
+
+def is_judgment_link(title: str, source: str = "") -> bool:
+    """False for statute/section documents, judged by link text or search docsource."""
+    return not _STATUTE_TITLE_RE.search(title.strip()) and not _STATUTE_SOURCE_RE.search(source or "")
+
+
+def _search_page_url(url: str, page: int) -> str:
+    """Return ``url`` with IndianKanoon's 0-based ``pagenum`` query parameter set."""
+    parts = urlparse(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    query["pagenum"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+class Crawler:
+    """
+    Concurrent IndianKanoon crawler with a deduplicated URL frontier.
+
+    Seeds may be search result pages or judgments. Search pages are paginated
+    up to ``max_pages``; judgments found at depth ``d < max_depth`` are fetched
+    and the cases they cite are added at depth ``d + 1``. Every fetch waits on
+    the per-host token bucket, so ``workers`` threads run in parallel but total
+    throughput never exceeds the politeness rate.
+
+    crawl() is a generator: cases are yielded the moment they are discovered,
+    long before the crawl finishes, so callers can start ingesting right away.
     """
-    Crawls a search result page, extracts case links, and returns their content.
-    For this demo, we will simulate finding links because scraping search result pages 
-    can be complex and fragile.
-    
-    In a real scenario, this would:
-    1. requests.get(start_url)
-    2. soup.find_all('a', class_='result_link')
-    3. yield urls
+
+    def __init__(
+        self,
+        limit: int = 20,
+        max_depth: int = 0,
+        max_pages: int = MAX_SEARCH_PAGES,
+        workers: int = CRAWL_WORKERS,
+        limiter: HostRateLimiter | None = None,
+    ):
+        self.limit = limit
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = workers
+        self.limiter = limiter or get_host_limiter()
+
+    def _fetch_links(self, url: str, scoped: bool) -> list[tuple[str, str]]:
+        """Fetch a page and return its (canonical_doc_url, link_text) pairs in page order."""
+        if not scoped:
+            # With an API token, search pages come from the structured search
+            # API (cached and metered) instead of scraped result HTML.
+            ik, search = get_ik_client(), search_query_from_url(url)
+            if ik is not None and search is not None:
+                return [(doc["url"], doc["title"]) for doc in ik.search_docs(*search)
+                        if is_judgment_link(doc["title"], doc["court"])]
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if scoped:
+            # Judgments are cached so the ingestion that follows doesn't download them again
+            response = cached_fetch(url, http_get, before_network=lambda: self.limiter.acquire(url), headers=headers)
+        else:
+            self.limiter.acquire(url)
+            response = http_get(url, headers=headers)
+        if response.status_code != 200:
+            logger.warning(f"Crawl fetch returned {response.status_code} for {url}")
+            return []
+
+        soup = BeautifulSoup(response.content, _HTML_PARSER)
+        if scoped:
+            # For judgments only look inside the judgment body, so site chrome
+            # ("Similar documents", "Recent cases") isn't mistaken for citations.
+            roots = [_select_judgment_node(soup)]
+        else:
+            # IndianKanoon wraps each search hit in .result_title; other pages
+            # fall back to every link on the page.
+            roots = soup.select(".result_title") or [soup]
+
+        links = []
+        for root in roots:
+            for link in root.find_all("a", href=True):
+                doc_url = canonical_doc_url(link["href"])
+                title = link.get_text(strip=True)
+                if doc_url and is_judgment_link(title):
+                    links.append((doc_url, title))
+        return links
+
+    def crawl(self, seeds: Iterable[str]) -> Iterator[dict]:
+        """Yield ``{"url", "title", "depth"}`` for each newly discovered case."""
+        seen: set[str] = set()
+        # Frontier entries: (url, depth, search_page) — search_page is None for judgments
+        frontier: deque[tuple[str, int, int | None]] = deque()
+        emitted = 0
+
+        for seed in seeds:
+            doc_url = (canonical_doc_url(seed) or seed) if "/doc/" in seed else None
+            if doc_url:
+                if doc_url in seen:
+                    continue
+                seen.add(doc_url)
+                logger.info(f"URL {seed} appears to be a specific document.")
+                yield {"url": doc_url, "title": "Direct Link Case", "depth": 0}
+                emitted += 1
+                if self.max_depth > 0:
+                    frontier.append((doc_url, 0, None))
+            else:
+                frontier.append((_search_page_url(seed, 0), 0, 0))
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        pending = {}
+        try:
+            while (frontier or pending) and emitted < self.limit:
+                while frontier and len(pending) < self.workers:
+                    url, depth, page = frontier.popleft()
+                    pending[pool.submit(self._fetch_links, url, page is None)] = (url, depth, page)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth, page = pending.pop(future)
+                    try:
+                        links = future.result()
+                    except Exception as e:
+                        logger.error(f"Crawl failed for {url}: {e}")
+                        continue
+
+                    # Search results sit at the seed's depth; citations are one level deeper
+                    link_depth = depth if page is not None else depth + 1
+                    new_links = 0
+                    for doc_url, title in links:
+                        if doc_url in seen or len(title) <= 10:  # filtering noise
+                            continue
+                        seen.add(doc_url)
+                        new_links += 1
+                        if emitted < self.limit:
+                            yield {"url": doc_url, "title": title, "depth": link_depth}
+                            emitted += 1
+                        if link_depth < self.max_depth:
+                            frontier.append((doc_url, link_depth, None))
+
+                    # Only turn the page while the previous one still produced new cases
+                    if page is not None and new_links and page + 1 < self.max_pages:
+                        frontier.append((_search_page_url(url, page + 1), depth, page + 1))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def crawl_and_ingest(
+    start_url: str,
+    limit: int = 20,
+    max_depth: int = 0,
+    on_case: Callable[[dict], None] | None = None,
+) -> list[dict]:
     """
-    logger.info(f"Crawling {start_url} for new cases...")
-    
-    # Mocking autonomy for the demo if the URL isn't a direct search page we support
-    # Or we can implement a real simple extractor if the user gives a specific format.
-    
+    Crawls a search result page (or judgment), collecting up to ``limit`` case links.
+
+    If ``on_case`` is given it is called for each case as soon as it is
+    discovered, so the caller can hand it to the ingestion queue while the
+    crawl is still running. Returns the full list of ``{"url", "title"}``
+    dicts once the crawl completes.
+    """
+    logger.info(f"Crawling {start_url} for new cases (limit={limit}, depth={max_depth})...")
+
     found_cases = []
-    
     try:
-        # Check if the start_url is already a likely case URL
-        if "/doc/" in start_url:
-             logger.info(f"URL {start_url} appears to be a specific document.")
-             # We might fetch the title from the page content in real scraping, 
-             # but here we'll just return it as a found case to be processed.
-             return [{"url": start_url, "title": "Direct Link Case"}]
-        
-        # User-Agent helpful for not getting blocked
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(start_url, headers=headers)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Generic link finder for kanoon - very naive
-            # IndianKanoon search results usually have links like /doc/123456/
-            links = soup.find_all('a', href=True)
-            
-            count = 0
-            for link in links:
-                href = link['href']
-                if "/doc/" in href and count < limit:
-                    full_url = f"https://indiankanoon.org{href}" if href.startswith('/') else href
-                    # Avoid duplicates or non-case links if possible
-                    title = link.get_text(strip=True)
-                    if len(title) > 10: # filtering noise
-                        found_cases.append({"url": full_url, "title": title})
-                        count += 1
-        
+        for case in Crawler(limit=limit, max_depth=max_depth).crawl([start_url]):
+            found_cases.append(case)
+            if on_case is not None:
+                on_case(case)
     except Exception as e:
         logger.error(f"Crawl failed: {e}")
-        
+
     return found_cases
@@ -0,0 +1,210 @@
+import os
+import json
+import math
+import time
+import logging
+import operator
+import threading
+from collections import Counter
+
+from app.core.rules import canonical_domain
+from app.utils.storage import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+# ─── Query domain classifier ─────────────────────────────────────────────────
+#
+# One centroid per legal domain: the normalised mean of every active chunk
+# vector labelled with that ai_legal_domain. Built offline from the index
+# (scripts/build_domain_centroids.py) and stored as JSON, so classifying a
+# query embedding is a dozen dot products in memory — cheap enough to run
+# before retrieval and narrow the search by domain.
+
+DOMAIN_CLASSIFIER_ENABLED = os.getenv("DOMAIN_CLASSIFIER_ENABLED", "1") != "0"
+# Cosine similarity the best centroid needs, and its lead over the runner-up;
+# below either the query is left unclassified rather than mis-filtered.
+DOMAIN_MIN_SCORE = float(os.getenv("DOMAIN_CLASSIFIER_MIN_SCORE", "0.2"))
+DOMAIN_MIN_MARGIN = float(os.getenv("DOMAIN_CLASSIFIER_MIN_MARGIN", "0.02"))
+# Domains with fewer chunk records than this get no centroid
+MIN_DOMAIN_RECORDS = int(os.getenv("DOMAIN_CLASSIFIER_MIN_RECORDS", "5"))
+
+_FETCH_BATCH = 100  # ids per index.fetch() call while building
+
+
+def _normalize(vector) -> tuple[float, ...]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return tuple(v / norm for v in vector) if norm else tuple(vector)
+
+
+class DomainClassifier:
+    """Nearest-centroid classifier over query embeddings."""
+
+    def __init__(self, centroids: dict, counts: dict | None = None, model: str | None = None,
+                 built_at: float | None = None):
+        self.centroids = {domain: _normalize(c) for domain, c in centroids.items()}
+        self.counts = dict(counts or {})
+        self.model = model
+        self.built_at = built_at
+        self.dimension = len(next(iter(self.centroids.values()))) if self.centroids else 0
+        self._lock = threading.Lock()
+        self._outcomes = Counter()
+        self._predictions = Counter()
+        self._elapsed = 0.0
+
+    def __len__(self):
+        return len(self.centroids)
+
+    def scores(self, vector) -> list[tuple[str, float]]:
+        """(domain, cosine similarity) for every centroid, best first."""
+        if len(vector) != self.dimension:
+            return []
+        query = _normalize(vector)
+        ranked = [(domain, sum(map(operator.mul, query, c))) for domain, c in self.centroids.items()]
+        return sorted(ranked, key=lambda pair: pair[1], reverse=True)
+
+    def classify(self, vector, min_score: float = DOMAIN_MIN_SCORE,
+                 min_margin: float = DOMAIN_MIN_MARGIN) -> tuple[str | None, float]:
+        """
+        (domain, score) of the nearest centroid, or (None, score) when the
+        match is weak, ambiguous, or the vector has the wrong dimension.
+        """
+        start = time.perf_counter()
+        ranked = self.scores(vector)
+        domain, score = ranked[0] if ranked else (None, 0.0)
+        if not ranked:
+            outcome = "dimension_mismatch"
+        elif score < min_score:
+            outcome, domain = "low_score", None
+        elif len(ranked) > 1 and score - ranked[1][1] < min_margin:
+            outcome, domain = "ambiguous", None
+        else:
+            outcome = "classified"
+        with self._lock:
+            self._elapsed += time.perf_counter() - start
+            self._outcomes[outcome] += 1
+            if domain:
+                self._predictions[domain] += 1
+        return domain, score
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = sum(self._outcomes.values())
+            return {
+                "domains": len(self.centroids),
+                "records": self.counts,
+                "model": self.model,
+                "built_at": self.built_at,
+                "calls": calls,
+                "outcomes": dict(self._outcomes),
+                "predictions": dict(self._predictions),
+                "mean_latency_us": round(self._elapsed / calls * 1e6, 1) if calls else 0.0,
+            }
+
+    # ── Persistence ──
+
+    def save(self, path):
+        data = {
+            "model": self.model,
+            "built_at": self.built_at,
+            "domains": {d: {"centroid": list(c), "records": self.counts.get(d, 0)} for d, c in self.centroids.items()},
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> "DomainClassifier":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        domains = data.get("domains") or {}
+        return cls(
+            {d: entry["centroid"] for d, entry in domains.items()},
+            counts={d: entry.get("records", 0) for d, entry in domains.items()},
+            model=data.get("model"),
+            built_at=data.get("built_at"),
+        )
+
+
+def build_domain_centroids(index, namespace: str = "", model: str | None = None,
+                           min_records: int = MIN_DOMAIN_RECORDS) -> DomainClassifier:
+    """
+    Average the stored vectors of every active chunk per ai_legal_domain.
+
+    Pages through the index with index.list() and index.fetch() (values and
+    metadata, no embedding or query calls), keeping one running sum per
+    domain. Raw labels are mapped through rules.canonical_domain first, so
+    "Tax" and "Tax Law" records share one centroid named like the query
+    filter value. "General"/"Unknown" records and domains below
+    ``min_records`` are left out.
+    """
+    sums: dict[str, list[float]] = {}
+    counts = Counter()
+
+    def _fetch(ids: list[str]):
+        fetched = index.fetch(ids=ids, namespace=namespace)
+        for vector in (getattr(fetched, "vectors", None) or {}).values():
+            meta = dict(getattr(vector, "metadata", None) or {})
+            values = getattr(vector, "values", None)
+            domain = canonical_domain(meta.get("ai_legal_domain"))
+            if not values or meta.get("status", "active") != "active" or domain == "General":
+                continue
+            total = sums.get(domain)
+            if total is None:
+                sums[domain] = list(values)
+            elif len(total) == len(values):
+                sums[domain] = list(map(operator.add, total, values))
+            else:
+                continue
+            counts[domain] += 1
+
+    pending: list[str] = []
+    for page in index.list(namespace=namespace):
+        pending.extend(page)
+        while len(pending) >= _FETCH_BATCH:
+            _fetch(pending[:_FETCH_BATCH])
+            del pending[:_FETCH_BATCH]
+    if pending:
+        _fetch(pending)
+
+    kept = {d: s for d, s in sums.items() if counts[d] >= min_records}
+    logger.info(
+        f"Domain centroids built from {sum(counts.values())} records: {len(kept)} domains "
+        f"({len(sums) - len(kept)} below {min_records} records)."
+    )
+    return DomainClassifier(kept, counts={d: counts[d] for d in kept}, model=model, built_at=time.time())
+
+
+def domain_centroids_path():
+    return get_data_dir() / "domain_centroids.json"
+
+
+# Global classifier instance, reloaded when the centroid file changes
+_classifier = None
+_classifier_mtime = None
+_classifier_lock = threading.Lock()
+
+
+def get_domain_classifier() -> DomainClassifier | None:
+    """
+    Shared classifier loaded from domain_centroids.json. None when
+    DOMAIN_CLASSIFIER_ENABLED=0 or no centroids have been built yet.
+    """
+    global _classifier, _classifier_mtime
+    if not DOMAIN_CLASSIFIER_ENABLED:
+        return None
+    path = domain_centroids_path()
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    if mtime != _classifier_mtime:
+        with _classifier_lock:
+            if mtime != _classifier_mtime:
+                try:
+                    _classifier = DomainClassifier.load(path)
+                except Exception as e:
+                    logger.warning(f"Domain centroids unreadable ({e}). Continuing without them.")
+                    _classifier = None
+                _classifier_mtime = mtime
+    return _classifier if _classifier else None
@@ -1,25 +1,29 @@
 import os
 import re
 import json
+import inspect
 import logging
 from datetime import date, datetime
 from typing import Optional
-from openai import OpenAI
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from dotenv import load_dotenv
 
+from app.core import rules as _rules_module
+from app.core.rules import LEGAL_DOMAINS, canonical_court, canonical_domain, extract_rule_metadata, has_relation_cues
+from app.utils.result_cache import get_result_cache, content_hash
+from app.utils.clients import UNSET, get_openrouter_client, llm_timeout
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Configure OpenRouter client
-api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
-client = None
-if api_key:
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=api_key
-    )
+# OpenRouter client: resolved on first use via the shared provider.
+# Assigning/patching ``client`` overrides it.
+client = UNSET
+
+
+def _llm_client():
+    return get_openrouter_client() if client is UNSET else client
 
 # Reliable free models for extraction.
 # Validated on 2026-05-30 against OpenRouter /api/v1/models — sorted by quality.
@@ -34,6 +38,30 @@ EXTRACTION_MODELS = [
     "qwen/qwen3-next-80b-a3b-instruct:free",       # ✅ 262K ctx fallback
 ]
 
+# Context windows (tokens) of the models above, used to size extraction batches.
+MODEL_CONTEXT_TOKENS = {
+    "deepseek/deepseek-v4-flash:free": 1_000_000,
+    "meta-llama/llama-3.3-70b-instruct:free": 131_072,
+    "google/gemma-4-31b-it:free": 262_144,
+    "qwen/qwen3-coder:free": 1_000_000,
+    "nvidia/nemotron-3-super-120b-a12b:free": 1_000_000,
+    "liquid/lfm-2.5-1.2b-instruct:free": 32_768,
+    "nvidia/nemotron-nano-12b-v2-vl:free": 128_000,
+    "qwen/qwen3-next-80b-a3b-instruct:free": 262_144,
+}
+DEFAULT_CONTEXT_TOKENS = 32_768
+
+
+def _coerce_case_lists(values: dict) -> dict:
+    for field in ("overrules_cases", "upholds_cases"):
+        val = values.get(field)
+        if isinstance(val, str):
+            # Empty string → empty list; otherwise split on comma
+            values[field] = [v.strip() for v in val.split(",") if v.strip()] if val.strip() else []
+        elif val is None:
+            values[field] = []
+    return values
+
 
 class CaseMetadata(BaseModel):
     """Structured legal metadata extracted from court judgments.
@@ -45,7 +73,9 @@ class CaseMetadata(BaseModel):
     judgment_date: str = Field(description="The date of the judgment in YYYY-MM-DD format. If unknown, output 'UNKNOWN'.")
     overrules_cases: list[str] = Field(default_factory=list, description="A list of case names that this judgment explicitly overrules. Empty list if none.")
     upholds_cases: list[str] = Field(default_factory=list, description="A list of case names that this judgment explicitly upholds. Empty list if none.")
-    legal_domain: str = Field(default="General", description="The primary area of Indian law discussed (e.g., Intellectual Property, Corporate, Tax).")
+    legal_domain: str = Field(default="General", description="The primary area of Indian law discussed, one of rules.LEGAL_DOMAINS (e.g., Intellectual Property, Corporate Law, Tax Law).")
+    bench: str = Field(default="", description="Judges on the bench, when parsed from the page header.")
+    court: str = Field(default="", description="Deciding court, when parsed from the page header.")
     validated_date: Optional[date] = Field(default=None, description="Parsed date object for temporal comparison. None if date is UNKNOWN or unparseable.")
 
     @model_validator(mode="before")
@@ -58,14 +88,19 @@ class CaseMetadata(BaseModel):
         validates the types, preventing spurious ValidationErrors that would
         cause the entire cascade to fall through to the next model.
         """
-        for field in ("overrules_cases", "upholds_cases"):
-            val = values.get(field)
-            if isinstance(val, str):
-                # Empty string → empty list; otherwise split on comma
-                values[field] = [v.strip() for v in val.split(",") if v.strip()] if val.strip() else []
-            elif val is None:
-                values[field] = []
-        return values
+        return _coerce_case_lists(values)
+
+    @field_validator("legal_domain", mode="before")
+    @classmethod
+    def canonicalise_domain(cls, value) -> str:
+        """Map the model's free-text domain ("Tax", "Corporate") onto the shared label set."""
+        return canonical_domain(value)
+
+    @field_validator("court", mode="before")
+    @classmethod
+    def canonicalise_court(cls, value) -> str:
+        """"High Court of Judicature at Bombay" → "Bombay High Court", matching query filters."""
+        return canonical_court(value)
 
     @model_validator(mode="after")
     def compute_validated_date(self) -> "CaseMetadata":
@@ -154,28 +189,45 @@ def extract_key_sections(markdown_text: str, max_chars: int = 20_000) -> str:
 
 # ─── LLM-based metadata extraction ──────────────────────────────────────────
 
-def extract_legal_metadata(raw_scraped_text: str) -> dict:
+_DOMAIN_INSTRUCTION = f"For legal_domain, answer with one of: {', '.join(LEGAL_DOMAINS)}, or General. "
+
+EXTRACTION_SYSTEM_PROMPT = (
+    "You are an expert Indian Legal AI. Analyze the scraped court judgment. "
+    "Extract the metadata strictly adhering to the following JSON schema: "
+    '{"case_name": "string", "judgment_date": "string (YYYY-MM-DD or UNKNOWN)", '
+    '"overrules_cases": ["string"], "upholds_cases": ["string"], "legal_domain": "string"}. '
+    "You MUST output raw JSON formatting adhering to this schema. "
+    + _DOMAIN_INSTRUCTION +
+    "For overrules_cases, list ONLY cases that are EXPLICITLY overruled, struck down, or reversed. "
+    "Do NOT include cases that are merely discussed or distinguished."
+)
+
+# Bump to invalidate every cached extraction (e.g. after changing the model
+# cascade). Changes to any extraction prompt (single, relations, batch), to
+# the CaseMetadata schema or to app/core/rules.py (the rule-based fast path
+# and label canonicalisation) invalidate automatically: all are hashed into
+# the cache key.
+EXTRACTION_CACHE_VERSION = 2
+# Source hash of the rules module, taken once at import
+_RULES_SOURCE_HASH = content_hash(inspect.getsource(_rules_module))
+
+
+def extract_legal_metadata(raw_scraped_text: str, skip_models=()) -> dict:
     """
     Passes raw scraped legal text to the AI to extract structured metadata 
-    for the Temporal Conflict-Resolution algorithm.
+    for the Temporal Conflict-Resolution algorithm. Models in ``skip_models``
+    (already known to be failing) are not tried.
     
     Returns a validated dictionary matching CaseMetadata schema,
     or an empty dict if extraction fails.
     """
+    client = _llm_client()
     if not client:
         logger.warning("OPENROUTER_API_KEY not set. Skipping AI extraction layer.")
         return {}
 
-    system_prompt = (
-        "You are an expert Indian Legal AI. Analyze the scraped court judgment. "
-        "Extract the metadata strictly adhering to the following JSON schema: "
-        '{"case_name": "string", "judgment_date": "string (YYYY-MM-DD or UNKNOWN)", '
-        '"overrules_cases": ["string"], "upholds_cases": ["string"], "legal_domain": "string"}. '
-        "You MUST output raw JSON formatting adhering to this schema. "
-        "For overrules_cases, list ONLY cases that are EXPLICITLY overruled, struck down, or reversed. "
-        "Do NOT include cases that are merely discussed or distinguished."
-    )
-    
+    system_prompt = EXTRACTION_SYSTEM_PROMPT
+
     # Use Markdown-aware section extraction instead of naive char truncation.
     # Priority sections (HELD, ORDER, RATIO) are pulled first so the LLM sees
     # the binding legal reasoning even in very long judgments.
@@ -184,6 +236,8 @@ def extract_legal_metadata(raw_scraped_text: str) -> dict:
     
     last_error = None
     for model_name in EXTRACTION_MODELS:
+        if model_name in skip_models:
+            continue
         try:
             response = client.chat.completions.create(
                 model=model_name,
@@ -192,7 +246,8 @@ def extract_legal_metadata(raw_scraped_text: str) -> dict:
                     {"role": "user", "content": user_prompt}
                 ],
                 response_format={"type": "json_object"},
-                temperature=0.1
+                temperature=0.1,
+                timeout=llm_timeout("extraction"),
             )
             
             response_text = response.choices[0].message.content
@@ -217,3 +272,315 @@ def extract_legal_metadata(raw_scraped_text: str) -> dict:
     
     logger.error(f"All extraction models failed. Last error: {last_error}")
     return {}
+
+
+# ─── Rule-based fast path ───────────────────────────────────────────────────
+
+RELATIONS_SYSTEM_PROMPT = (
+    "You are an expert Indian Legal AI. Read the court judgment and list the earlier decisions it "
+    'EXPLICITLY overrules (struck down, reversed, declared bad law) and EXPLICITLY upholds. '
+    'Respond with raw JSON: {"overrules_cases": ["string"], "upholds_cases": ["string"]}. '
+    "Do NOT include cases that are merely discussed, cited or distinguished."
+)
+
+
+class CaseRelations(BaseModel):
+    """Overrules/upholds lists — the part of CaseMetadata rules cannot parse."""
+    overrules_cases: list[str] = Field(default_factory=list)
+    upholds_cases: list[str] = Field(default_factory=list)
+
+    @model_validator(mode="before")
+    @classmethod
+    def coerce_list_fields(cls, values: dict) -> dict:
+        """Same comma-separated-string tolerance as CaseMetadata."""
+        return _coerce_case_lists(values)
+
+
+def extract_case_relations(raw_scraped_text: str, skip_models=()) -> dict | None:
+    """
+    Ask the LLM only for overrules_cases / upholds_cases.
+
+    Returns the validated lists, or None if every model failed.
+    """
+    client = _llm_client()
+    if not client:
+        return None
+
+    key_text = extract_key_sections(raw_scraped_text, max_chars=20_000)
+    user_prompt = f"Court Judgment (Markdown, key sections prioritised):\n{key_text}"
+
+    for model_name in EXTRACTION_MODELS:
+        if model_name in skip_models:
+            continue
+        try:
+            response = client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": RELATIONS_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                timeout=llm_timeout("extraction"),
+            )
+            raw_data = json.loads(response.choices[0].message.content)
+            return CaseRelations(**raw_data).model_dump()
+        except Exception as e:
+            logger.warning(f"Model {model_name} failed relation extraction: {e}. Trying next...")
+            continue
+
+    logger.error("All models failed relation extraction.")
+    return None
+
+
+def extract_legal_metadata_fast(raw_scraped_text: str, skip_models=()) -> dict:
+    """
+    Rule-based extraction first, LLM only where rules cannot answer.
+
+    - Rules confident and no overrule/uphold language → no LLM call at all.
+    - Rules confident but the text may overrule/uphold → one short
+      relations-only LLM call.
+    - Rules not confident → the full extract_legal_metadata() cascade.
+
+    Same return contract as extract_legal_metadata(); ``skip_models`` is
+    passed through to the LLM calls.
+    """
+    rules = extract_rule_metadata(raw_scraped_text)
+    header = {"bench": rules["bench"], "court": rules["court"]}
+
+    if not rules["confident"]:
+        result = extract_legal_metadata(raw_scraped_text, skip_models)
+        if result:
+            result = CaseMetadata(**{**result, **header}).model_dump()
+        return result
+
+    relations = {"overrules_cases": [], "upholds_cases": []}
+    if has_relation_cues(raw_scraped_text):
+        relations = extract_case_relations(raw_scraped_text, skip_models)
+        if relations is None:
+            return {}
+
+    logger.info(f"Rule-based extraction: {rules['case_name']} ({rules['judgment_date']}, {rules['legal_domain']})")
+    return CaseMetadata(
+        case_name=rules["case_name"],
+        judgment_date=rules["judgment_date"],
+        legal_domain=rules["legal_domain"],
+        **header,
+        **relations,
+    ).model_dump()
+
+
+# ─── Cached extraction ──────────────────────────────────────────────────────
+
+def _extraction_cache_key(raw_scraped_text: str, window: int = 0) -> str:
+    """
+    Versioned content-hash key: cache version + prompts + rules + schema +
+    document text. ``window`` marks a batch extraction made from a head +
+    tail window of the text (batch prompt included): it is keyed apart, so
+    the lower-fidelity batch result is never served to the single-document
+    path.
+    """
+    schema = json.dumps(CaseMetadata.model_json_schema(), sort_keys=True)
+    parts = [
+        str(EXTRACTION_CACHE_VERSION),
+        content_hash(EXTRACTION_SYSTEM_PROMPT),
+        content_hash(RELATIONS_SYSTEM_PROMPT),
+        _RULES_SOURCE_HASH,
+        content_hash(schema),
+    ]
+    if window:
+        parts += [f"window={window}", content_hash(EXTRACTION_BATCH_SYSTEM_PROMPT)]
+    return content_hash("\x1f".join((*parts, content_hash(raw_scraped_text))))
+
+
+def extract_legal_metadata_cached(raw_scraped_text: str, skip_models=()) -> dict:
+    """
+    extract_legal_metadata_fast() behind the local result cache.
+
+    Re-ingesting an unchanged document costs one SQLite lookup instead of up
+    to len(EXTRACTION_MODELS) LLM calls. Failed extractions ({}) are not
+    cached, so they are retried next time.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return extract_legal_metadata_fast(raw_scraped_text, skip_models)
+
+    key = _extraction_cache_key(raw_scraped_text)
+    cached = cache.get("metadata", key)
+    if cached is not None:
+        try:
+            # Re-validate so callers get the same types (e.g. date) as a fresh extraction
+            return CaseMetadata(**cached).model_dump()
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cached metadata: {e}")
+
+    result = extract_legal_metadata_fast(raw_scraped_text, skip_models)
+    if result:
+        cache.put("metadata", key, CaseMetadata(**result).model_dump(mode="json"))
+    return result
+
+
+# ─── Batch extraction ───────────────────────────────────────────────────────
+
+# Each packed document is cut to this window: its head (parties, court,
+# date, bench) and its tail (operative order, what was held/overruled),
+# where the extracted fields live. Long judgments are windowed, not excluded.
+BATCH_ITEM_WINDOW_CHARS = 8_000
+_BATCH_TAIL_SHARE = 0.4
+MAX_BATCH_ITEMS = 8          # bounded by output size (~200 tokens of JSON per item)
+_CHARS_PER_TOKEN = 4         # rough estimate for English legal text
+_BATCH_INPUT_SHARE = 0.5     # fraction of the context window spent on input
+
+EXTRACTION_BATCH_SYSTEM_PROMPT = (
+    "You are an expert Indian Legal AI. You will receive several scraped court judgments, "
+    "each introduced by a line '=== JUDGMENT <index> ==='. Extract metadata for EVERY judgment. "
+    'Respond with raw JSON of the form {"results": [{"index": <index>, "case_name": "string", '
+    '"judgment_date": "string (YYYY-MM-DD or UNKNOWN)", "overrules_cases": ["string"], '
+    '"upholds_cases": ["string"], "legal_domain": "string"}]} with one entry per judgment. '
+    + _DOMAIN_INSTRUCTION +
+    "For overrules_cases, list ONLY cases that are EXPLICITLY overruled, struck down, or reversed. "
+    "Do NOT include cases that are merely discussed or distinguished."
+)
+
+
+def _batch_window(text: str) -> str:
+    """Head + tail of ``text`` within BATCH_ITEM_WINDOW_CHARS (short texts unchanged)."""
+    if len(text) <= BATCH_ITEM_WINDOW_CHARS:
+        return text
+    tail = int(BATCH_ITEM_WINDOW_CHARS * _BATCH_TAIL_SHARE)
+    head = BATCH_ITEM_WINDOW_CHARS - tail
+    return f"{text[:head]}\n\n[...]\n\n{text[-tail:]}"
+
+
+def _pack_batches(items: list[tuple[int, str]], model_name: str) -> list[list[tuple[int, str]]]:
+    """Greedily pack (index, text) items into batches that fit ``model_name``'s context window."""
+    context = MODEL_CONTEXT_TOKENS.get(model_name, DEFAULT_CONTEXT_TOKENS)
+    budget_chars = int(context * _BATCH_INPUT_SHARE) * _CHARS_PER_TOKEN
+
+    batches, current, used = [], [], 0
+    for idx, text in items:
+        if current and (used + len(text) > budget_chars or len(current) >= MAX_BATCH_ITEMS):
+            batches.append(current)
+            current, used = [], 0
+        current.append((idx, text))
+        used += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _extract_batch_once(model_name: str, batch: list[tuple[int, str]]) -> dict[int, dict]:
+    """
+    One chat completion for a packed batch. Returns {index: validated metadata}
+    for every item that passed CaseMetadata; invalid items are simply absent.
+    Raises on transport errors or unparseable JSON so the caller can try the next model.
+    """
+    user_prompt = "\n\n".join(f"=== JUDGMENT {idx} ===\n{text}" for idx, text in batch)
+    response = _llm_client().chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": EXTRACTION_BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt},
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.1,
+        timeout=llm_timeout("extraction"),
+    )
+    raw_data = json.loads(response.choices[0].message.content)
+    entries = raw_data.get("results", []) if isinstance(raw_data, dict) else raw_data
+    if not isinstance(entries, list):
+        raise ValueError("batch response has no 'results' array")
+
+    expected = {idx for idx, _ in batch}
+    validated: dict[int, dict] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.pop("index"))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if idx not in expected:
+            continue
+        try:
+            validated[idx] = CaseMetadata(**entry).model_dump()
+        except Exception as e:
+            logger.warning(f"Batch item {idx} failed validation via {model_name}: {e}")
+    return validated
+
+
+def extract_legal_metadata_batch(texts: list[str]) -> list[dict]:
+    """
+    Extracts metadata for many judgments with as few LLM calls as possible.
+
+    1. Items already in the result cache (a single-document extraction, or
+       an earlier windowed batch one) are answered from it, and items the
+       rule-based fast path settles on its own never reach the LLM.
+    2. The rest, each cut to its head + tail window (_batch_window), are
+       packed into JSON-array requests sized to each model's context
+       window, walking the usual model cascade for any batch whose call
+       fails outright.
+    3. Each returned item is validated through CaseMetadata on its own;
+       only the items that fail fall back, once, to the single-document
+       extract_legal_metadata_cached() — skipping models whose batch
+       calls already failed with an API error, so a rate-limited cascade
+       is not re-run per item.
+
+    Returns one dict per input, in order ({} where extraction failed).
+    """
+    results: list[dict] = [{} for _ in texts]
+    cache = get_result_cache()
+    keys = [_extraction_cache_key(t) for t in texts]
+    # Batch results come from a window of the text: cached under their own key
+    window_keys = [_extraction_cache_key(t, window=BATCH_ITEM_WINDOW_CHARS) for t in texts]
+
+    pending: list[tuple[int, str]] = []
+    singles: list[int] = []
+    down_models: set[str] = set()  # models whose batch call failed with an API error
+    for i, text in enumerate(texts):
+        cached = None
+        if cache:
+            cached = cache.get("metadata", keys[i])
+            if cached is None:
+                cached = cache.get("metadata", window_keys[i])
+        if cached is not None:
+            results[i] = CaseMetadata(**cached).model_dump()
+            continue
+        rules = extract_rule_metadata(text)
+        if rules["confident"] and not has_relation_cues(text):
+            results[i] = extract_legal_metadata_fast(text)
+            if cache:
+                cache.put("metadata", keys[i], CaseMetadata(**results[i]).model_dump(mode="json"))
+        else:
+            pending.append((i, _batch_window(text)))
+
+    if _llm_client() and pending:
+        for model_name in EXTRACTION_MODELS:
+            if not pending:
+                break
+            unanswered: list[tuple[int, str]] = []
+            for batch in _pack_batches(pending, model_name):
+                try:
+                    validated = _extract_batch_once(model_name, batch)
+                except Exception as e:
+                    logger.warning(f"Model {model_name} failed batch of {len(batch)}: {e}. Trying next...")
+                    if not isinstance(e, ValueError):  # not a bad/truncated reply: the model itself failed
+                        down_models.add(model_name)
+                    unanswered.extend(batch)
+                    continue
+                for idx, _ in batch:
+                    if idx in validated:
+                        results[idx] = validated[idx]
+                        if cache:
+                            cache.put("metadata", window_keys[idx],
+                                      CaseMetadata(**validated[idx]).model_dump(mode="json"))
+                    else:
+                        singles.append(idx)
+                logger.info(f"Batch extraction via {model_name}: {len(validated)}/{len(batch)} items valid")
+            pending = unanswered
+
+    singles.extend(idx for idx, _ in pending)
+    skip = {"skip_models": frozenset(down_models)} if down_models else {}
+    for idx in sorted(singles):
+        results[idx] = extract_legal_metadata_cached(texts[idx], **skip)
+    return results
@@ -0,0 +1,251 @@
+import os
+import re
+import html
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlencode, urlparse, parse_qs
+
+from app.utils.http import http_post
+from app.utils.http_cache import cached_fetch
+from app.utils.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# ─── IndianKanoon API ────────────────────────────────────────────────────────
+#
+# The paid API (https://api.indiankanoon.org) is billed per call. Every call
+# goes through the on-disk HTTP cache, and only calls that actually reach the
+# network wait on the quota bucket; of those, only successful responses are
+# charged to the meter — cache hits are free and unthrottled.
+
+IK_API_BASE = "https://api.indiankanoon.org"
+IK_API_TIMEOUT = float(os.getenv("IK_API_TIMEOUT", "20"))
+# Sustained calls per second and burst allowed by the API plan
+IK_API_RATE_PER_SEC = float(os.getenv("IK_API_RATE_PER_SEC", "2"))
+IK_API_BURST = float(os.getenv("IK_API_BURST", "5"))
+# Search results change as judgments are added: cache them for this long
+# (seconds, 0 = always refetch) instead of the HTTP cache's week.
+IK_SEARCH_CACHE_TTL = int(os.getenv("IK_SEARCH_CACHE_TTL", "3600"))
+# Parallel fetches in get_docs()/aget_docs(); the shared HTTP pool allows
+# HTTP_POOL_MAXSIZE sockets per host, so more would only queue.
+IK_API_CONCURRENCY = int(os.getenv("IK_API_CONCURRENCY", "8"))
+# Daily spend cap in INR (0 = no cap). Tracked in memory, per UTC day.
+IK_API_DAILY_BUDGET = float(os.getenv("IK_API_DAILY_BUDGET_INR", "0"))
+# Price per call in INR by endpoint (defaults: IndianKanoon's published rates)
+IK_API_PRICES = {
+    "doc": float(os.getenv("IK_API_PRICE_DOC", "0.20")),
+    "search": float(os.getenv("IK_API_PRICE_SEARCH", "0.50")),
+}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _is_doc_payload(response) -> bool:
+    """Only cache /doc/ responses that carry a judgment (not an error or empty payload)."""
+    try:
+        payload = response.json()
+    except ValueError:
+        return False
+    return isinstance(payload, dict) and bool(payload.get("doc"))
+
+
+class IKQuotaExceeded(RuntimeError):
+    """The configured daily IndianKanoon API budget is spent."""
+
+
+def search_query_from_url(url: str) -> tuple[str, int] | None:
+    """(formInput, pagenum) of an indiankanoon.org/search/ URL, else None."""
+    parts = urlparse(url)
+    if "indiankanoon.org" not in parts.netloc or not parts.path.startswith("/search"):
+        return None
+    query = parse_qs(parts.query)
+    if not query.get("formInput"):
+        return None
+    try:
+        page = int(query.get("pagenum", ["0"])[0])
+    except ValueError:
+        page = 0
+    return query["formInput"][0], page
+
+
+class IKClient:
+    """
+    IndianKanoon API client: cached, quota-limited and metered.
+
+    get_doc()/search() are blocking and safe to call from worker threads;
+    aget_docs() fetches many documents concurrently from async code (each
+    fetch runs on a thread over the shared keep-alive pool, bounded by a
+    semaphore), and get_docs() is its blocking wrapper.
+    """
+
+    def __init__(self, token: str, rate: float = IK_API_RATE_PER_SEC, burst: float = IK_API_BURST,
+                 daily_budget: float = IK_API_DAILY_BUDGET):
+        self._headers = {"Authorization": f"Token {token}", "Accept": "application/json"}
+        self._bucket = TokenBucket(rate, burst)
+        self.daily_budget = daily_budget
+        self._lock = threading.Lock()
+        self._calls = Counter()
+        self._cache_hits = Counter()
+        self._failed = Counter()
+        self._spent = self._in_flight = 0.0
+        self._day, self._spent_today = time.strftime("%Y-%m-%d", time.gmtime()), 0.0
+        self._ingests, self._ingest_cost = 0, 0.0
+        self._scope = threading.local()
+
+    # ── Metering ──
+
+    def _reserve(self, endpoint: str) -> float:
+        """
+        before_network hook: check the budget, hold the call's price while it
+        is in flight, then wait for quota. Returns the price held.
+        """
+        price = IK_API_PRICES.get(endpoint, 0.0)
+        with self._lock:
+            today = time.strftime("%Y-%m-%d", time.gmtime())
+            if today != self._day:
+                self._day, self._spent_today = today, 0.0
+            if self.daily_budget and self._spent_today + self._in_flight + price > self.daily_budget:
+                raise IKQuotaExceeded(f"IndianKanoon API budget of ₹{self.daily_budget:.2f} for {today} is spent.")
+            self._in_flight += price
+        self._bucket.acquire()
+        return price
+
+    def _settle(self, endpoint: str, price: float, ok: bool):
+        """Release a reservation; only a successful response is billed and metered."""
+        with self._lock:
+            self._in_flight -= price
+            if not ok:
+                self._failed[endpoint] += 1
+                return
+            self._spent_today += price
+            self._spent += price
+            self._calls[endpoint] += 1
+        meter = getattr(self._scope, "meter", None)
+        if meter is not None:
+            meter["cost"] += price
+
+    @contextmanager
+    def metered_ingest(self):
+        """Attribute the API spend of the enclosed calls (same thread) to one ingestion. Yields {"cost": INR}."""
+        meter = self._scope.meter = {"cost": 0.0}
+        try:
+            yield meter
+        finally:
+            self._scope.meter = None
+            with self._lock:
+                self._ingests += 1
+                self._ingest_cost += meter["cost"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": dict(self._calls),
+                "cache_hits": dict(self._cache_hits),
+                "failed": dict(self._failed),
+                "spent_inr": round(self._spent, 2),
+                "spent_today_inr": round(self._spent_today, 2),
+                "daily_budget_inr": self.daily_budget or None,
+                "ingests": self._ingests,
+                "cost_per_ingest_inr": round(self._ingest_cost / self._ingests, 3) if self._ingests else 0.0,
+                "rate_per_sec": self._bucket.rate,
+            }
+
+    # ── Calls ──
+
+    def _post(self, endpoint: str, url: str, cacheable=None, ttl: int | None = None) -> dict:
+        held = None
+
+        def _before_network():
+            nonlocal held
+            held = self._reserve(endpoint)
+
+        try:
+            response = cached_fetch(url, http_post, before_network=_before_network, cacheable=cacheable,
+                                    ttl=ttl, headers=self._headers, timeout=IK_API_TIMEOUT)
+        except Exception:
+            if held is not None:
+                self._settle(endpoint, held, ok=False)
+            raise
+        if held is None:
+            with self._lock:
+                self._cache_hits[endpoint] += 1
+        else:
+            self._settle(endpoint, held, ok=response.status_code == 200)
+        response.raise_for_status()
+        return response.json()
+
+    def probe(self, docid: str | int):
+        """Uncached, metered /doc/ request for diagnostics. Returns the raw response."""
+        held = self._reserve("doc")
+        try:
+            response = http_post(f"{IK_API_BASE}/doc/{docid}/", headers=self._headers, timeout=IK_API_TIMEOUT)
+        except Exception:
+            self._settle("doc", held, ok=False)
+            raise
+        self._settle("doc", held, ok=response.status_code == 200)
+        return response
+
+    def get_doc(self, docid: str | int) -> dict:
+        """The /doc/ payload: {"doc": <judgment HTML>, "title": ..., ...}."""
+        return self._post("doc", f"{IK_API_BASE}/doc/{docid}/", cacheable=_is_doc_payload)
+
+    def search(self, query: str, pagenum: int = 0) -> dict:
+        """Raw /search/ payload: {"docs": [{"tid", "title", "docsource", "publishdate", ...}], "found": ...}."""
+        url = f"{IK_API_BASE}/search/?{urlencode({'formInput': query, 'pagenum': pagenum})}"
+        return self._post("search", url, ttl=IK_SEARCH_CACHE_TTL)
+
+    def search_docs(self, query: str, pagenum: int = 0) -> list[dict]:
+        """Search results as {"docid", "url", "title", "court", "date"} dicts, in rank order."""
+        results = []
+        for doc in self.search(query, pagenum).get("docs") or []:
+            docid = doc.get("tid")
+            if not docid:
+                continue
+            results.append({
+                "docid": str(docid),
+                "url": f"https://indiankanoon.org/doc/{docid}/",
+                "title": html.unescape(_TAG_RE.sub("", doc.get("title") or "")).strip(),
+                "court": doc.get("docsource") or "",
+                "date": doc.get("publishdate") or "",
+            })
+        return results
+
+    async def aget_docs(self, docids, concurrency: int = IK_API_CONCURRENCY) -> dict[str, dict | Exception]:
+        """Fetch many documents concurrently. Maps docid → payload, or the exception that fetch raised."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(docid: str):
+            async with semaphore:
+                try:
+                    return docid, await asyncio.to_thread(self.get_doc, docid)
+                except Exception as e:
+                    return docid, e
+
+        pairs = await asyncio.gather(*(_one(str(d)) for d in dict.fromkeys(docids)))
+        return dict(pairs)
+
+    def get_docs(self, docids, concurrency: int = IK_API_CONCURRENCY) -> dict[str, dict | Exception]:
+        """Blocking wrapper around aget_docs() (for scripts and worker threads, not the event loop)."""
+        return asyncio.run(self.aget_docs(docids, concurrency))
+
+
+# Global client instance
+_ik_client = None
+_ik_client_lock = threading.Lock()
+
+
+def get_ik_client() -> IKClient | None:
+    """Shared IKClient, created on first use. None when IK_API_TOKEN is not set."""
+    global _ik_client
+    if _ik_client is None:
+        token = os.getenv("IK_API_TOKEN", "").strip()
+        if not token:
+            return None
+        with _ik_client_lock:
+            if _ik_client is None:
+                _ik_client = IKClient(token)
+    return _ik_client
@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+INGESTION_LEDGER_ENABLED = os.getenv("INGESTION_LEDGER_ENABLED", "1") != "0"
+
+# Source kinds recorded in the ledger
+KIND_URL = "url"
+KIND_FILE = "file"  # key: SHA-256 of the uploaded bytes
+
+_LOOKUP_BATCH = 500  # keys per IN (...) query, below SQLite's variable limit
+
+
+class IngestionLedger:
+    """
+    Local record of every source that was successfully ingested: URLs, and
+    uploaded files by the SHA-256 of their bytes.
+
+    Answers "was this already ingested?" with an indexed SQLite lookup
+    instead of an embed + filtered Pinecone query, so duplicates can be
+    rejected before any fetch, conversion or OCR work starts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_data_dir() / "ledger.sqlite"
+        self._lock = threading.Lock()
+        self._db = connect_sqlite(self.path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS ingested (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                ingested_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )"""
+        )
+        self._db.commit()
+
+    def record(self, kind: str, key: str, doc_id: str = "", title: str = ""):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?, ?)",
+                (kind, key, doc_id or "", title or "", time.time()),
+            )
+            self._db.commit()
+
+    def get(self, kind: str, key: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT doc_id, title, ingested_at FROM ingested WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"doc_id": row[0], "title": row[1], "ingested_at": row[2]}
+
+    def forget(self, kind: str, key: str) -> bool:
+        """Drop one entry, e.g. when its document is no longer in the knowledge base."""
+        with self._lock:
+            removed = self._db.execute("DELETE FROM ingested WHERE kind = ? AND key = ?", (kind, key)).rowcount
+            self._db.commit()
+        return bool(removed)
+
+    def forget_doc(self, doc_id: str) -> int:
+        """Drop every entry that points at ``doc_id`` (a deleted or re-extracted document)."""
+        if not doc_id:
+            return 0
+        with self._lock:
+            removed = self._db.execute("DELETE FROM ingested WHERE doc_id = ?", (doc_id,)).rowcount
+            self._db.commit()
+        return removed
+
+    def known(self, kind: str, keys) -> set[str]:
+        """The subset of ``keys`` already in the ledger, looked up in batches."""
+        keys = list(dict.fromkeys(keys))
+        found = set()
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key FROM ingested WHERE kind = ? AND key IN ({','.join('?' * len(batch))})",
+                    (kind, *batch),
+                ).fetchall()
+                found.update(r[0] for r in rows)
+        return found
+
+    def doc_ids(self, kind: str, keys) -> dict[str, str]:
+        """{key: doc_id} for the ``keys`` in the ledger, looked up in batches."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start:start + _LOOKUP_BATCH]
+                rows = self._db.execute(
+                    f"SELECT key, doc_id FROM ingested WHERE kind = ? AND key IN ({','.join('?' * len(batch))})",
+                    (kind, *batch),
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT kind, COUNT(*) FROM ingested GROUP BY kind").fetchall()
+        return {"entries": dict(rows)}
+
+
+# Global ledger instance
+_ledger = None
+
+
+def get_ingestion_ledger() -> IngestionLedger | None:
+    """Get or initialize the shared ingestion ledger. None when INGESTION_LEDGER_ENABLED=0."""
+    global _ledger
+    if _ledger is None and INGESTION_LEDGER_ENABLED:
+        try:
+            _ledger = IngestionLedger()
+        except Exception as e:
+            logger.warning(f"Ingestion ledger unavailable ({e}). Continuing without it.")
+            return None
+    return _ledger
@@ -0,0 +1,136 @@
+import io
+import os
+import re
+import base64
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.clients import llm_timeout
+from app.utils.result_cache import get_result_cache, content_hash
+
+logger = logging.getLogger(__name__)
+
+# ─── Page-level OCR for scanned PDFs ─────────────────────────────────────────
+#
+# MarkItDown's OCR plugin walks a PDF page by page and sends every embedded
+# image to the vision model one call at a time. Here each page is classified
+# first: pages with a usable text layer are taken as-is, only image-only pages
+# are rendered and OCR'd (several at once), and every OCR result is cached by
+# the hash of the rendered page, so re-uploading a scan costs no LLM calls.
+
+# First vision-capable model in the EXTRACTION_MODELS cascade
+OCR_MODEL = "nvidia/nemotron-nano-12b-v2-vl:free"
+OCR_PAGE_CONCURRENCY = int(os.getenv("OCR_PAGE_CONCURRENCY", "4"))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+# A page whose text layer has fewer non-whitespace characters than this is
+# treated as image-only (blank scans often carry a stray page number).
+MIN_TEXT_LAYER_CHARS = int(os.getenv("MIN_TEXT_LAYER_CHARS", "80"))
+
+# Bump to invalidate cached page OCR (e.g. after changing the prompt or model).
+OCR_PAGE_CACHE_VERSION = 1
+
+OCR_PROMPT = (
+    "Extract all text from this scanned page of an Indian court judgment. "
+    "Return ONLY the extracted text, maintaining the original layout and order. "
+    "Do not add any commentary or description."
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def has_text_layer(text: str) -> bool:
+    return len(_WHITESPACE_RE.sub("", text or "")) >= MIN_TEXT_LAYER_CHARS
+
+
+def _render_page_png(page) -> bytes:
+    buf = io.BytesIO()
+    page.to_image(resolution=OCR_DPI).original.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def ocr_page_image(png: bytes, llm_client, model: str = OCR_MODEL) -> str:
+    """OCR one rendered page with the vision model."""
+    data_uri = f"data:image/png;base64,{base64.b64encode(png).decode('ascii')}"
+    response = llm_client.chat.completions.create(
+        model=model,
+        messages=[{
+            "role": "user",
+            "content": [
+                {"type": "text", "text": OCR_PROMPT},
+                {"type": "image_url", "image_url": {"url": data_uri}},
+            ],
+        }],
+        timeout=llm_timeout("ocr"),
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+def _ocr_page_cached(png: bytes, llm_client, model: str) -> tuple[str, bool]:
+    """Returns (text, cache_hit). Empty results are not cached, so a failed page is retried next time."""
+    cache = get_result_cache()
+    key = f"{OCR_PAGE_CACHE_VERSION}:{model}:{content_hash(png)}"
+    if cache is not None:
+        cached = cache.get("ocr_page", key)
+        if cached is not None:
+            return cached, True
+    text = ocr_page_image(png, llm_client, model)
+    if cache is not None and text:
+        cache.put("ocr_page", key, text)
+    return text, False
+
+
+def ocr_pdf(path: str, llm_client, model: str = OCR_MODEL) -> str:
+    """
+    Convert a (possibly scanned) PDF to Markdown, one "## Page N" section per
+    page like MarkItDown's OCR converter.
+
+    Pages are rendered sequentially (pdfium is not thread-safe) while up to
+    OCR_PAGE_CONCURRENCY vision calls run in the background; at most twice
+    that many rendered pages are held in memory at once. A page whose OCR
+    fails keeps whatever text layer it had.
+    """
+    import pdfplumber
+
+    texts: list[str] = []
+    futures = {}
+    in_flight = threading.BoundedSemaphore(2 * OCR_PAGE_CONCURRENCY)
+    cache_hits = 0
+
+    def _ocr(png: bytes):
+        try:
+            return _ocr_page_cached(png, llm_client, model)
+        finally:
+            in_flight.release()
+
+    with pdfplumber.open(path) as pdf, \
+         ThreadPoolExecutor(max_workers=OCR_PAGE_CONCURRENCY, thread_name_prefix="ocr-page") as pool:
+        for page_num, page in enumerate(pdf.pages):
+            text = page.extract_text() or ""
+            texts.append(text.strip())
+            if has_text_layer(text):
+                continue
+            in_flight.acquire()
+            try:
+                png = _render_page_png(page)
+            except Exception:
+                in_flight.release()
+                raise
+            futures[page_num] = pool.submit(_ocr, png)
+            page.close()  # drop pdfplumber's per-page object cache
+
+        for page_num, future in futures.items():
+            try:
+                ocr_text, hit = future.result()
+            except Exception as e:
+                logger.warning(f"OCR failed for page {page_num + 1} of {path}: {e}")
+                continue
+            cache_hits += hit
+            if ocr_text:
+                texts[page_num] = ocr_text
+
+    logger.info(
+        f"Page OCR for {os.path.basename(path)}: {len(texts)} pages, "
+        f"{len(texts) - len(futures)} with a text layer, {len(futures)} OCR'd ({cache_hits} from cache)"
+    )
+    return "\n\n".join(f"## Page {i}\n\n{text}" for i, text in enumerate(texts, 1)).strip()
@@ -3,47 +3,56 @@ logger = logging.getLogger(__name__)
 
 import os
 import re
+import json
 import difflib
+import threading
 import traceback
-from openai import OpenAI
-from pinecone import Pinecone
+from collections import Counter
+from datetime import date, datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# ─── OpenRouter Client ───────────────────────────────────────────────────────
+from app.utils.pinecone import get_pinecone_client, get_pinecone_index
+from app.utils.clients import UNSET, get_openrouter_client, llm_timeout
+from app.utils.singleflight import SingleFlight
+from app.core.citation_graph import get_citation_graph
+from app.core.rules import canonical_court, canonical_domain, infer_query_filters
+from app.core.domain_classifier import get_domain_classifier
+from app.core.context import pack_context, context_budget_tokens
+from app.core.case_index import (
+    get_case_index, find_case_mentions, name_tokens, _LEGAL_STOPWORDS,
+)
 
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# ─── Clients ─────────────────────────────────────────────────────────────────
+#
+# Created on first use through the shared providers, so importing this module
+# makes no network call. Assigning/patching ``client`` or ``index`` overrides
+# the provider.
 
-try:
-    if OPENROUTER_API_KEY:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY,
-        )
-    else:
-        client = None
-except Exception as e:
-    client = None
-    logger.info(f"Warning: Failed to initialize OpenAI client: {e}")
+client = UNSET
+index = UNSET
 
-# ─── Pinecone Client ─────────────────────────────────────────────────────────
 
-from app.utils.pinecone import get_pinecone_client, get_pinecone_index
+def _llm_client():
+    return get_openrouter_client() if client is UNSET else client
+
+
+def _pinecone_index():
+    if index is not UNSET:
+        return index
+    try:
+        return get_pinecone_index()
+    except Exception as e:
+        logger.info(f"Warning: Failed to initialize Pinecone index: {e}")
+        return None
+
 
 # Constants
 EMBED_MODEL = "llama-text-embed-v2"
-TOP_K = 50 # Increased for better recall
+TOP_K = 50 # Upper bound for adaptive retrieval (see K_STEPS)
 SIMILARITY_THRESHOLD = 0.5  # Ignore anything below 50% match
 
-# Initializing Pinecone index
-# Initializing Pinecone index
-try:
-    index = get_pinecone_index()
-except Exception as e:
-    logger.info(f"Warning: Failed to initialize Pinecone index: {e}")
-    index = None
-
 
 # ─── LLM Models (Free models fallback cascade) ───────────────────────────────
 
@@ -56,7 +65,30 @@ MODELS = [
 ]
 
 
-def get_llm_response(prompt: str) -> str:
+# Model families for which OpenRouter honours explicit `cache_control`
+# breakpoints. Others (DeepSeek, OpenAI, ...) cache identical prefixes
+# automatically, or not at all, and receive plain string content.
+CACHE_CONTROL_MODEL_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def _to_messages(prompt, model_name: str) -> list[dict]:
+    """
+    Chat messages for ``prompt`` (a plain string or a message list), with a
+    cache breakpoint on the static system message where the provider needs one.
+    """
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    if not model_name.startswith(CACHE_CONTROL_MODEL_PREFIXES):
+        return prompt
+    return [
+        {**m, "content": [{"type": "text", "text": m["content"], "cache_control": {"type": "ephemeral"}}]}
+        if m["role"] == "system" else m
+        for m in prompt
+    ]
+
+
+def get_llm_response(prompt: str | list[dict]) -> str:
+    client = _llm_client()
     if not client:
         return "Error: OpenRouter API configuration missing (Key not found)."
     
@@ -65,10 +97,8 @@ def get_llm_response(prompt: str) -> str:
         try:
             response = client.chat.completions.create(
                 model=model_name,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                timeout=12.0  # 12s/model → worst-case cascade 60s; DeepSeek typically 3-8s
+                messages=_to_messages(prompt, model_name),
+                timeout=llm_timeout("query"),  # per model; DeepSeek typically 3-8s
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -156,35 +186,257 @@ def _filter_diversity(hits: list, max_per_case: int = 2, min_cases: int = 3) ->
     return selected
 
 
-def _detect_legal_domain(hits: list) -> str:
+# ─── Citation-graph signals ──────────────────────────────────────────────────
+
+GRAPH_BOOST_PER_CITATION = 0.01   # score bonus per upholding/citing judgment
+GRAPH_BOOST_CAP = 0.05            # never let authority outweigh similarity
+
+
+def _drop_graph_overruled(hits: list) -> list:
     """
-    Looks at the top 3 hits and extracts the legal domain from metadata.
-    Returns 'Indian Law' as fallback.
+    Drop hits whose case the local citation graph knows is overruled. This
+    covers chunks stored before the overruling judgment was ingested, which
+    the Pinecone ``status`` filter cannot see.
     """
-    if not hits:
-        return "Indian Law"
-        
-    domains = []
-    for hit in hits[:3]:
-        # Pinecone metadata format can vary slightly based on serverless vs pod
-        # Safely access metadata or fields
-        meta = {}
-        if isinstance(hit, dict):
-            meta = hit.get("metadata") or hit.get("fields", {})
-        elif hasattr(hit, "metadata"):
-            meta = hit.metadata
-            
-        if meta and isinstance(meta, dict):
-            domain = meta.get("legal_domain") or meta.get("ai_legal_domain")
-            if domain and domain.lower() not in {"general", "unknown"}:
-                domains.append(domain)
-            
-    if not domains:
-        return "Indian Law"
-        
-    # Return the most frequent domain
-    from collections import Counter
-    return Counter(domains).most_common(1)[0][0]
+    graph = get_citation_graph()
+    if graph is None:
+        return hits
+    kept = []
+    for hit in hits:
+        meta = hit.get("metadata") or {}
+        name = meta.get("ai_case_name") or meta.get("title", "")
+        later = graph.overruling_case(name, meta.get("ai_validated_date"))
+        if later:
+            logger.info(f"  DROP (citation graph): '{name}' overruled by '{later}'")
+            continue
+        kept.append(hit)
+    return kept
+
+
+def _boost_graph_authority(hits: list) -> list:
+    """
+    Add a small, capped score bonus for precedents the graph shows are often
+    upheld or cited, and re-sort. Applied after the relevance gate so it
+    only reorders evidence, never decides whether there is any.
+    """
+    graph = get_citation_graph()
+    if graph is None:
+        return hits
+    for hit in hits:
+        meta = hit.get("metadata") or {}
+        authority = graph.authority(meta.get("ai_case_name") or meta.get("title", ""), meta.get("ai_validated_date"))
+        if authority:
+            hit["_score"] = hit.get("_score", 0) + min(GRAPH_BOOST_CAP, GRAPH_BOOST_PER_CITATION * authority)
+    return sorted(hits, key=lambda h: h.get("_score", 0), reverse=True)
+
+
+# ─── Query-time metadata filters ─────────────────────────────────────────────
+
+# Infer domain / judgment-year / court filters from the query text itself
+QUERY_AUTO_FILTERS = os.getenv("QUERY_AUTO_FILTERS", "1") != "0"
+FILTERED_TOP_K = 20     # a filtered candidate set needs fewer neighbours
+MIN_FILTERED_HITS = 3   # below this, inferred filters are dropped and the search retried
+# Court and domain inferred from the query only re-rank hits: records from
+# older ingests lack ai_court or carry a raw LLM domain label, so an exact
+# filter on an inferred value would silently drop them.
+QUERY_HINT_BOOST = 0.05
+_HINT_KEYS = ("legal_domain", "court")
+_DATE_KEYS = ("date_from", "date_to")
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def _iso_to_datenum(value) -> int:
+    """'2015-03-24' (or a date) → 20150324, matching ai_judgment_datenum."""
+    value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return int(date.fromisoformat(value[:10]).strftime("%Y%m%d"))
+
+
+def _build_metadata_filter(filters: dict) -> dict:
+    """
+    Pinecone metadata filter for active records narrowed by ``filters``
+    (``legal_domain``, ``date_from``, ``date_to``, ``court``). Domain and
+    court are compared in their canonical form (rules.canonical_domain /
+    canonical_court). Date bounds apply to the numeric ai_judgment_datenum
+    field, so records without one are excluded by any date bound — see
+    _adaptive_search(date_fallback=True) and scripts/backfill_filter_metadata.py.
+    """
+    clauses = [{"status": {"$eq": "active"}}]
+    if filters.get("legal_domain"):
+        clauses.append({"ai_legal_domain": {"$eq": canonical_domain(filters["legal_domain"])}})
+    date_range = {}
+    if filters.get("date_from"):
+        date_range["$gte"] = _iso_to_datenum(filters["date_from"])
+    if filters.get("date_to"):
+        date_range["$lte"] = _iso_to_datenum(filters["date_to"])
+    if date_range:
+        clauses.append({"ai_judgment_datenum": date_range})
+    if filters.get("court"):
+        clauses.append({"ai_court": {"$eq": canonical_court(filters["court"])}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _meta_datenum(meta: dict) -> int | None:
+    """YYYYMMDD judgment date of a record: ai_judgment_datenum, else parsed from ai_judgment_date."""
+    if meta.get("ai_judgment_datenum"):
+        return int(meta["ai_judgment_datenum"])
+    raw = str(meta.get("ai_validated_date") or meta.get("ai_judgment_date") or "").strip()[:10]
+    for fmt in _DATE_FORMATS:
+        try:
+            return int(datetime.strptime(raw, fmt).strftime("%Y%m%d"))
+        except ValueError:
+            continue
+    return None
+
+
+def _within_date_bounds(meta: dict, filters: dict) -> bool:
+    datenum = _meta_datenum(meta)
+    if datenum is None:
+        return False
+    if filters.get("date_from") and datenum < _iso_to_datenum(filters["date_from"]):
+        return False
+    if filters.get("date_to") and datenum > _iso_to_datenum(filters["date_to"]):
+        return False
+    return True
+
+
+def _boost_query_hints(hits: list, hints: dict) -> list:
+    """Add QUERY_HINT_BOOST per inferred court/domain a hit matches, and re-sort."""
+    if not hints:
+        return hits
+    domain = canonical_domain(hints["legal_domain"]) if hints.get("legal_domain") else None
+    court = canonical_court(hints["court"]) if hints.get("court") else None
+    for hit in hits:
+        meta = hit.get("metadata") or {}
+        matched = (domain is not None and canonical_domain(meta.get("ai_legal_domain")) == domain) + \
+                  (court is not None and canonical_court(meta.get("ai_court")) == court)
+        if matched:
+            hit["_score"] = hit.get("_score", 0) + QUERY_HINT_BOOST * matched
+    return sorted(hits, key=lambda h: h.get("_score", 0), reverse=True)
+
+
+def _search_index(query_vector: list, filters: dict, top_k: int):
+    return _pinecone_index().query(
+        namespace="",
+        vector=query_vector,
+        top_k=top_k,
+        include_metadata=True,
+        filter=_build_metadata_filter(filters),
+    )
+
+
+# ─── Adaptive retrieval ──────────────────────────────────────────────────────
+#
+# The downstream gates only need a handful of hits: _assess_relevance reads
+# the top 5 and _filter_diversity keeps at most 10. Retrieval therefore
+# starts small and widens only when the hits are relevant but too few
+# distinct cases survive the diversity filter.
+
+K_STEPS = tuple(int(k) for k in os.getenv("RETRIEVAL_K_STEPS", "10,25,50").split(","))
+RELEVANCE_FLOOR = 0.25   # top score below this → nothing deeper can be relevant either
+
+_retrieval_stats = {"queries": 0, "rounds": 0, "k_used": Counter(), "exits": Counter()}
+_retrieval_stats_lock = threading.Lock()
+
+
+def _to_hits(matches) -> list[dict]:
+    """Normalise Pinecone matches into the hit dicts the gates expect."""
+    hits = []
+    for hit in matches:
+        score = getattr(hit, "score", 0)
+        meta = getattr(hit, "metadata", {})
+        if not isinstance(meta, dict):
+            meta = dict(meta) if meta else {}
+        logger.info(f"  HIT: score={score:.4f}  title={meta.get('title', 'Unknown')}")
+        hits.append({"_score": score, "fields": meta, "metadata": meta})
+    return hits
+
+
+def _adaptive_search(user_query: str, query_vector: list, filters: dict, date_fallback: bool = False):
+    """
+    Query with increasing top_k (K_STEPS, capped at FILTERED_TOP_K when
+    filtered) until the gates are satisfied. With ``date_fallback`` the date
+    bounds are left out of the Pinecone filter and checked against each
+    hit's ai_judgment_date instead, for records ingested before
+    ai_judgment_datenum existed.
+
+    Exits early when the top score is under RELEVANCE_FLOOR, when the raw
+    matches are judged irrelevant (a wider k does not change the top 5), or
+    when Pinecone returned fewer matches than asked for. Hits dropped by the
+    graph or date post-filter keep it widening. Returns
+    (search_results, hits, is_relevant), relevance judged on the kept hits.
+    """
+    max_k = FILTERED_TOP_K if filters else TOP_K
+    steps = [k for k in K_STEPS if k < max_k] + [max_k]
+    search_filters = {k: v for k, v in filters.items() if k not in _DATE_KEYS} if date_fallback else filters
+    rounds = 0
+    for k in steps:
+        rounds += 1
+        search_results = _search_index(query_vector, search_filters, k)
+        matches = search_results.matches
+        logger.info(f"DEBUG: Pinecone search (top_k={k}) returned {len(matches)} raw hits.")
+        raw_hits = _to_hits(matches)
+        hits = _drop_graph_overruled(raw_hits)
+        if date_fallback:
+            hits = [h for h in hits if _within_date_bounds(h["metadata"], filters)]
+
+        # The floor and relevance exits judge what Pinecone returned: when the
+        # graph or date post-filter drops the first k hits, widening may still
+        # reach kept ones further down the ranking.
+        is_relevant = _assess_relevance(user_query, {"matches": raw_hits})
+        if not matches or max(getattr(m, "score", 0) for m in matches) < RELEVANCE_FLOOR:
+            exit_reason = "floor"
+        elif not is_relevant:
+            exit_reason = "irrelevant"
+        elif len({(h["metadata"].get("title") or "").strip() for h in _filter_diversity(hits)}) >= 3:
+            exit_reason = "satisfied"
+        elif len(matches) < k:
+            exit_reason = "exhausted"
+        elif k == max_k:
+            exit_reason = "max_k"
+        else:
+            continue
+        break
+
+    with _retrieval_stats_lock:
+        _retrieval_stats["queries"] += 1
+        _retrieval_stats["rounds"] += rounds
+        _retrieval_stats["k_used"][k] += 1
+        _retrieval_stats["exits"][exit_reason] += 1
+    logger.info(f"DEBUG: Adaptive retrieval stopped at top_k={k} after {rounds} round(s): {exit_reason}")
+    if is_relevant and len(hits) < len(raw_hits):
+        is_relevant = _assess_relevance(user_query, {"matches": hits})
+    return search_results, hits, is_relevant
+
+
+def get_retrieval_stats() -> dict:
+    """How often each top_k was the final one, why retrieval stopped, and mean rounds per query."""
+    with _retrieval_stats_lock:
+        queries = _retrieval_stats["queries"]
+        return {
+            "queries": queries,
+            "k_used": dict(_retrieval_stats["k_used"]),
+            "exits": dict(_retrieval_stats["exits"]),
+            "mean_rounds": round(_retrieval_stats["rounds"] / queries, 2) if queries else 0.0,
+        }
+
+
+def _classify_query_domain(query_vector: list) -> str | None:
+    """
+    Legal domain of the query embedding from the precomputed domain centroids
+    (see app/core/domain_classifier.py). None when no centroids are built for
+    EMBED_MODEL or the nearest one is not a confident match.
+    """
+    classifier = get_domain_classifier()
+    if classifier is None or classifier.model not in (None, EMBED_MODEL):
+        return None
+    try:
+        domain, score = classifier.classify(query_vector)
+    except Exception as e:
+        logger.warning(f"Domain classification failed: {e}")
+        return None
+    logger.info(f"DEBUG: Query domain from centroids: {domain or 'unclassified'} (score={score:.3f})")
+    # Centroid files built before labels were canonicalised may use raw LLM labels
+    return canonical_domain(domain) if domain else None
 
 
 def _extract_llm_cited_cases(analysis_text: str) -> list[str]:
@@ -220,11 +472,25 @@ def _extract_llm_cited_cases(analysis_text: str) -> list[str]:
     return result
 
 
-# Legal stopwords excluded from word-bag matching (appear in almost every case name)
-_LEGAL_STOPWORDS = {
-    "the", "and", "vs", "vs.", "v.", "v", "state", "union",
-    "india", "of", "in", "re", "ors", "anr", "another"
-}
+def _link_llm_cited_cases(llm_cited: list[str]) -> list[dict]:
+    """
+    Resolve LLM-cited case names against the local case-name index so the
+    frontend can link the ones we actually hold. No network calls.
+    """
+    case_index = get_case_index()
+    if case_index is None:
+        return []
+    linked = []
+    for cited in llm_cited:
+        entry = case_index.lookup(cited, include_overruled=True)
+        if entry:
+            linked.append({
+                "title": cited,
+                "matched_case": entry["name"],
+                "url": entry["url"],
+                "status": entry["status"],
+            })
+    return linked
 
 
 def _verify_citations(analysis_text: str, retrieved_titles: list[str]) -> dict:
@@ -244,11 +510,21 @@ def _verify_citations(analysis_text: str, retrieved_titles: list[str]) -> dict:
     grounded = []   # Retrieved AND referenced in the response
     ungrounded = [] # Retrieved but NOT referenced — possible hallucination
 
+    # Case names cited in the analysis, resolved through the shared case-name
+    # index ("Vishaka v. State of Rajasthan" → the full IndianKanoon title
+    # and its aliases) before falling back to the window scan.
+    case_index = get_case_index()
+    mentioned_keys = set()
+    if case_index is not None:
+        for mention in find_case_mentions(analysis_text):
+            for _, entry in case_index.lookup_all(mention, include_overruled=True):
+                mentioned_keys.update(" ".join(name_tokens(n)) for n in [entry["name"], *entry["aliases"]])
+
     for title in retrieved_titles:
         title_lower = title.lower()
 
-        # Fast path: verbatim substring match
-        if title_lower in analysis_lower:
+        # Fast path: verbatim substring match, or a resolved case-name mention
+        if title_lower in analysis_lower or " ".join(name_tokens(title)) in mentioned_keys:
             grounded.append(title)
             continue
 
@@ -293,10 +569,43 @@ def _verify_citations(analysis_text: str, retrieved_titles: list[str]) -> dict:
     }
 
 
-def query_legal_assistant(user_query: str):
+# ─── Request coalescing ──────────────────────────────────────────────────────
+#
+# Identical questions that arrive while one is already being answered wait
+# for that answer instead of repeating the embed, index.query and LLM calls.
+
+QUERY_COALESCING_ENABLED = os.getenv("QUERY_COALESCING_ENABLED", "1") != "0"
+_query_flight = SingleFlight()
+
+
+def _coalescing_key(user_query: str, filters: dict | None) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive query + filters."""
+    normalized = " ".join(user_query.lower().split()).rstrip("?.! ")
+    active = {k: str(v) for k, v in (filters or {}).items() if v}
+    return json.dumps([normalized, active], sort_keys=True)
+
+
+def get_query_coalescing_stats() -> dict:
+    return _query_flight.stats()
+
+
+def query_legal_assistant(user_query: str, filters: dict | None = None):
+    """
+    Answer a legal query (see _answer_query). Concurrent identical queries
+    share one in-flight computation.
+    """
+    if not QUERY_COALESCING_ENABLED:
+        return _answer_query(user_query, filters)
+    return _query_flight.do(_coalescing_key(user_query, filters), lambda: _answer_query(user_query, filters))
+
+
+def _answer_query(user_query: str, filters: dict | None = None):
     """
     RAG Pipeline with Pinecone Integrated Embeddings + Multi-Gate Relevance.
     
+    0. Combine explicit ``filters`` (legal_domain, date_from, date_to, court)
+       with filters inferred from the query text and, failing those, the
+       legal domain of the nearest precomputed domain centroid.
     1. Send the user's raw text query to Pinecone for integrated search.
     2. Run 3-gate relevance assessment (absolute floor, score gap, LLM check).
     3. If relevant context found, generate case-law-grounded analysis.
@@ -308,6 +617,17 @@ def query_legal_assistant(user_query: str):
     cited_cases_details = []
     search_results = None
     has_relevant_context = False
+
+    # ── 0. Metadata filters: explicit ones always apply, inferred dates are relaxed if too narrow,
+    #       inferred court/domain only re-rank ──
+    explicit_filters = {k: v for k, v in (filters or {}).items() if v}
+    inferred = {}
+    if QUERY_AUTO_FILTERS:
+        inferred = {k: v for k, v in infer_query_filters(user_query).items() if k not in explicit_filters}
+    query_hints = {k: v for k, v in inferred.items() if k in _HINT_KEYS}
+    inferred_filters = {k: v for k, v in inferred.items() if k not in _HINT_KEYS}
+    applied_filters = {**explicit_filters, **inferred_filters}
+    query_domain = explicit_filters.get("legal_domain") or query_hints.get("legal_domain")
     
     # ── 1. Retrieve from Pinecone using Integrated Embeddings ──
     logger.info(f"\n{'='*60}")
@@ -322,64 +642,42 @@ def query_legal_assistant(user_query: str):
         )
         query_vector = embeddings[0].values
 
-        search_results = index.query(
-            namespace="",
-            vector=query_vector,
-            top_k=TOP_K,
-            include_metadata=True,
-            filter={"status": {"$eq": "active"}}
-        )
-        
-        hits = []
-        logger.info(f"DEBUG: Pinecone search returned {len(search_results.matches)} raw hits.")
-        for hit in search_results.matches:
-            score = getattr(hit, "score", 0)
-            meta = getattr(hit, "metadata", {})
-            if not isinstance(meta, dict):
-                meta = dict(meta) if meta else {}
-                
-            hit_dict = {
-                "_score": score,
-                "fields": meta,
-                "metadata": meta
-            }
-            
-            title = meta.get("title", "Unknown")
-            logger.info(f"  HIT: score={score:.4f}  title={title}")
-            hits.append(hit_dict)
-        
-        # ── 2. Multi-gate relevance assessment ──
-        is_relevant = _assess_relevance(user_query, {"matches": hits})
+        # Nearest domain centroid, unless the caller or a statute mention already set the domain
+        if not query_domain:
+            query_domain = _classify_query_domain(query_vector)
+            if query_domain and QUERY_AUTO_FILTERS:
+                query_hints["legal_domain"] = query_domain
+
+        search_results, hits, is_relevant = _adaptive_search(user_query, query_vector, applied_filters)
+        if inferred_filters and len(search_results.matches) < MIN_FILTERED_HITS:
+            logger.info(f"DEBUG: Inferred filters {inferred_filters} too narrow; retrying without them.")
+            applied_filters = explicit_filters
+            search_results, hits, is_relevant = _adaptive_search(user_query, query_vector, applied_filters)
+        if any(k in applied_filters for k in _DATE_KEYS) and len(search_results.matches) < MIN_FILTERED_HITS:
+            logger.info("DEBUG: Date bounds matched too few records; retrying against ai_judgment_date.")
+            search_results, hits, is_relevant = _adaptive_search(
+                user_query, query_vector, applied_filters, date_fallback=True
+            )
         logger.info(f"DEBUG RELEVANCE DECISION: is_relevant={is_relevant}")
         
         if is_relevant and hits: # If LLM says relevant, proceed with filtering
             has_relevant_context = True
             
             # Apply Diversity Filtering
-            selected_docs_raw = _filter_diversity(hits)
+            selected_docs_raw = _filter_diversity(_boost_graph_authority(_boost_query_hints(hits, query_hints)))
 
-            # Format context for LLM
-            context_text = ""
-            for doc_hit in selected_docs_raw:
-                # Pinecone returns metadata in 'fields' for serverless, or 'metadata' for pod
-                meta = doc_hit.get("fields", {}) or doc_hit.get("metadata", {})
+            # Merge adjacent chunks per case and pack best-first into the token budget
+            context_text, packed_cases = pack_context(selected_docs_raw, context_budget_tokens(MODELS))
+            for case in packed_cases:
+                meta = case["meta"]
                 title = meta.get("title", "Unknown Case")
-                text = meta.get("text", "")
-                score = doc_hit.get("_score", 0)
+                text = case["text"]
 
                 # Strip markdown heading markers and embedded newlines from stored titles.
                 # Titles are stored as the first line of the doc which may include
                 # "## Case Name\n### Equivalent citations..." from MarkItDown output.
-                import re as _re
-                clean_title = _re.split(r'\\n|\n|###|##', title.lstrip('#').strip())[0].strip()[:150]
+                clean_title = re.split(r'\\n|\n|###|##', title.lstrip('#').strip())[0].strip()[:150]
 
-                domain = meta.get('ai_legal_domain', '')
-                judgment_date = meta.get('ai_judgment_date', '')
-                date_info = f" (Decided: {judgment_date})" if judgment_date and judgment_date != "UNKNOWN" else ""
-                domain_info = f" [{domain}]" if domain and domain != "General" else ""
-                
-                context_text += f"\nCase: {title}{date_info}{domain_info} [Relevance: {score:.2f}]\nContent: {text[:1500]}...\n"
-                
                 if clean_title and clean_title not in ('Unknown Case', 'UNKNOWN', 'Full Document') and not clean_title.startswith('['):
                     if clean_title not in cited_cases:
                         cited_cases.append(clean_title)
@@ -397,13 +695,8 @@ def query_legal_assistant(user_query: str):
         traceback.print_exc()
         context_text = ""
     
-    # ── 3. Detect domain from relevant hits only ──
-    detected_domain = "Indian Law"
-    try:
-        if has_relevant_context and search_results and hasattr(search_results, 'result') and search_results.result.hits:
-            detected_domain = _detect_legal_domain(search_results.result.hits)
-    except Exception:
-        pass
+    # ── 3. Prompt domain: the one decided before retrieval, kept even if its filter was relaxed ──
+    detected_domain = query_domain or "Indian Law"
     
     # ── 4. Generate with the right prompt based on relevance ──
     if has_relevant_context and context_text:
@@ -460,6 +753,7 @@ ORIGINAL ANALYSIS:
     # This captures landmark cases the LLM references from its own knowledge
     # (especially important in general analysis mode where cited_cases is empty)
     llm_cited = _extract_llm_cited_cases(analysis)
+    llm_cited_details = _link_llm_cited_cases(llm_cited)
     
     logger.info(f"DEBUG: Response generated. relevance_quality={relevance_quality}, "
           f"cited_cases={cited_cases}, llm_cited={llm_cited}")
@@ -472,29 +766,42 @@ ORIGINAL ANALYSIS:
         "citation_verification": citation_check,
         "relevance_quality": relevance_quality,
         "llm_cited_cases": llm_cited,
+        "llm_cited_cases_details": llm_cited_details,
+        "applied_filters": applied_filters,
+        "ranking_hints": query_hints,
     }
 
 
-def _build_grounded_prompt(user_query: str, context_text: str, detected_domain: str) -> str:
-    """
-    Prompt used when the retrieval step found genuinely relevant cases.
-    Instructs the LLM to cite them — but only the ones that are actually applicable.
-    """
-    return f"""You are an expert Legal AI Assistant specializing in {detected_domain} under Indian jurisdiction.
+# ─── Prompt layout ───────────────────────────────────────────────────────────
+#
+# Each prompt is a static system message (role, section layout, formatting
+# rules) followed by a user message holding everything that varies per query
+# (domain, retrieved context, the query). Identical system messages form a
+# byte-identical prefix that providers can cache across queries. Bump
+# PROMPT_LAYOUT_VERSION whenever a system message changes so cache and
+# quality comparisons stay attributable.
 
-Relevant Case Law Context (from verified legal database):
-{context_text}
+PROMPT_LAYOUT_VERSION = 2
 
-User Query:
-{user_query}
-
-INSTRUCTIONS:
-Structure your response using these markdown sections. Write concisely — be dense with information, not verbose.
+_RESPONSE_SECTIONS = """Structure your response using these markdown sections. Write concisely — be dense with information, not verbose.
 
 ## Risk Assessment
 
 State the risk level as **High**, **Medium**, or **Low** in bold, then give a concise 2-3 sentence explanation of the overall legal risk.
+"""
+
+_RECOMMENDATIONS = """## Recommendations
 
+Numbered, actionable strategies to mitigate risk:
+1. First recommendation with specific legal basis
+2. Second recommendation
+3. Third recommendation (and so on)
+"""
+
+GROUNDED_SYSTEM_PROMPT = f"""You are an expert Legal AI Assistant specializing in Indian law. Each request gives the legal domain, relevant case law context from a verified legal database, and the user's query.
+
+INSTRUCTIONS:
+{_RESPONSE_SECTIONS}
 ## Detailed Analysis
 
 Analyse the legal issues as flowing prose. For each relevant case from the context:
@@ -510,42 +817,22 @@ Use paragraphs, bullet points, and numbered lists. Group related issues under ##
 
 Identify any potential loopholes, exceptions, or alternative legal interpretations based on the context provided. Explain how they might apply.
 
-## Recommendations
-
-Numbered, actionable strategies to mitigate risk:
-1. First recommendation with specific legal basis
-2. Second recommendation
-3. Third recommendation (and so on)
-
+{_RECOMMENDATIONS}
 FORMATTING RULES:
 - NEVER use markdown tables (pipes |). Use structured prose, bullet points, and subheadings instead.
-- ONLY cite cases that appear in the context above AND are genuinely relevant — do NOT fabricate case names.
+- ONLY cite cases that appear in the provided context AND are genuinely relevant — do NOT fabricate case names.
 - If a case from the context is unrelated to the user's question, simply ignore it.
 - Use ## for sections, ### for subsections, **bold** for case names and risk levels.
 - Keep your response concise and information-dense. Avoid filler sentences.
 """
 
-
-def _build_general_prompt(user_query: str) -> str:
-    """
-    Prompt used when no relevant case law was found in the database.
-    Instructs the LLM to answer with general legal knowledge transparently.
-    """
-    return f"""You are an expert Legal AI Assistant specializing in Indian Law.
-
-User Query:
-{user_query}
+GENERAL_SYSTEM_PROMPT = f"""You are an expert Legal AI Assistant specializing in Indian Law.
 
 IMPORTANT CONTEXT:
-Our legal precedent database was searched but did NOT contain case law directly relevant to this specific query. You must answer based on your general legal knowledge of Indian law.
+Our legal precedent database was searched but did NOT contain case law directly relevant to the user's query. You must answer based on your general legal knowledge of Indian law.
 
 INSTRUCTIONS:
-Structure your response using these markdown sections. Write concisely — be dense with information, not verbose.
-
-## Risk Assessment
-
-State the risk level as **High**, **Medium**, or **Low** in bold, then give a concise 2-3 sentence explanation of the overall legal risk.
-
+{_RESPONSE_SECTIONS}
 ## Detailed Analysis
 
 Analyse the legal issues as flowing prose using your general knowledge of Indian law.
@@ -561,15 +848,35 @@ Use paragraphs, bullet points, and numbered lists. Group related issues under ##
 
 Identify any potential loopholes, exceptions, or alternative legal interpretations. Explain how they might apply.
 
-## Recommendations
-
-Numbered, actionable strategies to mitigate risk:
-1. First recommendation with specific legal basis
-2. Second recommendation
-3. Third recommendation (and so on)
-
+{_RECOMMENDATIONS}
 FORMATTING RULES:
 - NEVER use markdown tables (pipes |). Use structured prose, bullet points, and subheadings instead.
 - Use ## for sections, ### for subsections, **bold** for case names and risk levels.
 - Keep your response concise and information-dense. Avoid filler sentences.
 """
+
+
+def _build_grounded_prompt(user_query: str, context_text: str, detected_domain: str) -> list[dict]:
+    """
+    Messages used when the retrieval step found genuinely relevant cases.
+    Instructs the LLM to cite them — but only the ones that are actually applicable.
+    """
+    return [
+        {"role": "system", "content": GROUNDED_SYSTEM_PROMPT},
+        {"role": "user", "content": (
+            f"Legal domain: {detected_domain}\n\n"
+            f"Relevant Case Law Context (from verified legal database):\n{context_text}\n\n"
+            f"User Query:\n{user_query}"
+        )},
+    ]
+
+
+def _build_general_prompt(user_query: str) -> list[dict]:
+    """
+    Messages used when no relevant case law was found in the database.
+    Instructs the LLM to answer with general legal knowledge transparently.
+    """
+    return [
+        {"role": "system", "content": GENERAL_SYSTEM_PROMPT},
+        {"role": "user", "content": f"User Query:\n{user_query}"},
+    ]
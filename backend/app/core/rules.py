@@ -0,0 +1,335 @@
+import re
+from collections import Counter
+from datetime import date
+
+# ─── Deterministic metadata extraction ──────────────────────────────────────
+#
+# IndianKanoon pages carry most of the metadata we ask the LLM for in fixed
+# places: the title line ("X vs Y on 16 February, 1972"), a "Bench:" line,
+# the SCR-style "DATE OF JUDGMENT" header, and statute names in the body.
+# Parsing those with compiled patterns is free; the LLM is only needed for
+# the overrules/upholds relationships, and only when the text mentions them.
+
+# Only the document head is scanned for title/bench/court — the body is full
+# of other case names and dates.
+_HEAD_CHARS = 3_000
+
+_MONTHS = {
+    m: i for i, m in enumerate(
+        ("january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"), start=1)
+}
+
+# "Parle Products (P) Ltd. vs J.P. & Co., Mysore on 16 February, 1972"
+_TITLE_RE = re.compile(
+    r"^\s*(?:#+\s*)?(?P<name>\S.{2,300}?)\s+on\s+(?P<day>\d{1,2})\s+(?P<month>[A-Za-z]+),?\s+(?P<year>\d{4})\s*$",
+    re.MULTILINE,
+)
+# SCR headnote form: "DATE OF JUDGMENT16/02/1972" / "DATE OF JUDGMENT: 16.02.1972"
+_JUDGMENT_DATE_RE = re.compile(r"DATE OF JUDGMENT\s*:?\s*(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})", re.IGNORECASE)
+_BENCH_RE = re.compile(r"^\s*(?:#+\s*)?Bench\s*:\s*(?P<bench>.+?)\s*$", re.MULTILINE | re.IGNORECASE)
+# High Courts by canonical place name, with the spellings found on
+# IndianKanoon pages and in queries ("Punjab-Haryana", "Mumbai", "Odisha").
+# A closed list keeps question words out of the match ("Does Bombay High Court").
+_HIGH_COURTS = {
+    "Allahabad": r"Allahabad",
+    "Andhra Pradesh": r"Andhra(?: Pradesh)?",
+    "Bombay": r"Bombay|Mumbai",
+    "Calcutta": r"Calcutta|Kolkata",
+    "Chhattisgarh": r"Chhattisgarh",
+    "Delhi": r"Delhi",
+    "Gauhati": r"Gauhati|Guwahati",
+    "Gujarat": r"Gujarat",
+    "Himachal Pradesh": r"Himachal Pradesh",
+    "Jammu and Kashmir": r"Jammu(?:\s*(?:and|&|-)\s*Kashmir)?(?:\s*(?:and|&)\s*Ladakh)?",
+    "Jharkhand": r"Jharkhand",
+    "Karnataka": r"Karnataka|Mysore",
+    "Kerala": r"Kerala",
+    "Madhya Pradesh": r"Madhya Pradesh",
+    "Madras": r"Madras|Chennai",
+    "Manipur": r"Manipur",
+    "Meghalaya": r"Meghalaya",
+    "Orissa": r"Orissa|Odisha",
+    "Patna": r"Patna",
+    "Punjab and Haryana": r"Punjab(?:\s*(?:and|&|-)\s*Haryana)?",
+    "Rajasthan": r"Rajasthan",
+    "Sikkim": r"Sikkim",
+    "Telangana": r"Telangana",
+    "Tripura": r"Tripura",
+    "Uttarakhand": r"Uttarakhand|Uttaranchal",
+}
+_HIGH_COURT_PLACE_RES = [(place, re.compile(rf"^(?:{alias})$", re.IGNORECASE)) for place, alias in _HIGH_COURTS.items()]
+_PLACE = "(?:" + "|".join(_HIGH_COURTS.values()) + ")"
+_COURT_RE = re.compile(
+    r"\b(Supreme Court of India"
+    rf"|High Court (?:of (?:Judicature )?|at |for )(?:(?:at|for) )?(?:the State of )?(?P<place_after>{_PLACE})"
+    rf"|(?P<place_before>{_PLACE}) High Court"
+    r"|National Company Law (?:Appellate )?Tribunal"
+    r"|Income Tax Appellate Tribunal"
+    r"|Customs, Excise (?:and|&) Service Tax Appellate Tribunal"
+    r"|National Consumer Disputes Redressal Commission"
+    r"|National Green Tribunal)\b"
+)
+_CASE_NAME_RE = re.compile(r"\b(?:vs?\.?|versus)\s", re.IGNORECASE)
+
+# Statute mentions → legal domain. A domain needs at least
+# _MIN_DOMAIN_MENTIONS hits and must clearly beat the runner-up.
+_DOMAIN_STATUTES = {
+    "Intellectual Property": [
+        r"Copyright Act", r"Trade ?Marks? Act", r"Patents? Act", r"Designs Act",
+        r"Geographical Indications", r"passing off",
+    ],
+    "Tax Law": [
+        r"Income[- ]Tax Act", r"Central Excise", r"Customs Act", r"Finance Act",
+        r"Goods and Services Tax", r"CGST Act", r"Sales Tax", r"Wealth[- ]Tax Act",
+    ],
+    "Criminal Law": [
+        r"Indian Penal Code", r"\bI\.?P\.?C\b", r"Code of Criminal Procedure", r"\bCr\.?P\.?C\b",
+        r"Bharatiya Nyaya Sanhita", r"N\.?D\.?P\.?S\.? Act", r"Prevention of Corruption Act",
+    ],
+    "Constitutional Law": [
+        r"Article \d+[A-Z]? of the Constitution", r"Articles? (?:14|19|21|32|226)\b",
+        r"fundamental rights?", r"basic structure",
+    ],
+    "Corporate Law": [
+        r"Companies Act", r"Insolvency and Bankruptcy Code", r"\bIBC\b",
+        r"Securities and Exchange Board", r"\bSEBI\b", r"Competition Act",
+    ],
+    "Contract Law": [
+        r"(?:Indian )?Contract Act", r"Specific Relief Act", r"Sale of Goods Act",
+    ],
+    "Arbitration": [
+        r"Arbitration and Conciliation Act", r"arbitral award",
+    ],
+    "Family Law": [
+        r"Hindu Marriage Act", r"Hindu Succession Act", r"Special Marriage Act",
+        r"Guardians and Wards Act", r"Hindu Adoptions and Maintenance Act",
+    ],
+    "Property Law": [
+        r"Transfer of Property Act", r"Land Acquisition Act", r"Registration Act",
+        r"Rent Control", r"Specific performance",
+    ],
+    "Labour Law": [
+        r"Industrial Disputes Act", r"Workmen'?s Compensation Act", r"Employees'? (?:State Insurance|Provident Fund)",
+        r"Payment of Gratuity Act", r"Minimum Wages Act",
+    ],
+    "Consumer Law": [
+        r"Consumer Protection Act", r"deficiency (?:in|of) service",
+    ],
+    "Environmental Law": [
+        r"Environment \(Protection\) Act", r"Water \(Prevention", r"Air \(Prevention",
+        r"Forest \(Conservation\) Act", r"Wild ?Life \(Protection\) Act",
+    ],
+}
+_DOMAIN_PATTERNS = {
+    domain: re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+    for domain, patterns in _DOMAIN_STATUTES.items()
+}
+_MIN_DOMAIN_MENTIONS = 2
+
+# Citation-adjacent phrasing that signals the judgment overrules or upholds
+# another decision. Bare "affirmed"/"reversed"/"approved"/"overruled" are not
+# enough — appellate orders and objections use them in nearly every judgment.
+# When none appear, both relationship lists are empty and no LLM call is needed.
+_RELATION_CUES_RE = re.compile(
+    r"\b(?:is|are|was|were|stands?|been|be)\s+(?:hereby\s+|accordingly\s+|expressly\s+)?overruled\b"
+    r"|\boverruled\s+(?:in|by)\b"
+    r"|\bwe\s+(?:hereby\s+|accordingly\s+)?overrule\b"
+    r"|\buph[eo]ld\w*\s+the\s+(?:view|decision|ratio|law|principle|judgment)s?\s+(?:\w+\s+){0,2}?in\b"
+    r"|\b(?:no longer|not)\s+(?:a\s+)?good law\b"
+    r"|\bdoes not lay down (?:the )?(?:correct|good) law\b"
+    r"|\bper incuriam\b",
+    re.IGNORECASE,
+)
+
+# ─── Canonical legal domains ─────────────────────────────────────────────────
+#
+# Rule detection, LLM extraction, query filters and the domain classifier
+# share one label set: the _DOMAIN_STATUTES keys. LLMs answer in free text
+# ("Tax", "Corporate", "IPR"), so every label goes through canonical_domain()
+# before it is stored or compared. Aliases are matched as whole words, in
+# order ("Intellectual Property" before "Property Law", "Tax Law" before
+# "Labour Law" for "Service Tax").
+
+LEGAL_DOMAINS = tuple(_DOMAIN_STATUTES)
+_DOMAIN_ALIASES = {
+    "Intellectual Property": ("intellectual property", "ipr", "copyright", "trademark", "trade mark", "patent",
+                              "designs"),
+    "Tax Law": ("tax", "taxation", "gst", "excise", "customs"),
+    "Criminal Law": ("criminal", "penal"),
+    "Constitutional Law": ("constitutional", "constitution", "fundamental rights"),
+    "Corporate Law": ("corporate", "company", "companies", "insolvency", "securities", "competition"),
+    "Contract Law": ("contract", "contracts", "commercial"),
+    "Arbitration": ("arbitration",),
+    "Family Law": ("family", "matrimonial", "divorce", "succession"),
+    "Property Law": ("property", "land", "real estate", "tenancy", "rent control"),
+    "Labour Law": ("labour", "labor", "employment", "industrial", "service"),
+    "Consumer Law": ("consumer",),
+    "Environmental Law": ("environmental", "environment"),
+}
+_DOMAIN_ALIAS_RES = [
+    (domain, re.compile(r"\b(?:" + "|".join(re.escape(a) for a in aliases) + r")\b", re.IGNORECASE))
+    for domain, aliases in _DOMAIN_ALIASES.items()
+]
+_CANONICAL_DOMAINS = {d.lower(): d for d in LEGAL_DOMAINS}
+
+
+def canonical_domain(label: str | None) -> str:
+    """
+    Map a free-text legal domain ("Tax", "Corporate", "IPR") to its
+    canonical label. Empty/"Unknown" labels become "General"; labels that
+    match no domain are returned stripped, unchanged.
+    """
+    label = re.sub(r"\s+", " ", str(label or "")).strip()
+    lowered = label.lower()
+    if lowered in ("", "general", "unknown", "indian law", "none", "n/a"):
+        return "General"
+    if lowered in _CANONICAL_DOMAINS:
+        return _CANONICAL_DOMAINS[lowered]
+    for domain, pattern in _DOMAIN_ALIAS_RES:
+        if pattern.search(label):
+            return domain
+    return label
+
+
+def canonical_court(name: str | None) -> str:
+    """
+    Canonical court name: "Supreme Court of India", "<Place> High Court"
+    ("High Court of Judicature at Bombay" → "Bombay High Court"), or the
+    tribunal's name. Unrecognised names are returned stripped, unchanged.
+    """
+    name = re.sub(r"\s+", " ", str(name or "")).strip()
+    match = _COURT_RE.search(name)
+    if not match:
+        return name
+    place = match.group("place_after") or match.group("place_before")
+    if not place:
+        return match.group(1)
+    for canonical, pattern in _HIGH_COURT_PLACE_RES:
+        if pattern.match(place):
+            return f"{canonical} High Court"
+    return match.group(1)
+
+
+def _iso_date(day: int, month: int, year: int) -> str | None:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def detect_legal_domain(text: str, min_mentions: int = _MIN_DOMAIN_MENTIONS) -> tuple[str, int]:
+    """
+    Infer the legal domain from statute mentions.
+
+    Returns (domain, mentions); domain is "General" when no domain has
+    ``min_mentions`` mentions or the top two are too close to call.
+    """
+    counts = Counter({
+        domain: len(pattern.findall(text)) for domain, pattern in _DOMAIN_PATTERNS.items()
+    })
+    ranked = counts.most_common(2)
+    top_domain, top_count = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0
+    if top_count >= min_mentions and top_count >= 2 * runner_up:
+        return top_domain, top_count
+    return "General", top_count
+
+
+def has_relation_cues(text: str) -> bool:
+    """True if the judgment uses language that can signal overruling or upholding."""
+    return bool(_RELATION_CUES_RE.search(text))
+
+
+def extract_rule_metadata(text: str) -> dict:
+    """
+    Parse case name, judgment date, bench, court and legal domain from a
+    judgment without an LLM.
+
+    Returns a dict with the CaseMetadata scalar fields (``case_name``,
+    ``judgment_date``, ``legal_domain``) plus ``bench``, ``court`` and
+    ``confident`` — True only when name, date and domain were all found.
+    """
+    head = text[:_HEAD_CHARS]
+    case_name, judgment_date = "", "UNKNOWN"
+
+    title = _TITLE_RE.search(head)
+    if title and title.group("month").lower() in _MONTHS:
+        case_name = title.group("name").strip()
+        judgment_date = _iso_date(
+            int(title.group("day")), _MONTHS[title.group("month").lower()], int(title.group("year"))
+        ) or "UNKNOWN"
+
+    if judgment_date == "UNKNOWN":
+        scr_date = _JUDGMENT_DATE_RE.search(head)
+        if scr_date:
+            day, month, year = (int(g) for g in scr_date.groups())
+            judgment_date = _iso_date(day, month, year) or "UNKNOWN"
+
+    bench = _BENCH_RE.search(head)
+    court = _COURT_RE.search(head)
+    legal_domain, _ = detect_legal_domain(text)
+
+    return {
+        "case_name": case_name,
+        "judgment_date": judgment_date,
+        "legal_domain": legal_domain,
+        "bench": bench.group("bench") if bench else "",
+        "court": canonical_court(court.group(1)) if court else "",
+        "confident": bool(
+            case_name and _CASE_NAME_RE.search(case_name)
+            and judgment_date != "UNKNOWN"
+            and legal_domain != "General"
+        ),
+    }
+
+
+# ─── Query-time filter inference ────────────────────────────────────────────
+#
+# A user query that names a statute ("under the Copyright Act ...") or asks
+# for "judgments after 2015" can be narrowed before the vector search. Year
+# phrases only count when they qualify judgments, not the user's own facts
+# ("I was hired after 2015").
+
+_YEAR_QUALIFIER = r"(?:judgments?|cases?|decisions?|rulings?|precedents?|decided|delivered|pronounced)\s+(?:\w+\s+){0,2}?"
+_YEAR_RANGE_RE = re.compile(
+    _YEAR_QUALIFIER + r"(?:between|from)\s+((?:18|19|20)\d{2})\s+(?:and|to|-)\s+((?:18|19|20)\d{2})\b",
+    re.IGNORECASE,
+)
+_YEAR_BOUND_RE = re.compile(
+    _YEAR_QUALIFIER + r"(after|since|post|before|prior to|pre)[- ]((?:18|19|20)\d{2})\b",
+    re.IGNORECASE,
+)
+
+
+def infer_query_filters(query: str) -> dict:
+    """
+    Guess metadata filters from a natural-language query.
+
+    Returns a dict with any of ``legal_domain``, ``date_from``, ``date_to``
+    (ISO dates) and ``court``; keys are omitted when nothing was inferred.
+    """
+    filters = {}
+    domain, _ = detect_legal_domain(query, min_mentions=1)
+    if domain != "General":
+        filters["legal_domain"] = domain
+
+    year_range = _YEAR_RANGE_RE.search(query)
+    if year_range:
+        start, end = sorted(int(y) for y in year_range.groups())
+        filters["date_from"], filters["date_to"] = f"{start}-01-01", f"{end}-12-31"
+    else:
+        bound = _YEAR_BOUND_RE.search(query)
+        if bound:
+            word, year = bound.group(1).lower(), int(bound.group(2))
+            if word in ("after", "post"):
+                filters["date_from"] = f"{year + 1}-01-01"
+            elif word == "since":
+                filters["date_from"] = f"{year}-01-01"
+            else:
+                filters["date_to"] = f"{year - 1}-12-31"
+
+    court = _COURT_RE.search(query)
+    if court:
+        filters["court"] = canonical_court(court.group(1))
+    return filters
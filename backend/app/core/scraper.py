@@ -1,46 +1,83 @@
-import io
-import time
+import os
 import logging
-import requests
 from bs4 import BeautifulSoup
 
+from app.utils.http import http_get
+from app.utils.http_cache import cached_fetch
+from app.utils.ratelimit import get_host_limiter
+from app.utils.cpu_pool import run_cpu_bound
+from app.core.ikapi import get_ik_client
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# ── MarkItDown converter (lazy init so import errors don't crash the whole app) ──
+# ── HTML parser selection ──
+# lxml is a C parser and typically 5-10x faster than the pure-Python
+# html.parser on large judgments. It is optional: fall back silently if the
+# wheel is not installed.
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+# Pages at least this large are parsed in the CPU pool (app.utils.cpu_pool);
+# smaller ones are cheaper to parse inline than to ship to a worker.
+HTML_OFFLOAD_MIN_BYTES = int(os.getenv("HTML_OFFLOAD_MIN_BYTES", str(256 * 1024)))
+HTML_PARSE_TIMEOUT = float(os.getenv("HTML_PARSE_TIMEOUT", "30"))
+
+# ── Markdown converter (lazy init so import errors don't crash the whole app) ──
 _md_converter = None
 
 def _get_md_converter():
-    """Lazy-init a shared MarkItDown instance (thread-safe for read-only use)."""
+    """
+    Lazy-init a shared HTML → Markdown converter (thread-safe for read-only use).
+
+    Uses the same markdownify subclass MarkItDown's HtmlConverter uses
+    internally, so output is identical to ``MarkItDown.convert_stream`` —
+    but it works directly on an already-parsed soup node, which lets
+    fetch_case_text parse the page exactly once.
+    """
     global _md_converter
     if _md_converter is None:
         try:
-            from markitdown import MarkItDown
-            _md_converter = MarkItDown()
+            from markitdown.converters._markdownify import _CustomMarkdownify
+            _md_converter = _CustomMarkdownify()
             logger.info("MarkItDown converter initialised for scraper.")
         except ImportError:
-            logger.warning(
-                "markitdown not installed. Falling back to raw text extraction. "
-                "Run: pip install 'markitdown[html]'"
-            )
+            try:
+                import markdownify
+                _md_converter = markdownify.MarkdownConverter(heading_style=markdownify.ATX)
+                logger.info("markdownify converter initialised for scraper.")
+            except ImportError:
+                logger.warning(
+                    "markitdown not installed. Falling back to raw text extraction. "
+                    "Run: pip install 'markitdown[html]'"
+                )
     return _md_converter
 
 
-def _extract_judgment_html(response_content: bytes) -> bytes:
+# Remove elements with noise-indicating CSS classes or IDs
+_NOISE_TOKENS = {
+    "nav", "navigation", "navbar", "sidebar", "side-bar",
+    "ad", "ads", "advert", "advertisement",
+    "share", "social", "cookie", "banner",
+    "menu", "header", "footer", "breadcrumb", "pagination",
+}
+
+
+def _select_judgment_node(soup: BeautifulSoup):
     """
-    Scopes the raw HTML to the main judgment content before MarkItDown
-    conversion, stripping site chrome (nav bars, ads, footers, scripts).
+    Scopes a parsed page to the main judgment content, stripping site chrome
+    (nav bars, ads, footers, scripts).
 
     Strategy:
       1. Try a priority list of judgment-specific containers.
       2. If none found, surgically remove all known noise elements from the
-         full-page soup before handing the pruned HTML to MarkItDown.
+         full-page soup and return the pruned soup itself.
 
-    This ensures MarkItDown always receives clean, scoped HTML regardless of
-    whether the target page uses a known container class.
+    The returned node is part of ``soup`` — no serialisation round-trip.
     """
-    soup = BeautifulSoup(response_content, "html.parser")
-
     # Priority list of judgment content containers used across Indian legal portals
     container = (
         soup.find("div", class_="judgments")
@@ -54,29 +91,61 @@ def _extract_judgment_html(response_content: bytes) -> bytes:
     )
 
     if container:
-        return str(container).encode()
+        for tag in container.find_all(["script", "style", "noscript"]):
+            tag.decompose()
+        return container
 
-    # ── Fallback: strip all noise from the full page, then hand to MarkItDown ──
+    # ── Fallback: strip all noise from the full page ──
     # Remove structural noise tags outright
     for tag in soup.find_all(["nav", "header", "footer", "aside", "script", "style", "noscript"]):
         tag.decompose()
 
-    # Remove elements with noise-indicating CSS classes or IDs
-    _NOISE_TOKENS = {
-        "nav", "navigation", "navbar", "sidebar", "side-bar",
-        "ad", "ads", "advert", "advertisement",
-        "share", "social", "cookie", "banner",
-        "menu", "header", "footer", "breadcrumb", "pagination",
-    }
     for el in soup.find_all(True):
+        if el.decomposed:
+            continue
         classes = " ".join(el.get("class", [])).lower()
         el_id   = (el.get("id") or "").lower()
         if any(tok in classes or tok in el_id for tok in _NOISE_TOKENS):
             el.decompose()
 
-    return str(soup).encode()
+    return soup.find("body") or soup
+
+
+def _extract_judgment_html(response_content: bytes) -> bytes:
+    """
+    Returns the scoped judgment HTML as bytes.
+
+    Kept for callers that need the HTML itself; the fetch path uses
+    html_to_markdown() which never serialises the scoped node.
+    """
+    soup = BeautifulSoup(response_content, _HTML_PARSER)
+    return str(_select_judgment_node(soup)).encode()
 
 
+def html_to_markdown(html: bytes | str) -> str:
+    """
+    Single-parse HTML → Markdown conversion.
+
+    Parses once (lxml when installed), scopes to the judgment container and
+    feeds the resulting node straight to markdownify. The previous path
+    parsed with html.parser, serialised the container back to a string,
+    re-encoded it and let MarkItDown parse it a second time.
+    """
+    soup = BeautifulSoup(html, _HTML_PARSER)
+    node = _select_judgment_node(soup)
+
+    converter = _get_md_converter()
+    if converter is not None:
+        try:
+            return converter.convert_soup(node).strip()
+        except RecursionError:
+            # Deeply-nested pages exceed markdownify's recursive traversal;
+            # mirror MarkItDown's own plain-text fallback.
+            logger.warning("HTML too deeply nested for Markdown conversion. Using plain text.")
+
+    # Fallback: plain text extraction from the scoped node
+    return node.get_text(separator="\n", strip=True)
+
 
 def fetch_case_text(url: str) -> str:
     """
@@ -86,10 +155,11 @@ def fetch_case_text(url: str) -> str:
       1. Check if the URL is an IndianKanoon doc and IK_API_TOKEN is present.
          If so, fetch via the official IK API to bypass 403 blocks.
       2. Otherwise, download the page HTML normally.
-      3. Scope to the judgment container (strips nav/ads/footer).
-      4. Convert the scoped HTML to clean Markdown via MarkItDown.
+         Both fetches go through the on-disk HTTP cache (see http_cache.py),
+         so re-ingesting a document does not re-download it.
+      3. Parse once, scope to the judgment container (strips nav/ads/footer)
+         and convert the node to clean Markdown via html_to_markdown().
     """
-    import os
     import re
     try:
         headers = {
@@ -100,54 +170,42 @@ def fetch_case_text(url: str) -> str:
             )
         }
         
-        scoped_html = None
+        judgment_html = None
         
         # Step 1: Check for IndianKanoon URL and API Token
-        ik_token = os.environ.get("IK_API_TOKEN", "").strip()
+        ik = get_ik_client()
         ik_match = re.search(r"indiankanoon\.org/doc/([0-9]+)/?", url)
         
-        if ik_match and ik_token:
+        if ik_match and ik is not None:
             docid = ik_match.group(1)
-            api_url = f"https://api.indiankanoon.org/doc/{docid}/"
             logger.info(f"Using official IndianKanoon API for docid: {docid}")
-            api_headers = {
-                "Authorization": f"Token {ik_token}",
-                "Accept": "application/json"
-            }
             try:
-                # IK API requires POST
-                api_resp = requests.post(api_url, headers=api_headers, timeout=10)
-                api_resp.raise_for_status()
-                data = api_resp.json()
+                # Cached, quota-limited and metered (see app/core/ikapi.py)
+                data = ik.get_doc(docid)
                 if "doc" in data:
-                    # Enriched HTML from API
-                    scoped_html = data["doc"].encode("utf-8")
+                    # Enriched HTML from API (already a str — no re-encoding)
+                    judgment_html = data["doc"]
                 else:
                     logger.warning("IK API response did not contain 'doc'. Falling back.")
             except Exception as e:
                 logger.warning(f"IK API failed ({e}). Falling back to web scraper.")
         
         # Step 2: Fallback to web scraping if API wasn't used or failed
-        if not scoped_html:
-            time.sleep(1)  # Respectful rate-limiting
-            response = requests.get(url, headers=headers, timeout=30)
+        if not judgment_html:
+            # Respectful per-host rate-limiting — only when we actually hit the network
+            response = cached_fetch(
+                url, http_get,
+                before_network=lambda: get_host_limiter().acquire(url),
+                headers=headers, timeout=30,
+            )
             response.raise_for_status()
-            scoped_html = _extract_judgment_html(response.content)
-
-        converter = _get_md_converter()
+            judgment_html = response.content
 
-        if converter is not None:
-            # Step 3: Convert scoped HTML to clean Markdown
-            result = converter.convert_stream(
-                io.BytesIO(scoped_html),
-                file_extension=".html",
-                url=url,
-            )
-            text = result.text_content or ""
+        # Step 3: Scope + convert to clean Markdown in a single parse
+        if len(judgment_html) >= HTML_OFFLOAD_MIN_BYTES:
+            text = run_cpu_bound(html_to_markdown, judgment_html, timeout=HTML_PARSE_TIMEOUT)
         else:
-            # Fallback: plain text extraction from the scoped HTML
-            soup = BeautifulSoup(scoped_html, "html.parser")
-            text = soup.get_text(separator="\\n", strip=True)
+            text = html_to_markdown(judgment_html)
 
         cleaned = "\\n".join(line for line in text.splitlines() if line.strip())
         if not cleaned:
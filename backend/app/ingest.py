@@ -1,15 +1,32 @@
 import csv
 import os
+import re
 import sys
 import hashlib
 import logging
 import time
+import shutil
+import zipfile
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from pathlib import Path
 
 from app.core.scraper import fetch_case_text
-from app.core.extraction import extract_legal_metadata
+from app.core.chunking import CHUNK_SIZE, CHUNK_OVERLAP, MAX_CHUNKS, chunk_text
+from app.core.extraction import extract_legal_metadata_cached, extract_legal_metadata_batch
+from app.core.rules import extract_rule_metadata
+from app.core.citation_graph import get_citation_graph, case_key
+from app.core.case_index import get_case_index
+from app.core.catalogue import get_case_catalogue
+from app.core.ledger import get_ingestion_ledger, KIND_URL, KIND_FILE
+from app.core.ocr import ocr_pdf, OCR_MODEL
+from app.core.ikapi import get_ik_client
 from app.utils.pinecone import get_pinecone_index
+from app.utils.clients import get_openrouter_client, llm_timeout
+from app.utils.result_cache import get_result_cache, file_hash
+from app.utils.cpu_pool import get_cpu_pool
 from dotenv import load_dotenv
 
 # ─── Setup ────────────────────────────────────────────────────────────────────
@@ -22,39 +39,6 @@ load_dotenv()
 # The embedding model hosted by Pinecone (Integrated Inference)
 EMBED_MODEL = "llama-text-embed-v2"
 
-# ─── Chunking ────────────────────────────────────────────────────────────────
-
-CHUNK_SIZE = 1500      # characters per chunk
-CHUNK_OVERLAP = 200    # overlap between consecutive chunks
-MAX_CHUNKS = 20        # safety cap per document (20 × 1500 = 30 000 chars max)
-
-
-def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> list[str]:
-    """
-    Splits text into overlapping chunks using a sliding window.
-    
-    Unlike the previous text[:9000] truncation which permanently discarded
-    80%+ of long judgments, this preserves the entire document across
-    multiple indexed chunks — each inheriting parent metadata.
-    """
-    if not text:
-        return []
-    
-    chunks = []
-    start = 0
-    while start < len(text) and len(chunks) < MAX_CHUNKS:
-        end = start + chunk_size
-        chunk = text[start:end]
-        
-        # Only add non-trivial chunks (skip trailing whitespace fragments)
-        if len(chunk.strip()) > 50:
-            chunks.append(chunk)
-        
-        start += chunk_size - overlap
-    
-    return chunks
-
-
 # ─── Deduplication ───────────────────────────────────────────────────────────
 
 def generate_deterministic_id(text: str, chunk_index: int = 0) -> str:
@@ -81,13 +65,61 @@ def is_pinecone_available() -> bool:
     return False
 
 
+def live_ledger_entry(ledger, kind: str, key: str) -> dict | None:
+    """
+    The ledger entry for ``key``, provided its document is still in the
+    knowledge base (see live_ledger_keys); None otherwise.
+    """
+    if ledger is None or not live_ledger_keys(ledger, kind, [key], get_case_catalogue()):
+        return None
+    return ledger.get(kind, key)
+
+
+def live_ledger_keys(ledger, kind: str, keys, catalogue) -> set[str]:
+    """
+    The subset of ``keys`` in the ledger whose document is still in the
+    knowledge base, in one batched pass. An entry whose doc_id the case
+    catalogue no longer holds (the document was deleted or re-extracted) is
+    stale: it is dropped, so the source can be ingested again without
+    force=true. An empty catalogue (not rebuilt yet) proves nothing and is
+    not consulted; neither is it for entries without a doc_id (archives).
+    """
+    entries = ledger.doc_ids(kind, keys)
+    try:
+        if catalogue is None or not entries or not catalogue.count():
+            return set(entries)
+        present = catalogue.known_docs(entries.values())
+    except Exception as e:
+        logger.debug(f"Catalogue check for ledger entries failed (non-critical): {e}")
+        return set(entries)
+    stale = [key for key, doc_id in entries.items() if doc_id and doc_id not in present]
+    for key in stale:
+        logger.info(f"Ledger entry for {key} points at missing document {entries[key]}; forgetting it")
+        ledger.forget(kind, key)
+    return set(entries) - set(stale)
+
+
+def forget_removed_documents(doc_ids) -> int:
+    """Drop the ledger entries of documents that left the knowledge base (catalogue prune)."""
+    ledger = get_ingestion_ledger()
+    if ledger is None:
+        return 0
+    forgotten = sum(ledger.forget_doc(doc_id) for doc_id in doc_ids)
+    if forgotten:
+        logger.info(f"Forgot {forgotten} ledger entries of {len(doc_ids)} removed documents")
+    return forgotten
+
+
 def is_url_already_ingested(url: str) -> bool:
     """
-    Checks if a URL has already been ingested by querying Pinecone metadata.
+    Checks if a URL has already been ingested: the local ingestion ledger
+    first, then Pinecone metadata (documents stored before the ledger).
     
     This prevents the duplicate-flooding problem where train_bot.py or
     repeated /api/learn/url calls would store the same case N times.
     """
+    if live_ledger_entry(get_ingestion_ledger(), KIND_URL, url):
+        return True
     try:
         from app.utils.pinecone import get_pinecone_client
         index = get_pinecone_index()
@@ -126,6 +158,11 @@ def parse_date_safe(date_str: str) -> date | None:
     return None
 
 
+# Bounded parallelism for conflict resolution: Pinecone queries for the
+# overruled cases, then one metadata update per affected record.
+CONFLICT_WORKERS = int(os.getenv("CONFLICT_WORKERS", "8"))
+
+
 def resolve_legal_conflicts(new_metadata: dict, index=None):
     """
     Temporal conflict resolution — ensures newer judgments overrule older ones.
@@ -137,6 +174,9 @@ def resolve_legal_conflicts(new_metadata: dict, index=None):
     
     This prevents hallucinated overruling (LLM claiming A overrules B
     when B is actually the newer decision) and provides an auditable trail.
+
+    All case names are embedded in one call and looked up concurrently; each
+    affected record is then updated once, with bounded parallelism.
     """
     overrules_str = new_metadata.get("ai_overrules_cases", "")
     if not overrules_str:
@@ -148,21 +188,52 @@ def resolve_legal_conflicts(new_metadata: dict, index=None):
     new_case_date_str = new_metadata.get("ai_judgment_date", "UNKNOWN")
     new_case_date = parse_date_safe(new_case_date_str)
     
-    overruled_cases = [c.strip() for c in overrules_str.split(",") if c.strip()]
-    
+    overruled_cases = list(dict.fromkeys(c.strip() for c in overrules_str.split(",") if c.strip()))
+
+    # ── Step 1: Find the old cases in the DB via semantic search ──
+    found = _find_cases_in_db(overruled_cases, before=new_case_date)
+
+    if not new_case_date:
+        logger.warning(
+            f"TEMPORAL WARNING: No parseable date for '{new_case_title}'. "
+            f"Proceeding with overrule based on LLM assertion only (lower confidence)."
+        )
+
+    graph = get_citation_graph()
+    accepted: list[str] = []  # overrules edges for the citation graph
+    ids_to_update: dict[str, str] = {}  # record id → overruled case name (first wins)
+    overruled_urls: set[str] = set()     # for the document-level case catalogue
     for case_name in overruled_cases:
-        # ── Step 1: Find the old case in the DB via semantic search ──
-        results = _find_case_in_db(case_name)
-        
-        if not results:
+        if case_name not in found:
+            # Keep the edge anyway: when this case is ingested later, the graph
+            # marks it overruled at write time (after its own date check).
+            accepted.append(case_name)
             logger.info(f"Overruled case '{case_name}' not found in DB. Skipping (it may not have been ingested yet).")
             continue
+
+        results = found[case_name]
+        if results is None:
+            # Several indexed judgments share the name: no status change and
+            # no graph edge, which could later land on the wrong one
+            logger.warning(f"AMBIGUOUS OVERRULE: '{case_name}' names several judgments. Skipping.")
+            continue
         
+        # Semantic matches spanning several judgments cannot say which one is meant
+        urls = {hit.get("metadata", {}).get("url", "") for hit in results}
+        if len(urls) > 1:
+            logger.warning(
+                f"AMBIGUOUS OVERRULE: '{case_name}' matched {len(urls)} different judgments. "
+                f"Skipping to avoid marking the wrong one."
+            )
+            continue
+
         # ── Step 2: Temporal verification ──
-        old_meta = results[0].get("metadata", {}) if results else {}
+        old_meta = results[0].get("metadata", {})
         
         if new_case_date:
             old_case_date_str = old_meta.get("ai_judgment_date", "UNKNOWN")
+            if old_case_date_str == "UNKNOWN" and graph:
+                old_case_date_str = graph.date_of(case_name)
             old_case_date = parse_date_safe(old_case_date_str)
             
             if old_case_date and new_case_date <= old_case_date:
@@ -172,55 +243,155 @@ def resolve_legal_conflicts(new_metadata: dict, index=None):
                     f"Halting overrule to prevent data corruption."
                 )
                 continue
-        else:
-            logger.warning(
-                f"TEMPORAL WARNING: No parseable date for '{new_case_title}'. "
-                f"Proceeding with overrule based on LLM assertion only (lower confidence)."
-            )
-        
-        # ── Step 3: Mark as overruled with provenance ──
-        # Use direct set_metadata update — no fetch+merge needed for serverless.
-        # Pinecone's update() merges only the specified keys, preserving the rest.
-        ids_to_update = [hit["_id"] for hit in results]
 
-        for record_id in ids_to_update:
-            try:
-                index.update(
-                    id=record_id,
-                    set_metadata={
-                        "status": "overruled",
-                        "overruled_by": new_case_title,
-                        "overruled_on": new_case_date.isoformat() if new_case_date else "UNKNOWN",
-                    },
-                    namespace=""
-                )
-            except Exception as e:
-                logger.error(f"Failed to mark record {record_id} as overruled: {e}")
+        accepted.append(case_name)
+        for hit in results:
+            ids_to_update.setdefault(hit["_id"], case_name)
+            overruled_urls.add(hit.get("metadata", {}).get("url", ""))
+
+    if graph and accepted:
+        try:
+            graph.add_edges(new_metadata.get("ai_case_name") or new_case_title, "overrules", accepted,
+                            judgment_date=new_case_date.isoformat() if new_case_date else None)
+            graph.save()
+        except Exception as e:
+            logger.warning(f"Failed to record overrules edges in the citation graph: {e}")
+
+    if not ids_to_update:
+        return
+
+    # ── Step 3: Mark as overruled with provenance ──
+    # Use direct set_metadata update — no fetch+merge needed for serverless.
+    # Pinecone's update() merges only the specified keys, preserving the rest.
+    # A record matched by several overruled names is still updated only once.
+    set_metadata = {
+        "status": "overruled",
+        "overruled_by": new_case_title,
+        "overruled_on": new_case_date.isoformat() if new_case_date else "UNKNOWN",
+    }
+
+    def _mark(record_id: str) -> bool:
+        try:
+            index.update(id=record_id, set_metadata=set_metadata, namespace="")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to mark record {record_id} as overruled: {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(CONFLICT_WORKERS, len(ids_to_update))) as pool:
+        marked = dict(zip(ids_to_update, pool.map(_mark, ids_to_update)))
 
+    catalogue = get_case_catalogue()
+    if catalogue is not None and any(marked.values()):
+        catalogue.set_status_by_url(overruled_urls, "overruled")
+
+    case_index = get_case_index()
+    if case_index is not None:
+        case_index.set_status_for_records([rid for rid, ok in marked.items() if ok], "overruled")
+    for case_name in dict.fromkeys(ids_to_update.values()):
+        count = sum(1 for rid, name in ids_to_update.items() if name == case_name and marked[rid])
         logger.info(
-            f"TEMPORAL CONFLICT RESOLVED: Marked {len(ids_to_update)} chunks of "
+            f"TEMPORAL CONFLICT RESOLVED: Marked {count} chunks of "
             f"'{case_name}' as 'overruled' by '{new_case_title}'."
         )
 
 
-def _find_case_in_db(case_name: str) -> list | None:
-    """
-    Semantic search to find a case by name in Pinecone using explicit embeddings.
-    """
+def _embed_case_names(case_names: list[str]) -> list | None:
+    """Embed every case name in a single Pinecone inference call. None on failure."""
     try:
         from app.utils.pinecone import get_pinecone_client
-        index = get_pinecone_index()
-        pc = get_pinecone_client()
-
-        embeddings = pc.inference.embed(
+        embeddings = get_pinecone_client().inference.embed(
             model=EMBED_MODEL,
-            inputs=[case_name],
+            inputs=case_names,
             parameters={"input_type": "query"}
         )
+        return [e.values for e in embeddings]
+    except Exception as e:
+        logger.error(f"Batch embedding of {len(case_names)} case names failed: {e}")
+        return None
+
+
+def _find_cases_in_db(case_names: list[str], before=None) -> dict[str, list | None]:
+    """
+    Look up several cases at once. Names the local case-name index resolves
+    (or finds ambiguous) need no network call; the rest share one embedding
+    call, then their Pinecone queries run concurrently. ``before`` is the
+    overruling judgment's date (see CaseNameIndex.candidates). Returns
+    {case_name: matches} for names found and {case_name: None} for
+    ambiguous ones; names that were not found are absent.
+    """
+    found = _find_cases_locally(case_names, before=before)
+    case_names = [name for name in case_names if name not in found]
+    if not case_names:
+        return found
+    if len(case_names) == 1:
+        results = _find_case_in_db(case_names[0])
+        if results:
+            found[case_names[0]] = results
+        return found
+
+    vectors = _embed_case_names(case_names)
+    if vectors is None:
+        # Embedding failed — per-name lookups retry it independently
+        lookup = _find_case_in_db
+    else:
+        index = get_pinecone_index()
+        by_name = dict(zip(case_names, vectors))
+
+        def lookup(case_name):
+            return _find_case_in_db(case_name, vector=by_name[case_name], index=index)
+
+    with ThreadPoolExecutor(max_workers=min(CONFLICT_WORKERS, len(case_names))) as pool:
+        found.update((name, results) for name, results in zip(case_names, pool.map(lookup, case_names)) if results)
+    return found
+
+
+def _find_cases_locally(case_names: list[str], before=None) -> dict[str, list | None]:
+    """
+    Resolve case names through the local case-name index — no embedding or
+    Pinecone query. Returns the names that resolved to exactly one judgment,
+    in the same shape as _find_case_in_db() results, and None for names that
+    match several judgments: an ambiguous name must not drive an overrule,
+    and a semantic search would be no less ambiguous.
+    """
+    case_index = get_case_index()
+    if case_index is None:
+        return {}
+    found = {}
+    for name in case_names:
+        entries = case_index.candidates(name, before=before)
+        if len(entries) > 1:
+            logger.warning(f"'{name}' matches {len(entries)} indexed judgments; not resolving it for an overrule.")
+            found[name] = None
+        elif entries and entries[0]["record_ids"]:
+            entry = entries[0]
+            meta = {"title": entry["name"], "ai_judgment_date": entry["judgment_date"], "url": entry["url"]}
+            found[name] = [{"_id": rid, "metadata": meta} for rid in entry["record_ids"]]
+    return found
+
+
+def _find_case_in_db(case_name: str, vector: list = None, index=None) -> list | None:
+    """
+    Semantic search to find a case by name in Pinecone using explicit embeddings.
+    Pass ``vector`` (and ``index``) to reuse work done by _find_cases_in_db().
+    """
+    try:
+        if index is None:
+            index = get_pinecone_index()
+        if vector is None:
+            from app.utils.pinecone import get_pinecone_client
+            pc = get_pinecone_client()
+
+            embeddings = pc.inference.embed(
+                model=EMBED_MODEL,
+                inputs=[case_name],
+                parameters={"input_type": "query"}
+            )
+            vector = embeddings[0].values
 
         search_results = index.query(
             namespace="",
-            vector=embeddings[0].values,
+            vector=vector,
             top_k=5,
             filter={"status": {"$eq": "active"}},
             include_metadata=True,
@@ -239,12 +410,55 @@ def _find_case_in_db(case_name: str) -> list | None:
     return None
 
 
+def _register_case_name(metadata: dict, record_ids: list[str]):
+    """Add a stored case to the local case-name index (used instead of semantic name lookups)."""
+    case_index = get_case_index()
+    if case_index is None:
+        return
+    # Stored titles may be the first Markdown line ("## Name\n### Equivalent ...")
+    clean_title = re.split(r"\n|###|##", metadata.get("title", "").lstrip("#").strip())[0].strip()
+    try:
+        case_index.add(
+            metadata.get("ai_case_name") or clean_title,
+            aliases=[clean_title],
+            record_ids=record_ids,
+            judgment_date=metadata.get("ai_judgment_date"),
+            url=metadata.get("url"),
+            status=metadata.get("status", "active"),
+        )
+    except Exception as e:
+        logger.warning(f"Failed to index case name for '{clean_title}': {e}")
+
+
+def _apply_graph_status(metadata: dict):
+    """
+    O(1) overrule check at write time: if the citation graph holds an
+    "overrules" edge into this case from a newer judgment (ingested earlier),
+    store the case as overruled instead of active.
+    """
+    graph = get_citation_graph()
+    name = metadata.get("ai_case_name") or metadata.get("title") or ""
+    if graph is None or not case_key(name):
+        return
+    # Record the node first so the graph knows this case's own date
+    judgment_date = metadata.get("ai_validated_date")
+    graph.add_case(name, judgment_date, aliases=[metadata.get("title")])
+    overruling = graph.overruling_judgment(name, judgment_date)
+    if overruling:
+        later, later_date = overruling
+        metadata["status"] = "overruled"
+        metadata["overruled_by"] = later
+        metadata["overruled_on"] = later_date
+        logger.info(f"Citation graph: '{metadata.get('ai_case_name')}' was already overruled by '{later}'.")
+
+
 # ─── Document Processing ────────────────────────────────────────────────────
 
-def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
+def process_and_store_document(text: str, metadata: dict, doc_id: str = None, ai_metadata: dict = None):
     """
     Refined ingestion pipeline:
-    1. Extracts high-fidelity legal metadata via LLM.
+    1. Extracts high-fidelity legal metadata via LLM (skipped when the caller
+       passes ``ai_metadata`` already extracted, e.g. by a batch call).
     2. Resolves temporal conflicts (new cases overrule old ones).
     3. Splits text into overlapping chunks (sliding window).
     4. Stores each chunk in Pinecone with full parent metadata + chunk lineage.
@@ -255,7 +469,9 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
         # ── Step 1: Legal extraction & Enrichment ──
         # Pydantic-validated structured extraction of case name, date, domain,
         # and overruled/upheld relationships before any data enters the DB.
-        ai_metadata = extract_legal_metadata(text)
+        # Cached by content hash, so re-ingesting an unchanged document skips the LLM.
+        if ai_metadata is None:
+            ai_metadata = extract_legal_metadata_cached(text)
 
         # If LLM extraction fails (e.g. all free-tier models are temporarily down),
         # fall back to minimal placeholder metadata so we still store the case.
@@ -265,15 +481,21 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
                 f"Extraction returned no metadata for '{metadata.get('title', 'Untitled')}'. "
                 f"Storing with placeholder metadata (extraction can be re-run later)."
             )
-            # Build best-effort metadata from the raw text
+            # Build best-effort metadata from the raw text (title line, dates,
+            # statute mentions), falling back to the first line as the name
+            rules = extract_rule_metadata(text)
             first_line = text.split('\n')[0].lstrip('#').strip()[:120]
             ai_metadata = {
-                "case_name": first_line or metadata.get("title", "UNKNOWN"),
-                "judgment_date": "UNKNOWN",
+                "case_name": rules["case_name"] or first_line or metadata.get("title", "UNKNOWN"),
+                "judgment_date": rules["judgment_date"],
                 "overrules_cases": [],
                 "upholds_cases": [],
-                "legal_domain": "General",
-                "validated_date": None,
+                "legal_domain": rules["legal_domain"],
+                "bench": rules["bench"],
+                "court": rules["court"],
+                "validated_date": (
+                    date.fromisoformat(rules["judgment_date"]) if rules["judgment_date"] != "UNKNOWN" else None
+                ),
             }
 
         metadata["ai_case_name"] = ai_metadata.get("case_name", "UNKNOWN")
@@ -281,6 +503,11 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
         metadata["ai_overrules_cases"] = ", ".join(ai_metadata.get("overrules_cases", []))
         metadata["ai_upholds_cases"] = ", ".join(ai_metadata.get("upholds_cases", []))
         metadata["ai_legal_domain"] = ai_metadata.get("legal_domain", "General")
+        # Header fields parsed by the rule-based extractor (omitted when absent —
+        # Pinecone metadata cannot hold nulls)
+        for field in ("bench", "court"):
+            if ai_metadata.get(field):
+                metadata[f"ai_{field}"] = ai_metadata[field]
 
         # Store validated date as ISO string for Pinecone compatibility
         validated_date = ai_metadata.get("validated_date")
@@ -288,10 +515,26 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
             metadata["ai_validated_date"] = (
                 validated_date.isoformat() if hasattr(validated_date, 'isoformat') else str(validated_date)
             )
+            # Numeric YYYYMMDD copy: Pinecone range operators ($gte/$lte) only
+            # apply to numbers, so query-time date filters use this field.
+            try:
+                metadata["ai_judgment_datenum"] = int(metadata["ai_validated_date"][:10].replace("-", ""))
+            except ValueError:
+                pass
+
+        # A newer judgment ingested earlier may already have overruled this one
+        _apply_graph_status(metadata)
 
         # Temporal conflict resolution (now with actual date comparison)
         resolve_legal_conflicts(metadata)
 
+        graph = get_citation_graph()
+        if graph:
+            try:
+                graph.record_case(metadata)
+            except Exception as e:
+                logger.warning(f"Failed to record '{metadata.get('ai_case_name')}' in the citation graph: {e}")
+
         # ── Sliding-window chunking (replaces text[:9000] truncation) ──
         chunks = chunk_text(text)
         
@@ -346,6 +589,15 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
             index.upsert(vectors=vectors, namespace="")
             stored_count += len(batch)
         
+        _register_case_name(metadata, [rec["_id"] for rec in records])
+        catalogue = get_case_catalogue()
+        if catalogue is not None:
+            try:
+                catalogue.upsert(records[0]["_id"], records[0], total_chunks=len(records))
+            except Exception as e:
+                logger.warning(f"Failed to update the case catalogue: {e}")
+        _record_in_ledger(metadata, records[0]["_id"])
+
         source = metadata.get('url', 'Unknown Source')
         logger.info(f"Stored {stored_count}/{len(chunks)} chunks for: {metadata.get('title', 'Untitled')} from {source}")
         return True
@@ -357,6 +609,20 @@ def process_and_store_document(text: str, metadata: dict, doc_id: str = None):
         return False
 
 
+def _record_in_ledger(metadata: dict, doc_id: str):
+    """Remember the stored document's source (URL or uploaded file hash) for dedup."""
+    ledger = get_ingestion_ledger()
+    if ledger is None:
+        return
+    try:
+        if metadata.get("content_sha256"):
+            ledger.record(KIND_FILE, metadata["content_sha256"], doc_id, metadata.get("title", ""))
+        elif metadata.get("url"):
+            ledger.record(KIND_URL, metadata["url"], doc_id, metadata.get("title", ""))
+    except Exception as e:
+        logger.warning(f"Failed to update the ingestion ledger: {e}")
+
+
 # ─── URL-Based Ingestion ─────────────────────────────────────────────────────
 
 def ingest_case_from_url(url: str, title: str = None, force: bool = False) -> bool:
@@ -376,23 +642,158 @@ def ingest_case_from_url(url: str, title: str = None, force: bool = False) -> bo
         logger.info(f"URL already ingested, skipping: {url}")
         return False
     
-    text_content = fetch_case_text(url)
+    text_content = _fetch_url_text(url)
     if not text_content:
         logger.warning(f"Failed to fetch content for {url}")
         return False
     
+    return process_and_store_document(text_content, _url_metadata(url, title, text_content))
+
+
+def _fetch_url_text(url: str) -> str | None:
+    """fetch_case_text(), with IndianKanoon API spend attributed to this ingestion."""
+    ik = get_ik_client()
+    if ik is None:
+        return fetch_case_text(url)
+    with ik.metered_ingest() as meter:
+        text_content = fetch_case_text(url)
+    if meter["cost"]:
+        logger.info(f"IndianKanoon API cost for {url}: ₹{meter['cost']:.2f}")
+    return text_content
+
+
+def _url_metadata(url: str, title: str | None, text_content: str) -> dict:
     if not title:
         title = text_content.split('\n')[0][:100] if text_content else "Untitled Legal Case"
-        
-    metadata = {
+    return {
         "title": title,
         "url": url,
         "source": "autonomous_learning",
         "ingested_at": str(time.time()),
         "status": "active"
     }
-    
-    return process_and_store_document(text_content, metadata)
+
+
+# URLs fetched before each batched metadata extraction on the bulk URL paths
+# (/api/learn/batch, crawls); see ingest_cases_from_urls().
+URL_EXTRACTION_BATCH = int(os.getenv("URL_EXTRACTION_BATCH", "8"))
+
+
+def ingest_cases_from_urls(urls: list[str], titles: dict = None, force: bool = False) -> dict[str, bool]:
+    """
+    ingest_case_from_url() for a group of URLs: each is fetched, then the
+    metadata of all of them is extracted with one extract_legal_metadata_batch()
+    call (one LLM request for up to its MAX_BATCH_ITEMS judgments) instead of
+    one call per document, and each is stored.
+
+    Returns {url: success}; False also for URLs skipped as already ingested.
+    """
+    titles = titles or {}
+    results: dict[str, bool] = {}
+    fetched: list[tuple[str, str]] = []
+    for url in urls:
+        if not force and is_url_already_ingested(url):
+            logger.info(f"URL already ingested, skipping: {url}")
+            results[url] = False
+            continue
+        try:
+            text_content = _fetch_url_text(url)
+        except Exception as e:
+            logger.error(f"Fetch failed for {url}: {e}")
+            text_content = None
+        if not text_content:
+            logger.warning(f"Failed to fetch content for {url}")
+            results[url] = False
+            continue
+        fetched.append((url, text_content))
+
+    if not fetched:
+        return results
+    try:
+        extracted = extract_legal_metadata_batch([text for _, text in fetched])
+    except Exception as e:
+        logger.warning(f"Batch extraction failed ({e}); extracting per document")
+        extracted = [None] * len(fetched)
+    for (url, text_content), ai_metadata in zip(fetched, extracted):
+        results[url] = process_and_store_document(
+            text_content, _url_metadata(url, titles.get(url), text_content), ai_metadata=ai_metadata,
+        )
+    logger.info(f"Ingested {sum(results.values())}/{len(urls)} URLs with batched extraction")
+    return results
+
+
+# ─── Ingestion Worker Pool ───────────────────────────────────────────────────
+
+# Shared by the crawler, /api/crawl and the training bot. Kept small: every
+# ingestion makes an LLM extraction call and Pinecone embed/upsert calls, and
+# page fetches are already paced by the per-host rate limiter.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+
+_ingest_pool = None
+
+
+def get_ingest_pool() -> ThreadPoolExecutor:
+    """Lazy-init the shared ingestion worker pool."""
+    global _ingest_pool
+    if _ingest_pool is None:
+        _ingest_pool = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+    return _ingest_pool
+
+
+def submit_url_ingestion(url: str, title: str = None, force: bool = False) -> Future:
+    """Queue ingest_case_from_url() on the worker pool. The Future resolves to its bool result."""
+    return get_ingest_pool().submit(ingest_case_from_url, url, title, force)
+
+
+def submit_url_group_ingestion(urls: list[str], titles: dict = None, force: bool = False) -> Future:
+    """Queue ingest_cases_from_urls() on the worker pool. The Future resolves to its {url: bool} result."""
+    return get_ingest_pool().submit(ingest_cases_from_urls, list(urls), titles, force)
+
+
+class UrlGroupSubmitter:
+    """
+    Collects URLs found one at a time (by a crawl) into groups of
+    URL_EXTRACTION_BATCH and queues each full group with
+    submit_url_group_ingestion(), so they share batched extraction.
+
+    submit() returns a per-URL Future resolving to that URL's bool, like
+    submit_url_ingestion(); call flush() once no more URLs are coming.
+    """
+
+    def __init__(self, force: bool = False, size: int = None):
+        self.force = force
+        self.size = size or URL_EXTRACTION_BATCH
+        self._group: list[tuple[str, str | None, Future]] = []
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, title: str = None) -> Future:
+        future = Future()
+        with self._lock:
+            self._group.append((url, title, future))
+            full = len(self._group) >= self.size
+        if full:
+            self.flush()
+        return future
+
+    def flush(self):
+        with self._lock:
+            group, self._group = self._group, []
+        if not group:
+            return
+
+        def _done(group_future):
+            try:
+                results, error = group_future.result(), None
+            except Exception as e:
+                results, error = {}, e
+            for url, _, future in group:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results.get(url, False))
+
+        titles = {url: title for url, title, _ in group if title}
+        submit_url_group_ingestion([url for url, _, _ in group], titles, self.force).add_done_callback(_done)
 
 
 # ─── File-Based Ingestion ──────────────────────────────────────────────
@@ -426,7 +827,7 @@ def _get_ocr_converter():
     """
     Lazy-init a MarkItDown instance with the markitdown-ocr plugin enabled.
 
-    Uses the same OpenRouter client as extraction.py and reuses the first
+    Uses the shared OpenRouter client (app.utils.clients) and reuses the first
     vision-capable model from the EXTRACTION_MODELS cascade
     (nvidia/nemotron-nano-12b-v2-vl:free).
 
@@ -435,8 +836,8 @@ def _get_ocr_converter():
     """
     global _md_ocr
     if _md_ocr is None:
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
+        llm_client = get_openrouter_client()
+        if llm_client is None:
             logger.warning(
                 "OPENROUTER_API_KEY not set — OCR plugin requires a vision LLM. "
                 "Falling back to plain MarkItDown (text-layer PDF only)."
@@ -444,16 +845,12 @@ def _get_ocr_converter():
             return _get_plain_converter()
         try:
             from markitdown import MarkItDown
-            from openai import OpenAI
-            llm_client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=api_key,
-            )
             _md_ocr = MarkItDown(
                 enable_plugins=True,
-                llm_client=llm_client,
+                # Same pooled client, with the longer vision-OCR timeout
+                llm_client=llm_client.with_options(timeout=llm_timeout("ocr")),
                 # First vision-capable model in the existing cascade
-                llm_model="nvidia/nemotron-nano-12b-v2-vl:free",
+                llm_model=OCR_MODEL,
             )
             logger.info("MarkItDown OCR converter initialised with vision LLM.")
         except ImportError as e:
@@ -465,7 +862,75 @@ def _get_ocr_converter():
     return _md_ocr
 
 
-def ingest_case_from_file(file_path: str, title: str = None) -> bool:
+# Bump to invalidate cached conversions (e.g. after a MarkItDown upgrade).
+MARKDOWN_CACHE_VERSION = 2
+
+# Scanned PDFs go through the page-level pipeline in app/core/ocr.py
+# (text-layer detection, parallel vision OCR, per-page cache) instead of
+# MarkItDown's sequential OCR plugin.
+PAGE_OCR_ENABLED = os.getenv("PAGE_OCR_ENABLED", "1") != "0"
+
+
+# Per-task conversion timeouts in the CPU pool, in seconds. OCR sends every
+# page image to a vision model and is allowed much longer.
+CONVERT_TIMEOUT = float(os.getenv("CONVERT_TIMEOUT", "180"))
+OCR_CONVERT_TIMEOUT = float(os.getenv("OCR_CONVERT_TIMEOUT", "900"))
+
+
+def _run_conversion(path: str, converter, use_ocr: bool) -> str:
+    """One conversion: the page-level OCR pipeline for PDFs when a vision client is configured, else MarkItDown."""
+    if use_ocr and PAGE_OCR_ENABLED and path.lower().endswith(".pdf"):
+        llm_client = get_openrouter_client()
+        if llm_client is not None:
+            try:
+                return ocr_pdf(path, llm_client)
+            except Exception as e:
+                logger.warning(f"Page-level OCR failed for {path} ({e}); falling back to MarkItDown.")
+    return converter.convert(path).text_content or ""
+
+
+def _convert_in_worker(path: str, use_ocr: bool) -> str:
+    """CPU-pool entry point: builds this worker's own converter (they are not picklable)."""
+    converter = _get_ocr_converter() if use_ocr else _get_plain_converter()
+    if converter is None:
+        raise RuntimeError("MarkItDown is not available in the conversion worker.")
+    return _run_conversion(path, converter, use_ocr)
+
+
+def _convert_file(path: Path, converter, use_ocr: bool) -> str:
+    """Runs the conversion in the CPU pool when it is enabled, inline otherwise."""
+    pool = get_cpu_pool()
+    if pool is None:
+        return _run_conversion(str(path), converter, use_ocr)
+    timeout = OCR_CONVERT_TIMEOUT if use_ocr else CONVERT_TIMEOUT
+    return pool.run(_convert_in_worker, str(path), use_ocr, timeout=timeout)
+
+
+def _convert_file_cached(path: Path, converter, use_ocr: bool, digest: str = None) -> str:
+    """
+    Runs converter.convert() on ``path``, memoised by the file's SHA-256.
+
+    The same PDF uploaded twice (or re-ingested after a failed upsert) is
+    converted — and, for scanned files, OCR'd — only once.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return _convert_file(path, converter, use_ocr)
+
+    kind = "ocr" if use_ocr else "plain"
+    key = f"{MARKDOWN_CACHE_VERSION}:{kind}:{digest or file_hash(path)}"
+    cached = cache.get("markdown", key)
+    if cached is not None:
+        logger.info(f"Markdown cache hit for {path.name}")
+        return cached
+
+    text_content = _convert_file(path, converter, use_ocr)
+    if text_content.strip():
+        cache.put("markdown", key, text_content)
+    return text_content
+
+
+def ingest_case_from_file(file_path: str, title: str = None, content_sha256: str = None, force: bool = False) -> bool:
     """
     Converts a local file to clean Markdown via MarkItDown and ingests it
     into the Pinecone knowledge base.
@@ -481,9 +946,14 @@ def ingest_case_from_file(file_path: str, title: str = None) -> bool:
         file_path: Absolute or relative path to the file to ingest.
         title:     Optional display title. Defaults to the first non-empty
                    line of the extracted text.
+        content_sha256: SHA-256 of the file, if the caller already has it
+                   (the upload endpoint hashes while streaming to disk).
+        force:     Re-ingest even if identical bytes are already in the
+                   ingestion ledger.
 
     Returns:
-        True if ingestion succeeded, False otherwise.
+        True if ingestion succeeded, False otherwise — including when the
+        bytes are already ingested (see live_ledger_entry()).
     """
     path = Path(file_path).resolve()
     logger.info(f"Ingesting from file: {path}")
@@ -492,17 +962,24 @@ def ingest_case_from_file(file_path: str, title: str = None) -> bool:
         logger.error(f"File not found: {path}")
         return False
 
+    # Dedup on the file's bytes before any conversion or OCR
+    content_sha256 = content_sha256 or file_hash(path)
+    ledger = get_ingestion_ledger()
+    if not force and live_ledger_entry(ledger, KIND_FILE, content_sha256):
+        logger.info(f"Identical file already ingested, skipping: {path.name}")
+        return False
+
     # Choose converter based on whether the file may need OCR
     ext = path.suffix.lower()
-    converter = _get_ocr_converter() if ext in _OCR_EXTENSIONS else _get_plain_converter()
+    use_ocr = ext in _OCR_EXTENSIONS
+    converter = _get_ocr_converter() if use_ocr else _get_plain_converter()
 
     if converter is None:
         logger.error("No MarkItDown converter available. Cannot process file.")
         return False
 
     try:
-        result = converter.convert(str(path))
-        text_content = result.text_content or ""
+        text_content = _convert_file_cached(path, converter, use_ocr, digest=content_sha256)
     except Exception as e:
         logger.error(f"MarkItDown conversion failed for {path}: {e}")
         return False
@@ -524,6 +1001,7 @@ def ingest_case_from_file(file_path: str, title: str = None) -> bool:
         "source": "file_upload",
         "file_name": path.name,
         "file_type": ext.lstrip("."),
+        "content_sha256": content_sha256,
         "ingested_at": str(time.time()),
         "status": "active",
     }
@@ -531,8 +1009,142 @@ def ingest_case_from_file(file_path: str, title: str = None) -> bool:
     return process_and_store_document(text_content, metadata)
 
 
+def submit_file_ingestion(file_path: str, title: str = None, content_sha256: str = None, force: bool = False) -> Future:
+    """Queue ingest_case_from_file() on the worker pool. The Future resolves to its bool result."""
+    return get_ingest_pool().submit(ingest_case_from_file, file_path, title, content_sha256, force)
+
+
+# ─── Archive Fan-out ─────────────────────────────────────────────────────────
+
+# An uploaded archive is expanded and each member ingested as its own
+# document through the ingestion workers, instead of MarkItDown flattening
+# the whole archive into one Markdown blob (capped at MAX_CHUNKS chunks).
+ARCHIVE_EXTENSIONS = {".zip"}
+# Member types ingested from an archive; nested archives are skipped.
+ARCHIVE_MEMBER_EXTENSIONS = {
+    ".pdf", ".docx", ".doc", ".xlsx", ".pptx", ".epub",
+    ".txt", ".md", ".html", ".htm", ".csv", ".json",
+    ".jpg", ".jpeg", ".png",
+}
+MAX_ARCHIVE_MEMBERS = int(os.getenv("MAX_ARCHIVE_MEMBERS", "2000"))
+MAX_ARCHIVE_UNCOMPRESSED_MB = int(os.getenv("MAX_ARCHIVE_UNCOMPRESSED_MB", "2048"))
+# Members compressed better than this are skipped (zip-bomb guard).
+_MAX_COMPRESSION_RATIO = 200
+
+
+def is_archive(file_name: str) -> bool:
+    return Path(file_name or "").suffix.lower() in ARCHIVE_EXTENSIONS
+
+
+def _is_ingestible_member(info: zipfile.ZipInfo) -> bool:
+    name = info.filename
+    if info.is_dir() or "__MACOSX/" in name or Path(name).name.startswith("."):
+        return False
+    return Path(name).suffix.lower() in ARCHIVE_MEMBER_EXTENSIONS
+
+
+def expand_archive(archive_path: str, dest_dir: str) -> list[tuple[str, Path]]:
+    """
+    Extract the ingestible members of a ZIP into ``dest_dir``.
+
+    Member paths are never used on disk (no zip-slip): each member is written
+    flat under an index prefix. Returns [(member name, extracted path)] in
+    archive order; a member refused by the compression-ratio guard is listed
+    with path None instead of being dropped. Raises ValueError for archives
+    over the member or size limits, zipfile.BadZipFile for corrupt ones.
+    """
+    with zipfile.ZipFile(archive_path) as zf:
+        members = [info for info in zf.infolist() if _is_ingestible_member(info)]
+        if len(members) > MAX_ARCHIVE_MEMBERS:
+            raise ValueError(f"Archive has {len(members)} documents; the limit is {MAX_ARCHIVE_MEMBERS}.")
+        total = sum(info.file_size for info in members)
+        if total > MAX_ARCHIVE_UNCOMPRESSED_MB * 1024 * 1024:
+            raise ValueError(f"Archive expands to {total // (1024 * 1024)} MB; the limit is {MAX_ARCHIVE_UNCOMPRESSED_MB} MB.")
+
+        extracted = []
+        for i, info in enumerate(members):
+            if info.compress_size and info.file_size / info.compress_size > _MAX_COMPRESSION_RATIO:
+                logger.warning(f"Skipping suspiciously compressed archive member: {info.filename}")
+                extracted.append((info.filename, None))
+                continue
+            target = Path(dest_dir) / f"{i:05d}_{Path(info.filename).name}"
+            with zf.open(info) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            extracted.append((info.filename, target))
+    return extracted
+
+
+def ingest_archive(archive_path: str, archive_name: str = None, content_sha256: str = None,
+                   force: bool = False, on_expanded=None, on_result=None) -> dict:
+    """
+    Expand a ZIP and ingest every member as its own document, in parallel on
+    the ingestion workers.
+
+    Members are deduplicated by content hash in one ledger pass (and against
+    each other) before anything is queued. ``on_expanded(total)`` is called
+    once the member count is known, and ``on_result(member, status)`` is
+    called as each member settles, with status "done", "failed", "duplicate"
+    or "skipped" (refused by the zip-bomb guard). Once no member failed, the
+    archive's own hash is recorded so re-uploading it is rejected up front.
+
+    Returns {"total", "done", "failed", "duplicate", "skipped", "files": {member: status}}.
+    """
+    archive_name = archive_name or Path(archive_path).name
+    files: dict[str, str] = {}
+
+    def _settle(name: str, status: str):
+        files[name] = status
+        if on_result is not None:
+            on_result(name, status)
+
+    with tempfile.TemporaryDirectory(prefix="archive-") as tmp_dir:
+        members = expand_archive(archive_path, tmp_dir)
+        if on_expanded is not None:
+            on_expanded(len(members))
+        hashes = {name: file_hash(path) for name, path in members if path is not None}
+        ledger = get_ingestion_ledger()
+        known = set()
+        if ledger is not None and not force:
+            known = live_ledger_keys(ledger, KIND_FILE, hashes.values(), get_case_catalogue())
+        logger.info(f"Archive {archive_name}: {len(members)} documents, {len(known)} already ingested")
+
+        futures = {}
+        queued = set()
+        for name, path in members:
+            if path is None:
+                _settle(name, "skipped")
+                continue
+            digest = hashes[name]
+            if digest in known or digest in queued:
+                _settle(name, "duplicate")
+                continue
+            queued.add(digest)
+            title = Path(name).stem.replace("_", " ").replace("-", " ")
+            # force=True: dedup has already been done above, in one pass
+            futures[submit_file_ingestion(str(path), title, digest, True)] = name
+
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception as e:
+                logger.error(f"Archive member {futures[future]} failed: {e}")
+                ok = False
+            _settle(futures[future], "done" if ok else "failed")
+
+    summary = {"total": len(files), "done": 0, "failed": 0, "duplicate": 0, "skipped": 0, "files": files}
+    for status in files.values():
+        summary[status] += 1
+    if content_sha256 and ledger is not None and files and not summary["failed"]:
+        ledger.record(KIND_FILE, content_sha256, title=archive_name)
+    return summary
+
+
 # ─── CSV Bulk Ingestion ──────────────────────────────────────────────────────
 
+# Rows fetched before each batched metadata extraction in the CSV bulk loader.
+CSV_EXTRACTION_BATCH = int(os.getenv("CSV_EXTRACTION_BATCH", "8"))
+
+
 def ingest_data():
     """Reads cases.csv, scrapes text, and stores in Pinecone using Integrated Embeddings."""
     
@@ -547,34 +1159,43 @@ def ingest_data():
     logger.info(f"Reading cases from {csv_path}...")
     
     with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        idx = 0
-        for row in reader:
+        rows = list(csv.DictReader(f))
+
+    # Fetch a group of judgments, extract their metadata in as few LLM calls
+    # as possible, then store each one.
+    for start in range(0, len(rows), CSV_EXTRACTION_BATCH):
+        fetched = []
+        for idx, row in enumerate(rows[start:start + CSV_EXTRACTION_BATCH], start=start):
             url = row['case_url']
             title = row['case_title']
-            
+
             logger.info(f"Processing: {title}")
-            
+
             text_content = fetch_case_text(url)
             if not text_content:
                 logger.warning(f"Failed to fetch content for {url}")
-                idx += 1
                 continue
-            
+
             metadata = {
-                "title": title, 
-                "url": url, 
+                "title": title,
+                "url": url,
                 "author": row.get('case_author', ''),
                 "status": "active"
             }
-            
-            success = process_and_store_document(text_content, metadata, doc_id=str(idx))
-            
-            if success:
-                time.sleep(4)
-            
-            idx += 1
-            
+            fetched.append((idx, text_content, metadata))
+
+        if not fetched:
+            continue
+
+        extracted = extract_legal_metadata_batch([text for _, text, _ in fetched])
+        stored = 0
+        for (idx, text_content, metadata), ai_metadata in zip(fetched, extracted):
+            if process_and_store_document(text_content, metadata, doc_id=str(idx), ai_metadata=ai_metadata):
+                stored += 1
+
+        if stored:
+            time.sleep(4)
+
     logger.info("Ingestion Complete!")
 
 if __name__ == "__main__":
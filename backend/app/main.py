@@ -1,16 +1,30 @@
 import logging
 logger = logging.getLogger(__name__)
 
-from fastapi import FastAPI, HTTPException, Request, UploadFile, File, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form, BackgroundTasks, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field, HttpUrl
-from app.core.rag import query_legal_assistant, EMBED_MODEL
+from app.core.rag import query_legal_assistant, get_retrieval_stats, get_query_coalescing_stats, EMBED_MODEL
 from app.core.crawler import crawl_and_ingest
-from app.ingest import ingest_case_from_url, ingest_case_from_file, _get_plain_converter, _get_ocr_converter
-from app.core.extraction import extract_legal_metadata
+from app.ingest import (
+    ingest_case_from_url, ingest_case_from_file, ingest_archive, is_archive, UrlGroupSubmitter,
+    live_ledger_entry, forget_removed_documents,
+    _get_plain_converter, _get_ocr_converter,
+)
+from app.core.extraction import extract_legal_metadata_cached
+from app.core.catalogue import get_case_catalogue
+from app.core.ledger import get_ingestion_ledger, KIND_FILE
+from app.core.batch import MAX_BATCH_ITEMS, start_batch, get_batch_job, format_event
+from app.core.ikapi import get_ik_client
+from app.core.domain_classifier import get_domain_classifier
 from app.utils.pinecone import get_pinecone_index, get_pinecone_client
+from app.utils.http import http_get, get_http_stats
+from app.utils.http_cache import get_response_cache
+from app.utils.clients import start_background_warm_up, get_openrouter_pool_settings
+from app.utils.cpu_pool import get_cpu_pool, shutdown_cpu_pool
 import time
 import os
+import hashlib
 import uuid
 import tempfile
 import traceback
@@ -20,6 +34,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 from typing import Literal
+from datetime import date
 
 # ─── In-memory Task Registry ────────────────────────────────────────────────
 # Stores status of background ingestion jobs. Thread-safe via Lock.
@@ -33,6 +48,12 @@ def _set_task(task_id: str, status: Literal["pending", "running", "done", "faile
         _task_registry[task_id] = {"status": status, "task_id": task_id, **kwargs}
 
 
+def _update_task(task_id: str, **kwargs):
+    """Merge fields into an existing task entry (progress updates)."""
+    with _task_lock:
+        _task_registry.setdefault(task_id, {"task_id": task_id}).update(kwargs)
+
+
 def _get_task(task_id: str) -> dict | None:
     with _task_lock:
         return _task_registry.get(task_id)
@@ -57,18 +78,63 @@ def _run_url_ingestion(task_id: str, url: str, force: bool = False):
         _set_task(task_id, "failed", url=url, error=str(e), trace=traceback.format_exc())
 
 
-def _run_file_ingestion(task_id: str, tmp_path: str, original_filename: str, title: str | None):
+def _run_file_ingestion(task_id: str, tmp_path: str, original_filename: str, title: str | None,
+                        content_sha256: str = None, force: bool = False):
     """Background worker: convert, embed and store a case from a temp file."""
     _set_task(task_id, "running", file_name=original_filename, started_at=time.time())
     try:
-        success = ingest_case_from_file(tmp_path, title=title)
+        success = ingest_case_from_file(tmp_path, title=title, content_sha256=content_sha256, force=force)
+        existing = None
+        if not success and not force and content_sha256:
+            existing = live_ledger_entry(get_ingestion_ledger(), KIND_FILE, content_sha256)
         if success:
             _set_task(task_id, "done", file_name=original_filename, message=f"Successfully ingested '{original_filename}'.")
+        elif existing is not None:
+            # Identical bytes were ingested meanwhile (dedup skipped it) — not an error
+            _set_task(task_id, "done", file_name=original_filename, duplicate=True,
+                      message=f"Identical file already ingested as '{existing['title']}' (skipped). Use force=true to re-ingest.")
         else:
             _set_task(task_id, "failed", file_name=original_filename, error="Ingestion returned False. File may be empty, corrupt, or contain no extractable text.")
     except Exception as e:
         _set_task(task_id, "failed", file_name=original_filename, error=str(e), trace=traceback.format_exc())
     finally:
+        _release_upload(content_sha256)
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def _run_archive_ingestion(task_id: str, tmp_path: str, original_filename: str,
+                           content_sha256: str = None, force: bool = False):
+    """Background worker: fan an archive out into one ingestion per member, tracking per-file status."""
+    _set_task(task_id, "running", file_name=original_filename, started_at=time.time(),
+              total=None, done=0, failed=0, duplicate=0, skipped=0, files={})
+
+    def on_result(member: str, status: str):
+        with _task_lock:
+            task = _task_registry[task_id]
+            task["files"][member] = status
+            task[status] += 1
+
+    try:
+        summary = ingest_archive(
+            tmp_path, original_filename, content_sha256, force,
+            on_expanded=lambda total: _update_task(task_id, total=total), on_result=on_result,
+        )
+        if summary["total"] and summary["failed"] + summary["skipped"] == summary["total"]:
+            _set_task(task_id, "failed", file_name=original_filename, error="No document in the archive could be ingested.", **summary)
+        elif not summary["total"]:
+            _set_task(task_id, "failed", file_name=original_filename, error="The archive contains no supported documents.", **summary)
+        else:
+            _set_task(task_id, "done", file_name=original_filename, finished_at=time.time(),
+                      message=f"Ingested {summary['done']} of {summary['total']} documents "
+                              f"({summary['duplicate']} duplicates, {summary['skipped']} skipped, "
+                              f"{summary['failed']} failed).", **summary)
+    except Exception as e:
+        _set_task(task_id, "failed", file_name=original_filename, error=str(e), trace=traceback.format_exc())
+    finally:
+        _release_upload(content_sha256)
         try:
             os.unlink(tmp_path)
         except OSError:
@@ -79,15 +145,11 @@ def _run_file_ingestion(task_id: str, tmp_path: str, original_filename: str, tit
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Verify Pinecone connection on startup
-    try:
-        index = get_pinecone_index()
-        stats = index.describe_index_stats()
-        logger.info(f"Connected to Pinecone index: {os.getenv('PINECONE_INDEX_NAME')}")
-        logger.info(f"Total vector count: {stats['total_vector_count']}")
-    except Exception as e:
-        logger.info(f"Warning: Could not connect to Pinecone on startup: {e}")
+    # Build clients and verify the Pinecone connection in the background so
+    # the server accepts requests immediately (STARTUP_WARMUP=0 disables).
+    start_background_warm_up()
     yield
+    shutdown_cpu_pool()
 
 app = FastAPI(title="Legal AI Assistant API", lifespan=lifespan)
 
@@ -131,14 +193,25 @@ class AnalysisRequest(BaseModel):
 
 class QueryRequest(BaseModel):
     query: str = Field(..., min_length=2, description="The user query")
+    legal_domain: str | None = Field(None, description="Only retrieve cases in this legal domain")
+    date_from: date | None = Field(None, description="Only retrieve judgments on or after this date")
+    date_to: date | None = Field(None, description="Only retrieve judgments on or before this date")
+    court: str | None = Field(None, description="Only retrieve judgments of this court")
 
 class CrawlRequest(BaseModel):
     url: HttpUrl = Field(..., description="The URL to crawl for related cases")
+    limit: int = Field(3, ge=1, le=200, description="Maximum number of cases to discover")
+    depth: int = Field(0, ge=0, le=3, description="How many levels of citations to follow")
 
 class LearnRequest(BaseModel):
     url: HttpUrl = Field(..., description="The IndianKanoon URL to learn from")
     force: bool = Field(False, description="If true, bypass dedup check and re-ingest")
 
+class BatchLearnRequest(BaseModel):
+    items: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS,
+                             description="URLs or bare IndianKanoon docids to ingest")
+    force: bool = Field(False, description="If true, skip the dedup pass and re-ingest everything")
+
 # ─── Core Endpoints ───────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -147,7 +220,8 @@ def read_root():
 
 @app.post("/api/query")
 def query_assistant(request: QueryRequest):
-    result = query_legal_assistant(request.query)
+    filters = request.model_dump(mode="json", exclude={"query"}, exclude_none=True)
+    result = query_legal_assistant(request.query, filters=filters)
     return JSONResponse(content=result)
 
 @app.post("/api/analyze")
@@ -178,6 +252,58 @@ def learn_from_url(request: LearnRequest, background_tasks: BackgroundTasks):
     }
 
 
+@app.post("/api/learn/batch", status_code=202)
+def learn_batch(request: BatchLearnRequest):
+    """
+    Queue many URLs / IndianKanoon docids as one job.
+
+    Items are normalised (docid → doc URL), deduplicated against each other
+    and against everything already ingested in a single local pass, and the
+    rest are scheduled on the ingestion workers. Returns 202 with a job_id
+    and the up-front counts; follow progress via GET /api/learn/batch/{job_id}
+    or stream per-item results from /api/learn/batch/{job_id}/events.
+    """
+    job = start_batch(request.items, force=request.force)
+    return {
+        **job.summary(),
+        "status_url": f"/api/learn/batch/{job.job_id}",
+        "events_url": f"/api/learn/batch/{job.job_id}/events",
+    }
+
+
+def _require_batch_job(job_id: str):
+    job = get_batch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Batch job '{job_id}' not found.")
+    return job
+
+
+@app.get("/api/learn/batch/{job_id}")
+def get_batch_status(job_id: str, items: bool = Query(False, description="Include per-item status")):
+    """Aggregate progress of a batch job: counts, throughput, ETA and (optionally) per-item status."""
+    return _require_batch_job(job_id).summary(include_items=items)
+
+
+@app.get("/api/learn/batch/{job_id}/events")
+async def stream_batch_events(job_id: str, format: Literal["ndjson", "sse"] = "ndjson"):
+    """
+    Stream per-item results as they settle — as NDJSON lines or Server-Sent
+    Events — replaying those already settled, and ending with a summary.
+    """
+    job = _require_batch_job(job_id)
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+
+    async def _frames():
+        async for event in job.follow():
+            yield format_event(event, format)
+
+    return StreamingResponse(
+        _frames(),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/api/tasks/{task_id}")
 def get_task_status(task_id: str):
     """
@@ -211,15 +337,81 @@ _SUPPORTED_UPLOAD_TYPES = {
 }
 
 
+# Uploads are copied to disk in chunks of this size, so a large scanned PDF
+# never sits in memory whole; larger uploads are rejected with 413.
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+
+# SHA-256 of uploads queued or being ingested, so a second copy of a file
+# still in flight is rejected too (the ledger only knows finished ingests).
+_uploads_in_flight: set[str] = set()
+_uploads_lock = threading.Lock()
+
+
+def _claim_upload(digest: str) -> bool:
+    with _uploads_lock:
+        if digest in _uploads_in_flight:
+            return False
+        _uploads_in_flight.add(digest)
+        return True
+
+
+def _release_upload(digest: str | None):
+    with _uploads_lock:
+        _uploads_in_flight.discard(digest)
+
+
+async def _stream_upload_to_disk(file: UploadFile, suffix: str) -> tuple[str, str, int]:
+    """
+    Copy an upload to a named temp file chunk by chunk, hashing as it goes.
+    Returns (path, sha256, size). Raises 413 (and removes the partial file)
+    once the size limit is exceeded.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit.",
+                    )
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return tmp.name, digest.hexdigest(), size
+
+
 @app.post("/api/learn/file", status_code=202)
-async def learn_from_file(file: UploadFile = File(...), background_tasks: BackgroundTasks = None):
+async def learn_from_file(request: Request, file: UploadFile = File(...), force: bool = Form(False),
+                          background_tasks: BackgroundTasks = None):
     """
     Queue a file for ingestion into the knowledge base.
 
     Accepts PDF, DOCX, XLSX, PPTX, images, ZIP, TXT, HTML, CSV, JSON, EPub.
+    A ZIP is expanded and every document in it ingested separately; its
+    task reports per-file status and done/failed/duplicate/skipped counts.
+
+    The upload is streamed to disk and hashed on the way; a file whose bytes
+    were already ingested (or are queued) is rejected with 409 before any
+    conversion or OCR. Pass force=true to re-ingest it anyway.
+
     Returns 202 Accepted immediately with a task_id.
     Poll GET /api/tasks/{task_id} to check progress.
     """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_CHUNK_BYTES:
+        # Multipart overhead is small: anything this far over cannot fit
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit.",
+        )
+
     if file.content_type not in _SUPPORTED_UPLOAD_TYPES:
         raise HTTPException(
             status_code=415,
@@ -232,19 +424,34 @@ async def learn_from_file(file: UploadFile = File(...), background_tasks: Backgr
     # Write to a named temp file so MarkItDown can detect the extension.
     # The background worker is responsible for deleting it after processing.
     suffix = Path(file.filename).suffix if file.filename else ".bin"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
+    tmp_path, content_sha256, size = await _stream_upload_to_disk(file, suffix)
+
+    existing = None
+    if not force:
+        existing = live_ledger_entry(get_ingestion_ledger(), KIND_FILE, content_sha256)
+    if existing is not None or not _claim_upload(content_sha256):
+        os.unlink(tmp_path)
+        detail = (
+            f"Identical file already ingested as '{existing['title']}'. Pass force=true to re-ingest." if existing
+            else "An identical file is already queued for ingestion."
+        )
+        raise HTTPException(status_code=409, detail=detail)
 
-    title = Path(file.filename).stem.replace("_", " ").replace("-", " ") if file.filename else None
     task_id = str(uuid.uuid4())
-    _set_task(task_id, "pending", file_name=file.filename, queued_at=time.time())
-    background_tasks.add_task(_run_file_ingestion, task_id, tmp_path, file.filename, title)
+    _set_task(task_id, "pending", file_name=file.filename, content_sha256=content_sha256,
+              size_bytes=size, queued_at=time.time())
+    if is_archive(file.filename) or file.content_type == "application/zip":
+        # Each member becomes its own document; the task aggregates per-file status
+        background_tasks.add_task(_run_archive_ingestion, task_id, tmp_path, file.filename, content_sha256, force)
+    else:
+        title = Path(file.filename).stem.replace("_", " ").replace("-", " ") if file.filename else None
+        background_tasks.add_task(_run_file_ingestion, task_id, tmp_path, file.filename, title, content_sha256, force)
 
     return {
         "message": "File ingestion queued. Poll /api/tasks/{task_id} for status.",
         "task_id": task_id,
         "file_name": file.filename,
+        "content_sha256": content_sha256,
     }
 
 
@@ -258,86 +465,126 @@ def crawl_url(request: CrawlRequest, background_tasks: BackgroundTasks):
     """
     task_id = str(uuid.uuid4())
 
-    def _run_crawl(task_id: str, url: str):
+    def _run_crawl(task_id: str, url: str, limit: int, depth: int):
         _set_task(task_id, "running", url=url, started_at=time.time())
         try:
-            cases = crawl_and_ingest(url, limit=3)
+            # Cases are queued for ingestion as the crawler finds them, in groups
+            # that share one batched metadata extraction; politeness is enforced
+            # by the per-host rate limiter, not by sleeps.
+            futures = []
+            submitter = UrlGroupSubmitter()
+            try:
+                cases = crawl_and_ingest(
+                    url, limit=limit, max_depth=depth,
+                    on_case=lambda case: futures.append(submitter.submit(case['url'], title=case['title'])),
+                )
+            finally:
+                submitter.flush()
             ingested_count = 0
-            for case in cases:
-                success = ingest_case_from_url(case['url'], title=case['title'])
-                if success:
-                    ingested_count += 1
-                    time.sleep(2)
+            for future in futures:
+                try:
+                    if future.result():
+                        ingested_count += 1
+                except Exception as e:
+                    logger.error(f"Crawl ingestion failed: {e}")
             _set_task(task_id, "done", url=url, ingested_count=ingested_count, cases=cases)
         except Exception as e:
             _set_task(task_id, "failed", url=url, error=str(e), trace=traceback.format_exc())
 
     _set_task(task_id, "pending", url=str(request.url), queued_at=time.time())
-    background_tasks.add_task(_run_crawl, task_id, str(request.url))
+    background_tasks.add_task(_run_crawl, task_id, str(request.url), request.limit, request.depth)
     return {"message": "Crawl queued.", "task_id": task_id, "url": str(request.url)}
 
 
 # ─── Cases List Endpoint ──────────────────────────────────────────────────────
 
+_catalogue_rebuild_started = threading.Event()
+
+
+def _rebuild_catalogue() -> int:
+    """Refresh the catalogue from Pinecone; documents gone from the index also leave the ledger."""
+    return get_case_catalogue().rebuild_from_pinecone(get_pinecone_index(), on_removed=forget_removed_documents)
+
+
+def _rebuild_catalogue_once():
+    """Populate an empty catalogue from Pinecone in the background (once per process)."""
+    if _catalogue_rebuild_started.is_set():
+        return
+    _catalogue_rebuild_started.set()
+
+    def _run():
+        try:
+            _rebuild_catalogue()
+        except Exception as e:
+            logger.warning(f"Case catalogue rebuild failed: {e}")
+            _catalogue_rebuild_started.clear()
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
 @app.get("/api/cases")
-def get_cases():
+def get_cases(
+    request: Request,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=200),
+    domain: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    status: str | None = None,
+    sort: str = "date_desc",
+):
     """
-    Fetch all ingested cases by doing a generic semantic search.
-    Returns the first chunk (chunk_index==0) of every ingested document.
+    List ingested cases (one row per document) from the local case catalogue.
+
+    Cursor-paginated: pass the previous page's ``next_cursor`` to continue.
+    Filters: ``domain``, ``status``, ``date_from``/``date_to`` (ISO dates).
+    Sorts: date_desc (default), date_asc, title, recent. Responses carry a
+    weak ETag; a matching If-None-Match returns 304. No embedding or vector
+    query is made. An empty catalogue is rebuilt from Pinecone in the
+    background.
     """
-    pc = get_pinecone_client()
-    index = get_pinecone_index()
+    catalogue = get_case_catalogue()
+    if catalogue is None:
+        raise HTTPException(status_code=503, detail="Case catalogue is disabled.")
 
-    embedding = pc.inference.embed(
-        model=EMBED_MODEL,
-        inputs=["law case judgment summary research document"],
-        parameters={"input_type": "query"}
-    )
+    params = dict(cursor=cursor, limit=limit, domain=domain, date_from=date_from,
+                  date_to=date_to, status=status, sort=sort)
+    etag = catalogue.etag(**params)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
 
-    # Use empty namespace "" — consistent with the upsert namespace in ingest.py
-    search_results = index.query(
-        namespace="",
-        vector=embedding[0]['values'],
-        top_k=100,
-        filter={"chunk_index": {"$eq": 0}},
-        include_metadata=True
-    )
+    try:
+        page = catalogue.list(**params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    cases = []
-    if search_results and hasattr(search_results, 'matches'):
-        for match in search_results.matches:
-            meta = match.metadata
-            # Strip leading markdown heading markers and embedded newlines.
-            # Some titles are stored with the raw first line of the markdown doc,
-            # e.g. "Maneka Gandhi...\n### Equivalent citations..."
-            # \n here may be a literal two-char escape sequence OR a real newline.
-            import re
-            raw_title = meta.get("title", "Unknown Case")
-            clean_title = re.split(r'\\n|\n|###|##', raw_title.lstrip('#').strip())[0].strip()[:120]
-            cases.append({
-                "id": match.id,
-                "title": clean_title,
-                "url": meta.get("url", ""),
-                "score": match.score,
-                "legal_domain": meta.get("ai_legal_domain", ""),
-                "judgment_date": meta.get("ai_judgment_date", ""),
-            })
-
-    return {"cases": cases}
+    if page["total"] == 0 and not any((cursor, domain, date_from, date_to, status)):
+        _rebuild_catalogue_once()
+    return JSONResponse(content=page, headers=headers)
+
+
+@app.post("/api/cases/rebuild", status_code=202)
+def rebuild_cases():
+    """Re-scan Pinecone (list + fetch, no inference) to refresh the case catalogue."""
+    if get_case_catalogue() is None:
+        raise HTTPException(status_code=503, detail="Case catalogue is disabled.")
+    _catalogue_rebuild_started.clear()
+    _rebuild_catalogue_once()
+    return {"message": "Case catalogue rebuild started."}
 
 
 # ─── Diagnostic Endpoints ─────────────────────────────────────────────────────
 
 @app.get("/api/health/diagnostics")
 def run_diagnostics():
-    import requests
     from app.ingest import process_and_store_document
     results = {}
 
     # 1. Test IndianKanoon Reachability
     try:
         headers = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"}
-        resp = requests.get("https://indiankanoon.org/doc/1712542/", headers=headers, timeout=10)
+        resp = http_get("https://indiankanoon.org/doc/1712542/", headers=headers, timeout=10)
         results["indian_kanoon_status"] = resp.status_code
     except Exception as e:
         results["indian_kanoon_status"] = f"Error: {e}"
@@ -368,7 +615,6 @@ def run_diagnostics():
 
 @app.get("/api/health/ik_api")
 def test_ik_api():
-    import requests
     from app.core.scraper import fetch_case_text
 
     results = {}
@@ -378,13 +624,9 @@ def test_ik_api():
         return results
 
     docid = "257876"
-    api_url = f"https://api.indiankanoon.org/doc/{docid}/"
-    api_headers = {
-        "Authorization": f"Token {ik_token}",
-        "Accept": "application/json"
-    }
     try:
-        api_resp = requests.post(api_url, headers=api_headers, timeout=10)
+        # Bypasses the HTTP cache: this must reach the API to tell anything
+        api_resp = get_ik_client().probe(docid)
         results["api_test"] = {
             "status_code": api_resp.status_code,
             "response": api_resp.text[:500]
@@ -396,10 +638,50 @@ def test_ik_api():
         text = fetch_case_text("https://indiankanoon.org/doc/257876/")
         results["fetch_case_text_length"] = len(text)
         results["fetch_case_text_preview"] = text[:500]
-        ai_meta = extract_legal_metadata(text[:25000])
+        ai_meta = extract_legal_metadata_cached(text[:25000])
         results["extraction_test"] = ai_meta
     except Exception as e:
         results["fetch_case_text_error"] = str(e)
         results["fetch_case_text_trace"] = traceback.format_exc()
 
     return results
+
+
+@app.get("/api/health/ik_usage")
+def ik_api_usage():
+    """IndianKanoon API metering: calls and cache hits per endpoint, spend (INR), cost per ingest."""
+    ik = get_ik_client()
+    return ik.stats() if ik else {"enabled": False}
+
+
+@app.get("/api/health/retrieval")
+def retrieval_stats():
+    """Adaptive-retrieval metrics: final top_k per query, exit reasons, mean rounds."""
+    return get_retrieval_stats()
+
+
+@app.get("/api/health/coalescing")
+def query_coalescing_stats():
+    """Single-flight metrics for /api/query: calls, executions, coalesced duplicates and their ratio."""
+    return get_query_coalescing_stats()
+
+
+@app.get("/api/health/domain_classifier")
+def domain_classifier_stats():
+    """Query domain centroids: domains and records per centroid, classify outcomes and mean latency."""
+    classifier = get_domain_classifier()
+    return classifier.stats() if classifier else {"enabled": False}
+
+
+@app.get("/api/health/cpu_pool")
+def cpu_pool_stats():
+    """Process-pool metrics for document conversion and large-page parsing: tasks, failures, timeouts, recycles."""
+    pool = get_cpu_pool()
+    return pool.stats() if pool else {"enabled": False}
+
+
+@app.get("/api/health/http")
+def http_pool_stats():
+    """Connection-reuse metrics for the shared outbound HTTP pool, plus response-cache and OpenRouter pool settings."""
+    cache = get_response_cache()
+    return {**get_http_stats(), "cache": cache.stats() if cache else None, "openrouter": get_openrouter_pool_settings()}
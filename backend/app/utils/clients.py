@@ -0,0 +1,176 @@
+import os
+import time
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Placeholder for module-level client attributes (``rag.client``,
+# ``rag.index``, ``extraction.client``) that are resolved through the shared
+# providers on first use. Assigning or patching the attribute overrides the
+# provider — tests rely on this.
+UNSET = object()
+
+# ─── OpenRouter ──────────────────────────────────────────────────────────────
+#
+# One OpenAI-compatible client per process (plus an async twin) over a tuned
+# httpx pool, so querying, extraction and OCR reuse warm keep-alive
+# connections to openrouter.ai instead of each holding its own pool.
+
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "32"))
+OPENROUTER_MAX_KEEPALIVE = int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "16"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "60"))
+_CONNECT_TIMEOUT = 5.0
+
+# Read timeout per call type, in seconds. "query" is per model in the answer
+# cascade (12 s x 5 models → worst case 60 s); extraction and vision OCR
+# legitimately take longer.
+LLM_TIMEOUTS = {"query": 12.0, "extraction": 30.0, "ocr": 60.0}
+
+# HTTP/2 multiplexes concurrent calls over one connection. It needs the
+# optional `h2` package (pip install "httpx[http2]"); fall back silently.
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_openrouter = None
+_async_openrouter = None
+_openrouter_lock = threading.Lock()
+
+
+def llm_timeout(kind: str):
+    """httpx.Timeout for an LLM call of the given kind ("query", "extraction", "ocr")."""
+    import httpx
+    read = LLM_TIMEOUTS[kind]
+    return httpx.Timeout(read, connect=min(_CONNECT_TIMEOUT, read))
+
+
+def _pool_options() -> dict:
+    import httpx
+    return {
+        "http2": _HTTP2,
+        "limits": httpx.Limits(
+            max_connections=OPENROUTER_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE,
+            keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": llm_timeout("extraction"),
+    }
+
+
+def get_openrouter_client():
+    """
+    Shared OpenAI-compatible OpenRouter client, created on first use.
+    Returns None when OPENROUTER_API_KEY is not set (checked on every call,
+    so a key added later is picked up).
+
+    Pass ``timeout=llm_timeout(kind)`` per call, or use
+    ``client.with_options(timeout=...)`` — both keep the shared pool.
+    """
+    global _openrouter
+    if _openrouter is None:
+        api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
+        if not api_key:
+            return None
+        with _openrouter_lock:
+            if _openrouter is None:
+                try:
+                    import httpx
+                    from openai import OpenAI
+                    _openrouter = OpenAI(
+                        base_url=OPENROUTER_BASE_URL,
+                        api_key=api_key,
+                        http_client=httpx.Client(**_pool_options()),
+                    )
+                except Exception as e:
+                    logger.info(f"Warning: Failed to initialize OpenAI client: {e}")
+                    return None
+    return _openrouter
+
+
+def get_async_openrouter_client():
+    """Async counterpart of get_openrouter_client() with the same pool settings."""
+    global _async_openrouter
+    if _async_openrouter is None:
+        api_key = os.getenv("OPENROUTER_API_KEY", "").strip()
+        if not api_key:
+            return None
+        with _openrouter_lock:
+            if _async_openrouter is None:
+                try:
+                    import httpx
+                    from openai import AsyncOpenAI
+                    _async_openrouter = AsyncOpenAI(
+                        base_url=OPENROUTER_BASE_URL,
+                        api_key=api_key,
+                        http_client=httpx.AsyncClient(**_pool_options()),
+                    )
+                except Exception as e:
+                    logger.info(f"Warning: Failed to initialize async OpenAI client: {e}")
+                    return None
+    return _async_openrouter
+
+
+def get_openrouter_pool_settings() -> dict:
+    return {
+        "http2": _HTTP2,
+        "max_connections": OPENROUTER_MAX_CONNECTIONS,
+        "max_keepalive_connections": OPENROUTER_MAX_KEEPALIVE,
+        "keepalive_expiry_s": OPENROUTER_KEEPALIVE_EXPIRY,
+        "timeouts_s": LLM_TIMEOUTS,
+        "sync_client": _openrouter is not None,
+        "async_client": _async_openrouter is not None,
+    }
+
+
+# ─── Warm-up ─────────────────────────────────────────────────────────────────
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") != "0"
+
+
+def warm_up() -> dict:
+    """
+    Build the heavy clients ahead of the first request: OpenRouter, the
+    Pinecone index (plus a stats round-trip) and the plain MarkItDown
+    converter. Every step is best-effort. Returns per-step timings in ms.
+    """
+    from app.utils.pinecone import get_pinecone_index
+    from app.ingest import _get_plain_converter
+
+    timings = {}
+
+    def _step(name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            logger.info(f"Warning: warm-up step '{name}' failed: {e}")
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _pinecone():
+        stats = get_pinecone_index().describe_index_stats()
+        logger.info(f"Connected to Pinecone index: {os.getenv('PINECONE_INDEX_NAME')}")
+        logger.info(f"Total vector count: {stats['total_vector_count']}")
+
+    _step("openrouter", get_openrouter_client)
+    _step("pinecone", _pinecone)
+    _step("markitdown", _get_plain_converter)
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
+
+
+def start_background_warm_up() -> threading.Thread | None:
+    """Run warm_up() on a daemon thread so startup is not blocked. None when STARTUP_WARMUP=0."""
+    if not STARTUP_WARMUP:
+        return None
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,170 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process address-space limit
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# ─── CPU-bound work off the API process ──────────────────────────────────────
+#
+# MarkItDown conversion (PDF/DOCX/XLSX/...) and large-page HTML parsing hold
+# the GIL for seconds at a time. Running them in a small process pool keeps
+# query handling responsive, and lets a pathological document be killed
+# (timeout) or starved (memory cap) without taking the API down with it.
+
+CPU_POOL_ENABLED = os.getenv("CPU_POOL_ENABLED", "1") != "0"
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+# Recycle each worker after this many tasks (bounds leaks in parser libraries)
+CPU_POOL_MAX_TASKS_PER_CHILD = int(os.getenv("CPU_POOL_MAX_TASKS_PER_CHILD", "20"))
+# Address-space cap per worker in MiB (0 = unlimited). An allocation beyond it
+# raises MemoryError inside the worker instead of swapping the instance.
+CPU_POOL_MEMORY_MB = int(os.getenv("CPU_POOL_MEMORY_MB", "2048"))
+
+
+class CpuTaskTimeout(TimeoutError):
+    """A pooled task exceeded its timeout; its worker was killed."""
+
+
+def _init_worker(memory_mb: int):
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+class CpuPool:
+    """
+    ProcessPoolExecutor with per-task timeouts, a memory cap and worker
+    recycling.
+
+    A ProcessPoolExecutor cannot cancel a running task, so on timeout the
+    whole pool is killed and replaced; tasks that were running alongside it
+    are transparently resubmitted once to the fresh pool.
+    """
+
+    def __init__(self, max_workers: int = CPU_POOL_WORKERS,
+                 max_tasks_per_child: int = CPU_POOL_MAX_TASKS_PER_CHILD,
+                 memory_mb: int = CPU_POOL_MEMORY_MB):
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.memory_mb = memory_mb
+        self._pool = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.submitted = self.completed = self.failed = self.timeouts = self.recycles = 0
+
+    def _executor(self) -> tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._pool is None:
+                # max_tasks_per_child is incompatible with "fork"; "spawn" also
+                # keeps the parent's threads and sockets out of the workers.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb,),
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+            return self._pool, self._generation
+
+    def _recycle(self, generation: int, kill: bool):
+        """Replace the pool if it is still ``generation`` (another thread may have done it already)."""
+        with self._lock:
+            if self._pool is None or generation != self._generation:
+                return
+            pool, self._pool = self._pool, None
+            self._generation += 1
+            self.recycles += 1
+        if kill:
+            # No public API to stop a running task: terminate the workers.
+            for process in list((pool._processes or {}).values()):
+                process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args, timeout: float):
+        """Run ``fn(*args)`` in a worker and return its result. Raises CpuTaskTimeout on timeout."""
+        for attempt in range(2):
+            pool, generation = self._executor()
+            with self._lock:
+                self.submitted += 1
+            future = pool.submit(fn, *args)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeout:
+                with self._lock:
+                    self.timeouts += 1
+                logger.warning(f"{getattr(fn, '__name__', fn)} exceeded {timeout}s; recycling the CPU pool.")
+                self._recycle(generation, kill=True)
+                raise CpuTaskTimeout(f"{getattr(fn, '__name__', fn)} timed out after {timeout}s")
+            except BrokenProcessPool:
+                recycled_by_other = generation != self._generation
+                self._recycle(generation, kill=False)
+                if recycled_by_other and attempt == 0:
+                    continue  # collateral of another task's timeout: retry once
+                with self._lock:
+                    self.failed += 1
+                raise
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            with self._lock:
+                self.completed += 1
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_tasks_per_child": self.max_tasks_per_child,
+                "memory_mb": self.memory_mb,
+                "running": self._pool is not None,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "recycles": self.recycles,
+            }
+
+    def shutdown(self):
+        """Drop queued tasks and wait for running ones (graceful; used at app shutdown)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            # wait=True: on 3.11 a non-waiting shutdown can race the executor's
+            # replacement of a worker that just hit max_tasks_per_child.
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Global pool instance
+_cpu_pool = None
+_cpu_pool_lock = threading.Lock()
+
+
+def get_cpu_pool() -> CpuPool | None:
+    """Get the shared CPU pool (workers start on first task). None when CPU_POOL_ENABLED=0."""
+    global _cpu_pool
+    if _cpu_pool is None and CPU_POOL_ENABLED:
+        with _cpu_pool_lock:
+            if _cpu_pool is None:
+                _cpu_pool = CpuPool()
+    return _cpu_pool
+
+
+def run_cpu_bound(fn, *args, timeout: float):
+    """Run ``fn(*args)`` in the shared CPU pool, or inline when the pool is disabled."""
+    pool = get_cpu_pool()
+    if pool is None:
+        return fn(*args)
+    return pool.run(fn, *args, timeout=timeout)
+
+
+def shutdown_cpu_pool():
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown()
@@ -0,0 +1,151 @@
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.utils.ratelimit import get_host_limiter
+
+logger = logging.getLogger(__name__)
+
+# ─── Pool / retry configuration ──────────────────────────────────────────────
+
+DEFAULT_TIMEOUT = 30          # seconds, used when a caller passes no timeout
+POOL_CONNECTIONS = 10         # number of distinct hosts kept in the pool manager
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))  # keep-alive sockets per host
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 1.0          # 1s, 2s, 4s between retries
+MAX_RETRY_AFTER = 60          # never sleep longer than this on a Retry-After header
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.114 Safari/537.36"
+)
+
+
+class _CappedRetry(Retry):
+    """
+    Retry that honours Retry-After but caps it so one 429 can't stall a worker
+    for minutes. Retries to a host under the per-host politeness limiter also
+    wait for a slot, so urllib3's retries can't exceed the crawl rate.
+    """
+
+    host = None
+
+    def increment(self, *args, **kwargs):
+        new_retry = super().increment(*args, **kwargs)
+        new_retry.host = getattr(kwargs.get("_pool"), "host", None) or self.host
+        return new_retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.host:
+            get_host_limiter().acquire_if_limited(self.host)
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+
+def _build_adapter() -> HTTPAdapter:
+    retry = _CappedRetry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # The IK API uses POST for reads, so POST is safe to retry here.
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand the final response back; callers raise_for_status()
+    )
+    return HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        # Block instead of opening overflow sockets: POOL_MAXSIZE is a hard per-host limit.
+        pool_block=True,
+        max_retries=retry,
+    )
+
+
+# ─── Shared client ───────────────────────────────────────────────────────────
+# One HTTPAdapter (and therefore one urllib3 PoolManager) is shared by the whole
+# process, so keep-alive connections are reused across the scraper, crawler and
+# diagnostics. requests.Session itself is not guaranteed thread-safe, so every
+# thread gets its own lightweight Session mounted on the shared adapter.
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_adapter() -> HTTPAdapter:
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                _adapter = _build_adapter()
+    return _adapter
+
+
+def get_http_session() -> requests.Session:
+    """Get the calling thread's Session, backed by the process-wide connection pool."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        adapter = _get_adapter()
+        session = requests.Session()
+        session.headers["User-Agent"] = _DEFAULT_USER_AGENT
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared pool, with retries and a default timeout."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_http_session().get(url, **kwargs)
+
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared pool, with retries and a default timeout."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    return get_http_session().post(url, **kwargs)
+
+
+def get_http_stats() -> dict:
+    """
+    Connection-reuse metrics for every host currently held in the pool.
+
+    ``requests`` counts HTTP requests sent on the pool and ``connections``
+    counts TCP(+TLS) connections opened, so ``reuse_ratio`` is the share of
+    requests that skipped a handshake.
+    """
+    if _adapter is None:
+        return {"hosts": {}, "requests": 0, "connections": 0, "reuse_ratio": 0.0}
+
+    pools = _adapter.poolmanager.pools
+    hosts = {}
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:  # evicted between keys() and get()
+            continue
+        n_req, n_conn = pool.num_requests, pool.num_connections
+        hosts[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+            "requests": n_req,
+            "connections": n_conn,
+            "reuse_ratio": round(1 - n_conn / n_req, 3) if n_req else 0.0,
+        }
+
+    total_req = sum(h["requests"] for h in hosts.values())
+    total_conn = sum(h["connections"] for h in hosts.values())
+    return {
+        "hosts": hosts,
+        "requests": total_req,
+        "connections": total_conn,
+        "reuse_ratio": round(1 - total_conn / total_req, 3) if total_req else 0.0,
+    }
@@ -0,0 +1,269 @@
+import os
+import re
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Callable
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+# ─── Configuration ───────────────────────────────────────────────────────────
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") != "0"
+# Replay only from cache; a miss raises OfflineCacheMiss instead of hitting the network.
+HTTP_CACHE_OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "0") == "1"
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "512"))
+# Judgments are effectively immutable once published, so entries are served
+# without revalidation for a week, then revalidated with ETag/Last-Modified.
+HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", str(7 * 24 * 3600)))
+
+_IK_DOC_RE = re.compile(r"(api\.)?indiankanoon\.org/doc/(\d+)/?")
+
+
+class OfflineCacheMiss(requests.ConnectionError):
+    """Raised in offline mode when a URL has never been cached."""
+
+
+def cache_key(url: str) -> str:
+    """
+    Cache key for a URL. IndianKanoon judgments are keyed by docid (separately
+    for the web page and the API payload, whose bodies differ); everything
+    else by URL.
+    """
+    match = _IK_DOC_RE.search(url)
+    if match:
+        source = "api" if match.group(1) else "web"
+        return f"ik:{match.group(2)}:{source}"
+    return url
+
+
+def _cached_response(url: str, body: bytes, headers: dict) -> requests.Response:
+    """Build a real requests.Response so callers can't tell a hit from a fetch."""
+    resp = requests.Response()
+    resp.status_code = 200
+    resp._content = body
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.url = url
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    return resp
+
+
+class ResponseCache:
+    """
+    On-disk, content-addressed HTTP response cache.
+
+    Bodies are zlib-compressed and stored once per SHA-256 digest under
+    ``blobs/``; a SQLite index maps cache keys to digests plus the validators
+    (ETag / Last-Modified) needed for conditional revalidation. Total blob
+    size is bounded by ``max_bytes`` with least-recently-used eviction.
+    """
+
+    def __init__(self, root=None, max_bytes: int = HTTP_CACHE_MAX_MB * 1024 * 1024,
+                 ttl: int = HTTP_CACHE_TTL, offline: bool = HTTP_CACHE_OFFLINE):
+        self.root = root or get_data_dir("http_cache")
+        self.blob_dir = self.root / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.hits = self.misses = self.revalidated = 0
+        self._lock = threading.Lock()
+        self._db = connect_sqlite(self.root / "index.sqlite")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(accessed_at)")
+        self._db.commit()
+
+    # ── Blob store ──
+
+    def _blob_path(self, digest: str):
+        return self.blob_dir / digest[:2] / f"{digest}.z"
+
+    def _read_blob(self, digest: str) -> bytes | None:
+        try:
+            return zlib.decompress(self._blob_path(digest).read_bytes())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_blob(self, body: bytes) -> tuple[str, int]:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(zlib.compress(body, 6))
+            tmp.replace(path)
+        return digest, path.stat().st_size
+
+    # ── Index ──
+
+    def get(self, url: str) -> dict | None:
+        """Return the index row for ``url`` (with its body), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, digest, content_type, etag, last_modified, stored_at FROM responses WHERE key = ?",
+                (cache_key(url),),
+            ).fetchone()
+        if row is None:
+            return None
+        body = self._read_blob(row[1])
+        if body is None:  # blob deleted out from under us — treat as a miss
+            return None
+        return {
+            "url": row[0], "digest": row[1], "content_type": row[2],
+            "etag": row[3], "last_modified": row[4], "stored_at": row[5], "body": body,
+        }
+
+    def touch(self, url: str, refreshed: bool = False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute("UPDATE responses SET accessed_at = ?, stored_at = ? WHERE key = ?",
+                                 (now, now, cache_key(url)))
+            else:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, cache_key(url)))
+            self._db.commit()
+
+    def put(self, url: str, response: requests.Response):
+        """Store a 200 response unless the server forbids it."""
+        if "no-store" in (response.headers.get("Cache-Control") or ""):
+            return
+        digest, size = self._write_blob(response.content)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key(url), url, digest, size, response.headers.get("Content-Type"),
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now),
+            )
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until the store fits in max_bytes. Caller holds the lock."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, digest, size in self._db.execute(
+            "SELECT key, digest, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            still_used = self._db.execute("SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if not still_used:
+                try:
+                    self._blob_path(digest).unlink()
+                except OSError:
+                    pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._db.commit()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {
+                "entries": entries, "bytes": size, "max_bytes": self.max_bytes, "offline": self.offline,
+                "hits": self.hits, "misses": self.misses, "revalidated": self.revalidated,
+            }
+
+    # ── Fetch ──
+
+    def fetch(self, url: str, send: Callable[..., requests.Response],
+              before_network: Callable[[], object] | None = None,
+              cacheable: Callable[[requests.Response], bool] | None = None,
+              ttl: int | None = None, **kwargs) -> requests.Response:
+        """
+        Return a response for ``url``, from cache when possible.
+
+        ``send(url, **kwargs)`` performs the real request (e.g. http_get or
+        http_post). ``before_network`` runs only when the network is actually
+        used — pass the rate limiter here so cache hits aren't throttled.
+        ``cacheable(response)`` vetoes storing a 200 whose body is not a
+        usable result (an API error payload, an empty page), so a transient
+        failure is not replayed for the whole TTL. ``ttl`` overrides the
+        cache-wide freshness lifetime for this URL.
+        """
+        entry = self.get(url)
+        max_age = self.ttl if ttl is None else ttl
+
+        if entry and (self.offline or time.time() - entry["stored_at"] < max_age):
+            self._count("hits")
+            self.touch(url)
+            return _cached_response(url, entry["body"], {"Content-Type": entry["content_type"] or ""})
+
+        if self.offline:
+            self._count("misses")
+            raise OfflineCacheMiss(f"Offline mode: {url} is not in the HTTP cache")
+
+        if entry:
+            headers = dict(kwargs.pop("headers", None) or {})
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+            kwargs["headers"] = headers
+
+        if before_network is not None:
+            before_network()
+        response = send(url, **kwargs)
+
+        if entry and response.status_code == 304:
+            self._count("revalidated")
+            self.touch(url, refreshed=True)
+            return _cached_response(url, entry["body"], {"Content-Type": entry["content_type"] or ""})
+
+        self._count("misses")
+        if response.status_code == 200 and (cacheable is None or cacheable(response)):
+            try:
+                self.put(url, response)
+            except Exception as e:
+                logger.warning(f"HTTP cache write failed for {url}: {e}")
+        return response
+
+
+# Global cache instance
+_response_cache = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Get or initialize the shared response cache. None when HTTP_CACHE_ENABLED=0."""
+    global _response_cache
+    if _response_cache is None and HTTP_CACHE_ENABLED:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def cached_fetch(url: str, send: Callable[..., requests.Response],
+                 before_network: Callable[[], object] | None = None,
+                 cacheable: Callable[[requests.Response], bool] | None = None,
+                 ttl: int | None = None, **kwargs) -> requests.Response:
+    """ResponseCache.fetch() on the shared cache, or a plain ``send`` when caching is disabled."""
+    cache = get_response_cache()
+    if cache is None:
+        if before_network is not None:
+            before_network()
+        return send(url, **kwargs)
+    return cache.fetch(url, send, before_network=before_network, cacheable=cacheable, ttl=ttl, **kwargs)
@@ -1,11 +1,14 @@
-from pinecone import Pinecone
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Global Pinecone client instance
+# Global Pinecone client and index handles. The pinecone SDK is imported on
+# first use: it is one of the slowest imports in the app.
 _pc = None
+_indexes = {}
+_lock = threading.Lock()
 
 def get_pinecone_client():
     """Get or initialize the Pinecone client instance."""
@@ -14,14 +17,23 @@ def get_pinecone_client():
         api_key = os.getenv("PINECONE_API_KEY")
         if not api_key:
             raise ValueError("PINECONE_API_KEY environment variable is not set")
-        _pc = Pinecone(api_key=api_key)
+        with _lock:
+            if _pc is None:
+                from pinecone import Pinecone
+                _pc = Pinecone(api_key=api_key)
     return _pc
 
 def get_pinecone_index():
-    """Get the Pinecone index using the centralized client."""
-    pc = get_pinecone_client()
+    """Get the (shared) Pinecone index using the centralized client."""
     index_name = os.getenv("PINECONE_INDEX_NAME")
     if not index_name:
         # Fallback to match the render.yaml default
         index_name = "indian-law"
-    return pc.Index(index_name)
+    index = _indexes.get(index_name)
+    if index is None:
+        pc = get_pinecone_client()
+        with _lock:
+            index = _indexes.get(index_name)
+            if index is None:
+                index = _indexes[index_name] = pc.Index(index_name)
+    return index
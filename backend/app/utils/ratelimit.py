@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+
+# Default politeness budget per host: 1 request/second with a burst of 2.
+# Replaces the fixed time.sleep() calls scattered through the crawl/ingest path.
+DEFAULT_RATE = float(os.getenv("CRAWL_RATE_PER_SEC", "1.0"))
+DEFAULT_BURST = float(os.getenv("CRAWL_BURST", "2"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    acquire() reserves tokens under the lock and sleeps *outside* it, so
+    concurrent callers queue up in arrival order and each waits only for its
+    own slot — throughput is bounded by ``rate``, not by serial waiting.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens  # may go negative: that is our reservation
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """One TokenBucket per hostname, created on first use."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """Wait for a politeness slot on ``url``'s host. Returns the seconds waited."""
+        return self.bucket(urlparse(url).hostname or "").acquire()
+
+    def acquire_if_limited(self, host: str) -> float:
+        """Wait for a slot only if ``host`` is already rate-limited (for retries of limited requests)."""
+        with self._lock:
+            bucket = self._buckets.get(host)
+        return bucket.acquire() if bucket is not None else 0.0
+
+
+# Global limiter instance shared by the crawler and the scraper
+_host_limiter = None
+_host_limiter_lock = threading.Lock()
+
+
+def get_host_limiter() -> HostRateLimiter:
+    """Get or initialize the process-wide per-host rate limiter."""
+    global _host_limiter
+    if _host_limiter is None:
+        with _host_limiter_lock:
+            if _host_limiter is None:
+                _host_limiter = HostRateLimiter()
+    return _host_limiter
@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from app.utils.storage import get_data_dir, connect_sqlite
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") != "0"
+# Bounded like the HTTP cache: entries expire after a TTL, and the least
+# recently used ones are pruned once the stored values exceed the size cap.
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "1024"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(90 * 24 * 3600)))
+
+
+def content_hash(data: str | bytes) -> str:
+    """SHA-256 hex digest of text or bytes (text is hashed as UTF-8)."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 hex digest of a file, read in chunks (same value as content_hash of its bytes)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite store for expensive, deterministic-enough derived results
+    (converted Markdown, LLM-extracted metadata), keyed by content hash.
+
+    Values are JSON. Entries are grouped by ``namespace`` so each producer can
+    version its own keys without clashing with the others. Entries older than
+    ``ttl`` are misses, and the total value size is kept under ``max_bytes``
+    with least-recently-used pruning. Write failures are logged, never raised:
+    the cache must not break the ingestion that feeds it.
+    """
+
+    def __init__(self, path=None, max_bytes: int = RESULT_CACHE_MAX_MB * 1024 * 1024,
+                 ttl: int = RESULT_CACHE_TTL):
+        self.path = path or get_data_dir() / "results.sqlite"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = self.misses = self.evicted = 0
+        self._lock = threading.Lock()
+        self._db = connect_sqlite(self.path)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                accessed_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+        if "size" not in columns:  # caches created before pruning existed
+            self._db.execute("ALTER TABLE results ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._db.execute("ALTER TABLE results ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._db.execute("UPDATE results SET size = LENGTH(value), accessed_at = created_at")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_results_lru ON results(accessed_at)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, namespace: str, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created_at FROM results WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE results SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, namespace: str, key: str, value):
+        try:
+            data = json.dumps(value)
+            now = time.time()
+            with self._lock:
+                old = self._db.execute(
+                    "SELECT size FROM results WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (namespace, key, value, created_at, size, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (namespace, key, data, now, len(data), now),
+                )
+                self._bytes += len(data) - (old[0] if old else 0)
+                if self._bytes > self.max_bytes:
+                    self._prune(now)
+                self._db.commit()
+        except Exception as e:
+            logger.warning(f"Result cache write failed for {namespace}/{key[:12]}: {e}")
+
+    def _prune(self, now: float):
+        """Drop expired entries, then least-recently-used ones down to 90% of max_bytes. Caller holds the lock."""
+        removed = self._db.execute("DELETE FROM results WHERE created_at <= ?", (now - self.ttl,)).rowcount
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        target = self.max_bytes * 0.9
+        if self._bytes > target:
+            for namespace, key, size in self._db.execute(
+                "SELECT namespace, key, size FROM results ORDER BY accessed_at ASC"
+            ).fetchall():
+                self._db.execute("DELETE FROM results WHERE namespace = ? AND key = ?", (namespace, key))
+                self._bytes -= size
+                removed += 1
+                if self._bytes <= target:
+                    break
+        self.evicted += removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT namespace, COUNT(*) FROM results GROUP BY namespace").fetchall()
+            return {
+                "entries": dict(rows), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evicted": self.evicted,
+            }
+
+
+# Global cache instance
+_result_cache = None
+
+
+def get_result_cache() -> ResultCache | None:
+    """Get or initialize the shared result cache. None when RESULT_CACHE_ENABLED=0."""
+    global _result_cache
+    if _result_cache is None and RESULT_CACHE_ENABLED:
+        try:
+            _result_cache = ResultCache()
+        except Exception as e:
+            logger.warning(f"Result cache unavailable ({e}). Continuing without it.")
+            return None
+    return _result_cache
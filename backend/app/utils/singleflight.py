@@ -0,0 +1,55 @@
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution.
+
+    The first caller for a key (the leader) runs ``fn``; callers arriving
+    while it is in flight block on the leader's Future and receive a deep
+    copy of its result (or its exception). Nothing is cached: once the call
+    completes, the next caller for that key runs ``fn`` again.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = self.executions = self.coalesced = 0
+
+    def do(self, key: str, fn):
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalescing_ratio": round(self.coalesced / self.calls, 3) if self.calls else 0.0,
+                "in_flight": len(self._inflight),
+            }
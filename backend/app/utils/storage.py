@@ -0,0 +1,32 @@
+import os
+import sqlite3
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local on-disk state (HTTP cache, extraction cache, ...) lives here.
+# Everything in it is a rebuildable cache — safe to delete at any time.
+_DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent.parent / ".data"
+
+
+def get_data_dir(*parts: str) -> Path:
+    """Return (and create) a directory under LOCAL_DATA_DIR."""
+    root = Path(os.getenv("LOCAL_DATA_DIR", str(_DEFAULT_DATA_DIR)))
+    path = root.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def connect_sqlite(path: Path) -> sqlite3.Connection:
+    """
+    Open a SQLite database for shared use across worker threads.
+
+    Callers must serialise access with their own lock; WAL mode keeps readers
+    from other processes (e.g. a second uvicorn worker) from blocking writers.
+    """
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,74 @@
+"""
+Backfill the metadata that query-time filters compare against, on records
+ingested before it existed or before labels were canonicalised:
+ai_judgment_datenum (from ai_validated_date / ai_judgment_date), and
+ai_legal_domain / ai_court in their canonical form (see
+rules.canonical_domain / canonical_court). Only changed keys are written.
+
+Needs PINECONE_API_KEY. Run from backend/:
+    python -m scripts.backfill_filter_metadata [--dry-run]
+"""
+import sys
+import time
+from collections import Counter
+
+from app.core.rag import _meta_datenum
+from app.core.rules import canonical_court, canonical_domain
+from app.utils.pinecone import get_pinecone_index
+
+FETCH_BATCH = 100  # ids per index.fetch() call
+
+
+def metadata_updates(meta: dict) -> dict:
+    """The set_metadata patch that brings one record's filter fields up to date."""
+    updates = {}
+    if "ai_judgment_datenum" not in meta:
+        datenum = _meta_datenum(meta)
+        if datenum:
+            updates["ai_judgment_datenum"] = datenum
+    if meta.get("ai_legal_domain") is not None:
+        domain = canonical_domain(meta["ai_legal_domain"])
+        if domain != meta["ai_legal_domain"]:
+            updates["ai_legal_domain"] = domain
+    if meta.get("ai_court"):
+        court = canonical_court(meta["ai_court"])
+        if court != meta["ai_court"]:
+            updates["ai_court"] = court
+    return updates
+
+
+def main():
+    dry_run = "--dry-run" in sys.argv[1:]
+    index = get_pinecone_index()
+    counts = Counter()
+    start = time.perf_counter()
+
+    def _process(ids: list[str]):
+        fetched = index.fetch(ids=ids, namespace="")
+        for record_id, vector in (getattr(fetched, "vectors", None) or {}).items():
+            counts["records"] += 1
+            updates = metadata_updates(dict(getattr(vector, "metadata", None) or {}))
+            if not updates:
+                continue
+            counts["updated"] += 1
+            counts.update(updates.keys())
+            if not dry_run:
+                index.update(id=record_id, set_metadata=updates, namespace="")
+
+    pending: list[str] = []
+    for page in index.list(namespace=""):
+        pending.extend(page)
+        while len(pending) >= FETCH_BATCH:
+            _process(pending[:FETCH_BATCH])
+            del pending[:FETCH_BATCH]
+    if pending:
+        _process(pending)
+
+    verb = "would update" if dry_run else "updated"
+    print(f"{counts['records']} records scanned, {counts['updated']} {verb} in {time.perf_counter() - start:.1f}s")
+    for key in ("ai_judgment_datenum", "ai_legal_domain", "ai_court"):
+        print(f"  {counts[key]:7d}  {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: prompt layout vs provider-side prompt caching on the model cascade.
+
+Sends the same grounded query N times per model with the legacy layout
+(domain + query interpolated ahead of the instruction block, one user
+message) and with the current layout (static system message + dynamic user
+message, cache hints where supported). Reports mean time-to-first-token,
+prompt tokens, cached prompt tokens and cost as reported by OpenRouter.
+
+Needs OPENROUTER_API_KEY. Run from backend/:
+    python -m scripts.bench_prompt_cache [--repeat N] [--model MODEL ...]
+"""
+import sys
+import time
+from statistics import mean
+
+from app.core.rag import MODELS, PROMPT_LAYOUT_VERSION, _build_grounded_prompt, _to_messages
+from app.utils.clients import get_openrouter_client
+
+SAMPLE_CONTEXT = (
+    "Case: Parle Products (P) Ltd. vs J.P. & Co., Mysore (Decided: 1972-02-16) [Intellectual Property] "
+    "[Relevance: 0.71]\nContent: The question is whether the wrapper used by the defendants is deceptively "
+    "similar to the registered trade mark of the plaintiffs. Two marks need not be identical; it is enough "
+    "that the impugned mark bears an overall similarity likely to mislead a person usually dealing with one "
+    "to accept the other if offered to him. " * 6
+)
+SAMPLE_QUERIES = [
+    "Can I sell biscuits in a wrapper that looks similar to a famous brand's packaging?",
+    "Is it trademark infringement to use a similar colour scheme on packaging for a different product?",
+    "What is the test for deceptive similarity between two trade marks in India?",
+]
+
+
+def _legacy_messages(query: str, context: str, domain: str) -> list[dict]:
+    """The pre-v2 layout: variable text first, then the fixed instructions, in one user message."""
+    system, user = _build_grounded_prompt(query, context, domain)
+    return [{"role": "user", "content": (
+        f"You are an expert Legal AI Assistant specializing in {domain} under Indian jurisdiction.\n\n"
+        f"Relevant Case Law Context (from verified legal database):\n{context}\n\nUser Query:\n{query}\n\n"
+        + system["content"].split("INSTRUCTIONS:", 1)[1]
+    )}]
+
+
+def _run(model: str, messages: list[dict]) -> dict:
+    start = time.perf_counter()
+    ttft, usage = None, None
+    stream = get_openrouter_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        max_tokens=64,  # TTFT and prompt-side cost only; the answer length is irrelevant
+        stream_options={"include_usage": True},
+        extra_body={"usage": {"include": True}},
+        timeout=60.0,
+    )
+    for chunk in stream:
+        if ttft is None and chunk.choices and chunk.choices[0].delta.content:
+            ttft = time.perf_counter() - start
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "ttft_ms": (ttft or time.perf_counter() - start) * 1000,
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        "cost": float(getattr(usage, "cost", 0) or 0),
+    }
+
+
+def _bench(model: str, layout: str, repeat: int) -> dict | None:
+    runs = []
+    for i in range(repeat):
+        query = SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]
+        if layout == "legacy":
+            messages = _legacy_messages(query, SAMPLE_CONTEXT, "Intellectual Property")
+        else:
+            messages = _to_messages(_build_grounded_prompt(query, SAMPLE_CONTEXT, "Intellectual Property"), model)
+        try:
+            runs.append(_run(model, messages))
+        except Exception as e:
+            print(f"  {model} [{layout}] run {i + 1} failed: {e}")
+    if not runs:
+        return None
+    return {key: mean(r[key] for r in runs) for key in runs[0]}
+
+
+def main():
+    if get_openrouter_client() is None:
+        print("OPENROUTER_API_KEY is not set.")
+        return
+    args = sys.argv[1:]
+    repeat = 5
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    models = [args[i + 1] for i, a in enumerate(args) if a == "--model"] or MODELS
+
+    print(f"prompt layout v{PROMPT_LAYOUT_VERSION}, {repeat} runs per model and layout (first run of each is cold)")
+    print(f"{'model':42} {'layout':7} {'TTFT ms':>9} {'prompt tok':>11} {'cached tok':>11} {'cost $':>10}")
+    for model in models:
+        for layout in ("legacy", "v2"):
+            result = _bench(model, layout, repeat)
+            if result is None:
+                continue
+            print(
+                f"{model[:42]:42} {layout:7} {result['ttft_ms']:9.0f} {result['prompt_tokens']:11.0f} "
+                f"{result['cached_tokens']:11.0f} {result['cost']:10.6f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
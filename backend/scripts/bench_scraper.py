@@ -0,0 +1,86 @@
+"""
+Benchmark: HTML → Markdown conversion over stored IndianKanoon pages.
+
+Compares the legacy double-parse path (html.parser → str → MarkItDown) with
+the single-parse html_to_markdown() path. Reports wall time and peak
+tracemalloc memory per fixture.
+
+Run from backend/:
+    python -m scripts.bench_scraper [fixture_dir_or_file ...] [--repeat N]
+"""
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.core.scraper import html_to_markdown, _select_judgment_node
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "indiankanoon"
+
+
+_legacy_md = None
+
+
+def _legacy_convert(html: bytes) -> str:
+    """The pre-single-parse pipeline, kept here only for comparison."""
+    global _legacy_md
+    if _legacy_md is None:
+        from markitdown import MarkItDown
+        _legacy_md = MarkItDown()
+    soup = BeautifulSoup(html, "html.parser")
+    scoped = str(_select_judgment_node(soup)).encode()
+    result = _legacy_md.convert_stream(io.BytesIO(scoped), file_extension=".html")
+    return result.text_content or ""
+
+
+def _measure(fn, html: bytes, repeat: int) -> tuple[float, float]:
+    """Returns (mean ms per call, peak MiB)."""
+    fn(html)  # warm-up: imports, converter singletons
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / (1024 * 1024)
+
+
+def _collect(paths: list[str]) -> list[Path]:
+    files: list[Path] = []
+    for p in map(Path, paths or [str(DEFAULT_FIXTURES)]):
+        files.extend(sorted(p.glob("*.htm*")) if p.is_dir() else [p])
+    return files
+
+
+def main():
+    args = sys.argv[1:]
+    repeat = 20
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+
+    files = _collect(args)
+    if not files:
+        print("No fixtures found.")
+        return
+
+    print(f"{'fixture':40} {'KiB':>7} {'legacy ms':>10} {'legacy MiB':>11} {'single ms':>10} {'single MiB':>11}")
+    for path in files:
+        html = path.read_bytes()
+        legacy_ms, legacy_mb = _measure(_legacy_convert, html, repeat)
+        single_ms, single_mb = _measure(html_to_markdown, html, repeat)
+        print(
+            f"{path.name[:40]:40} {len(html) / 1024:7.1f} "
+            f"{legacy_ms:10.2f} {legacy_mb:11.2f} {single_ms:10.2f} {single_mb:11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
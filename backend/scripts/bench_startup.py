@@ -0,0 +1,98 @@
+"""
+Benchmark: cold-start cost of the backend.
+
+1. Import time of app.main (``python -X importtime``), with the slowest
+   top-level packages by cumulative time.
+2. Time-to-first-200: seconds from launching uvicorn until GET / returns 200.
+
+Each measurement runs in a fresh interpreter. Run from backend/:
+    python -m scripts.bench_startup [--repeat N] [--top N]
+"""
+import os
+import re
+import sys
+import time
+import socket
+import subprocess
+from statistics import mean, median
+
+import requests
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$")
+
+
+def _import_profile() -> tuple[float, list[tuple[str, float]]]:
+    """Returns (app.main cumulative ms, [(top-level module, cumulative ms), ...])."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, env={**os.environ, "STARTUP_WARMUP": "0"},
+    )
+    total, modules = 0.0, {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        cumulative_ms, depth, name = int(m.group(2)) / 1000, len(m.group(3)), m.group(4)
+        if name == "app.main":
+            total = cumulative_ms
+        elif depth <= 3:  # direct imports of app.main and their children
+            top = name.split(".")[0]
+            modules[top] = max(modules.get(top, 0.0), cumulative_ms)
+    return total, sorted(modules.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _time_to_first_200(timeout: float = 60.0) -> float | None:
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.RequestException:
+                pass
+            time.sleep(0.02)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    args = sys.argv[1:]
+    repeat, top = 5, 10
+    for flag in ("--repeat", "--top"):
+        if flag in args:
+            i = args.index(flag)
+            if flag == "--repeat":
+                repeat = int(args[i + 1])
+            else:
+                top = int(args[i + 1])
+            del args[i:i + 2]
+
+    profiles = [_import_profile() for _ in range(repeat)]
+    totals = [p[0] for p in profiles]
+    print(f"import app.main: median {median(totals):.0f} ms, mean {mean(totals):.0f} ms over {repeat} runs")
+    print(f"{'package':30} {'cumulative ms':>14}")
+    for name, ms in profiles[-1][1][:top]:
+        print(f"{name[:30]:30} {ms:14.1f}")
+
+    ttfb = [t for t in (_time_to_first_200() for _ in range(repeat)) if t is not None]
+    if ttfb:
+        print(f"\ntime-to-first-200: median {median(ttfb):.2f} s, mean {mean(ttfb):.2f} s over {len(ttfb)} runs")
+    else:
+        print("\ntime-to-first-200: server did not answer within the timeout")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Build the query domain classifier: one centroid per ai_legal_domain,
+averaged over every active chunk vector in the Pinecone index, written to
+LOCAL_DATA_DIR/domain_centroids.json. A running server picks the new file
+up on the next query.
+
+Re-run after large ingestions or when new domains appear. Needs
+PINECONE_API_KEY. Run from backend/:
+    python -m scripts.build_domain_centroids [--min-records N]
+"""
+import sys
+import time
+
+from app.core.domain_classifier import MIN_DOMAIN_RECORDS, build_domain_centroids, domain_centroids_path
+from app.core.rag import EMBED_MODEL
+from app.utils.pinecone import get_pinecone_index
+
+
+def main():
+    args = sys.argv[1:]
+    min_records = int(args[args.index("--min-records") + 1]) if "--min-records" in args else MIN_DOMAIN_RECORDS
+
+    start = time.perf_counter()
+    classifier = build_domain_centroids(get_pinecone_index(), model=EMBED_MODEL, min_records=min_records)
+    if not len(classifier):
+        print("No domain has enough labelled records; nothing written.")
+        return
+    path = domain_centroids_path()
+    classifier.save(path)
+    print(f"{len(classifier)} domain centroids ({classifier.dimension} dims) in {time.perf_counter() - start:.1f}s → {path}")
+    for domain, records in sorted(classifier.counts.items(), key=lambda pair: -pair[1]):
+        print(f"  {records:7d}  {domain}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,6 @@
-import os
-import time
 import logging
 from app.core.crawler import crawl_and_ingest
-from app.ingest import ingest_case_from_url
+from app.ingest import UrlGroupSubmitter
 
 # Configure Logging to show progress clearly
 logging.basicConfig(
@@ -35,9 +33,19 @@ def run_training_bot():
     for seed in SEED_URLS:
         logger.info(f"\n--- Scouting topic: {seed} ---")
         
-        # 1. Crawl for potential cases (Limit increased to 20 per topic for broader coverage)
-        # Note: crawl_and_ingest returns a list of dicts {url, title}
-        potential_cases = crawl_and_ingest(seed, limit=15)
+        # 1. Crawl for potential cases and queue them for ingestion as they are
+        # discovered, in groups that share one batched metadata extraction.
+        # Politeness is handled by the per-host rate limiter inside the
+        # crawler/scraper, so no fixed sleeps are needed here.
+        queued = []
+        submitter = UrlGroupSubmitter()
+
+        def _queue(case):
+            logger.info(f"[{len(queued) + 1}] Queued: {case['title']}...")
+            queued.append((case, submitter.submit(case['url'], title=case['title'])))
+
+        potential_cases = crawl_and_ingest(seed, limit=15, on_case=_queue)
+        submitter.flush()
         
         if not potential_cases:
             logger.warning("No cases found for this topic. Moving to next.")
@@ -45,15 +53,12 @@ def run_training_bot():
             
         logger.info(f"Found {len(potential_cases)} potential cases to learn.")
         
-        # 2. Ingest each case
-        for i, case in enumerate(potential_cases, 1):
+        # 2. Collect ingestion results
+        for case, future in queued:
             url = case['url']
             title = case['title']
-            
-            logger.info(f"[{i}/{len(potential_cases)}] Learning: {title}...")
-            
             try:
-                success = ingest_case_from_url(url, title=title)
+                success = future.result()
                 
                 if success:
                     logger.info(f"✅ Learned: {title}")
@@ -61,9 +66,6 @@ def run_training_bot():
                 else:
                     logger.warning(f"❌ Failed to learn: {title}")
                 
-                # Politeness delay to be a good bot
-                time.sleep(2) 
-                
             except Exception as e:
                 logger.error(f"Error learning {url}: {e}")
                 
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Point every on-disk cache at a throwaway directory so tests never read or
+# pollute the developer's real backend/.data store. Must run before app imports.
+os.environ.setdefault("LOCAL_DATA_DIR", tempfile.mkdtemp(prefix="techniche-test-"))
+
+# Convert documents inline: tests patch converters with MagicMocks, which a
+# spawned worker process would never see. test_cpu_pool.py builds its own pool.
+os.environ.setdefault("CPU_POOL_ENABLED", "0")
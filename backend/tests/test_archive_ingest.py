@@ -0,0 +1,149 @@
+"""
+Tests for ZIP fan-out ingestion: safe expansion, per-member dedup, parallel
+submission through the ingestion workers, and the aggregated upload task.
+
+Run: cd backend && python -m pytest tests/test_archive_ingest.py -v
+"""
+import io
+import hashlib
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import ingest
+from app.core.ledger import IngestionLedger, KIND_FILE
+
+
+def _zip(members: dict[str, bytes]) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return IngestionLedger(tmp_path / "ledger.sqlite")
+
+
+class TestExpandArchive:
+
+    def test_skips_unsupported_hidden_and_nested(self, tmp_path):
+        archive = tmp_path / "a.zip"
+        archive.write_bytes(_zip({
+            "judgments/a.pdf": b"%PDF a",
+            "judgments/b.txt": b"text b",
+            "__MACOSX/judgments/._a.pdf": b"junk",
+            ".DS_Store": b"junk",
+            "inner.zip": b"PK",
+            "tool.exe": b"MZ",
+        }))
+        out = tmp_path / "out"
+        out.mkdir()
+        members = ingest.expand_archive(str(archive), str(out))
+        assert [name for name, _ in members] == ["judgments/a.pdf", "judgments/b.txt"]
+        assert members[0][1].read_bytes() == b"%PDF a"
+
+    def test_member_paths_cannot_escape(self, tmp_path):
+        archive = tmp_path / "evil.zip"
+        archive.write_bytes(_zip({"../../escape.txt": b"x"}))
+        out = tmp_path / "out"
+        out.mkdir()
+        (_, path), = ingest.expand_archive(str(archive), str(out))
+        assert path.parent == out
+        assert not (tmp_path.parent / "escape.txt").exists()
+
+    def test_compression_bomb_member_listed_without_path(self, tmp_path):
+        archive = tmp_path / "bomb.zip"
+        archive.write_bytes(_zip({"bomb.txt": b"0" * 1_000_000, "ok.txt": b"judgment"}))
+        out = tmp_path / "out"
+        out.mkdir()
+        members = ingest.expand_archive(str(archive), str(out))
+        assert [(name, path is None) for name, path in members] == [("bomb.txt", True), ("ok.txt", False)]
+
+    def test_member_limit(self, tmp_path):
+        archive = tmp_path / "many.zip"
+        archive.write_bytes(_zip({f"{i}.txt": b"x" for i in range(5)}))
+        with patch("app.ingest.MAX_ARCHIVE_MEMBERS", 3), pytest.raises(ValueError):
+            ingest.expand_archive(str(archive), str(tmp_path))
+
+
+class TestIngestArchive:
+
+    def test_each_member_ingested_separately(self, tmp_path, ledger):
+        archive = tmp_path / "cases.zip"
+        archive.write_bytes(_zip({f"case_{i}.txt": f"judgment {i}".encode() for i in range(6)}))
+        calls = []
+
+        def fake_ingest(path, title=None, content_sha256=None, force=False):
+            calls.append((Path(path).read_bytes(), title, content_sha256))
+            return True
+
+        with patch("app.ingest.ingest_case_from_file", side_effect=fake_ingest), \
+             patch("app.ingest.get_ingestion_ledger", return_value=ledger):
+            summary = ingest.ingest_archive(str(archive), "cases.zip", content_sha256="arch")
+        assert summary["total"] == summary["done"] == 6
+        assert sorted(c[1] for c in calls) == [f"case {i}" for i in range(6)]
+        assert all(c[2] == hashlib.sha256(c[0]).hexdigest() for c in calls)
+        assert ledger.get(KIND_FILE, "arch")["title"] == "cases.zip"
+
+    def test_duplicates_and_failures(self, tmp_path, ledger):
+        archive = tmp_path / "cases.zip"
+        archive.write_bytes(_zip({"old.txt": b"known", "a.txt": b"same", "b.txt": b"same", "bad.txt": b"bad"}))
+        ledger.record(KIND_FILE, hashlib.sha256(b"known").hexdigest())
+        seen = []
+
+        def fake_ingest(path, title=None, content_sha256=None, force=False):
+            return Path(path).read_bytes() != b"bad"
+
+        with patch("app.ingest.ingest_case_from_file", side_effect=fake_ingest), \
+             patch("app.ingest.get_ingestion_ledger", return_value=ledger):
+            summary = ingest.ingest_archive(
+                str(archive), content_sha256="arch", on_result=lambda name, status: seen.append((name, status)),
+            )
+        assert summary["files"] == {"old.txt": "duplicate", "a.txt": "done", "b.txt": "duplicate", "bad.txt": "failed"}
+        assert sorted(seen) == sorted(summary["files"].items())
+        # A partly failed archive is not recorded, so a re-upload retries the failures
+        assert ledger.get(KIND_FILE, "arch") is None
+
+
+    def test_guarded_members_reported_as_skipped(self, tmp_path, ledger):
+        archive = tmp_path / "cases.zip"
+        archive.write_bytes(_zip({"bomb.txt": b"0" * 1_000_000, "ok.txt": b"judgment"}))
+        totals = []
+        with patch("app.ingest.ingest_case_from_file", return_value=True) as mock_ingest, \
+             patch("app.ingest.get_ingestion_ledger", return_value=ledger):
+            summary = ingest.ingest_archive(str(archive), on_expanded=totals.append)
+        assert summary["files"] == {"bomb.txt": "skipped", "ok.txt": "done"}
+        assert (summary["total"], summary["done"], summary["skipped"]) == (2, 1, 1) and totals == [2]
+        mock_ingest.assert_called_once()
+
+
+class TestArchiveUpload:
+
+    def test_zip_upload_aggregates_member_status(self, ledger):
+        from app.main import app
+        client = TestClient(app, raise_server_exceptions=False)
+        content = _zip({"x.txt": b"one", "y.txt": b"two", "z.txt": b"one"})
+        with patch("app.ingest.ingest_case_from_file", return_value=True), \
+             patch("app.ingest.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.get_ingestion_ledger", return_value=ledger):
+            resp = client.post("/api/learn/file", files={"file": ("bundle.zip", io.BytesIO(content), "application/zip")})
+            assert resp.status_code == 202
+            task = client.get(f"/api/tasks/{resp.json()['task_id']}").json()
+            again = client.post("/api/learn/file", files={"file": ("bundle.zip", io.BytesIO(content), "application/zip")})
+        assert task["status"] == "done"
+        assert (task["total"], task["done"], task["duplicate"], task["failed"]) == (3, 2, 1, 0)
+        assert task["files"]["y.txt"] == "done"
+        assert again.status_code == 409
+
+    def test_corrupt_zip_fails_task(self):
+        from app.main import app
+        client = TestClient(app, raise_server_exceptions=False)
+        resp = client.post("/api/learn/file", files={"file": ("broken.zip", io.BytesIO(b"PK not a zip"), "application/zip")})
+        task = client.get(f"/api/tasks/{resp.json()['task_id']}").json()
+        assert task["status"] == "failed"
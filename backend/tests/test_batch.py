@@ -0,0 +1,233 @@
+"""
+Tests for bulk URL ingestion (app/core/batch.py) and the /api/learn/batch
+endpoints: normalisation, one-pass dedup, job accounting and streaming.
+
+Run: cd backend && python -m pytest tests/test_batch.py -v
+"""
+import json
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import batch
+from app.core.ledger import IngestionLedger, KIND_URL
+from app.core.catalogue import CaseCatalogue
+
+
+def _done_future(value):
+    f = Future()
+    f.set_result(value)
+    return f
+
+
+@pytest.fixture
+def stores(tmp_path):
+    ledger = IngestionLedger(tmp_path / "ledger.sqlite")
+    catalogue = CaseCatalogue(tmp_path / "catalogue.sqlite")
+    with patch("app.core.batch.get_ingestion_ledger", return_value=ledger), \
+         patch("app.core.batch.get_case_catalogue", return_value=catalogue):
+        yield ledger, catalogue
+
+
+class TestNormalize:
+
+    def test_docids_and_links(self):
+        assert batch.normalize_batch_item(" 1712542 ") == "https://indiankanoon.org/doc/1712542/"
+        assert batch.normalize_batch_item("https://indiankanoon.org/docfragment/99/?formInput=x") == \
+            "https://indiankanoon.org/doc/99/"
+        assert batch.normalize_batch_item("https://example.org/judgment/5") == "https://example.org/judgment/5"
+        assert batch.normalize_batch_item("not a url") is None
+        assert batch.normalize_batch_item("ftp://x/doc/1") is None
+
+
+class TestStartBatch:
+
+    def test_dedup_in_one_pass(self, stores):
+        ledger, catalogue = stores
+        ledger.record(KIND_URL, "https://indiankanoon.org/doc/1/")
+        catalogue.upsert("doc_2", {"title": "T", "url": "https://indiankanoon.org/doc/2/"})
+        submitted = []
+
+        def submit(urls, force):
+            submitted.append((urls, force))
+            return _done_future({url: True for url in urls})
+
+        job = batch.start_batch(
+            ["1", "https://indiankanoon.org/doc/2/", "3", "https://indiankanoon.org/doc/3/", "junk"],
+            submit=submit,
+        )
+        assert submitted == [(["https://indiankanoon.org/doc/3/"], True)]
+        summary = job.summary(include_items=True)
+        assert (summary["done"], summary["duplicate"], summary["invalid"], summary["queued"]) == (1, 2, 1, 0)
+        assert summary["requested"] == 5 and summary["status"] == "done"
+
+    def test_stale_ledger_entries_are_not_duplicates(self, stores):
+        ledger, catalogue = stores
+        catalogue.upsert("doc_live", {"title": "T", "url": "https://indiankanoon.org/doc/8/"})
+        ledger.record(KIND_URL, "https://indiankanoon.org/doc/8/", "doc_live")
+        ledger.record(KIND_URL, "https://indiankanoon.org/doc/9/", "doc_gone")
+        submitted = []
+        job = batch.start_batch(["8", "9"], submit=lambda urls, force: submitted.extend(urls) or _done_future({}))
+        assert submitted == ["https://indiankanoon.org/doc/9/"]
+        assert job.summary()["duplicate"] == 1
+        assert ledger.get(KIND_URL, "https://indiankanoon.org/doc/9/") is None
+
+    def test_force_skips_dedup(self, stores):
+        ledger, _ = stores
+        ledger.record(KIND_URL, "https://indiankanoon.org/doc/1/")
+        submitted = []
+        batch.start_batch(["1"], force=True, submit=lambda urls, force: submitted.extend(urls) or _done_future({}))
+        assert submitted == ["https://indiankanoon.org/doc/1/"]
+
+    @staticmethod
+    def _pending_submit(pending):
+        def submit(urls, force):
+            pending[tuple(urls)] = Future()
+            return pending[tuple(urls)]
+        return submit
+
+    def test_job_finishes_only_after_all_items_settle(self, stores):
+        pending = {}
+        with patch("app.core.batch.BATCH_GROUP_SIZE", 1):
+            job = batch.start_batch(["1", "2"], submit=self._pending_submit(pending))
+        assert not job.finished and job.summary()["queued"] == 2
+        pending[("https://indiankanoon.org/doc/1/",)].set_result({"https://indiankanoon.org/doc/1/": True})
+        assert not job.finished
+        pending[("https://indiankanoon.org/doc/2/",)].set_exception(RuntimeError("boom"))
+        assert job.finished
+        assert job.summary()["failed"] == 1
+        assert job.events[-1]["error"] == "boom"
+
+    def test_urls_share_grouped_submissions(self, stores):
+        pending = {}
+        with patch("app.core.batch.BATCH_GROUP_SIZE", 3):
+            job = batch.start_batch([str(i) for i in range(7)], submit=self._pending_submit(pending))
+            assert [len(group) for group in pending] == [3, 3]
+            while not job.finished:
+                group = next(g for g, f in pending.items() if not f.done())
+                pending[group].set_result({url: not url.endswith("/0/") for url in group})
+        assert [len(group) for group in pending] == [3, 3, 1]
+        assert (job.summary()["done"], job.summary()["failed"]) == (6, 1)
+
+    def test_follow_streams_as_items_settle(self, stores):
+        pool = ThreadPoolExecutor(max_workers=2)
+        job = batch.start_batch(
+            [str(i) for i in range(10)],
+            submit=lambda urls, force: pool.submit(lambda: {url: True for url in urls}),
+        )
+
+        async def _collect():
+            return [event async for event in job.follow(heartbeat_s=0.05)]
+
+        events = asyncio.run(_collect())
+        pool.shutdown()
+        items = [e for e in events if e and "item" in e]
+        assert len(items) == 10 and all(e["status"] == "done" for e in items)
+        assert events[-1]["summary"]["done"] == 10
+
+    def test_follow_heartbeats_while_quiet(self, stores):
+        pending = Future()
+        job = batch.start_batch(["1"], submit=lambda urls, force: pending)
+
+        async def _collect():
+            events = []
+            async for event in job.follow(heartbeat_s=0.01):
+                events.append(event)
+                if event is None and not pending.done():
+                    pending.set_result({"https://indiankanoon.org/doc/1/": True})
+            return events
+
+        events = asyncio.run(_collect())
+        assert events[0] is None and events[1]["status"] == "done" and "summary" in events[-1]
+
+    def test_submission_throttled_to_worker_count(self, stores):
+        pending = {}
+        with patch("app.core.batch.MAX_BATCH_INFLIGHT", 2), patch("app.core.batch.BATCH_GROUP_SIZE", 1):
+            job = batch.start_batch([str(i) for i in range(5)], submit=self._pending_submit(pending))
+            assert len(pending) == 2 and job.summary()["queued"] == 5
+            for _ in range(5):
+                group = next(g for g, f in pending.items() if not f.done())
+                pending[group].set_result({url: True for url in group})
+        assert len(pending) == 5 and job.finished and job.summary()["done"] == 5
+
+    def test_in_flight_urls_not_queued_twice(self, stores):
+        pending = {}
+        first = batch.start_batch(["1", "2"], submit=self._pending_submit(pending))
+        second = batch.start_batch(["2", "3"], submit=self._pending_submit(pending), force=True)
+        assert second.summary(include_items=True)["items"]["https://indiankanoon.org/doc/2/"] == "duplicate"
+        while not (first.finished and second.finished):
+            group = next(g for g, f in pending.items() if not f.done())
+            pending[group].set_result({url: True for url in group})
+        third = batch.start_batch(["2"], submit=lambda urls, force: _done_future({url: True for url in urls}))
+        assert third.summary()["done"] == 1
+
+
+class TestGroupedUrlIngestion:
+    """Bulk URL paths share one batched metadata extraction per group."""
+
+    def test_one_batch_extraction_per_group(self):
+        from app import ingest
+        texts = {"u1": "Judgment one", "u2": None, "u3": "Judgment three"}
+        with patch("app.ingest._fetch_url_text", side_effect=texts.get), \
+             patch("app.ingest.extract_legal_metadata_batch", return_value=[{"case_name": "A"}, {"case_name": "C"}]) as mock_batch, \
+             patch("app.ingest.process_and_store_document", return_value=True) as mock_store:
+            results = ingest.ingest_cases_from_urls(["u1", "u2", "u3"], titles={"u3": "Case Three"}, force=True)
+        assert results == {"u1": True, "u2": False, "u3": True}
+        mock_batch.assert_called_once_with(["Judgment one", "Judgment three"])
+        stored = [(c.args[1]["url"], c.args[1]["title"], c.kwargs["ai_metadata"]) for c in mock_store.call_args_list]
+        assert stored == [("u1", "Judgment one", {"case_name": "A"}), ("u3", "Case Three", {"case_name": "C"})]
+
+    def test_submitter_groups_crawled_urls(self):
+        from app import ingest
+        groups = []
+
+        def submit(urls, titles, force):
+            groups.append(urls)
+            return _done_future({url: url != "u1" for url in urls})
+
+        with patch("app.ingest.submit_url_group_ingestion", side_effect=submit):
+            submitter = ingest.UrlGroupSubmitter(size=2)
+            futures = [submitter.submit(f"u{i}", title=f"Case {i}") for i in range(5)]
+            assert groups == [["u0", "u1"], ["u2", "u3"]] and not futures[4].done()
+            submitter.flush()
+        assert groups[-1] == ["u4"]
+        assert [f.result() for f in futures] == [True, False, True, True, True]
+
+
+class TestBatchEndpoints:
+
+    @pytest.fixture(autouse=True)
+    def client(self, stores):
+        from app.main import app
+        self.client = TestClient(app, raise_server_exceptions=False)
+
+    def test_batch_job_lifecycle(self):
+        with patch("app.ingest.submit_url_group_ingestion",
+                   side_effect=lambda urls, force: _done_future({url: url.endswith("/1/") for url in urls})):
+            resp = self.client.post("/api/learn/batch", json={"items": ["1", "2", "2", "bad"]})
+        assert resp.status_code == 202
+        body = resp.json()
+        job_id = body["job_id"]
+        status = self.client.get(f"/api/learn/batch/{job_id}", params={"items": True}).json()
+        assert (status["done"], status["failed"], status["invalid"]) == (1, 1, 1)
+        assert status["items"]["https://indiankanoon.org/doc/2/"] == "failed"
+
+        ndjson = self.client.get(body["events_url"])
+        assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in ndjson.text.splitlines() if line]
+        assert lines[-1]["summary"]["status"] == "done" and len(lines) == 4
+
+        sse = self.client.get(body["events_url"], params={"format": "sse"})
+        assert sse.headers["content-type"].startswith("text/event-stream")
+        assert sse.text.count("data: ") == 4
+
+    def test_unknown_job_404(self):
+        assert self.client.get("/api/learn/batch/nope").status_code == 404
+
+    def test_limits(self):
+        assert self.client.post("/api/learn/batch", json={"items": []}).status_code == 422
+        too_many = [str(i) for i in range(batch.MAX_BATCH_ITEMS + 1)]
+        assert self.client.post("/api/learn/batch", json={"items": too_many}).status_code == 422
@@ -0,0 +1,193 @@
+"""
+Tests for the local case-name resolver in app/core/case_index.py and its use
+in conflict resolution and citation verification.
+
+Run: cd backend && python -m pytest tests/test_case_index.py -v
+"""
+import json
+import sqlite3
+from datetime import date
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.core.case_index import CaseNameIndex, name_tokens, name_similarity, find_case_mentions
+
+VISHAKA = "Vishaka & Ors vs State Of Rajasthan & Ors on 13 August, 1997"
+PARLE = "Parle Products (P) Ltd. vs J.P. & Co., Mysore on 16 February, 1972"
+
+
+@pytest.fixture
+def index(tmp_path):
+    ix = CaseNameIndex(tmp_path / "cases.sqlite")
+    ix.add(VISHAKA, record_ids=["v1", "v2"], judgment_date="1997-08-13", url="https://indiankanoon.org/doc/1031794/")
+    ix.add(PARLE, aliases=["Parle Products vs J.P. & Co."], record_ids=["p1"], judgment_date="1972-02-16")
+    return ix
+
+
+class TestNormalisation:
+
+    def test_stopwords_noise_and_dates_stripped(self):
+        assert name_tokens(VISHAKA) == ["vishaka", "rajasthan"]
+        assert name_tokens("M/S. Parle Products Pvt. Ltd. v. J.P. & Co. (1972)") == ["parle", "products", "j"]
+
+    def test_similarity_is_symmetric(self):
+        assert name_similarity("Vishaka v. State of Rajasthan", VISHAKA) == name_similarity(VISHAKA, "Vishaka v. State of Rajasthan")
+
+
+class TestLookup:
+
+    def test_short_citation_resolves(self, index):
+        assert index.lookup("Vishaka v. State of Rajasthan")["record_ids"] == ["v1", "v2"]
+
+    def test_spelling_variant_resolves(self, index):
+        assert index.lookup("Vishakha v State of Rajasthan (1997)")["name"] == VISHAKA
+
+    def test_different_case_sharing_a_party_does_not(self, index):
+        assert index.lookup("Vishaka v. Rajasthan Tourism Board Ltd") is None
+        assert index.lookup("Kesavananda Bharati v. State of Kerala") is None
+
+    def test_overruled_cases_hidden_by_default(self, index):
+        assert index.set_status("Vishaka v. State of Rajasthan", "overruled")
+        assert index.lookup("Vishaka v. State of Rajasthan") is None
+        assert index.lookup("Vishaka v. State of Rajasthan", include_overruled=True)["status"] == "overruled"
+
+    def test_reingest_merges_record_ids(self, index):
+        index.add(VISHAKA, record_ids=["v3"], url="https://indiankanoon.org/doc/1031794/")
+        assert index.lookup("Vishaka v. State of Rajasthan")["record_ids"] == ["v1", "v2", "v3"]
+        assert len(index) == 2
+
+    def test_same_parties_different_judgments_stay_apart(self, index):
+        index.add("State of Punjab vs Gurmit Singh on 16 January, 1996", record_ids=["a1"],
+                  judgment_date="1996-01-16", url="https://indiankanoon.org/doc/1/")
+        index.add("Gurmit Singh vs State of Punjab on 2 May, 2005", record_ids=["b1"],
+                  judgment_date="2005-05-02", url="https://indiankanoon.org/doc/2/")
+        entries = index.candidates("State of Punjab v. Gurmit Singh")
+        assert {e["judgment_date"] for e in entries} == {"1996-01-16", "2005-05-02"}
+        assert [e["record_ids"] for e in index.candidates("State of Punjab v. Gurmit Singh (1996)")] == [["a1"]]
+        assert [e["record_ids"] for e in index.candidates("State of Punjab v. Gurmit Singh", before=date(2000, 1, 1))] == [["a1"]]
+        assert index.set_status("State of Punjab v. Gurmit Singh", "overruled") is False  # ambiguous
+
+    def test_legacy_name_keyed_rows_are_rekeyed(self, tmp_path):
+        path = tmp_path / "legacy.sqlite"
+        CaseNameIndex(path)  # creates the table
+        db = sqlite3.connect(path)
+        db.execute("INSERT INTO cases VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   ("vishaka rajasthan", VISHAKA, "[]", json.dumps(["v1"]), "1997-08-13", "https://x/doc/1/", "active"))
+        db.commit()
+        db.close()
+        CaseNameIndex(path)
+        keys = [row[0] for row in sqlite3.connect(path).execute("SELECT key FROM cases")]
+        assert keys == ["https://x/doc/1/"]
+
+    def test_persisted_across_instances(self, index, tmp_path):
+        index.set_status(PARLE, "overruled")
+        reloaded = CaseNameIndex(tmp_path / "cases.sqlite")
+        assert reloaded.lookup("Vishaka v. State of Rajasthan")["url"].endswith("/1031794/")
+        assert reloaded.lookup("Parle Products v. J.P. & Co.", include_overruled=True)["status"] == "overruled"
+
+    def test_find_case_mentions(self):
+        text = "As held in **Vishaka v. State of Rajasthan (1997)** and in R.G. Anand vs. Delux Films the court"
+        mentions = find_case_mentions(text)
+        assert mentions[0] == "Vishaka v. State of Rajasthan (1997)"
+        assert mentions[1].startswith("R.G. Anand vs. Delux Films")
+
+
+class TestIndexIntegration:
+
+    def test_conflict_lookup_skips_network(self, index):
+        from app.ingest import _find_cases_in_db
+        with patch("app.ingest.get_case_index", return_value=index), \
+             patch("app.ingest._find_case_in_db") as mock_semantic, \
+             patch("app.ingest._embed_case_names") as mock_embed:
+            found = _find_cases_in_db(["Vishaka v. State of Rajasthan", "Parle Products v. J.P. & Co."])
+        mock_semantic.assert_not_called()
+        mock_embed.assert_not_called()
+        assert [hit["_id"] for hit in found["Vishaka v. State of Rajasthan"]] == ["v1", "v2"]
+        assert found["Parle Products v. J.P. & Co."][0]["metadata"]["ai_judgment_date"] == "1972-02-16"
+
+    def test_unresolved_names_fall_back_to_semantic_search(self, index):
+        from app.ingest import _find_cases_in_db
+        with patch("app.ingest.get_case_index", return_value=index), \
+             patch("app.ingest._find_case_in_db", return_value=None) as mock_semantic:
+            found = _find_cases_in_db(["Vishaka v. State of Rajasthan", "Unknown Party v. Someone"])
+        mock_semantic.assert_called_once_with("Unknown Party v. Someone")
+        assert "Unknown Party v. Someone" not in found
+
+    def test_ambiguous_name_is_never_overruled(self, index):
+        from app.ingest import resolve_legal_conflicts
+        index.add("Vishaka vs State of Rajasthan on 2 March, 1990", record_ids=["w1"],
+                  judgment_date="1990-03-02", url="https://indiankanoon.org/doc/99/")
+        pinecone_index = MagicMock()
+        with patch("app.ingest.get_case_index", return_value=index), \
+             patch("app.ingest._find_case_in_db") as mock_semantic:
+            resolve_legal_conflicts(
+                {"title": "Later vs Union (2020)", "ai_judgment_date": "2020-01-01",
+                 "ai_overrules_cases": "Vishaka v. State of Rajasthan"},
+                index=pinecone_index,
+            )
+        mock_semantic.assert_not_called()
+        pinecone_index.update.assert_not_called()
+        assert len(index.candidates("Vishaka v. State of Rajasthan")) == 2
+
+    def test_ambiguous_name_adds_no_graph_edge(self, index):
+        from app.ingest import resolve_legal_conflicts
+        index.add("Vishaka vs State of Rajasthan on 2 March, 1990", record_ids=["w1"],
+                  judgment_date="1990-03-02", url="https://indiankanoon.org/doc/99/")
+        graph = MagicMock()
+        with patch("app.ingest.get_case_index", return_value=index), \
+             patch("app.ingest.get_citation_graph", return_value=graph), \
+             patch("app.ingest._find_case_in_db", return_value=None):
+            resolve_legal_conflicts(
+                {"title": "Later vs Union (2020)", "ai_judgment_date": "2020-01-01",
+                 "ai_overrules_cases": "Vishaka v. State of Rajasthan, Never Ingested v. State"},
+                index=MagicMock(),
+            )
+        graph.add_edges.assert_called_once()
+        assert graph.add_edges.call_args.args[2] == ["Never Ingested v. State"]
+
+    def test_semantic_matches_across_judgments_are_skipped(self):
+        from app.ingest import resolve_legal_conflicts
+        hits = [{"_id": "x1", "metadata": {"url": "u1", "ai_judgment_date": "1990-01-01"}},
+                {"_id": "y1", "metadata": {"url": "u2", "ai_judgment_date": "1995-01-01"}}]
+        pinecone_index = MagicMock()
+        with patch("app.ingest.get_case_index", return_value=None), \
+             patch("app.ingest._find_case_in_db", return_value=hits):
+            resolve_legal_conflicts(
+                {"title": "Later vs Union (2020)", "ai_judgment_date": "2020-01-01",
+                 "ai_overrules_cases": "Some Party v. State"},
+                index=pinecone_index,
+            )
+        pinecone_index.update.assert_not_called()
+
+    def test_overrule_marks_index_entry(self, index):
+        from app.ingest import resolve_legal_conflicts
+        pinecone_index = MagicMock()
+        with patch("app.ingest.get_case_index", return_value=index):
+            resolve_legal_conflicts(
+                {"title": "Later vs Union (2020)", "ai_judgment_date": "2020-01-01",
+                 "ai_overrules_cases": "Vishaka v. State of Rajasthan"},
+                index=pinecone_index,
+            )
+        assert {c.kwargs["id"] for c in pinecone_index.update.call_args_list} == {"v1", "v2"}
+        assert index.lookup("Vishaka v. State of Rajasthan") is None
+
+    def test_citation_verification_resolves_abbreviated_mention(self, index):
+        from app.core.rag import _verify_citations
+        with patch("app.core.rag.get_case_index", return_value=index):
+            result = _verify_citations(
+                "Sexual harassment guidelines were laid down in Vishakha v. State of Rajasthan.",
+                [VISHAKA],
+            )
+        assert result["grounded"] == [VISHAKA]
+
+    def test_llm_cited_cases_linked_locally(self, index):
+        from app.core.rag import _link_llm_cited_cases
+        with patch("app.core.rag.get_case_index", return_value=index):
+            linked = _link_llm_cited_cases(["Vishaka v. State of Rajasthan (1997)", "Maneka Gandhi v. Union of India (1978)"])
+        assert linked == [{
+            "title": "Vishaka v. State of Rajasthan (1997)",
+            "matched_case": VISHAKA,
+            "url": "https://indiankanoon.org/doc/1031794/",
+            "status": "active",
+        }]
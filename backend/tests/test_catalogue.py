@@ -0,0 +1,157 @@
+"""
+Tests for the local case catalogue behind GET /api/cases (app/core/catalogue.py).
+
+Run: cd backend && python -m pytest tests/test_catalogue.py -v
+"""
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.catalogue import CaseCatalogue, clean_title
+from app.main import app
+
+
+def _meta(i, domain="Constitutional Law", date=None, status="active"):
+    return {
+        "title": f"Case {i:03d} vs State",
+        "url": f"https://indiankanoon.org/doc/{i}/",
+        "ai_legal_domain": domain,
+        "ai_validated_date": date if date is not None else f"19{50 + i % 50:02d}-01-01",
+        "status": status,
+        "ingested_at": str(1000 + i),
+    }
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    cat = CaseCatalogue(tmp_path / "catalogue.sqlite")
+    for i in range(25):
+        cat.upsert(f"doc{i}#chunk0", _meta(i, domain="Tax Law" if i % 5 == 0 else "Constitutional Law"))
+    return cat
+
+
+class TestCatalogueListing:
+
+    def test_cursor_pages_cover_every_case_once(self, catalogue):
+        seen, cursor = [], None
+        while True:
+            page = catalogue.list(limit=7, cursor=cursor)
+            seen.extend(c["id"] for c in page["cases"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 25
+        assert page["total"] == 25
+
+    def test_sorts(self, catalogue):
+        dates = [c["judgment_date"] for c in catalogue.list(limit=25)["cases"]]
+        assert dates == sorted(dates, reverse=True)
+        titles = [c["title"] for c in catalogue.list(limit=25, sort="title")["cases"]]
+        assert titles == sorted(titles)
+        assert catalogue.list(limit=1, sort="recent")["cases"][0]["id"] == "doc24#chunk0"
+
+    def test_filters(self, catalogue):
+        tax = catalogue.list(domain="tax law")
+        assert tax["total"] == 5
+        assert all(c["legal_domain"] == "Tax Law" for c in tax["cases"])
+
+        ranged = catalogue.list(date_from="1960-01-01", date_to="1969-12-31")
+        assert ranged["total"] == 10
+        assert all("1960" <= c["judgment_date"] <= "1969-12-31" for c in ranged["cases"])
+
+    def test_undated_cases_excluded_by_date_filter(self, tmp_path):
+        cat = CaseCatalogue(tmp_path / "c.sqlite")
+        cat.upsert("a", _meta(1, date=""))
+        assert cat.list()["total"] == 1
+        assert cat.list(date_to="2100-01-01")["total"] == 0
+
+    def test_bad_sort_or_cursor_raises(self, catalogue):
+        with pytest.raises(ValueError):
+            catalogue.list(sort="score")
+        with pytest.raises(ValueError):
+            catalogue.list(cursor="not-a-cursor")
+
+    def test_status_update_by_url(self, catalogue):
+        assert catalogue.set_status_by_url(["https://indiankanoon.org/doc/3/"], "overruled") == 1
+        assert catalogue.list(status="overruled")["cases"][0]["id"] == "doc3#chunk0"
+
+    def test_titles_are_cleaned(self):
+        assert clean_title("# Maneka Gandhi vs Union Of India\\n### Equivalent citations") == \
+            "Maneka Gandhi vs Union Of India"
+
+
+class TestCatalogueEtag:
+
+    def test_etag_changes_on_write_and_with_params(self, catalogue):
+        before = catalogue.etag(limit=50)
+        assert catalogue.etag(limit=50) == before
+        assert catalogue.etag(limit=10) != before
+        catalogue.upsert("new", _meta(99))
+        assert catalogue.etag(limit=50) != before
+
+
+class TestCatalogueRebuild:
+
+    def test_rebuild_uses_list_and_fetch_only(self, tmp_path):
+        vectors = {
+            f"doc{i}#chunk{c}": SimpleNamespace(metadata={**_meta(i), "chunk_index": c})
+            for i in range(3) for c in range(2)
+        }
+        index = MagicMock()
+        index.list.return_value = iter([list(vectors)[:4], list(vectors)[4:]])
+        index.fetch.side_effect = lambda ids, namespace: SimpleNamespace(vectors={i: vectors[i] for i in ids})
+
+        cat = CaseCatalogue(tmp_path / "c.sqlite")
+        assert cat.rebuild_from_pinecone(index) == 3
+        assert {c["id"] for c in cat.list()["cases"]} == {"doc0#chunk0", "doc1#chunk0", "doc2#chunk0"}
+        index.query.assert_not_called()
+
+    def test_rebuild_removes_documents_gone_from_index(self, tmp_path):
+        cat = CaseCatalogue(tmp_path / "c.sqlite")
+        cat.upsert("gone#chunk0", _meta(7))
+        vectors = {"kept#chunk0": SimpleNamespace(metadata={**_meta(1), "chunk_index": 0})}
+        index = MagicMock()
+        index.list.return_value = iter([list(vectors)])
+        index.fetch.side_effect = lambda ids, namespace: SimpleNamespace(vectors={i: vectors[i] for i in ids})
+
+        before = cat.version
+        assert cat.rebuild_from_pinecone(index) == 1
+        assert [c["id"] for c in cat.list()["cases"]] == ["kept#chunk0"]
+        assert cat.version > before and not cat.has_doc("gone#chunk0")
+
+    def test_failed_listing_removes_nothing(self, tmp_path):
+        cat = CaseCatalogue(tmp_path / "c.sqlite")
+        cat.upsert("doc#chunk0", _meta(1))
+        index = MagicMock()
+        index.list.side_effect = RuntimeError("pinecone down")
+        with pytest.raises(RuntimeError):
+            cat.rebuild_from_pinecone(index)
+        assert cat.has_doc("doc#chunk0")
+
+
+class TestCasesEndpoint:
+
+    def setup_method(self):
+        self.client = TestClient(app)
+
+    def test_paginates_and_honours_if_none_match(self, catalogue):
+        with patch("app.main.get_case_catalogue", return_value=catalogue), \
+             patch("app.main.get_pinecone_client") as mock_pc:
+            first = self.client.get("/api/cases?limit=10")
+            assert first.status_code == 200
+            body = first.json()
+            assert len(body["cases"]) == 10 and body["next_cursor"] and body["total"] == 25
+            assert {"id", "title", "url", "legal_domain", "judgment_date"} <= set(body["cases"][0])
+
+            cached = self.client.get("/api/cases?limit=10", headers={"If-None-Match": first.headers["etag"]})
+            assert cached.status_code == 304
+
+            second = self.client.get(f"/api/cases?limit=10&cursor={body['next_cursor']}")
+            assert not {c["id"] for c in body["cases"]} & {c["id"] for c in second.json()["cases"]}
+            mock_pc.assert_not_called()
+
+    def test_bad_sort_is_400(self, catalogue):
+        with patch("app.main.get_case_catalogue", return_value=catalogue):
+            assert self.client.get("/api/cases?sort=score").status_code == 400
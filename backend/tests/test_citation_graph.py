@@ -0,0 +1,146 @@
+"""
+Tests for the local citation graph in app/core/citation_graph.py and its
+use at ingest time and in retrieval.
+
+Run: cd backend && python -m pytest tests/test_citation_graph.py -v
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.core.citation_graph import CitationGraph, case_key, case_year, seed_from_legacy_csv
+
+
+@pytest.fixture
+def graph(tmp_path):
+    return CitationGraph(tmp_path / "graph.sqlite")
+
+
+class TestCaseKey:
+
+    def test_title_date_suffix_and_versus_forms(self):
+        assert case_key("Parle Products vs J.P. & Co. on 16 February, 1972") == "parle products vs j p co"
+        assert case_key("Parle Products v. J.P. & Co. (1972)") == "parle products vs j p co"
+
+    def test_year_from_date_or_name(self):
+        assert case_year("X vs Y on 16 February, 1972") == "1972"
+        assert case_year("X v. Y (2018)") == "2018"
+        assert case_year("X vs Y", "2001-05-01") == "2001"
+        assert case_year("X vs Y", "UNKNOWN") == ""
+
+    def test_truncated_indiankanoon_title(self):
+        assert case_key("M/S.Nandhini Deluxe vs M/S.Karnataka Co-Operative Milk ... on 26 July, 2018") == \
+            case_key("M/S.Nandhini Deluxe vs M/S.Karnataka Co-Operative Milk")
+
+
+class TestCitationGraph:
+
+    def test_overruling_lookup(self, graph):
+        graph.add_edges("New Case vs State", "overrules", ["Old Case vs State"], judgment_date="2024-01-01")
+        assert graph.overruling_case("Old Case v. State (1999)") == "New Case vs State"
+        assert graph.is_overruled("New Case vs State") is False
+
+    def test_older_case_cannot_overrule(self, graph):
+        graph.add_case("Modern Case vs State", "2020-01-01")
+        graph.add_edges("Ancient Case vs State", "overrules", ["Modern Case vs State"], judgment_date="2015-01-01")
+        assert graph.overruling_case("Modern Case vs State") is None
+
+    def test_edges_are_not_duplicated(self, graph):
+        assert graph.add_edges("A vs B", "upholds", ["C vs D", "C vs D"]) == 1
+        assert graph.authority("C vs D") == 1
+
+    def test_record_case_adds_upholds_and_aliases(self, graph):
+        graph.record_case({
+            "title": "Full Title vs Respondent on 1 May, 2020",
+            "ai_case_name": "Full Title vs Respondent",
+            "ai_validated_date": "2020-05-01",
+            "ai_upholds_cases": "Earlier vs Someone, Another vs Party",
+            "ai_overrules_cases": "Ignored vs Here",
+        })
+        assert graph.authority("Earlier vs Someone") == 1
+        assert graph.date_of("Full Title vs Respondent") == "2020-05-01"
+        # Overrules edges are left to resolve_legal_conflicts (after temporal checks)
+        assert graph.overruling_case("Ignored vs Here") is None
+
+    def test_same_parties_in_different_years_stay_apart(self, graph):
+        graph.add_case("State of Punjab vs Singh", "1990-01-01")
+        graph.add_case("State of Punjab vs Singh", "2005-01-01")
+        graph.add_edges("Later Bench vs Union", "overrules", ["State of Punjab vs Singh (1990)"], judgment_date="2010-01-01")
+        assert graph.overruling_case("State of Punjab vs Singh", "1990-01-01") == "Later Bench vs Union"
+        assert graph.overruling_case("State of Punjab vs Singh", "2005-01-01") is None
+        assert graph.overruling_case("State of Punjab vs Singh") is None  # ambiguous without a year
+
+    def test_undated_target_only_applies_while_unambiguous(self, graph):
+        graph.add_edges("New vs State", "overrules", ["Old vs State"], judgment_date="2020-01-01")
+        graph.add_case("Old vs State", "1999-01-01")
+        assert graph.overruling_case("Old vs State", "1999-01-01") == "New vs State"
+        graph.add_case("Old vs State", "1985-01-01")
+        assert graph.overruling_case("Old vs State", "1999-01-01") is None
+
+    def test_overrules_edge_into_newer_case_is_refused(self, graph):
+        graph.add_case("Modern vs State", "2020-01-01")
+        assert graph.add_edges("Ancient vs State", "overrules", ["Modern vs State"], judgment_date="2015-01-01") == 0
+        assert graph.stats()["edges"]["overrules"] == 0
+
+    def test_persists_and_reloads(self, graph):
+        graph.add_edges("New vs State", "overrules", ["Old vs State"], judgment_date="2024-01-01")
+        graph.add_case("New vs State", "2024-01-01", aliases=["State Appeal No. 7"])
+        graph.save()
+        reloaded = CitationGraph(graph.path)
+        assert reloaded.overruling_case("Old vs State") == "New vs State"
+        assert reloaded.node_id("State Appeal No. 7", "2024-01-01") == reloaded.node_id("New vs State")
+        assert reloaded.stats() == graph.stats()
+
+    def test_save_only_commits_new_rows(self, graph):
+        graph.add_edges("A vs B", "upholds", ["C vs D"], judgment_date="2001-01-01")
+        graph.save()
+        graph.add_edges("E vs F", "upholds", ["C vs D"], judgment_date="2002-01-01")
+        graph.save()
+        rows = graph._db.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+        assert rows == 2 and CitationGraph(graph.path).authority("C vs D") == 2
+
+    def test_imports_legacy_json(self, tmp_path):
+        (tmp_path / "graph.json").write_text(json.dumps({
+            "version": 1, "names": ["New vs State", "Old vs State"], "dates": ["2024-01-01", "UNKNOWN"],
+            "aliases": {"new appeal": 0}, "edges": {"overrules": [0, 1], "upholds": [], "cites": []},
+        }))
+        graph = CitationGraph(tmp_path / "graph.sqlite")
+        assert graph.overruling_case("Old vs State") == "New vs State"
+        assert CitationGraph(tmp_path / "graph.sqlite").stats()["nodes"] == 2
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        path = tmp_path / "graph.sqlite"
+        path.write_text("not a database")
+        assert CitationGraph(path).stats()["nodes"] == 0
+
+    def test_seed_from_legacy_csv_skips_statutes(self, graph):
+        assert seed_from_legacy_csv(graph) > 0
+        assert graph.node_id("The Trade Marks Act, 1999") is None
+        assert graph.authority("M/S.Nandhini Deluxe vs M/S.Karnataka Co-Operative Milk ... on 26 July, 2018") >= 1
+
+
+class TestGraphIntegration:
+
+    def test_ingest_marks_already_overruled_case(self, graph):
+        from app.ingest import _apply_graph_status
+        graph.add_edges("Landmark vs Union", "overrules", ["Old Ruling vs State"], judgment_date="2024-01-01")
+        metadata = {"title": "Old Ruling vs State", "ai_case_name": "Old Ruling vs State",
+                    "ai_validated_date": "2001-01-01", "status": "active"}
+        with patch("app.ingest.get_citation_graph", return_value=graph):
+            _apply_graph_status(metadata)
+        assert metadata["status"] == "overruled"
+        assert metadata["overruled_by"] == "Landmark vs Union"
+
+    def test_retrieval_drops_overruled_and_boosts_authority(self, graph):
+        from app.core.rag import _drop_graph_overruled, _boost_graph_authority
+        graph.add_edges("Landmark vs Union", "overrules", ["Old Ruling vs State"], judgment_date="2024-01-01")
+        graph.add_edges("Follower vs State", "upholds", ["Landmark vs Union"])
+        hits = [
+            {"_score": 0.60, "metadata": {"title": "Old Ruling vs State"}},
+            {"_score": 0.60, "metadata": {"title": "Unrelated vs Party"}},
+            {"_score": 0.595, "metadata": {"title": "Landmark vs Union"}},
+        ]
+        with patch("app.core.rag.get_citation_graph", return_value=graph):
+            ranked = _boost_graph_authority(_drop_graph_overruled(hits))
+        assert [h["metadata"]["title"] for h in ranked] == ["Landmark vs Union", "Unrelated vs Party"]
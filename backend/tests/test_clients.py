@@ -0,0 +1,96 @@
+"""
+Tests for the lazy client providers in app/utils/clients.py and the patchable
+module-level client attributes in rag / extraction.
+
+Run: cd backend && python -m pytest tests/test_clients.py -v
+"""
+import subprocess
+import sys
+from unittest.mock import patch, MagicMock
+
+from app.utils import clients
+from app.core import rag, extraction
+
+
+class TestOpenRouterProvider:
+
+    def test_no_key_returns_none(self, monkeypatch):
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        monkeypatch.setattr(clients, "_openrouter", None)
+        assert clients.get_openrouter_client() is None
+
+    def test_client_is_created_once(self, monkeypatch):
+        monkeypatch.setenv("OPENROUTER_API_KEY", "sk-test")
+        monkeypatch.setattr(clients, "_openrouter", None)
+        first = clients.get_openrouter_client()
+        assert first is not None and clients.get_openrouter_client() is first
+
+
+class TestPooledClient:
+
+    def test_sync_and_async_clients_use_tuned_pools(self, monkeypatch):
+        import httpx
+        monkeypatch.setenv("OPENROUTER_API_KEY", "sk-test")
+        monkeypatch.setattr(clients, "_openrouter", None)
+        monkeypatch.setattr(clients, "_async_openrouter", None)
+        sync_client = clients.get_openrouter_client()
+        async_client = clients.get_async_openrouter_client()
+        assert isinstance(sync_client._client, httpx.Client)
+        assert isinstance(async_client._client, httpx.AsyncClient)
+        pool = sync_client._client._transport._pool
+        assert pool._max_connections == clients.OPENROUTER_MAX_CONNECTIONS
+        assert pool._max_keepalive_connections == clients.OPENROUTER_MAX_KEEPALIVE
+
+    def test_with_options_shares_the_pool(self, monkeypatch):
+        monkeypatch.setenv("OPENROUTER_API_KEY", "sk-test")
+        monkeypatch.setattr(clients, "_openrouter", None)
+        base = clients.get_openrouter_client()
+        ocr = base.with_options(timeout=clients.llm_timeout("ocr"))
+        assert ocr._client is base._client
+        assert ocr.timeout.read == clients.LLM_TIMEOUTS["ocr"]
+
+    def test_timeouts_per_call_type(self):
+        assert clients.llm_timeout("query").read < clients.llm_timeout("extraction").read < clients.llm_timeout("ocr").read
+        assert clients.llm_timeout("query").connect <= 5.0
+
+    @patch("app.core.rag.client")
+    def test_query_calls_use_query_timeout(self, mock_client):
+        mock_client.chat.completions.create.return_value.choices = [MagicMock(message=MagicMock(content="ok"))]
+        rag.get_llm_response("q")
+        assert mock_client.chat.completions.create.call_args.kwargs["timeout"].read == clients.LLM_TIMEOUTS["query"]
+
+
+class TestModuleAttributes:
+
+    def test_patched_attribute_overrides_provider(self):
+        fake = MagicMock()
+        with patch("app.core.rag.client", fake), patch("app.core.extraction.client", fake):
+            assert rag._llm_client() is fake
+            assert extraction._llm_client() is fake
+        with patch("app.core.extraction.client", None):
+            assert extraction._llm_client() is None
+
+    def test_unpatched_attribute_uses_provider(self):
+        sentinel = MagicMock()
+        with patch("app.core.rag.get_openrouter_client", return_value=sentinel):
+            assert rag._llm_client() is sentinel
+
+    def test_missing_pinecone_key_gives_no_index(self, monkeypatch):
+        monkeypatch.delenv("PINECONE_API_KEY", raising=False)
+        with patch("app.utils.pinecone._pc", None):
+            assert rag._pinecone_index() is None
+
+
+class TestStartup:
+
+    def test_importing_app_builds_no_clients(self):
+        code = "import sys, app.main; print('openai' in sys.modules, 'pinecone' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert out.stdout.split()[-2:] == ["False", "False"]
+
+    def test_warm_up_is_best_effort(self):
+        with patch("app.utils.clients.get_openrouter_client", side_effect=RuntimeError("down")), \
+             patch("app.utils.pinecone.get_pinecone_index", side_effect=ValueError("no key")), \
+             patch("app.ingest._get_plain_converter", return_value=None):
+            timings = clients.warm_up()
+        assert set(timings) == {"openrouter", "pinecone", "markitdown"}
@@ -242,6 +242,50 @@ class TestTemporalConflictResolution:
 
 
 
+class TestBatchedConflictLookup:
+    """resolve_legal_conflicts for judgments that overrule several precedents at once."""
+
+    NAMES = ["Case A vs State (2001)", "Case B vs State (2002)", "Case C vs State (2003)"]
+
+    @staticmethod
+    def _match(record_id, date="2000-01-01"):
+        m = MagicMock()
+        m.id, m.score, m.metadata = record_id, 0.9, {"ai_judgment_date": date}
+        return m
+
+    def _run(self, query_matches):
+        pc = MagicMock()
+        pc.inference.embed.return_value = [MagicMock(values=[float(i)]) for i in range(len(self.NAMES))]
+        index = MagicMock()
+        index.query.side_effect = lambda vector, **kw: MagicMock(matches=query_matches[int(vector[0])])
+
+        new_metadata = {
+            "title": "Landmark Case (2024)",
+            "ai_judgment_date": "2024-01-01",
+            "ai_overrules_cases": ", ".join(self.NAMES),
+        }
+        with patch("app.utils.pinecone.get_pinecone_client", return_value=pc), \
+             patch("app.ingest.get_pinecone_index", return_value=index):
+            resolve_legal_conflicts(new_metadata, index=index)
+        return pc, index
+
+    def test_all_names_embedded_in_one_call(self):
+        pc, index = self._run([[self._match("a")], [self._match("b")], [self._match("c")]])
+        pc.inference.embed.assert_called_once()
+        assert pc.inference.embed.call_args.kwargs["inputs"] == self.NAMES
+        assert index.query.call_count == 3
+        assert {c.kwargs["id"] for c in index.update.call_args_list} == {"a", "b", "c"}
+
+    def test_shared_record_updated_once(self):
+        _, index = self._run([[self._match("shared")], [self._match("shared")], []])
+        index.update.assert_called_once()
+        assert index.update.call_args.kwargs["set_metadata"]["overruled_by"] == "Landmark Case (2024)"
+
+    def test_temporal_rejection_is_per_case(self):
+        _, index = self._run([[self._match("a")], [self._match("b", date="2030-01-01")], [self._match("c")]])
+        assert {c.kwargs["id"] for c in index.update.call_args_list} == {"a", "c"}
+
+
 class TestChunking:
     """Tests for the sliding-window text chunking."""
     
@@ -0,0 +1,64 @@
+"""
+Tests for grounded-prompt context packing in app/core/context.py.
+
+Run: cd backend && python -m pytest tests/test_context.py -v
+"""
+import subprocess
+import sys
+
+from app.core.context import pack_context, merge_chunks, context_budget_tokens, CONTEXT_TOKEN_BUDGET
+from app.core.chunking import chunk_text
+
+DOC = "".join(f"Paragraph {i}: the appellant contends that the order is bad in law. " for i in range(80))
+
+
+def _hit(chunk_index, text, score, title="Case A vs State", url="https://indiankanoon.org/doc/1/"):
+    meta = {"title": title, "url": url, "text": text, "chunk_index": chunk_index}
+    return {"_score": score, "fields": meta, "metadata": meta}
+
+
+class TestMergeChunks:
+
+    def test_adjacent_chunks_rebuild_the_original_text(self):
+        chunks = chunk_text(DOC)
+        assert merge_chunks({0: chunks[0], 1: chunks[1], 2: chunks[2]}) == DOC[:len(chunks[0]) + 2 * 1300].strip()
+
+    def test_gap_is_marked(self):
+        chunks = chunk_text(DOC)
+        merged = merge_chunks({0: chunks[0], 2: chunks[2]})
+        assert "[...]" in merged
+        assert merged.count(chunks[2][:200]) == 1
+
+
+class TestPackContext:
+
+    def test_same_case_merged_and_ordered_by_score(self):
+        chunks = chunk_text(DOC)
+        hits = [
+            _hit(1, chunks[1], 0.6),
+            _hit(0, "Other case text " * 20, 0.9, title="Case B vs Union", url="https://indiankanoon.org/doc/2/"),
+            _hit(0, chunks[0], 0.5),
+        ]
+        context, packed = pack_context(hits, budget_tokens=5000)
+        assert [p["meta"]["title"] for p in packed] == ["Case B vs Union", "Case A vs State"]
+        assert context.count("Case: ") == 2
+        assert context.count(chunks[1][:200]) == 1  # overlap removed
+        assert "[Relevance: 0.60]" in context
+
+    def test_budget_is_respected(self):
+        chunks = chunk_text(DOC)
+        hits = [_hit(i, c, 0.9 - i / 100, url=f"u{i}", title=f"Case {i} vs State") for i, c in enumerate(chunks)]
+        context, packed = pack_context(hits, budget_tokens=1000)
+        assert len(context) <= 4000
+        assert 0 < len(packed) < len(chunks)
+
+    def test_budget_capped_by_smallest_model_window(self):
+        assert context_budget_tokens(["unknown/model"]) == min(CONTEXT_TOKEN_BUDGET, 32_768 // 4)
+
+
+class TestImports:
+
+    def test_query_path_does_not_import_ingest(self):
+        code = "import sys, app.core.context; print('app.ingest' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
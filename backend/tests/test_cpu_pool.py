@@ -0,0 +1,93 @@
+"""
+Tests for the process pool in app/utils/cpu_pool.py and its use by ingestion
+and the scraper. Pool tests start real (spawned) worker processes and only
+submit builtins, so nothing from the test module has to be importable there.
+
+Run: cd backend && python -m pytest tests/test_cpu_pool.py -v
+"""
+import math
+import time
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.utils.cpu_pool import CpuPool, CpuTaskTimeout, run_cpu_bound
+from app import ingest
+from app.core import scraper
+
+
+@pytest.fixture
+def pool():
+    p = CpuPool(max_workers=1, max_tasks_per_child=2, memory_mb=512)
+    yield p
+    p.shutdown()
+
+
+class TestCpuPool:
+
+    def test_runs_task_in_worker(self, pool):
+        assert pool.run(math.factorial, 10, timeout=30) == 3628800
+        stats = pool.stats()
+        assert stats["running"] and stats["completed"] == 1
+
+    def test_errors_propagate(self, pool):
+        with pytest.raises(ValueError):
+            pool.run(int, "not a number", timeout=30)
+        assert pool.stats()["failed"] == 1
+
+    def test_timeout_kills_and_recycles(self, pool):
+        with pytest.raises(CpuTaskTimeout):
+            pool.run(time.sleep, 30, timeout=1)
+        stats = pool.stats()
+        assert stats["timeouts"] == 1 and stats["recycles"] == 1 and not stats["running"]
+        # A fresh pool serves the next task
+        assert pool.run(abs, -3, timeout=30) == 3
+
+    def test_memory_cap(self, pool):
+        with pytest.raises(MemoryError):
+            pool.run(bytearray, 1024 ** 3, timeout=30)
+        assert pool.run(abs, -1, timeout=30) == 1
+
+    def test_workers_are_recycled_after_max_tasks(self, pool):
+        import os
+        pids = {pool.run(os.getpid, timeout=30) for _ in range(4)}
+        assert len(pids) >= 2
+
+
+class TestDisabledPool:
+
+    def test_runs_inline(self):
+        with patch("app.utils.cpu_pool.get_cpu_pool", return_value=None):
+            assert run_cpu_bound(sorted, [3, 1, 2], timeout=1) == [1, 2, 3]
+
+    def test_ingest_converts_inline(self, tmp_path):
+        f = tmp_path / "doc.txt"
+        f.write_text("hello")
+        converter = MagicMock()
+        converter.convert.return_value.text_content = "converted"
+        assert ingest._convert_file(Path(f), converter, use_ocr=False) == "converted"
+
+
+class TestOffloadRouting:
+
+    def test_ingest_uses_pool_with_kind_timeout(self, tmp_path):
+        fake_pool = MagicMock()
+        fake_pool.run.return_value = "from worker"
+        converter = MagicMock()
+        with patch("app.ingest.get_cpu_pool", return_value=fake_pool):
+            assert ingest._convert_file(tmp_path / "a.pdf", converter, use_ocr=True) == "from worker"
+        converter.convert.assert_not_called()
+        args, kwargs = fake_pool.run.call_args
+        assert args[0] is ingest._convert_in_worker and args[2] is True
+        assert kwargs["timeout"] == ingest.OCR_CONVERT_TIMEOUT
+
+    def test_only_large_pages_are_offloaded(self):
+        small = b"<html><body><div class='judgments'>" + b"<p>text</p>" * 10 + b"</div></body></html>"
+        large = b"<html><body><div class='judgments'>" + b"<p>text</p>" * 30000 + b"</div></body></html>"
+        for page, offloaded in ((small, False), (large, True)):
+            response = MagicMock(content=page)
+            with patch("app.core.scraper.cached_fetch", return_value=response), \
+                 patch("app.core.scraper.run_cpu_bound", return_value="parsed") as mock_run:
+                scraper.fetch_case_text("https://example.org/case")
+            assert mock_run.called is offloaded
@@ -0,0 +1,197 @@
+"""
+Tests for the frontier-based crawler and per-host politeness limiter.
+
+No network access: app.core.crawler.http_get is patched with canned pages.
+Run: cd backend && python -m pytest tests/test_crawler.py -v
+"""
+import time
+import threading
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.core.crawler import Crawler, crawl_and_ingest, canonical_doc_url, _search_page_url
+from app.utils.ratelimit import TokenBucket, HostRateLimiter
+
+SEARCH = "https://indiankanoon.org/search/?formInput=copyright"
+
+
+def _result_page(*doc_ids):
+    links = "".join(
+        f'<div class="result_title"><a href="/docfragment/{d}/?formInput=copyright">Case number {d} vs State</a></div>'
+        for d in doc_ids
+    )
+    return f"<html><body><nav><a href='/doc/1/'>Navigation link here</a></nav>{links}</body></html>".encode()
+
+
+def _judgment_page(*cited_ids):
+    cites = "".join(f'<a href="/doc/{d}/">Cited precedent {d} vs Union</a>' for d in cited_ids)
+    return (
+        "<html><body><div class='judgments'><p>Judgment text. " + cites + "</p></div>"
+        "<div class='similar'><a href='/doc/999/'>Similar document not a citation</a></div></body></html>"
+    ).encode()
+
+
+def _fake_web(pages: dict):
+    """Build an http_get side_effect serving ``pages`` (url → bytes); unknown URLs 404."""
+    calls = []
+
+    def _get(url, **kwargs):
+        calls.append(url)
+        resp = MagicMock()
+        resp.status_code = 200 if url in pages else 404
+        resp.content = pages.get(url, b"")
+        return resp
+
+    return _get, calls
+
+
+@pytest.fixture
+def fast_limiter():
+    return HostRateLimiter(rate=1000, burst=1000)
+
+
+class TestCanonicalUrls:
+
+    def test_docfragment_maps_to_doc(self):
+        assert canonical_doc_url("/docfragment/123/?formInput=x") == "https://indiankanoon.org/doc/123/"
+
+    def test_absolute_doc_url(self):
+        assert canonical_doc_url("https://indiankanoon.org/doc/42") == "https://indiankanoon.org/doc/42/"
+
+    def test_foreign_host_rejected(self):
+        assert canonical_doc_url("https://example.com/doc/42/") is None
+
+    def test_non_doc_link(self):
+        assert canonical_doc_url("/search/?formInput=x") is None
+
+    def test_search_page_param(self):
+        assert "pagenum=2" in _search_page_url(SEARCH, 2)
+        assert "formInput=copyright" in _search_page_url(SEARCH, 2)
+
+
+class TestCrawler:
+
+    def test_paginates_until_no_new_results(self, fast_limiter):
+        pages = {
+            _search_page_url(SEARCH, 0): _result_page(10, 11),
+            _search_page_url(SEARCH, 1): _result_page(11, 12),
+            _search_page_url(SEARCH, 2): _result_page(12),  # nothing new → stop
+        }
+        fake_get, calls = _fake_web(pages)
+        with patch("app.core.crawler.http_get", side_effect=fake_get):
+            cases = list(Crawler(limit=50, limiter=fast_limiter).crawl([SEARCH]))
+
+        assert [c["url"] for c in cases] == [
+            "https://indiankanoon.org/doc/10/",
+            "https://indiankanoon.org/doc/11/",
+            "https://indiankanoon.org/doc/12/",
+        ]
+        assert _search_page_url(SEARCH, 3) not in calls
+
+    def test_respects_limit(self, fast_limiter):
+        pages = {_search_page_url(SEARCH, 0): _result_page(*range(100, 120))}
+        fake_get, _ = _fake_web(pages)
+        with patch("app.core.crawler.http_get", side_effect=fake_get):
+            cases = list(Crawler(limit=5, limiter=fast_limiter).crawl([SEARCH]))
+        assert len(cases) == 5
+
+    def test_depth_zero_never_fetches_judgments(self, fast_limiter):
+        pages = {_search_page_url(SEARCH, 0): _result_page(10)}
+        fake_get, calls = _fake_web(pages)
+        with patch("app.core.crawler.http_get", side_effect=fake_get):
+            list(Crawler(limit=10, max_pages=1, limiter=fast_limiter).crawl([SEARCH]))
+        assert "https://indiankanoon.org/doc/10/" not in calls
+
+    def test_follows_citations_to_max_depth(self, fast_limiter):
+        pages = {
+            _search_page_url(SEARCH, 0): _result_page(10),
+            "https://indiankanoon.org/doc/10/": _judgment_page(20, 21),
+            "https://indiankanoon.org/doc/20/": _judgment_page(30),
+        }
+        fake_get, calls = _fake_web(pages)
+        with patch("app.core.crawler.http_get", side_effect=fake_get):
+            cases = list(Crawler(limit=50, max_depth=1, max_pages=1, limiter=fast_limiter).crawl([SEARCH]))
+
+        depths = {c["url"]: c["depth"] for c in cases}
+        assert depths["https://indiankanoon.org/doc/10/"] == 0
+        assert depths["https://indiankanoon.org/doc/20/"] == 1
+        assert depths["https://indiankanoon.org/doc/21/"] == 1
+        # Depth-1 judgments are not expanded further, and non-citation chrome is ignored
+        assert "https://indiankanoon.org/doc/20/" not in calls
+        assert "https://indiankanoon.org/doc/999/" not in depths
+
+    def test_statute_links_are_not_followed(self, fast_limiter):
+        judgment = (
+            "<html><body><div class='judgments'><p>Under "
+            "<a href='/doc/501/'>Section 21 in The Trade Marks Act, 1940</a> read with "
+            "<a href='/doc/502/'>The Trade Marks Act, 1940</a> and "
+            "<a href='/doc/503/'>Article 14 in Constitution of India</a>, as held in "
+            "<a href='/doc/20/'>Cited precedent 20 vs Union</a>.</p></div></body></html>"
+        ).encode()
+        pages = {_search_page_url(SEARCH, 0): _result_page(10), "https://indiankanoon.org/doc/10/": judgment}
+        fake_get, _ = _fake_web(pages)
+        with patch("app.core.crawler.http_get", side_effect=fake_get):
+            cases = list(Crawler(limit=50, max_depth=1, max_pages=1, limiter=fast_limiter).crawl([SEARCH]))
+        assert [c["url"] for c in cases] == ["https://indiankanoon.org/doc/10/", "https://indiankanoon.org/doc/20/"]
+
+    def test_direct_doc_seed_is_yielded(self, fast_limiter):
+        with patch("app.core.crawler.http_get") as mock_get:
+            cases = list(Crawler(limit=5, limiter=fast_limiter).crawl(["https://indiankanoon.org/doc/77/"]))
+        assert cases == [{"url": "https://indiankanoon.org/doc/77/", "title": "Direct Link Case", "depth": 0}]
+        mock_get.assert_not_called()
+
+    def test_fetch_error_does_not_abort_crawl(self, fast_limiter):
+        with patch("app.core.crawler.http_get", side_effect=Exception("Connection reset")):
+            assert list(Crawler(limit=5, limiter=fast_limiter).crawl([SEARCH])) == []
+
+
+class TestCrawlAndIngest:
+
+    def test_on_case_streams_each_case(self, fast_limiter):
+        pages = {_search_page_url(SEARCH, 0): _result_page(10, 11)}
+        fake_get, _ = _fake_web(pages)
+        seen = []
+        with patch("app.core.crawler.http_get", side_effect=fake_get), \
+             patch("app.core.crawler.get_host_limiter", return_value=fast_limiter):
+            cases = crawl_and_ingest(SEARCH, limit=5, on_case=seen.append)
+        assert seen == cases
+        assert len(cases) == 2
+
+
+class TestTokenBucket:
+
+    def test_burst_is_free(self):
+        bucket = TokenBucket(rate=1, capacity=3)
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    def test_rate_bounds_throughput_across_threads(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(11)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 1 free token + 10 more at 50/s ≈ 0.2s, regardless of thread count
+        assert time.monotonic() - start >= 0.18
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0, capacity=1)
+
+    def test_retries_wait_on_limited_hosts_only(self):
+        from app.utils.http import _CappedRetry
+        limiter = HostRateLimiter(rate=1000, burst=1000)
+        limiter.acquire("https://indiankanoon.org/doc/1/")
+        retry = _CappedRetry(total=3, backoff_factor=0)
+        with patch("app.utils.http.get_host_limiter", return_value=limiter), \
+             patch.object(limiter, "acquire_if_limited", wraps=limiter.acquire_if_limited) as acquire:
+            retry.increment("GET", "/doc/1/", _pool=MagicMock(host="indiankanoon.org")).sleep()
+        acquire.assert_called_once_with("indiankanoon.org")
+        assert limiter.acquire_if_limited("example.com") == 0.0 and "example.com" not in limiter._buckets
+
+    def test_buckets_are_per_host(self):
+        limiter = HostRateLimiter(rate=1, burst=1)
+        assert limiter.acquire("https://indiankanoon.org/doc/1/") == 0.0
+        assert limiter.acquire("https://api.indiankanoon.org/doc/1/") == 0.0
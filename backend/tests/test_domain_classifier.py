@@ -0,0 +1,147 @@
+"""
+Tests for the query domain classifier (app/core/domain_classifier.py):
+nearest-centroid classification, building centroids from the index, the
+shared file-backed instance, and its use ahead of retrieval in rag.
+
+Run: cd backend && python -m pytest tests/test_domain_classifier.py -v
+"""
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.domain_classifier import DomainClassifier, build_domain_centroids, get_domain_classifier
+
+CENTROIDS = {
+    "Intellectual Property": [1.0, 0.0, 0.0],
+    "Criminal Law": [0.0, 1.0, 0.0],
+    "Tax Law": [0.0, 0.0, 1.0],
+}
+
+
+def _record(values, domain, status="active"):
+    return SimpleNamespace(values=values, metadata={"ai_legal_domain": domain, "status": status})
+
+
+class FakeIndex:
+    def __init__(self, records: dict):
+        self.records = records
+        self.fetch_calls = 0
+
+    def list(self, namespace=""):
+        ids = list(self.records)
+        yield from (ids[i:i + 3] for i in range(0, len(ids), 3))
+
+    def fetch(self, ids, namespace=""):
+        self.fetch_calls += 1
+        return SimpleNamespace(vectors={i: self.records[i] for i in ids})
+
+
+class TestDomainClassifier:
+
+    def test_nearest_centroid(self):
+        classifier = DomainClassifier(CENTROIDS)
+        domain, score = classifier.classify([0.9, 0.3, 0.1])
+        assert domain == "Intellectual Property" and score == pytest.approx(0.943, abs=1e-3)
+        assert classifier.scores([0.0, 2.0, 0.1])[0][0] == "Criminal Law"
+
+    def test_abstains_when_weak_ambiguous_or_wrong_dimension(self):
+        classifier = DomainClassifier(CENTROIDS)
+        assert classifier.classify([1.0, 1.0, 0.0])[0] is None           # tie between two domains
+        assert classifier.classify([-1.0, -1.0, -1.0])[0] is None        # far from every centroid
+        assert classifier.classify([1.0, 0.0]) == (None, 0.0)
+        assert classifier.stats()["outcomes"] == {"ambiguous": 1, "low_score": 1, "dimension_mismatch": 1}
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "centroids.json"
+        DomainClassifier(CENTROIDS, counts={"Tax Law": 7}, model="m", built_at=1.0).save(path)
+        loaded = DomainClassifier.load(path)
+        assert set(loaded.centroids) == set(CENTROIDS) and loaded.model == "m"
+        assert loaded.counts["Tax Law"] == 7
+        assert loaded.classify([0.0, 0.1, 0.9])[0] == "Tax Law"
+
+
+class TestBuildCentroids:
+
+    def test_averages_active_labelled_vectors(self):
+        index = FakeIndex({
+            "a1": _record([1.0, 0.0], "Tax Law"),
+            "a2": _record([0.0, 1.0], "Tax"),
+            "b1": _record([1.0, 1.0], "Criminal"),
+            "old": _record([0.0, 1.0], "Criminal Law", status="overruled"),
+            "g": _record([5.0, 5.0], "General"),
+            "u": _record([5.0, 5.0], "Unknown"),
+            "solo": _record([0.0, 1.0], "Family Law"),
+            "none": SimpleNamespace(values=[], metadata={"ai_legal_domain": "Tax Law"}),
+        })
+        with patch("app.core.domain_classifier._FETCH_BATCH", 3):
+            classifier = build_domain_centroids(index, model="m", min_records=1)
+        assert set(classifier.centroids) == {"Tax Law", "Criminal Law", "Family Law"}
+        assert classifier.counts == {"Tax Law": 2, "Criminal Law": 1, "Family Law": 1}
+        assert classifier.centroids["Tax Law"] == pytest.approx((0.7071, 0.7071), abs=1e-4)
+        assert index.fetch_calls == 3
+
+        assert set(build_domain_centroids(index, min_records=2).centroids) == {"Tax Law"}
+
+
+class TestSharedClassifier:
+
+    def test_missing_file_disabled_and_reload(self, tmp_path):
+        path = tmp_path / "domain_centroids.json"
+        with patch("app.core.domain_classifier.domain_centroids_path", return_value=path):
+            assert get_domain_classifier() is None
+            DomainClassifier(CENTROIDS).save(path)
+            assert len(get_domain_classifier()) == 3
+            DomainClassifier({"Tax Law": [0.0, 0.0, 1.0]}).save(path)
+            os.utime(path, (1, 1))  # mtime granularity: force a visible change
+            assert list(get_domain_classifier().centroids) == ["Tax Law"]
+            with patch("app.core.domain_classifier.DOMAIN_CLASSIFIER_ENABLED", False):
+                assert get_domain_classifier() is None
+
+
+class TestQueryDomain:
+    """The classified domain re-ranks retrieval and sets the prompt domain."""
+
+    @pytest.fixture(autouse=True)
+    def pipeline(self):
+        pc = MagicMock()
+        pc.inference.embed.return_value = [MagicMock(values=[0.9, 0.1, 0.0])]
+        hits = [MagicMock(score=0.8, metadata={"title": f"Case {i}", "url": f"u{i}", "text": "t"}) for i in range(5)]
+        classifier = DomainClassifier(CENTROIDS)
+        with patch("app.core.rag.get_pinecone_client", return_value=pc), \
+             patch("app.core.rag.index") as self.index, \
+             patch("app.core.rag.get_domain_classifier", return_value=classifier), \
+             patch("app.core.rag._assess_relevance", return_value=True), \
+             patch("app.core.rag._build_grounded_prompt", return_value="prompt") as self.prompt, \
+             patch("app.core.rag.get_llm_response", return_value="analysis"):
+            self.index.query.return_value = MagicMock(matches=hits)
+            yield
+
+    def test_classified_domain_feeds_ranking_and_prompt(self):
+        from app.core.rag import query_legal_assistant
+        result = query_legal_assistant("Can a rival copy my biscuit wrapper?")
+        assert self.index.query.call_args.kwargs["filter"] == {"status": {"$eq": "active"}}
+        assert result["applied_filters"] == {}
+        assert result["ranking_hints"] == {"legal_domain": "Intellectual Property"}
+        assert self.prompt.call_args.args[2] == "Intellectual Property"
+
+    def test_explicit_domain_wins(self):
+        from app.core.rag import query_legal_assistant
+        result = query_legal_assistant("Can a rival copy my biscuit wrapper?", filters={"legal_domain": "Tax Law"})
+        assert result["applied_filters"] == {"legal_domain": "Tax Law"}
+        assert self.prompt.call_args.args[2] == "Tax Law"
+
+    def test_raw_centroid_labels_are_canonicalised(self):
+        from app.core.rag import query_legal_assistant
+        raw = DomainClassifier({"IPR": [1.0, 0.0, 0.0], "Criminal": [0.0, 1.0, 0.0]})
+        with patch("app.core.rag.get_domain_classifier", return_value=raw):
+            result = query_legal_assistant("Can a rival copy my biscuit wrapper?")
+        assert result["ranking_hints"] == {"legal_domain": "Intellectual Property"}
+
+    def test_other_embedding_model_ignored(self):
+        from app.core.rag import query_legal_assistant
+        with patch("app.core.rag.get_domain_classifier", return_value=DomainClassifier(CENTROIDS, model="other")):
+            result = query_legal_assistant("Can a rival copy my biscuit wrapper?")
+        assert result["ranking_hints"] == {}
+        assert self.prompt.call_args.args[2] == "Indian Law"
@@ -66,6 +66,11 @@ class TestCaseMetadataValidation:
         with pytest.raises(Exception):
             CaseMetadata(judgment_date="2024-01-01")
     
+    def test_free_text_domain_is_canonicalised(self):
+        """LLM labels like "Tax" are mapped onto the shared rules.LEGAL_DOMAINS set."""
+        assert CaseMetadata(case_name="A vs B", judgment_date="2001-01-01", legal_domain="Tax").legal_domain == "Tax Law"
+        assert CaseMetadata(case_name="A vs B", judgment_date="2001-01-01", legal_domain=None).legal_domain == "General"
+
     def test_wrong_type_for_overrules_raises(self):
         """overrules_cases must be a list, not a string."""
         with pytest.raises(Exception):
@@ -157,3 +162,240 @@ class TestExtractLegalMetadata:
         # The key point is it doesn't silently pass through bad data
         # Since case_name is required, Pydantic will reject and the cascade exhausts → empty
         assert result == {} or "case_name" in result
+
+
+class TestCachedExtraction:
+    """Tests for extract_legal_metadata_cached — content-hash keyed result cache."""
+
+    GOOD = {
+        "case_name": "Cached Case vs. State",
+        "judgment_date": "2020-06-01",
+        "overrules_cases": [],
+        "upholds_cases": ["Older Case"],
+        "legal_domain": "Tax Law",
+    }
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from app.utils.result_cache import ResultCache
+        cache = ResultCache(tmp_path / "results.sqlite")
+        with patch("app.core.extraction.get_result_cache", return_value=cache):
+            yield cache
+
+    def test_repeat_extraction_is_a_single_lookup(self, cache):
+        from app.core.extraction import extract_legal_metadata_cached
+        with patch("app.core.extraction.extract_legal_metadata", return_value=CaseMetadata(**self.GOOD).model_dump()) as mock_extract:
+            first = extract_legal_metadata_cached("Judgment text")
+            second = extract_legal_metadata_cached("Judgment text")
+
+        mock_extract.assert_called_once()
+        assert second == first
+        assert second["validated_date"] == date(2020, 6, 1)
+
+    def test_different_text_misses(self, cache):
+        from app.core.extraction import extract_legal_metadata_cached
+        with patch("app.core.extraction.extract_legal_metadata", return_value=CaseMetadata(**self.GOOD).model_dump()) as mock_extract:
+            extract_legal_metadata_cached("Judgment text A")
+            extract_legal_metadata_cached("Judgment text B")
+        assert mock_extract.call_count == 2
+
+    def test_failed_extraction_not_cached(self, cache):
+        from app.core.extraction import extract_legal_metadata_cached
+        with patch("app.core.extraction.extract_legal_metadata", return_value={}) as mock_extract:
+            assert extract_legal_metadata_cached("Judgment text") == {}
+            assert extract_legal_metadata_cached("Judgment text") == {}
+        assert mock_extract.call_count == 2
+
+    def test_prompt_change_invalidates_key(self):
+        from app.core.extraction import _extraction_cache_key
+        before = _extraction_cache_key("Judgment text")
+        with patch("app.core.extraction.EXTRACTION_SYSTEM_PROMPT", "A different prompt"):
+            assert _extraction_cache_key("Judgment text") != before
+        with patch("app.core.extraction.EXTRACTION_CACHE_VERSION", 999):
+            assert _extraction_cache_key("Judgment text") != before
+        for name in ("RELATIONS_SYSTEM_PROMPT", "_RULES_SOURCE_HASH"):
+            with patch(f"app.core.extraction.{name}", "changed"):
+                assert _extraction_cache_key("Judgment text") != before
+        windowed = _extraction_cache_key("Judgment text", window=8_000)
+        with patch("app.core.extraction.EXTRACTION_BATCH_SYSTEM_PROMPT", "A different batch prompt"):
+            assert _extraction_cache_key("Judgment text", window=8_000) != windowed
+            assert _extraction_cache_key("Judgment text") == before
+
+
+class TestBatchExtraction:
+    """Tests for extract_legal_metadata_batch — several judgments per LLM call."""
+
+    @staticmethod
+    def _item(i):
+        return {
+            "index": i,
+            "case_name": f"Case {i} vs. State",
+            "judgment_date": "2019-01-0" + str(i + 1),
+            "overrules_cases": [],
+            "upholds_cases": [],
+            "legal_domain": "Contract Law",
+        }
+
+    @staticmethod
+    def _reply(entries):
+        response = MagicMock()
+        response.choices[0].message.content = json.dumps({"results": entries})
+        return response
+
+    @pytest.fixture(autouse=True)
+    def no_cache(self):
+        with patch("app.core.extraction.get_result_cache", return_value=None):
+            yield
+
+    def test_packing_respects_context_window(self):
+        from app.core.extraction import _pack_batches, MODEL_CONTEXT_TOKENS
+        items = [(i, "x" * 6000) for i in range(8)]
+        with patch.dict(MODEL_CONTEXT_TOKENS, {"small-model": 8_000, "large-model": 1_000_000}):
+            small = _pack_batches(items, "small-model")
+            large = _pack_batches(items, "large-model")
+        # 8k tokens × 0.5 input share × 4 chars/token = 16k chars → two items per call
+        assert [len(b) for b in small] == [2, 2, 2, 2]
+        assert [len(b) for b in large] == [8]
+
+    def test_several_judgments_in_one_call(self):
+        from app.core.extraction import extract_legal_metadata_batch
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._reply([self._item(i) for i in range(3)])
+
+        with patch("app.core.extraction.client", mock_client):
+            results = extract_legal_metadata_batch(["Judgment A", "Judgment B", "Judgment C"])
+
+        mock_client.chat.completions.create.assert_called_once()
+        assert [r["case_name"] for r in results] == ["Case 0 vs. State", "Case 1 vs. State", "Case 2 vs. State"]
+        assert results[1]["validated_date"] == date(2019, 1, 2)
+        prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "=== JUDGMENT 2 ===\nJudgment C" in prompt
+
+    def test_only_invalid_items_fall_back(self):
+        from app.core.extraction import extract_legal_metadata_batch
+        bad = self._item(1)
+        del bad["case_name"]  # required field missing → this item alone is invalid
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._reply([self._item(0), bad])
+        fallback = CaseMetadata(**{k: v for k, v in self._item(1).items() if k != "index"}).model_dump()
+
+        with patch("app.core.extraction.client", mock_client), \
+             patch("app.core.extraction.extract_legal_metadata_cached", return_value=fallback) as mock_single:
+            results = extract_legal_metadata_batch(["Judgment A", "Judgment B"])
+
+        mock_single.assert_called_once_with("Judgment B")
+        assert results[0]["case_name"] == "Case 0 vs. State"
+        assert results[1] == fallback
+
+    def test_failed_batch_moves_to_next_model(self):
+        from app.core.extraction import extract_legal_metadata_batch
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = [
+            Exception("429 rate limited"),
+            self._reply([self._item(0), self._item(1)]),
+        ]
+
+        with patch("app.core.extraction.client", mock_client):
+            results = extract_legal_metadata_batch(["Judgment A", "Judgment B"])
+
+        assert mock_client.chat.completions.create.call_count == 2
+        assert all(r["case_name"] for r in results)
+
+    def test_long_judgments_are_windowed_into_the_batch(self):
+        from app.core.extraction import extract_legal_metadata_batch, BATCH_ITEM_WINDOW_CHARS
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._reply([self._item(0), self._item(1)])
+        long_text = "CAUSE TITLE. " + "Arguments. " * BATCH_ITEM_WINDOW_CHARS + "HELD: appeal allowed."
+
+        with patch("app.core.extraction.client", mock_client), \
+             patch("app.core.extraction.extract_legal_metadata_cached") as mock_single:
+            results = extract_legal_metadata_batch([long_text, "Judgment B"])
+
+        mock_single.assert_not_called()
+        assert results[0]["case_name"] == "Case 0 vs. State"
+        prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "CAUSE TITLE." in prompt and "HELD: appeal allowed." in prompt
+        assert len(prompt) < BATCH_ITEM_WINDOW_CHARS + 1_000
+
+    def test_windowed_results_are_not_served_to_single_extraction(self, tmp_path):
+        from app.core.extraction import extract_legal_metadata_batch, extract_legal_metadata_cached
+        from app.utils.result_cache import ResultCache
+        cache = ResultCache(tmp_path / "results.sqlite")
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value = self._reply([self._item(0)])
+        single = CaseMetadata(**{**self._item(1), "case_name": "Full Text Case"}).model_dump()
+
+        with patch("app.core.extraction.get_result_cache", return_value=cache), \
+             patch("app.core.extraction.client", mock_client):
+            extract_legal_metadata_batch(["Judgment A"])
+            with patch("app.core.extraction.extract_legal_metadata_fast", return_value=single) as mock_fast:
+                assert extract_legal_metadata_cached("Judgment A")["case_name"] == "Full Text Case"
+            mock_fast.assert_called_once()
+            # A full-text result is the better answer for a later batch
+            assert extract_legal_metadata_batch(["Judgment A"])[0]["case_name"] == "Full Text Case"
+        mock_client.chat.completions.create.assert_called_once()
+
+    def test_failed_batch_skips_failed_models_in_single_fallback(self):
+        from app.core.extraction import extract_legal_metadata_batch, EXTRACTION_MODELS
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = Exception("503 upstream down")
+
+        with patch("app.core.extraction.client", mock_client), \
+             patch("app.core.extraction.extract_legal_metadata_cached", return_value={}) as mock_single:
+            assert extract_legal_metadata_batch(["Judgment A", "Judgment B"]) == [{}, {}]
+
+        assert mock_client.chat.completions.create.call_count == len(EXTRACTION_MODELS)
+        assert mock_single.call_count == 2
+        assert mock_single.call_args.kwargs["skip_models"] == frozenset(EXTRACTION_MODELS)
+
+    def test_skipped_models_are_not_called(self):
+        from app.core.extraction import extract_legal_metadata, EXTRACTION_MODELS
+        mock_client = MagicMock()
+        with patch("app.core.extraction.client", mock_client):
+            assert extract_legal_metadata("Some judgment text", skip_models=frozenset(EXTRACTION_MODELS)) == {}
+        mock_client.chat.completions.create.assert_not_called()
+
+
+class TestRuleFastPath:
+    """Tests for extract_legal_metadata_fast — rules first, LLM only when needed."""
+
+    HEADER = (
+        "## Parle Products (P) Ltd. vs J.P. & Co., Mysore on 16 February, 1972\n\n"
+        "Bench: Sikri, S.M. (Cj)\n\n"
+        "Infringement under the Copyright Act, 1957 and section 14 of the Copyright Act.\n"
+    )
+
+    def test_confident_without_relation_language_skips_llm(self):
+        from app.core.extraction import extract_legal_metadata_fast
+        mock_client = MagicMock()
+        with patch("app.core.extraction.client", mock_client):
+            result = extract_legal_metadata_fast(self.HEADER + "The appeal is dismissed.")
+
+        mock_client.chat.completions.create.assert_not_called()
+        assert result["case_name"] == "Parle Products (P) Ltd. vs J.P. & Co., Mysore"
+        assert result["validated_date"] == date(1972, 2, 16)
+        assert result["legal_domain"] == "Intellectual Property"
+        assert result["bench"] == "Sikri, S.M. (Cj)"
+        assert result["overrules_cases"] == []
+
+    def test_relation_language_asks_llm_for_relations_only(self):
+        from app.core.extraction import extract_legal_metadata_fast, RELATIONS_SYSTEM_PROMPT
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.return_value.choices[0].message.content = json.dumps(
+            {"overrules_cases": ["Old Case vs State"], "upholds_cases": []}
+        )
+        with patch("app.core.extraction.client", mock_client):
+            result = extract_legal_metadata_fast(self.HEADER + "Old Case vs State is overruled.")
+
+        call = mock_client.chat.completions.create.call_args.kwargs
+        assert call["messages"][0]["content"] == RELATIONS_SYSTEM_PROMPT
+        assert result["overrules_cases"] == ["Old Case vs State"]
+        assert result["case_name"] == "Parle Products (P) Ltd. vs J.P. & Co., Mysore"
+
+    def test_low_confidence_uses_full_extraction(self):
+        from app.core.extraction import extract_legal_metadata_fast
+        full = CaseMetadata(case_name="LLM Case", judgment_date="2001-01-01").model_dump()
+        with patch("app.core.extraction.extract_legal_metadata", return_value=full) as mock_full:
+            result = extract_legal_metadata_fast("Unstructured text without a title line.")
+        mock_full.assert_called_once()
+        assert result["case_name"] == "LLM Case"
@@ -118,7 +118,7 @@ class TestCaseMetadataValidationEdgeCases:
         assert meta.overrules_cases == ["Case A", "Case B", "Case A"]
 
     def test_legal_domain_case_sensitivity(self):
-        """Test that legal_domain preserves case sensitivity."""
+        """Test that legal_domain is mapped to its canonical label regardless of case."""
         data = {
             "case_name": "Test Case",
             "judgment_date": "2024-01-15",
@@ -127,10 +127,10 @@ class TestCaseMetadataValidationEdgeCases:
             "legal_domain": "intellectual property"  # lowercase
         }
         meta = CaseMetadata(**data)
-        assert meta.legal_domain == "intellectual property"
+        assert meta.legal_domain == "Intellectual Property"
 
     def test_legal_domain_with_special_characters(self):
-        """Test that legal_domain accepts special characters."""
+        """Test that legal_domain with special characters still maps to its canonical label."""
         data = {
             "case_name": "Test Case",
             "judgment_date": "2024-01-15",
@@ -139,7 +139,7 @@ class TestCaseMetadataValidationEdgeCases:
             "legal_domain": "Intellectual Property (IP)"
         }
         meta = CaseMetadata(**data)
-        assert meta.legal_domain == "Intellectual Property (IP)"
+        assert meta.legal_domain == "Intellectual Property"
 
 
 class TestExtractLegalMetadataEdgeCases:
@@ -181,10 +181,10 @@ class TestExtractLegalMetadataEdgeCases:
         result = extract_legal_metadata("Some legal text here...")
         
         # Empty strings are valid for str fields, so validation passes
-        # Empty judgment_date results in validated_date=None
+        # Empty judgment_date results in validated_date=None; an empty domain is "General"
         assert result["case_name"] == ""
         assert result["judgment_date"] == ""
-        assert result["legal_domain"] == ""
+        assert result["legal_domain"] == "General"
         assert result["overrules_cases"] == []
         assert result["upholds_cases"] == []
         assert result["validated_date"] is None
@@ -0,0 +1,143 @@
+"""
+Tests for the on-disk HTTP response cache in app/utils/http_cache.py.
+
+Run: cd backend && python -m pytest tests/test_http_cache.py -v
+"""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.utils.http_cache import ResponseCache, OfflineCacheMiss, cache_key
+
+URL = "https://indiankanoon.org/doc/257876/"
+
+
+def _response(status=200, body=b"<html>judgment</html>", **headers):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers = CaseInsensitiveDict({"Content-Type": "text/html", **headers})
+    return resp
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(root=tmp_path, max_bytes=10 * 1024 * 1024, ttl=3600, offline=False)
+
+
+class TestCacheKey:
+
+    def test_ik_web_and_api_keyed_by_docid(self):
+        assert cache_key("https://indiankanoon.org/doc/257876/") == "ik:257876:web"
+        assert cache_key("https://api.indiankanoon.org/doc/257876/") == "ik:257876:api"
+
+    def test_trailing_slash_is_irrelevant(self):
+        assert cache_key("https://indiankanoon.org/doc/257876") == cache_key(URL)
+
+    def test_other_urls_keyed_by_url(self):
+        assert cache_key("https://example.com/judgment.html") == "https://example.com/judgment.html"
+
+
+class TestResponseCache:
+
+    def test_second_fetch_is_served_from_disk(self, cache):
+        send = MagicMock(return_value=_response())
+        first = cache.fetch(URL, send)
+        second = cache.fetch(URL, send)
+
+        assert send.call_count == 1
+        assert second.content == first.content == b"<html>judgment</html>"
+        assert second.status_code == 200
+        assert cache.stats()["hits"] == 1
+
+    def test_bodies_are_compressed(self, cache):
+        body = b"The appeal is allowed. " * 2000
+        cache.fetch(URL, MagicMock(return_value=_response(body=body)))
+        assert cache.stats()["bytes"] < len(body) / 10
+
+    def test_identical_bodies_share_one_blob(self, cache):
+        send = MagicMock(return_value=_response())
+        cache.fetch("https://example.com/a", send)
+        cache.fetch("https://example.com/b", send)
+        assert len(list(cache.blob_dir.rglob("*.z"))) == 1
+
+    def test_stale_entry_revalidates_with_etag(self, cache):
+        cache.ttl = 0
+        cache.fetch(URL, MagicMock(return_value=_response(ETag='"v1"', **{"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})))
+
+        send = MagicMock(return_value=_response(status=304, body=b""))
+        resp = cache.fetch(URL, send, headers={"Accept": "text/html"})
+
+        sent_headers = send.call_args.kwargs["headers"]
+        assert sent_headers["If-None-Match"] == '"v1"'
+        assert sent_headers["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+        assert sent_headers["Accept"] == "text/html"
+        assert resp.content == b"<html>judgment</html>"
+        assert cache.stats()["revalidated"] == 1
+
+    def test_changed_document_replaces_entry(self, cache):
+        cache.ttl = 0
+        cache.fetch(URL, MagicMock(return_value=_response(ETag='"v1"')))
+        cache.fetch(URL, MagicMock(return_value=_response(body=b"<html>corrected</html>", ETag='"v2"')))
+        assert cache.get(URL)["body"] == b"<html>corrected</html>"
+        assert cache.get(URL)["etag"] == '"v2"'
+
+    def test_errors_are_not_cached(self, cache):
+        cache.fetch(URL, MagicMock(return_value=_response(status=503)))
+        assert cache.get(URL) is None
+
+    def test_cacheable_can_veto_a_200(self, cache):
+        send = MagicMock(return_value=_response(body=b'{"errmsg": "busy"}'))
+        cache.fetch(URL, send, cacheable=lambda r: b"errmsg" not in r.content)
+        cache.fetch(URL, send, cacheable=lambda r: b"errmsg" not in r.content)
+        assert send.call_count == 2 and cache.get(URL) is None
+        assert cache.stats()["misses"] == 2
+
+    def test_no_store_is_respected(self, cache):
+        cache.fetch(URL, MagicMock(return_value=_response(**{"Cache-Control": "no-store"})))
+        assert cache.get(URL) is None
+
+    def test_before_network_skipped_on_hit(self, cache):
+        send = MagicMock(return_value=_response())
+        limiter = MagicMock()
+        cache.fetch(URL, send, before_network=limiter)
+        cache.fetch(URL, send, before_network=limiter)
+        limiter.assert_called_once()
+
+    def test_lru_eviction_bounds_size(self, tmp_path):
+        import os
+        cache = ResponseCache(root=tmp_path, max_bytes=3500, ttl=3600, offline=False)
+        for i in range(3):
+            # Incompressible bodies so each blob is ~1 KiB on disk
+            cache.fetch(f"https://example.com/{i}", MagicMock(return_value=_response(body=os.urandom(1000))))
+            time.sleep(0.01)
+        cache.fetch("https://example.com/0", MagicMock())  # touch 0 → now most recent
+        cache.fetch("https://example.com/3", MagicMock(return_value=_response(body=os.urandom(1000))))
+
+        assert cache.stats()["bytes"] <= 3500
+        assert cache.get("https://example.com/0") is not None
+        assert cache.get("https://example.com/1") is None
+
+
+class TestOfflineMode:
+
+    def test_offline_replays_even_stale_entries(self, cache):
+        cache.fetch(URL, MagicMock(return_value=_response()))
+        cache.ttl = 0
+        cache.offline = True
+        send = MagicMock()
+        assert cache.fetch(URL, send).content == b"<html>judgment</html>"
+        send.assert_not_called()
+
+    def test_offline_miss_raises_without_network(self, cache):
+        cache.offline = True
+        send = MagicMock()
+        with pytest.raises(OfflineCacheMiss):
+            cache.fetch(URL, send)
+        send.assert_not_called()
+
+    def test_offline_miss_is_a_connection_error(self):
+        assert issubclass(OfflineCacheMiss, requests.ConnectionError)
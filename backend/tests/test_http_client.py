@@ -0,0 +1,107 @@
+"""
+Tests for the shared HTTP client layer in app/utils/http.py.
+
+Uses a throwaway local HTTP/1.1 server — no external network access.
+Run: cd backend && python -m pytest tests/test_http_client.py -v
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils import http
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    fail_first = 0
+
+    def do_GET(self):
+        if _Handler.fail_first > 0:
+            _Handler.fail_first -= 1
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool(monkeypatch):
+    """Give every test its own adapter so pool counters start at zero."""
+    monkeypatch.setattr(http, "_adapter", None)
+    monkeypatch.setattr(http, "_local", threading.local())
+    _Handler.fail_first = 0
+
+
+class TestSharedSession:
+
+    def test_sessions_are_per_thread_but_share_one_pool(self):
+        sessions = []
+        t = threading.Thread(target=lambda: sessions.append(http.get_http_session()))
+        t.start()
+        t.join()
+        main = http.get_http_session()
+
+        assert sessions[0] is not main
+        assert sessions[0].get_adapter("https://indiankanoon.org") is main.get_adapter("https://indiankanoon.org")
+
+    def test_same_thread_reuses_session(self):
+        assert http.get_http_session() is http.get_http_session()
+
+    def test_keep_alive_connections_are_reused(self, local_server):
+        for _ in range(5):
+            assert http.http_get(local_server).status_code == 200
+
+        stats = http.get_http_stats()
+        host = stats["hosts"][local_server]
+        assert host["requests"] == 5
+        assert host["connections"] == 1
+        assert stats["reuse_ratio"] == pytest.approx(0.8)
+
+    def test_stats_empty_before_first_request(self):
+        assert http.get_http_stats() == {"hosts": {}, "requests": 0, "connections": 0, "reuse_ratio": 0.0}
+
+
+class TestRetries:
+
+    def test_retries_on_503_with_retry_after(self, local_server):
+        _Handler.fail_first = 2
+        resp = http.http_get(local_server)
+        assert resp.status_code == 200
+        assert _Handler.fail_first == 0
+
+    def test_retry_after_is_capped(self):
+        class _Resp:
+            headers = {"Retry-After": "86400"}
+
+        assert http._CappedRetry().get_retry_after(_Resp()) == http.MAX_RETRY_AFTER
+
+    def test_default_timeout_applied(self, monkeypatch):
+        captured = {}
+
+        class _Session:
+            def get(self, url, **kwargs):
+                captured.update(kwargs)
+
+        monkeypatch.setattr(http, "get_http_session", lambda: _Session())
+        http.http_get("https://example.com")
+        assert captured["timeout"] == http.DEFAULT_TIMEOUT
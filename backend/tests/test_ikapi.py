@@ -0,0 +1,192 @@
+"""
+Tests for the IndianKanoon API client (app/core/ikapi.py): caching, quota
+metering, budget enforcement, concurrent doc fetch and structured search.
+
+No network access: app.core.ikapi.http_post is patched.
+
+Run: cd backend && python -m pytest tests/test_ikapi.py -v
+"""
+import json
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from app.core import ikapi
+from app.core.ikapi import IKClient, IKQuotaExceeded, search_query_from_url
+from app.utils.http_cache import ResponseCache
+
+
+def _response(payload: dict, status: int = 200) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(payload).encode()
+    resp.headers["Content-Type"] = "application/json"
+    return resp
+
+
+def _fake_post(calls: list, delay: float = 0.0):
+    lock = threading.Lock()
+
+    def post(url, **kwargs):
+        with lock:
+            calls.append(url)
+        time.sleep(delay)
+        if "/search/" in url:
+            return _response({"docs": [
+                {"tid": 11, "title": "<b>Parle</b> Products vs J.P. &amp; Co", "docsource": "Supreme Court of India"},
+                {"tid": 12, "title": "Cadila Health Care vs Cadila Pharmaceuticals", "publishdate": "2001-03-26"},
+            ]})
+        docid = url.rstrip("/").rsplit("/", 1)[-1]
+        return _response({"doc": f"<div class='judgments'>Judgment {docid}</div>", "title": f"Case {docid}"})
+
+    return post
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with patch("app.utils.http_cache.get_response_cache", return_value=ResponseCache(tmp_path / "http")):
+        yield
+
+
+@pytest.fixture
+def client():
+    return IKClient("token", rate=1000, burst=1000)
+
+
+class TestIKClient:
+
+    def test_cache_hits_are_free(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post(calls)):
+            first = client.get_doc(257876)
+            second = client.get_doc("257876")
+        assert first == second and len(calls) == 1
+        stats = client.stats()
+        assert stats["calls"] == {"doc": 1} and stats["cache_hits"] == {"doc": 1}
+        assert stats["spent_inr"] == ikapi.IK_API_PRICES["doc"]
+
+    def test_error_payload_not_cached(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=lambda url, **kw: calls.append(url) or _response({"errmsg": "x"})):
+            client.get_doc(7)
+            client.get_doc(7)
+        assert len(calls) == 2
+
+    def test_metered_ingest_cost(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post(calls)):
+            with client.metered_ingest() as meter:
+                client.get_doc(1)
+                client.search("trademark")
+            with client.metered_ingest() as cached_meter:
+                client.get_doc(1)
+        assert meter["cost"] == pytest.approx(ikapi.IK_API_PRICES["doc"] + ikapi.IK_API_PRICES["search"])
+        assert cached_meter["cost"] == 0.0
+        assert client.stats()["ingests"] == 2
+        assert client.stats()["cost_per_ingest_inr"] == pytest.approx(meter["cost"] / 2, abs=1e-3)
+
+    def test_daily_budget(self, cache):
+        client = IKClient("token", rate=1000, burst=1000, daily_budget=0.45)
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post([])):
+            client.get_doc(1)
+            client.get_doc(2)
+            with pytest.raises(IKQuotaExceeded):
+                client.get_doc(3)
+            client.get_doc(1)  # cached: still served
+
+    def test_failed_calls_are_not_billed(self, cache):
+        client = IKClient("token", rate=1000, burst=1000, daily_budget=0.25)
+
+        def post(url, **kwargs):
+            raise requests.ConnectionError("reset")
+
+        with patch("app.core.ikapi.http_post", side_effect=post):
+            for _ in range(3):
+                with pytest.raises(requests.ConnectionError):
+                    client.get_doc(1)
+        with patch("app.core.ikapi.http_post", return_value=_response({"errmsg": "x"}, status=500)):
+            with pytest.raises(requests.HTTPError):
+                client.get_doc(1)
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post([])):
+            client.get_doc(1)  # the budget is still intact
+        stats = client.stats()
+        assert stats["spent_inr"] == ikapi.IK_API_PRICES["doc"]
+        assert stats["failed"] == {"doc": 4} and stats["calls"] == {"doc": 1}
+
+    def test_search_has_short_ttl(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post(calls)):
+            client.search("bail")
+            client.search("bail")
+            with patch("app.core.ikapi.IK_SEARCH_CACHE_TTL", 0):
+                client.search("bail")
+        assert len(calls) == 2
+
+    def test_probe_bypasses_cache(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post(calls)):
+            client.get_doc(5)
+            response = client.probe(5)
+        assert len(calls) == 2 and response.status_code == 200
+        assert client.stats()["calls"] == {"doc": 2}
+
+    def test_get_docs_concurrent(self, client, cache):
+        calls = []
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post(calls, delay=0.2)):
+            start = time.perf_counter()
+            docs = client.get_docs([1, 2, 3, 4, 4], concurrency=4)
+            elapsed = time.perf_counter() - start
+        assert set(docs) == {"1", "2", "3", "4"} and len(calls) == 4
+        assert docs["3"]["title"] == "Case 3"
+        assert elapsed < 0.6  # 4 x 0.2 s serially
+
+    def test_get_docs_reports_failures(self, client, cache):
+        def post(url, **kwargs):
+            if "/2/" in url:
+                raise requests.ConnectionError("reset")
+            return _fake_post([])(url)
+
+        with patch("app.core.ikapi.http_post", side_effect=post):
+            docs = asyncio.run(client.aget_docs(["1", "2"]))
+        assert "doc" in docs["1"] and isinstance(docs["2"], requests.ConnectionError)
+
+    def test_quota_bucket_paces_network_calls(self, cache):
+        client = IKClient("token", rate=10, burst=1)
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post([])):
+            start = time.perf_counter()
+            for docid in range(4):
+                client.get_doc(docid)
+        assert time.perf_counter() - start >= 0.25
+
+    def test_search_docs(self, client, cache):
+        with patch("app.core.ikapi.http_post", side_effect=_fake_post([])):
+            results = client.search_docs("deceptive similarity", 0)
+        assert [r["url"] for r in results] == ["https://indiankanoon.org/doc/11/", "https://indiankanoon.org/doc/12/"]
+        assert results[0]["title"] == "Parle Products vs J.P. & Co"
+        assert results[0]["court"] == "Supreme Court of India"
+
+
+class TestSearchIntegration:
+
+    def test_search_query_from_url(self):
+        assert search_query_from_url("https://indiankanoon.org/search/?formInput=trade%20mark&pagenum=2") == ("trade mark", 2)
+        assert search_query_from_url("https://indiankanoon.org/doc/1/") is None
+
+    def test_crawler_uses_search_api(self, client, cache):
+        from app.core.crawler import Crawler
+        with patch("app.core.crawler.get_ik_client", return_value=client), \
+             patch("app.core.ikapi.http_post", side_effect=_fake_post([])), \
+             patch("app.core.crawler.http_get") as mock_get:
+            cases = list(Crawler(limit=5, max_pages=1).crawl(["https://indiankanoon.org/search/?formInput=biscuit"]))
+        mock_get.assert_not_called()
+        assert [c["url"] for c in cases] == ["https://indiankanoon.org/doc/11/", "https://indiankanoon.org/doc/12/"]
+
+    def test_fetch_case_text_uses_client(self, client, cache):
+        from app.core import scraper
+        with patch("app.core.scraper.get_ik_client", return_value=client), \
+             patch("app.core.ikapi.http_post", side_effect=_fake_post([])):
+            assert "Judgment 42" in scraper.fetch_case_text("https://indiankanoon.org/doc/42/")
@@ -129,7 +129,7 @@ class TestScraperMarkItDown:
         mock_resp.raise_for_status = MagicMock()
         return mock_resp
 
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_markitdown_strips_nav_and_footer(self, mock_get):
         """MarkItDown output must not contain navigation/footer noise."""
         mock_get.return_value = self._mock_response(SAMPLE_INDIANKANOON_HTML)
@@ -143,7 +143,7 @@ class TestScraperMarkItDown:
         assert "Copyright IndianKanoon" not in text, "Footer leaked into output"
         assert "Advertisement" not in text, "Ad text leaked into output"
 
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_fallback_strips_noise_when_no_container_found(self, mock_get):
         """
         When no <div class='judgments'> container exists, the fallback path
@@ -175,7 +175,7 @@ class TestScraperMarkItDown:
         assert "Advertisement" not in text, "Ad not stripped in fallback path"
 
 
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_markitdown_preserves_judgment_content(self, mock_get):
         """Legal content (HELD, ORDER) must survive HTML → Markdown conversion."""
         mock_get.return_value = self._mock_response(SAMPLE_INDIANKANOON_HTML)
@@ -188,7 +188,7 @@ class TestScraperMarkItDown:
             "Supreme Court" in text or "appeal is allowed" in text.lower()
         ), "Core judgment content missing from MarkItDown output"
 
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_output_is_smaller_than_raw_html(self, mock_get):
         """Cleaned Markdown must be smaller than raw HTML (noise stripped)."""
         mock_get.return_value = self._mock_response(SAMPLE_INDIANKANOON_HTML)
@@ -201,7 +201,7 @@ class TestScraperMarkItDown:
             "Output is not smaller than raw HTML — noise not being stripped"
         )
 
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_returns_empty_string_on_fetch_error(self, mock_get):
         """Network errors must return '' not raise."""
         mock_get.side_effect = Exception("Connection refused")
@@ -211,7 +211,7 @@ class TestScraperMarkItDown:
         assert result == ""
 
     @patch("app.core.scraper._get_md_converter", return_value=None)
-    @patch("app.core.scraper.requests.get")
+    @patch("app.core.scraper.http_get")
     def test_beautifulsoup_fallback_when_markitdown_unavailable(self, mock_get, _mock_conv):
         """When MarkItDown is unavailable the BeautifulSoup path must still work."""
         mock_get.return_value = self._mock_response(SAMPLE_INDIANKANOON_HTML)
@@ -221,6 +221,49 @@ class TestScraperMarkItDown:
         assert "appeal is allowed" in text.lower() or "Supreme Court" in text
 
 
+class TestSingleParseConversion:
+    """Tests for html_to_markdown() — one parse, no str() round-trip."""
+
+    FIXTURE = Path(__file__).parent / "fixtures" / "indiankanoon" / "parle_products_1972.html"
+
+    def test_stored_fixture_converts_to_markdown_headings(self):
+        from app.core.scraper import html_to_markdown, _get_md_converter
+        if _get_md_converter() is None:
+            pytest.skip("MarkItDown not installed")
+
+        text = html_to_markdown(self.FIXTURE.read_bytes())
+        assert text.startswith("## Parle Products")
+        assert "### HELD" in text
+        assert "Advertisement" not in text
+        assert "Copyright Indian Kanoon" not in text
+        assert "ga('send'" not in text
+
+    def test_accepts_str_input_from_ik_api(self):
+        """The IK API returns HTML as a str — it must not need re-encoding."""
+        from app.core.scraper import html_to_markdown
+        text = html_to_markdown(SAMPLE_INDIANKANOON_HTML.decode())
+        assert "appeal is allowed" in text.lower()
+
+    def test_container_is_never_serialised(self):
+        """The scoped node must be converted directly, not via str(container)."""
+        from bs4 import Tag
+        from app.core.scraper import html_to_markdown
+        with patch.object(Tag, "__str__", side_effect=AssertionError("round-trip")) as mock_str:
+            html_to_markdown(SAMPLE_INDIANKANOON_HTML)
+        mock_str.assert_not_called()
+
+    def test_matches_markitdown_output(self):
+        """Single-parse output must match the old MarkItDown double-parse output."""
+        from app.core.scraper import html_to_markdown, _extract_judgment_html, _get_md_converter
+        if _get_md_converter() is None:
+            pytest.skip("MarkItDown not installed")
+        from markitdown import MarkItDown
+
+        scoped = _extract_judgment_html(SAMPLE_INDIANKANOON_HTML)
+        legacy = MarkItDown().convert_stream(io.BytesIO(scoped), file_extension=".html").text_content
+        assert html_to_markdown(SAMPLE_INDIANKANOON_HTML) == legacy.strip()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Idea 3 — extraction.py: extract_key_sections()
 # ─────────────────────────────────────────────────────────────────────────────
@@ -368,6 +411,24 @@ class TestIngestCaseFromFile:
         finally:
             os.unlink(tmp)
 
+    def test_repeat_ingest_converts_once(self, tmp_path):
+        """The same file bytes must hit the Markdown cache on the second ingest."""
+        from app.utils.result_cache import ResultCache
+        tmp = self._write_tmp(SAMPLE_CASE_TEXT, ".txt")
+        converter = MagicMock()
+        converter.convert.return_value = MagicMock(text_content=SAMPLE_CASE_TEXT * 3)
+        try:
+            with patch("app.ingest.process_and_store_document", return_value=True) as mock_psd, \
+                 patch("app.ingest._get_plain_converter", return_value=converter), \
+                 patch("app.ingest.get_result_cache", return_value=ResultCache(tmp_path / "r.sqlite")):
+                from app.ingest import ingest_case_from_file
+                assert ingest_case_from_file(tmp) is True
+                assert ingest_case_from_file(tmp) is True
+            converter.convert.assert_called_once()
+            assert mock_psd.call_args_list[0][0][0] == mock_psd.call_args_list[1][0][0]
+        finally:
+            os.unlink(tmp)
+
     def test_process_and_store_receives_str_not_bytes(self):
         content = "# Case ABC\n\nThe judgment is as follows. " * 10
         tmp = self._write_tmp(content, ".txt")
@@ -502,7 +563,7 @@ class TestLearnFileEndpoint:
         """Temp file must be deleted from disk after the request completes."""
         captured_paths: list[str] = []
 
-        def capture_and_succeed(path, title=None):
+        def capture_and_succeed(path, title=None, **kwargs):
             captured_paths.append(path)
             return True
 
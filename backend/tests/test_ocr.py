@@ -0,0 +1,126 @@
+"""
+Tests for the page-level OCR pipeline in app/core/ocr.py: text-layer
+detection, OCR of image-only pages only, page order, and the per-page cache.
+
+Run: cd backend && python -m pytest tests/test_ocr.py -v
+"""
+import io
+import threading
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from app.core import ocr
+from app.utils.result_cache import ResultCache
+
+pymupdf = pytest.importorskip("pymupdf")
+Image = pytest.importorskip("PIL.Image")
+
+TEXT_PAGE = "IN THE HIGH COURT OF DELHI AT NEW DELHI. The petitioner challenges the order dated 12 March 2019 passed by the tribunal."
+
+
+def _png(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (200, 120), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _make_pdf(path, layout):
+    """layout: list of "text" or an RGB colour (image-only page)."""
+    doc = pymupdf.open()
+    for item in layout:
+        page = doc.new_page()
+        if item == "text":
+            page.insert_textbox(pymupdf.Rect(50, 50, 550, 400), TEXT_PAGE, fontsize=11)
+        else:
+            page.insert_image(pymupdf.Rect(50, 50, 450, 290), stream=_png(item))
+    doc.save(str(path))
+    return str(path)
+
+
+def _vision_client(calls: list):
+    client = MagicMock()
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=f"OCR page {len(calls)}"))])
+
+    client.chat.completions.create.side_effect = create
+    return client
+
+
+class TestTextLayer:
+
+    def test_threshold(self):
+        assert ocr.has_text_layer(TEXT_PAGE)
+        assert not ocr.has_text_layer("  12 \n")
+        assert not ocr.has_text_layer("")
+
+
+class TestOcrPdf:
+
+    def test_only_image_pages_are_ocred_in_order(self, tmp_path):
+        pdf = _make_pdf(tmp_path / "mixed.pdf", ["text", (200, 0, 0), "text", (0, 0, 200)])
+        calls = []
+        with patch("app.core.ocr.get_result_cache", return_value=ResultCache(tmp_path / "r.sqlite")):
+            markdown = ocr.ocr_pdf(pdf, _vision_client(calls))
+        assert len(calls) == 2
+        sections = markdown.split("## Page ")[1:]
+        assert [s.split("\n", 1)[0] for s in sections] == ["1", "2", "3", "4"]
+        assert "HIGH COURT OF DELHI" in sections[0] and "HIGH COURT OF DELHI" in sections[2]
+        assert "OCR page" in sections[1] and "OCR page" in sections[3]
+        assert calls[0]["timeout"].read == ocr.llm_timeout("ocr").read
+
+    def test_reupload_hits_page_cache(self, tmp_path):
+        pdf = _make_pdf(tmp_path / "scan.pdf", [(10, 120, 10), (120, 10, 10)])
+        cache = ResultCache(tmp_path / "r.sqlite")
+        calls = []
+        with patch("app.core.ocr.get_result_cache", return_value=cache):
+            first = ocr.ocr_pdf(pdf, _vision_client(calls))
+            second = ocr.ocr_pdf(pdf, _vision_client(calls))
+        assert len(calls) == 2
+        assert first == second
+
+    def test_pages_are_ocred_concurrently(self, tmp_path):
+        pdf = _make_pdf(tmp_path / "scan.pdf", [(i * 40, 0, 0) for i in range(4)])
+        barrier = threading.Barrier(2, timeout=10)
+        client = MagicMock()
+
+        def create(**kwargs):
+            barrier.wait()  # deadlocks (and times out) if calls run one at a time
+            return MagicMock(choices=[MagicMock(message=MagicMock(content="text"))])
+
+        client.chat.completions.create.side_effect = create
+        with patch("app.core.ocr.get_result_cache", return_value=None), \
+             patch("app.core.ocr.OCR_PAGE_CONCURRENCY", 2):
+            assert ocr.ocr_pdf(pdf, client).count("text") == 4
+
+    def test_failed_page_keeps_going(self, tmp_path):
+        pdf = _make_pdf(tmp_path / "scan.pdf", ["text", (5, 5, 5)])
+        client = MagicMock()
+        client.chat.completions.create.side_effect = RuntimeError("rate limited")
+        with patch("app.core.ocr.get_result_cache", return_value=None):
+            markdown = ocr.ocr_pdf(pdf, client)
+        assert "HIGH COURT OF DELHI" in markdown and "## Page 2" in markdown
+
+
+class TestIngestRouting:
+
+    def test_scanned_pdf_uses_page_pipeline(self, tmp_path):
+        from app import ingest
+        converter = MagicMock()
+        with patch("app.ingest.get_openrouter_client", return_value=MagicMock()), \
+             patch("app.ingest.ocr_pdf", return_value="## Page 1\n\ntext") as mock_ocr:
+            assert ingest._run_conversion(str(tmp_path / "a.pdf"), converter, use_ocr=True) == "## Page 1\n\ntext"
+        converter.convert.assert_not_called()
+        mock_ocr.assert_called_once()
+
+    def test_falls_back_to_markitdown(self, tmp_path):
+        from app import ingest
+        converter = MagicMock()
+        converter.convert.return_value.text_content = "markitdown"
+        with patch("app.ingest.get_openrouter_client", return_value=None):
+            assert ingest._run_conversion(str(tmp_path / "a.pdf"), converter, use_ocr=True) == "markitdown"
+        with patch("app.ingest.get_openrouter_client", return_value=MagicMock()), \
+             patch("app.ingest.ocr_pdf", side_effect=ValueError("bad pdf")):
+            assert ingest._run_conversion(str(tmp_path / "a.pdf"), converter, use_ocr=True) == "markitdown"
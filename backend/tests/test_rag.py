@@ -4,7 +4,7 @@ Tests for citation verification in rag.py.
 Run: cd backend && python -m pytest tests/test_rag.py -v  
 """
 import pytest
-from app.core.rag import _verify_citations, _detect_legal_domain
+from app.core.rag import _verify_citations
 
 
 class TestCitationVerification:
@@ -42,30 +42,3 @@ class TestCitationVerification:
         result = _verify_citations("Some analysis text", [])
         assert result["grounded"] == []
         assert result["ungrounded"] == []
-
-
-class TestDomainDetection:
-    """Tests for automatic legal domain detection from retrieved metadata."""
-    
-    def test_detects_common_domain(self):
-        metadatas = [
-            {"metadata": {"ai_legal_domain": "Intellectual Property"}},
-            {"metadata": {"ai_legal_domain": "Intellectual Property"}},
-            {"metadata": {"ai_legal_domain": "Tax Law"}}
-        ]
-        assert _detect_legal_domain(metadatas) == "Intellectual Property"
-    
-    def test_falls_back_to_indian_law(self):
-        metadatas = [{"metadata": {"ai_legal_domain": "General"}}, {"metadata": {}}]
-        assert _detect_legal_domain(metadatas) == "Indian Law"
-    
-    def test_empty_metadatas(self):
-        assert _detect_legal_domain([]) == "Indian Law"
-    
-    def test_ignores_unknown_and_general(self):
-        metadatas = [
-            {"metadata": {"ai_legal_domain": "UNKNOWN"}},
-            {"metadata": {"ai_legal_domain": "General"}},
-            {"metadata": {"ai_legal_domain": "Corporate Law"}}
-        ]
-        assert _detect_legal_domain(metadatas) == "Corporate Law"
@@ -6,12 +6,20 @@ from unittest.mock import patch, MagicMock
 from app.core.rag import (
     _assess_relevance,
     _filter_diversity,
-    _detect_legal_domain,
     _extract_llm_cited_cases,
     _verify_citations,
     query_legal_assistant,
     get_llm_response,
-    MODELS
+    _build_metadata_filter,
+    MODELS,
+    TOP_K,
+    FILTERED_TOP_K,
+    K_STEPS,
+    _adaptive_search,
+    get_retrieval_stats,
+    _build_grounded_prompt,
+    _build_general_prompt,
+    _to_messages,
 )
 
 
@@ -168,58 +176,6 @@ class TestFilterDiversity:
         assert first_case_c < first_case_a < first_case_b
 
 
-class TestDetectLegalDomain:
-    """Tests for the _detect_legal_domain function."""
-
-    def test_empty_hits_returns_indian_law(self):
-        """Test that empty hits returns Indian Law."""
-        assert _detect_legal_domain([]) == "Indian Law"
-
-    def test_no_legal_domain_returns_indian_law(self):
-        """Test that hits with no legal_domain returns Indian Law."""
-        hits = [
-            {"metadata": {"title": "Case A"}},
-            {"metadata": {"title": "Case B"}}
-        ]
-        assert _detect_legal_domain(hits) == "Indian Law"
-
-    def test_general_and_unknown_ignored(self):
-        """Test that General and UNKNOWN domains are ignored."""
-        hits = [
-            {"metadata": {"title": "Case A", "ai_legal_domain": "General"}},
-            {"metadata": {"title": "Case B", "ai_legal_domain": "UNKNOWN"}},
-            {"metadata": {"title": "Case C", "ai_legal_domain": "Corporate Law"}}
-        ]
-        assert _detect_legal_domain(hits) == "Corporate Law"
-
-    def test_returns_most_frequent_domain(self):
-        """Test that the most frequent domain is returned."""
-        hits = [
-            {"metadata": {"title": "Case A", "ai_legal_domain": "Tax Law"}},
-            {"metadata": {"title": "Case B", "ai_legal_domain": "Tax Law"}},
-            {"metadata": {"title": "Case C", "ai_legal_domain": "Tax Law"}},
-            {"metadata": {"title": "Case D", "ai_legal_domain": "Corporate Law"}},
-            {"metadata": {"title": "Case E", "ai_legal_domain": "Corporate Law"}}
-        ]
-        assert _detect_legal_domain(hits) == "Tax Law"
-
-    def test_handles_metadata_variations(self):
-        """Test handling of different metadata structures."""
-        # Test with direct metadata (not nested)
-        hits = [
-            {"title": "Case A", "ai_legal_domain": "IP Law"},
-            {"title": "Case B", "ai_legal_domain": "IP Law"},
-            {"title": "Case C", "ai_legal_domain": "Tax Law"}
-        ]
-        # This tests the hasattr(hit, "metadata") branch
-        class MockHit:
-            def __init__(self, metadata):
-                self.metadata = metadata
-        
-        mock_hits = [MockHit(h) for h in hits]
-        assert _detect_legal_domain(mock_hits) == "IP Law"
-
-
 class TestExtractLLMCitedCases:
     """Tests for the _extract_llm_cited_cases function."""
 
@@ -389,5 +345,178 @@ class TestQueryLegalAssistantIntegration:
             assert result["relevance_quality"] == "none"
 
 
+class TestQueryFilters:
+    """Explicit and inferred metadata filters pushed into the Pinecone query."""
+
+    def _search(self, mock_get_pc, mock_index, match_counts):
+        mock_pc = MagicMock()
+        mock_embedding = MagicMock()
+        mock_embedding.values = [0.1, 0.2, 0.3]
+        mock_pc.inference.embed.return_value = [mock_embedding]
+        mock_get_pc.return_value = mock_pc
+        mock_index.query.side_effect = [MagicMock(matches=[MagicMock(score=0.3, metadata={})] * n) for n in match_counts]
+
+    def test_unfiltered_query_keeps_status_filter(self):
+        assert _build_metadata_filter({}) == {"status": {"$eq": "active"}}
+
+    def test_filter_clauses(self):
+        f = _build_metadata_filter({"legal_domain": "Tax Law", "date_from": "2015-01-01",
+                                    "date_to": "2020-12-31", "court": "Supreme Court of India"})
+        assert f["$and"] == [
+            {"status": {"$eq": "active"}},
+            {"ai_legal_domain": {"$eq": "Tax Law"}},
+            {"ai_judgment_datenum": {"$gte": 20150101, "$lte": 20201231}},
+            {"ai_court": {"$eq": "Supreme Court of India"}},
+        ]
+
+    @patch("app.core.rag.index")
+    @patch("app.core.rag.get_pinecone_client")
+    @patch("app.core.rag.get_llm_response", return_value="analysis")
+    @patch("app.core.rag._assess_relevance", return_value=False)
+    def test_explicit_filters_reach_pinecone(self, _rel, _llm, mock_get_pc, mock_index):
+        self._search(mock_get_pc, mock_index, [5])
+        result = query_legal_assistant("bail conditions", filters={"legal_domain": "Criminal Law"})
+        call = mock_index.query.call_args.kwargs
+        assert {"ai_legal_domain": {"$eq": "Criminal Law"}} in call["filter"]["$and"]
+        assert call["top_k"] == K_STEPS[0]
+        assert result["applied_filters"] == {"legal_domain": "Criminal Law"}
+
+    @patch("app.core.rag.index")
+    @patch("app.core.rag.get_pinecone_client")
+    @patch("app.core.rag.get_llm_response", return_value="analysis")
+    @patch("app.core.rag._assess_relevance", return_value=False)
+    def test_too_narrow_inferred_filter_is_relaxed(self, _rel, _llm, mock_get_pc, mock_index):
+        self._search(mock_get_pc, mock_index, [1, 8])
+        result = query_legal_assistant("copyright judgments after 2015")
+        first, second = (c.kwargs for c in mock_index.query.call_args_list)
+        assert {"ai_judgment_datenum": {"$gte": 20160101}} in first["filter"]["$and"]
+        assert second["filter"] == {"status": {"$eq": "active"}}
+        assert second["top_k"] == K_STEPS[0]
+        assert result["applied_filters"] == {}
+
+    @patch("app.core.rag.index")
+    @patch("app.core.rag.get_pinecone_client")
+    @patch("app.core.rag.get_llm_response", return_value="analysis")
+    @patch("app.core.rag._assess_relevance", return_value=False)
+    def test_inferred_court_and_domain_only_rerank(self, _rel, _llm, mock_get_pc, mock_index):
+        self._search(mock_get_pc, mock_index, [5])
+        result = query_legal_assistant("Does Bombay High Court treat this as infringement under the Copyright Act?")
+        assert mock_index.query.call_args.kwargs["filter"] == {"status": {"$eq": "active"}}
+        assert result["applied_filters"] == {}
+        assert result["ranking_hints"] == {"legal_domain": "Intellectual Property", "court": "Bombay High Court"}
+
+    def test_explicit_labels_are_canonicalised(self):
+        f = _build_metadata_filter({"legal_domain": "Tax", "court": "High Court of Delhi"})
+        assert {"ai_legal_domain": {"$eq": "Tax Law"}} in f["$and"]
+        assert {"ai_court": {"$eq": "Delhi High Court"}} in f["$and"]
+
+    def test_hint_boost_reorders(self):
+        from app.core.rag import _boost_query_hints, QUERY_HINT_BOOST
+        hits = [
+            {"_score": 0.60, "metadata": {"ai_legal_domain": "General"}},
+            {"_score": 0.58, "metadata": {"ai_legal_domain": "Tax", "ai_court": "High Court of Judicature at Bombay"}},
+        ]
+        ranked = _boost_query_hints(hits, {"legal_domain": "Tax Law", "court": "Bombay High Court"})
+        assert ranked[0]["_score"] == pytest.approx(0.58 + 2 * QUERY_HINT_BOOST)
+
+    @patch("app.core.rag.index")
+    @patch("app.core.rag.get_pinecone_client")
+    @patch("app.core.rag.get_llm_response", return_value="analysis")
+    @patch("app.core.rag._assess_relevance", return_value=False)
+    def test_explicit_dates_fall_back_to_judgment_date(self, _rel, _llm, mock_get_pc, mock_index):
+        self._search(mock_get_pc, mock_index, [0])
+        old = [MagicMock(score=0.4, metadata={"ai_judgment_date": date}) for date in ("2018-05-01", "1999-01-01", "UNKNOWN")]
+        mock_index.query.side_effect = [MagicMock(matches=[]), MagicMock(matches=old)]
+        with patch("app.core.rag._assess_relevance", return_value=False) as gate:
+            query_legal_assistant("bail", filters={"date_from": "2015-01-01"})
+        second = mock_index.query.call_args_list[1].kwargs
+        assert second["filter"] == {"status": {"$eq": "active"}}
+        judged = gate.call_args_list[1].args[1]["matches"]
+        assert [h["metadata"]["ai_judgment_date"] for h in judged] == ["2018-05-01", "1999-01-01", "UNKNOWN"]
+
+
+class TestAdaptiveRetrieval:
+    """top_k starts small and widens only while the gates are unsatisfied."""
+
+    @staticmethod
+    def _matches(n, score=0.6, cases=1):
+        return MagicMock(matches=[
+            MagicMock(score=score, metadata={"title": f"Case {i % cases}", "url": f"u{i % cases}"})
+            for i in range(n)
+        ])
+
+    @patch("app.core.rag.index")
+    def test_diverse_relevant_hits_stop_at_first_k(self, mock_index):
+        mock_index.query.return_value = self._matches(K_STEPS[0], cases=5)
+        _, hits, is_relevant = _adaptive_search("q", [0.1], {})
+        assert is_relevant and len(hits) == K_STEPS[0]
+        assert [c.kwargs["top_k"] for c in mock_index.query.call_args_list] == [K_STEPS[0]]
+
+    @patch("app.core.rag.index")
+    def test_single_case_widens_until_max(self, mock_index):
+        mock_index.query.side_effect = lambda **kw: self._matches(kw["top_k"], cases=1)
+        _adaptive_search("q", [0.1], {})
+        assert [c.kwargs["top_k"] for c in mock_index.query.call_args_list] == list(K_STEPS)
+        assert K_STEPS[-1] == TOP_K
+
+    @patch("app.core.rag.index")
+    def test_low_top_score_exits_early(self, mock_index):
+        before = get_retrieval_stats()["exits"].get("floor", 0)
+        mock_index.query.return_value = self._matches(K_STEPS[0], score=0.1, cases=1)
+        _, _, is_relevant = _adaptive_search("q", [0.1], {})
+        assert not is_relevant
+        assert mock_index.query.call_count == 1
+        assert get_retrieval_stats()["exits"]["floor"] == before + 1
+
+    @patch("app.core.rag.index")
+    def test_date_fallback_widens_past_out_of_range_hits(self, mock_index):
+        def query(**kw):
+            return MagicMock(matches=[
+                MagicMock(score=0.6, metadata={"title": f"Case {i}", "url": f"u{i}",
+                                               "ai_judgment_date": "2019-01-01" if i >= K_STEPS[0] else "1990-01-01"})
+                for i in range(kw["top_k"])
+            ])
+
+        mock_index.query.side_effect = query
+        _, hits, is_relevant = _adaptive_search("q", [0.1], {"date_from": "2015-01-01"}, date_fallback=True)
+        assert [c.kwargs["top_k"] for c in mock_index.query.call_args_list] == [K_STEPS[0], FILTERED_TOP_K]
+        assert is_relevant and hits and all(h["metadata"]["ai_judgment_date"] == "2019-01-01" for h in hits)
+
+    @patch("app.core.rag.index")
+    def test_filtered_search_capped(self, mock_index):
+        mock_index.query.side_effect = lambda **kw: self._matches(kw["top_k"], cases=1)
+        _adaptive_search("q", [0.1], {"legal_domain": "Tax Law"})
+        assert mock_index.query.call_args.kwargs["top_k"] == FILTERED_TOP_K
+
+
+class TestPromptLayout:
+    """Static system message first, per-query text in the user message."""
+
+    def test_system_message_is_identical_across_queries(self):
+        a = _build_grounded_prompt("query one", "ctx A", "Tax Law")
+        b = _build_grounded_prompt("query two", "ctx B", "Criminal Law")
+        assert a[0] == b[0] and a[0]["role"] == "system"
+        assert "Tax Law" in a[1]["content"] and "query one" in a[1]["content"]
+        assert "Tax Law" not in a[0]["content"]
+        assert _build_general_prompt("x")[0] == _build_general_prompt("y")[0]
+
+    def test_cache_hint_only_for_supported_providers(self):
+        messages = _build_grounded_prompt("q", "ctx", "Tax Law")
+        assert _to_messages(messages, "deepseek/deepseek-v4-flash:free") == messages
+        hinted = _to_messages(messages, "anthropic/claude-sonnet-4")
+        assert hinted[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert hinted[1] == messages[1]
+
+    def test_plain_string_prompt_still_supported(self):
+        assert _to_messages("hello", "any/model") == [{"role": "user", "content": "hello"}]
+
+    @patch("app.core.rag.client")
+    def test_get_llm_response_sends_system_and_user(self, mock_client):
+        mock_client.chat.completions.create.return_value.choices = [MagicMock(message=MagicMock(content="ok"))]
+        assert get_llm_response(_build_general_prompt("q")) == "ok"
+        sent = mock_client.chat.completions.create.call_args.kwargs["messages"]
+        assert [m["role"] for m in sent] == ["system", "user"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
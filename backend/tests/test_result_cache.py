@@ -0,0 +1,58 @@
+"""
+Tests for the derived-result cache in app/utils/result_cache.py: expiry,
+size-bounded LRU pruning, schema upgrade and fault isolation.
+
+Run: cd backend && python -m pytest tests/test_result_cache.py -v
+"""
+import sqlite3
+import time
+from unittest.mock import patch
+
+from app.utils.result_cache import ResultCache
+
+
+class TestResultCache:
+
+    def test_round_trip(self, tmp_path):
+        cache = ResultCache(tmp_path / "r.sqlite")
+        cache.put("markdown", "k", {"text": "judgment"})
+        assert cache.get("markdown", "k") == {"text": "judgment"}
+        assert cache.get("metadata", "k") is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_expired_entries_miss(self, tmp_path):
+        cache = ResultCache(tmp_path / "r.sqlite", ttl=3600)
+        cache.put("markdown", "k", "text")
+        with patch("app.utils.result_cache.time.time", return_value=time.time() + 7200):
+            assert cache.get("markdown", "k") is None
+
+    def test_size_cap_prunes_least_recently_used(self, tmp_path):
+        cache = ResultCache(tmp_path / "r.sqlite", max_bytes=3500)
+        for i in range(3):
+            cache.put("markdown", str(i), "x" * 1000)
+            time.sleep(0.01)
+        cache.get("markdown", "0")  # 0 is now the most recently used
+        cache.put("markdown", "3", "x" * 1000)
+
+        stats = cache.stats()
+        assert stats["bytes"] <= 3500 and stats["evicted"] >= 1
+        assert cache.get("markdown", "0") is not None
+        assert cache.get("markdown", "1") is None
+
+    def test_write_failure_is_logged_not_raised(self, tmp_path):
+        cache = ResultCache(tmp_path / "r.sqlite")
+        cache.put("markdown", "k", object())  # not JSON-serialisable
+        assert cache.get("markdown", "k") is None
+
+    def test_upgrades_old_schema(self, tmp_path):
+        path = tmp_path / "r.sqlite"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE results (namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                   "created_at REAL NOT NULL, PRIMARY KEY (namespace, key))")
+        db.execute("INSERT INTO results VALUES ('markdown', 'k', '\"old\"', ?)", (time.time(),))
+        db.commit()
+        db.close()
+
+        cache = ResultCache(path)
+        assert cache.get("markdown", "k") == "old"
+        assert cache.stats()["bytes"] == len('"old"')
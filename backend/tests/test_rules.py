@@ -0,0 +1,113 @@
+"""
+Tests for the deterministic (no-LLM) metadata extractor in app/core/rules.py.
+
+Run: cd backend && python -m pytest tests/test_rules.py -v
+"""
+from pathlib import Path
+
+from app.core.rules import (
+    canonical_court, canonical_domain, extract_rule_metadata, detect_legal_domain, has_relation_cues, infer_query_filters,
+)
+
+FIXTURE = Path(__file__).parent / "fixtures" / "indiankanoon" / "parle_products_1972.html"
+
+
+class TestTitleParsing:
+
+    def test_indiankanoon_title_line(self):
+        meta = extract_rule_metadata(
+            "## Parle Products (P) Ltd. vs J.P. & Co., Mysore on 16 February, 1972\n\n"
+            "Bench: Sikri, S.M. (Cj), Mitter, G.K.\n\nThe Copyright Act, 1957 and the Copyright Act again."
+        )
+        assert meta["case_name"] == "Parle Products (P) Ltd. vs J.P. & Co., Mysore"
+        assert meta["judgment_date"] == "1972-02-16"
+        assert meta["bench"] == "Sikri, S.M. (Cj), Mitter, G.K."
+        assert meta["confident"] is True
+
+    def test_scr_date_header_when_title_has_no_date(self):
+        meta = extract_rule_metadata("PETITIONER:\nX\nDATE OF JUDGMENT16/02/1972\n")
+        assert meta["judgment_date"] == "1972-02-16"
+        assert meta["confident"] is False  # no case name
+
+    def test_impossible_date_is_unknown(self):
+        meta = extract_rule_metadata("A vs B on 31 February, 1972\nIncome Tax Act, Income Tax Act")
+        assert meta["judgment_date"] == "UNKNOWN"
+        assert meta["confident"] is False
+
+    def test_court_from_header(self):
+        meta = extract_rule_metadata("Supreme Court of India\n\nA vs B on 1 January, 2001")
+        assert meta["court"] == "Supreme Court of India"
+        assert extract_rule_metadata("Delhi High Court\nA vs B on 1 May, 2020")["court"] == "Delhi High Court"
+
+    def test_title_deep_in_body_is_ignored(self):
+        text = "Some preamble.\n" + "filler text. " * 400 + "\nOther vs Case on 1 January, 1999\n"
+        assert extract_rule_metadata(text)["case_name"] == ""
+
+    def test_real_page_fixture(self):
+        from app.core.scraper import html_to_markdown
+        meta = extract_rule_metadata(html_to_markdown(FIXTURE.read_bytes()))
+        assert meta["case_name"].startswith("Parle Products")
+        assert meta["legal_domain"] == "Intellectual Property"
+        assert meta["confident"] is True
+
+
+class TestDomainAndCues:
+
+    def test_statutes_pick_domain(self):
+        assert detect_legal_domain("Section 302 of the Indian Penal Code and Code of Criminal Procedure")[0] == "Criminal Law"
+
+    def test_single_mention_is_not_enough(self):
+        assert detect_legal_domain("under the Companies Act")[0] == "General"
+
+    def test_close_call_is_general(self):
+        text = "Income Tax Act, Income Tax Act, Companies Act, Companies Act"
+        assert detect_legal_domain(text)[0] == "General"
+
+    def test_relation_cues(self):
+        assert has_relation_cues("The decision in X is hereby overruled.")
+        assert has_relation_cues("We uphold the view taken in Y.")
+        assert not has_relation_cues("The appeal is dismissed with costs.")
+
+    def test_everyday_appellate_words_are_not_cues(self):
+        text = ("The judgment of the trial court was affirmed by the High Court, which reversed the "
+                "finding on costs. The objection was raised and the approved valuer's report accepted.")
+        assert not has_relation_cues(text)
+        assert has_relation_cues("That view stands overruled.")
+        assert has_relation_cues("as overruled in Keshavan Madhava Menon")
+
+    def test_canonical_domain_labels(self):
+        assert canonical_domain("Tax") == canonical_domain("Tax Law") == "Tax Law"
+        assert canonical_domain("Corporate") == "Corporate Law"
+        assert canonical_domain("Intellectual Property Rights") == "Intellectual Property"
+        assert canonical_domain("Service Tax") == "Tax Law"
+        assert canonical_domain("") == canonical_domain("Unknown") == "General"
+        assert canonical_domain("Maritime Law") == "Maritime Law"
+
+
+class TestQueryFilters:
+
+    def test_statute_in_query_sets_domain(self):
+        assert infer_query_filters("Is copying code infringement under the Copyright Act?") == {
+            "legal_domain": "Intellectual Property"
+        }
+
+    def test_year_phrases_about_judgments(self):
+        assert infer_query_filters("judgments after 2015 on bail") == {"date_from": "2016-01-01"}
+        assert infer_query_filters("cases decided before 1980") == {"date_to": "1979-12-31"}
+        assert infer_query_filters("decisions between 2000 and 1990") == {
+            "date_from": "1990-01-01", "date_to": "2000-12-31"
+        }
+
+    def test_years_in_user_facts_are_ignored(self):
+        assert infer_query_filters("I was hired after 2015 and dismissed without notice") == {}
+
+    def test_court(self):
+        assert infer_query_filters("Delhi High Court view on anticipatory bail")["court"] == "Delhi High Court"
+        assert infer_query_filters("Does Bombay High Court grant bail?")["court"] == "Bombay High Court"
+        assert infer_query_filters("rulings of the High Court of Judicature at Madras")["court"] == "Madras High Court"
+
+    def test_canonical_court_names(self):
+        assert canonical_court("High Court of Delhi") == canonical_court("Delhi High Court") == "Delhi High Court"
+        assert canonical_court("Punjab-Haryana High Court") == "Punjab and Haryana High Court"
+        assert canonical_court("Mumbai High Court") == "Bombay High Court"
+        assert canonical_court("Supreme Court of India") == "Supreme Court of India"
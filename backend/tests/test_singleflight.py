@@ -0,0 +1,100 @@
+"""
+Tests for single-flight request coalescing (app/utils/singleflight.py) and
+its use in front of query_legal_assistant.
+
+Run: cd backend && python -m pytest tests/test_singleflight.py -v
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+from app.core import rag
+
+
+def _slow(result, started: threading.Event, release: threading.Event):
+    def fn():
+        started.set()
+        release.wait(5)
+        return result
+    return fn
+
+
+class TestSingleFlight:
+
+    def test_concurrent_duplicates_share_one_execution(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            return _slow({"answer": 42}, started, release)()
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            leader = pool.submit(flight.do, "k", fn)
+            started.wait(5)
+            followers = [pool.submit(flight.do, "k", fn) for _ in range(4)]
+            while flight.stats()["coalesced"] < 4:
+                time.sleep(0.01)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert len(calls) == 1
+        assert all(r == {"answer": 42} for r in results)
+        assert results[1] is not results[0]  # waiters get their own copy
+        stats = flight.stats()
+        assert stats["calls"] == 5 and stats["executions"] == 1 and stats["coalescing_ratio"] == 0.8
+        assert stats["in_flight"] == 0
+
+    def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+
+    def test_exception_propagates_to_waiters(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def boom():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("provider down")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "k", boom)
+            started.wait(5)
+            follower = pool.submit(flight.do, "k", boom)
+            while flight.stats()["coalesced"] < 1:
+                time.sleep(0.01)
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+        assert flight.do("k", lambda: "recovered") == "recovered"
+
+
+class TestQueryCoalescing:
+
+    def test_key_normalises_case_whitespace_and_punctuation(self):
+        assert rag._coalescing_key("What is  Bail?", None) == rag._coalescing_key("what is bail", {})
+        assert rag._coalescing_key("what is bail", {"legal_domain": "Tax Law"}) != rag._coalescing_key("what is bail", None)
+
+    def test_identical_queries_run_the_pipeline_once(self):
+        started, release = threading.Event(), threading.Event()
+        answer = _slow({"analysis": "shared"}, started, release)
+        with patch.object(rag, "_query_flight", SingleFlight()), \
+             patch("app.core.rag._answer_query", side_effect=lambda q, f: answer()) as mock_answer:
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                first = pool.submit(rag.query_legal_assistant, "What is bail?")
+                started.wait(5)
+                others = [pool.submit(rag.query_legal_assistant, q) for q in ("what is bail", "WHAT IS BAIL ?")]
+                while rag.get_query_coalescing_stats()["coalesced"] < 2:
+                    time.sleep(0.01)
+                release.set()
+                results = [first.result()] + [f.result() for f in others]
+            assert mock_answer.call_count == 1
+            assert all(r["analysis"] == "shared" for r in results)
@@ -0,0 +1,198 @@
+"""
+Tests for streamed uploads on POST /api/learn/file and hash-based dedup via
+the ingestion ledger (app/core/ledger.py).
+
+Run: cd backend && python -m pytest tests/test_upload_streaming.py -v
+"""
+import io
+import hashlib
+import tempfile
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.core.ledger import IngestionLedger, KIND_FILE, KIND_URL
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return IngestionLedger(tmp_path / "ledger.sqlite")
+
+
+def _upload(content: bytes, filename: str = "judgment.pdf", **data):
+    return client.post(
+        "/api/learn/file",
+        files={"file": (filename, io.BytesIO(content), "application/pdf")},
+        data=data,
+    )
+
+
+class TestIngestionLedger:
+
+    def test_record_and_get(self, ledger):
+        assert ledger.get(KIND_FILE, "abc") is None
+        ledger.record(KIND_FILE, "abc", "doc_1", "Case A")
+        assert ledger.get(KIND_FILE, "abc")["title"] == "Case A"
+        assert ledger.get(KIND_URL, "abc") is None
+
+    def test_known_in_batches(self, ledger):
+        for i in range(0, 1200, 2):
+            ledger.record(KIND_URL, f"https://x/{i}")
+        known = ledger.known(KIND_URL, [f"https://x/{i}" for i in range(1200)])
+        assert len(known) == 600 and "https://x/2" in known and "https://x/1" not in known
+
+    def test_forget(self, ledger):
+        ledger.record(KIND_FILE, "abc", "doc_1")
+        ledger.record(KIND_URL, "https://x/1", "doc_1")
+        ledger.record(KIND_URL, "https://x/2", "doc_2")
+        assert ledger.forget(KIND_URL, "https://x/2") and not ledger.forget(KIND_URL, "https://x/2")
+        assert ledger.forget_doc("doc_1") == 2
+        assert ledger.stats()["entries"] == {}
+
+
+class TestStreamingUpload:
+
+    def test_streams_to_disk_and_hashes(self, ledger):
+        content = b"%PDF-1.4 " + b"x" * (3 * 1024 * 1024)  # several read chunks
+        seen = {}
+
+        def fake_ingest(path, title=None, content_sha256=None, force=False):
+            seen["bytes"] = Path(path).read_bytes()
+            seen["sha"] = content_sha256
+            return True
+
+        with patch("app.main.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.ingest_case_from_file", side_effect=fake_ingest):
+            resp = _upload(content)
+        assert resp.status_code == 202
+        expected = hashlib.sha256(content).hexdigest()
+        assert resp.json()["content_sha256"] == expected
+        assert seen == {"bytes": content, "sha": expected}
+
+    def test_oversized_upload_rejected_and_removed(self, ledger):
+        before = set(Path(tempfile.gettempdir()).glob("*.pdf"))
+        with patch("app.main.MAX_UPLOAD_BYTES", 1024), \
+             patch("app.main.ingest_case_from_file") as mock_ingest:
+            resp = _upload(b"y" * 4096)
+        assert resp.status_code == 413
+        mock_ingest.assert_not_called()
+        assert set(Path(tempfile.gettempdir()).glob("*.pdf")) == before
+
+    def test_duplicate_rejected_before_conversion(self, ledger):
+        content = b"%PDF-1.4 already ingested"
+        ledger.record(KIND_FILE, hashlib.sha256(content).hexdigest(), "doc_1", "Known Case")
+        with patch("app.main.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.ingest_case_from_file") as mock_ingest:
+            resp = _upload(content)
+            forced = _upload(content, force="true")
+        assert resp.status_code == 409 and "Known Case" in resp.json()["detail"]
+        assert forced.status_code == 202
+        mock_ingest.assert_called_once()
+        assert mock_ingest.call_args.kwargs["force"] is True
+
+    def test_identical_upload_in_flight_rejected(self, ledger):
+        content = b"%PDF-1.4 in flight"
+        from app import main
+        with patch("app.main.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.ingest_case_from_file", return_value=True):
+            main._claim_upload(hashlib.sha256(content).hexdigest())
+            try:
+                assert _upload(content).status_code == 409
+            finally:
+                main._release_upload(hashlib.sha256(content).hexdigest())
+            assert _upload(content).status_code == 202
+
+
+class TestStaleLedgerEntries:
+    """A ledger hit whose document left the catalogue is forgotten, not a duplicate."""
+
+    @pytest.fixture
+    def catalogue(self, tmp_path):
+        from app.core.catalogue import CaseCatalogue
+        catalogue = CaseCatalogue(tmp_path / "catalogue.sqlite")
+        catalogue.upsert("doc_live", {"title": "Live Case", "url": "https://x/live"})
+        with patch("app.ingest.get_case_catalogue", return_value=catalogue):
+            yield catalogue
+
+    def test_missing_document_is_forgotten(self, ledger, catalogue):
+        from app.ingest import live_ledger_entry
+        ledger.record(KIND_FILE, "live", "doc_live", "Live Case")
+        ledger.record(KIND_FILE, "gone", "doc_gone", "Deleted Case")
+        assert live_ledger_entry(ledger, KIND_FILE, "live")["title"] == "Live Case"
+        assert live_ledger_entry(ledger, KIND_FILE, "gone") is None
+        assert ledger.get(KIND_FILE, "gone") is None
+
+    def test_deleted_document_can_be_uploaded_again(self, ledger, catalogue):
+        content = b"%PDF-1.4 deleted since"
+        ledger.record(KIND_FILE, hashlib.sha256(content).hexdigest(), "doc_gone", "Deleted Case")
+        with patch("app.main.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.ingest_case_from_file", return_value=True):
+            assert _upload(content).status_code == 202
+
+    def test_catalogue_rebuild_forgets_documents_gone_from_index(self, ledger, catalogue):
+        from types import SimpleNamespace
+        from app import main
+        catalogue.upsert("doc_gone", {"title": "Deleted Case", "url": "https://x/gone"})
+        ledger.record(KIND_URL, "https://x/gone", "doc_gone", "Deleted Case")
+        ledger.record(KIND_FILE, "gone", "doc_gone", "Deleted Case")
+        ledger.record(KIND_URL, "https://x/live", "doc_live", "Live Case")
+        vectors = {"doc_live": SimpleNamespace(metadata={"title": "Live Case", "url": "https://x/live", "chunk_index": 0})}
+        index = MagicMock()
+        index.list.return_value = iter([list(vectors)])
+        index.fetch.side_effect = lambda ids, namespace: SimpleNamespace(vectors={i: vectors[i] for i in ids})
+        with patch("app.main.get_case_catalogue", return_value=catalogue), \
+             patch("app.main.get_pinecone_index", return_value=index), \
+             patch("app.ingest.get_ingestion_ledger", return_value=ledger):
+            assert main._rebuild_catalogue() == 1
+        assert not catalogue.has_doc("doc_gone")
+        assert ledger.get(KIND_URL, "https://x/gone") is None and ledger.get(KIND_FILE, "gone") is None
+        assert ledger.get(KIND_URL, "https://x/live")["doc_id"] == "doc_live"
+
+    def test_empty_catalogue_proves_nothing(self, ledger, tmp_path):
+        from app.core.catalogue import CaseCatalogue
+        from app.ingest import live_ledger_entry
+        ledger.record(KIND_FILE, "abc", "doc_1", "Case")
+        with patch("app.ingest.get_case_catalogue", return_value=CaseCatalogue(tmp_path / "empty.sqlite")):
+            assert live_ledger_entry(ledger, KIND_FILE, "abc") is not None
+
+
+class TestFileDedupInIngest:
+
+    def test_ledger_hit_skips_conversion(self, ledger, tmp_path):
+        f = tmp_path / "case.txt"
+        f.write_text("judgment text " * 20)
+        ledger.record(KIND_FILE, hashlib.sha256(f.read_bytes()).hexdigest(), "doc_1", "Case")
+        converter = MagicMock()
+        with patch("app.ingest.get_ingestion_ledger", return_value=ledger), \
+             patch("app.ingest._get_plain_converter", return_value=converter):
+            from app.ingest import ingest_case_from_file
+            assert ingest_case_from_file(str(f)) is False
+        converter.convert.assert_not_called()
+
+    def test_worker_reports_ledger_hit_as_duplicate(self, ledger, tmp_path):
+        from app import main
+        f = tmp_path / "case.pdf"
+        f.write_bytes(b"%PDF-1.4 raced")
+        digest = hashlib.sha256(f.read_bytes()).hexdigest()
+        ledger.record(KIND_FILE, digest, "doc_1", "Known Case")
+        with patch("app.main.get_ingestion_ledger", return_value=ledger), \
+             patch("app.main.ingest_case_from_file", return_value=False):
+            main._run_file_ingestion("t-dup", str(f), "case.pdf", None, digest)
+            main._run_file_ingestion("t-bad", str(f), "case.pdf", None, "0" * 64)
+        assert main._get_task("t-dup")["status"] == "done" and main._get_task("t-dup")["duplicate"] is True
+        assert "Known Case" in main._get_task("t-dup")["message"]
+        assert main._get_task("t-bad")["status"] == "failed"
+
+    def test_successful_store_records_hash(self, ledger):
+        from app.ingest import _record_in_ledger
+        with patch("app.ingest.get_ingestion_ledger", return_value=ledger):
+            _record_in_ledger({"content_sha256": "f00", "url": "file:///tmp/x.pdf", "title": "T"}, "doc_9")
+            _record_in_ledger({"url": "https://indiankanoon.org/doc/1/", "title": "U"}, "doc_10")
+        assert ledger.get(KIND_FILE, "f00")["doc_id"] == "doc_9"
+        assert ledger.get(KIND_URL, "file:///tmp/x.pdf") is None
+        assert ledger.get(KIND_URL, "https://indiankanoon.org/doc/1/")["doc_id"] == "doc_10"
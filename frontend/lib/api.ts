@@ -8,6 +8,18 @@ export interface AnalysisResult {
     }[];
     relevance_quality?: "high" | "low" | "none";
     llm_cited_cases?: string[];
+    llm_cited_cases_details?: {
+        title: string;
+        matched_case: string;
+        url: string;
+        status: string;
+    }[];
+    applied_filters?: {
+        legal_domain?: string;
+        date_from?: string;
+        date_to?: string;
+        court?: string;
+    };
     citation_verification?: {
         grounded: string[];
         ungrounded: string[];